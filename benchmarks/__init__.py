@@ -0,0 +1,19 @@
+"""
+Benchmarks for BigRig.
+
+Each module may be run directly, e.g. ``python -m benchmarks.frontend``:
+
+``frontend``
+    Scanner, token stream and parser throughput and peak memory over the
+    generated corpus in ``corpus``, with JSON output for comparing runs.
+``interpreter``
+    Time per program for each interpreter backend over a set of small
+    programs.
+``charclass``
+    Per character cost of the character class checks.
+``tokens``
+    Objects and bytes held per 1,000 tokens for each token format.
+``trees``
+    Objects and bytes held per 1,000 nodes for object and compact syntax
+    trees.
+"""
@@ -0,0 +1,69 @@
+"""
+Microbenchmark the character class checks used by the scanner.
+
+Compares the ``unicodedata`` based checks the tables replaced with the table
+driven checks in ``bigrig.parser.charclass``, reporting the time per check
+for ASCII, non-ASCII BMP and astral characters.
+"""
+import sys
+import timeit
+import unicodedata as ud
+
+from bigrig.parser import charclass
+
+#
+# The checks as they were before the tables
+#
+
+def legacy_is_identifier_start(char):
+    return (char in charclass.IDENTIFIER_START_CHARS or
+            ud.category(char) in charclass.IDENTIFIER_START_CLASSES)
+
+def legacy_is_identifier_part(char):
+    return (char in charclass.IDENTIFIER_START_CHARS or
+            ud.category(char) in charclass.IDENTIFIER_PART_CLASSES)
+
+def legacy_is_whitespace_char(char):
+    return char in charclass.WHITESPACE_CHARS or ud.category(char) == 'Zs'
+
+CHECKS = (
+    ('is_identifier_start', legacy_is_identifier_start, charclass.is_identifier_start),
+    ('is_identifier_part', legacy_is_identifier_part, charclass.is_identifier_part),
+    ('is_whitespace_char', legacy_is_whitespace_char, charclass.is_whitespace_char),
+)
+
+SAMPLES = (
+    ('ascii', u'var foo = bar_1 + $baz;\t// comment\n'),
+    ('bmp', u'\xe9\xa0\u03bb\u0416\u4e2d\u6587\u3000\uff21\u0661'),
+    ('astral', u'\U00010000\U0001d400\U00020000'),
+)
+
+def time_check(check, chars, repeat=3, number=20000):
+    """
+    Return the best time per character in nanoseconds of ``check`` over
+    ``chars``.
+    """
+    def run():
+        for char in chars:
+            check(char)
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    return best / (number * len(chars)) * 1e9
+
+def main(argv=None):
+    print '%-20s %-8s %12s %12s %8s' % ('check', 'sample', 'legacy ns', 'table ns', 'speedup')
+    for name, legacy, table in CHECKS:
+        for sample_name, chars in SAMPLES:
+            # Astral characters are two code units on narrow builds.
+            chars = [char for char in chars if len(char) == 1]
+            if not chars:
+                continue
+            for char in chars:
+                assert legacy(char) == table(char), (name, char)
+            before = time_check(legacy, chars)
+            after = time_check(table, chars)
+            print '%-20s %-8s %12.1f %12.1f %7.1fx' % (
+                name, sample_name, before, after, before / after
+            )
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
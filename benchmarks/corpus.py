@@ -0,0 +1,243 @@
+"""
+A deterministic corpus of ECMAScript sources for the front end benchmarks.
+
+The sources are generated from a seeded random number generator, so every
+run with the same ``seed`` and ``scale`` measures exactly the same input.
+Each corpus entry is a list of sources to be parsed separately:
+
+``snippets``
+    Many small programs, as typed into a REPL or passed to ``eval``.
+``library``
+    One library sized file of functions, prototypes, object literals and
+    the usual statements.
+``nested``
+    Deeply nested expressions, array and object literals and calls.
+``strings``
+    A file dominated by long string literals with escapes and regular
+    expression literals.
+"""
+import random
+
+SEED = 20111104
+
+NAMES = (
+    'value', 'result', 'options', 'node', 'index', 'length', 'callback',
+    'element', 'count', 'total', 'item', 'key', 'data', 'context', 'state',
+    'buffer', 'offset', 'target', 'source', 'handler',
+)
+PROPERTIES = (
+    'length', 'push', 'apply', 'call', 'prototype', 'parentNode', 'style',
+    'className', 'firstChild', 'nodeType', 'indexOf', 'slice', 'join',
+)
+BINARY_OPERATORS = (
+    '+', '-', '*', '/', '%', '<', '>', '<=', '>=', '==', '!=', '===', '!==',
+    '&&', '||', '&', '|', '^', '<<', '>>', '>>>',
+)
+ESCAPES = ('\\n', '\\t', '\\\\', '\\"', "\\'", '\\x41', '\\u00e9', '\\0')
+REGEXPS = (
+    r'/^\s+|\s+$/g', r'/[a-z_$][\w$]*/i', r'/(\d+)\.(\d+)/',
+    r'/<([a-z]+)[^>]*>/gi', r'/[\/\\]/g', r'/^(?:#([\w-]+)|(\w+)|\.([\w-]+))$/',
+)
+
+class CorpusGenerator(object):
+    """
+    Generates the corpus sources from a seeded random number generator.
+    """
+    def __init__(self, seed=SEED):
+        self.random = random.Random(seed)
+
+    def choice(self, sequence):
+        return self.random.choice(sequence)
+
+    def chance(self, probability):
+        return self.random.random() < probability
+
+    #
+    # Expressions
+    #
+
+    def name(self):
+        return self.choice(NAMES)
+
+    def number(self):
+        if self.chance(0.3):
+            return '%.2f' % (self.random.random() * 1000)
+        elif self.chance(0.1):
+            return '0x%X' % self.random.randint(0, 0xFFFF)
+        return str(self.random.randint(0, 1000))
+
+    def string(self, length=12):
+        quote = self.choice(('"', "'"))
+        chars = []
+        for i in xrange(length):
+            if self.chance(0.1):
+                chars.append(self.choice(ESCAPES))
+            else:
+                chars.append(self.choice('abcdefghijklmnopqrstuvwxyz _-'))
+        return quote + ''.join(chars) + quote
+
+    def primary(self):
+        kind = self.random.randint(0, 9)
+        if kind < 4:
+            return self.name()
+        elif kind < 6:
+            return self.number()
+        elif kind < 7:
+            return self.string()
+        elif kind < 8:
+            return '%s.%s' % (self.name(), self.choice(PROPERTIES))
+        elif kind < 9:
+            return '%s[%s]' % (self.name(), self.number())
+        return self.choice(('this', 'null', 'true', 'false'))
+
+    def expression(self, depth=2):
+        if depth <= 0 or self.chance(0.3):
+            return self.primary()
+        kind = self.random.randint(0, 5)
+        if kind < 3:
+            return '%s %s %s' % (
+                self.expression(depth - 1), self.choice(BINARY_OPERATORS),
+                self.expression(depth - 1)
+            )
+        elif kind < 4:
+            args = ', '.join(
+                self.expression(depth - 1)
+                for i in xrange(self.random.randint(0, 3))
+            )
+            return '%s(%s)' % (self.name(), args)
+        elif kind < 5:
+            return '(%s ? %s : %s)' % (
+                self.expression(depth - 1), self.expression(depth - 1),
+                self.expression(depth - 1)
+            )
+        return '!%s' % self.primary()
+
+    #
+    # Statements
+    #
+
+    def statement(self, indent, depth=2):
+        prefix = '    ' * indent
+        kind = self.random.randint(0, 9)
+        if depth <= 0 or kind < 3:
+            return '%s%s = %s;\n' % (prefix, self.name(), self.expression())
+        elif kind < 5:
+            return '%svar %s = %s, %s;\n' % (
+                prefix, self.name(), self.expression(), self.name()
+            )
+        elif kind < 6:
+            return '%sif (%s) {\n%s%s} else {\n%s%s}\n' % (
+                prefix, self.expression(),
+                self.block(indent + 1, depth - 1), prefix,
+                self.block(indent + 1, depth - 1), prefix
+            )
+        elif kind < 7:
+            return '%sfor (var i = 0; i < %s.length; i++) {\n%s%s}\n' % (
+                prefix, self.name(), self.block(indent + 1, depth - 1), prefix
+            )
+        elif kind < 8:
+            return '%stry {\n%s%s} catch (e) {\n%s%s}\n' % (
+                prefix, self.block(indent + 1, depth - 1), prefix,
+                self.block(indent + 1, depth - 1), prefix
+            )
+        elif kind < 9:
+            cases = ''.join(
+                '%s    case %s:\n%s%s        break;\n' % (
+                    prefix, self.number(), self.block(indent + 2, 0), prefix
+                )
+                for i in xrange(self.random.randint(1, 4))
+            )
+            return '%sswitch (%s) {\n%s%s}\n' % (
+                prefix, self.name(), cases, prefix
+            )
+        return '%sreturn %s;\n' % (prefix, self.expression())
+
+    def block(self, indent, depth):
+        return ''.join(
+            self.statement(indent, depth)
+            for i in xrange(self.random.randint(1, 4))
+        )
+
+    def function(self, name):
+        params = ', '.join(self.name() for i in xrange(self.random.randint(0, 3)))
+        return 'function %s(%s) {\n%s}\n' % (name, params, self.block(1, 2))
+
+    def object_literal(self, indent):
+        prefix = '    ' * (indent + 1)
+        properties = ',\n'.join(
+            '%s%s: %s' % (prefix, self.choice(NAMES), self.expression(1))
+            for i in xrange(self.random.randint(1, 6))
+        )
+        return '{\n%s\n%s}' % (properties, '    ' * indent)
+
+    #
+    # Corpus entries
+    #
+
+    def snippets(self, count):
+        return [self.statement(0) for i in xrange(count)]
+
+    def library(self, functions):
+        parts = ['// Generated library\n(function (global) {\n']
+        for i in xrange(functions):
+            name = 'Widget%d' % i
+            kind = i % 3
+            if kind == 0:
+                parts.append(self.function(name))
+            elif kind == 1:
+                parts.append('%s.prototype.%s = function (%s) {\n%s};\n' % (
+                    'Widget%d' % (i - 1), self.choice(PROPERTIES), self.name(),
+                    self.block(1, 2)
+                ))
+            else:
+                parts.append('var %s = %s;\n' % (name, self.object_literal(0)))
+        parts.append('global.widgets = [%s];\n})(this);\n' % ', '.join(
+            'Widget%d' % i for i in xrange(0, functions, 3)
+        ))
+        return [''.join(parts)]
+
+    def nested_expression(self, depth):
+        if depth <= 0:
+            return self.primary()
+        inner = self.nested_expression(depth - 1)
+        kind = depth % 4
+        if kind == 0:
+            return '(%s %s %s)' % (inner, self.choice(BINARY_OPERATORS), self.primary())
+        elif kind == 1:
+            return '[%s, %s]' % (self.primary(), inner)
+        elif kind == 2:
+            return '{%s: %s}' % (self.name(), inner)
+        return '%s(%s)' % (self.name(), inner)
+
+    def nested(self, statements, depth):
+        return [''.join(
+            'x%d = %s;\n' % (i, self.nested_expression(depth))
+            for i in xrange(statements)
+        )]
+
+    def strings(self, statements):
+        parts = []
+        for i in xrange(statements):
+            if i % 2:
+                parts.append('s%d = %s + %s;\n' % (
+                    i, self.string(self.random.randint(40, 400)),
+                    self.string(self.random.randint(40, 400))
+                ))
+            else:
+                parts.append('if (%s.test(%s)) { r%d = %s.exec(s); }\n' % (
+                    self.choice(REGEXPS), self.name(), i, self.choice(REGEXPS)
+                ))
+        return [''.join(parts)]
+
+def make_corpus(scale=1, seed=SEED):
+    """
+    Build the corpus, a list of ``(name, sources)`` pairs. The ``scale``
+    multiplies the size of every entry.
+    """
+    generator = CorpusGenerator(seed)
+    return [
+        ('snippets', generator.snippets(200 * scale)),
+        ('library', generator.library(120 * scale)),
+        ('nested', generator.nested(20 * scale, 24)),
+        ('strings', generator.strings(200 * scale)),
+    ]
@@ -0,0 +1,251 @@
+"""
+Benchmark the scanner and parser front end over the benchmark corpus.
+
+Times the ``Scanner``, ``TokenStream``, ``Parser``, ``LocatorParser``,
+``LazyParser`` and ``CompactParser`` stages separately over every corpus
+entry, where ``Parser`` parses without and ``LocatorParser`` with location
+tracking, ``LazyParser`` pre-parses function bodies and ``CompactParser``
+builds a ``CompactTree``, reporting tokens, nodes and
+bytes per second and the peak memory of each stage. Each stage runs in a
+forked child process, so its peak memory is measured on its own.
+
+Results are written as JSON with ``--output``, and a previous results file
+can be compared against with ``--compare``::
+
+    python -m benchmarks.frontend --output before.json
+    python -m benchmarks.frontend --output after.json --compare before.json
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+from bigrig.parser.compact import CompactParser
+from bigrig.parser.parser import Parser
+from bigrig.parser.scanner import (
+    make_string_scanner, TokenStream, TokenStreamAllowReserved
+)
+from bigrig.parser.token import EOF
+
+from .corpus import make_corpus, SEED
+
+#
+# Stages
+#
+
+def count_nodes(node):
+    """
+    Count the nodes in a syntax tree.
+    """
+    count = 0
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        count += 1
+        pending.extend(node.iter_children())
+    return count
+
+def run_scanner(sources, fast):
+    tokens = 0
+    for source in sources:
+        scanner = make_string_scanner(source, fast=fast)
+        while scanner.next().type != EOF:
+            tokens += 1
+    return tokens, 0
+
+def run_token_stream(sources, fast):
+    tokens = 0
+    for source in sources:
+        stream = TokenStream(make_string_scanner(source, fast=fast))
+        while stream.next().type != EOF:
+            tokens += 1
+    return tokens, 0
+
+def make_parser_stage(track_locations, lazy_functions=False,
+                      parser_class=Parser):
+    def run_parser(sources, fast):
+        nodes = 0
+        for source in sources:
+            scanner = make_string_scanner(source, fast=fast)
+            parser = parser_class(
+                TokenStreamAllowReserved(scanner), track_locations,
+                lazy_functions
+            )
+            nodes += count_nodes(parser.parse())
+        return 0, nodes
+    return run_parser
+
+STAGES = (
+    ('Scanner', run_scanner),
+    ('TokenStream', run_token_stream),
+    ('Parser', make_parser_stage(False)),
+    ('LocatorParser', make_parser_stage(True)),
+    ('LazyParser', make_parser_stage(True, True)),
+    ('CompactParser', make_parser_stage(True, False, CompactParser)),
+)
+
+#
+# Measurement
+#
+
+def measure(stage, sources, fast, repeat):
+    """
+    Run a stage ``repeat`` times, returning its token and node counts and
+    the best time.
+    """
+    best = None
+    for i in xrange(repeat):
+        gc.collect()
+        start = time.time()
+        tokens, nodes = stage(sources, fast)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return {'tokens': tokens, 'nodes': nodes, 'seconds': best}
+
+def run_in_child(function, *args):
+    """
+    Call ``function`` in a forked child process, returning its JSON
+    serializable result and the child's peak resident memory in kilobytes.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            result = function(*args)
+            os.write(write_fd, json.dumps(result))
+        finally:
+            os.close(write_fd)
+            os._exit(0)
+    os.close(write_fd)
+    chunks = []
+    while True:
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    pid, status, usage = os.wait4(pid, 0)
+    if status != 0:
+        raise RuntimeError('benchmark child exited with status %d' % status)
+    # Linux reports kilobytes, OS X bytes
+    peak = usage.ru_maxrss
+    if sys.platform == 'darwin':
+        peak = peak // 1024
+    return json.loads(''.join(chunks)), peak
+
+def idle():
+    return None
+
+def run_benchmarks(scale=1, seed=SEED, repeat=3, fast=False, stages=None):
+    """
+    Run the stages over the corpus and return the results.
+    """
+    corpus = make_corpus(scale, seed)
+    baseline = run_in_child(idle)[1]
+    results = []
+    for name, sources in corpus:
+        size = sum(len(source) for source in sources)
+        for stage_name, stage in STAGES:
+            if stages and stage_name not in stages:
+                continue
+            result, peak = run_in_child(measure, stage, sources, fast, repeat)
+            seconds = result['seconds']
+            results.append({
+                'corpus': name,
+                'stage': stage_name,
+                'bytes': size,
+                'tokens': result['tokens'],
+                'nodes': result['nodes'],
+                'seconds': seconds,
+                'bytes_per_second': size / seconds,
+                'tokens_per_second': result['tokens'] / seconds,
+                'nodes_per_second': result['nodes'] / seconds,
+                'peak_memory_kb': max(peak - baseline, 0),
+            })
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'seed': seed,
+        'repeat': repeat,
+        'fast': fast,
+        'results': results,
+    }
+
+#
+# Reporting
+#
+
+def format_rate(value):
+    if not value:
+        return '-'
+    elif value >= 1e6:
+        return '%.2fM' % (value / 1e6)
+    elif value >= 1e3:
+        return '%.1fk' % (value / 1e3)
+    return '%.0f' % value
+
+def print_results(report, previous=None):
+    """
+    Print a results table, with the change in time against ``previous``
+    results where they have the same corpus and stage.
+    """
+    before = {}
+    if previous is not None:
+        for result in previous['results']:
+            before[result['corpus'], result['stage']] = result
+    print '%-10s %-14s %10s %10s %10s %10s %10s %8s' % (
+        'corpus', 'stage', 'seconds', 'bytes/s', 'tokens/s', 'nodes/s',
+        'peak KB', 'change'
+    )
+    for result in report['results']:
+        change = ''
+        old = before.get((result['corpus'], result['stage']))
+        if old is not None and old['seconds']:
+            change = '%+.1f%%' % (
+                (result['seconds'] / old['seconds'] - 1) * 100
+            )
+        print '%-10s %-14s %10.4f %10s %10s %10s %10d %8s' % (
+            result['corpus'], result['stage'], result['seconds'],
+            format_rate(result['bytes_per_second']),
+            format_rate(result['tokens_per_second']),
+            format_rate(result['nodes_per_second']),
+            result['peak_memory_kb'], change
+        )
+
+def main(argv=None):
+    import argparse
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    argparser.add_argument('--scale', type=int, default=1,
+                           help='Multiply the corpus size')
+    argparser.add_argument('--seed', type=int, default=SEED,
+                           help='Seed for generating the corpus')
+    argparser.add_argument('--repeat', type=int, default=3,
+                           help='Runs per stage, the best time is reported')
+    argparser.add_argument('--fast', action='store_true',
+                           help='Scan with the FastScanner')
+    argparser.add_argument('--stage', action='append', dest='stages',
+                           help='Only run the given stage(s)')
+    argparser.add_argument('--output', help='Write the results to a JSON file')
+    argparser.add_argument('--compare', help='Compare with a JSON results file')
+    arguments = argparser.parse_args(argv)
+    report = run_benchmarks(
+        arguments.scale, arguments.seed, arguments.repeat, arguments.fast,
+        arguments.stages
+    )
+    previous = None
+    if arguments.compare:
+        with open(arguments.compare) as fd:
+            previous = json.load(fd)
+    print_results(report, previous)
+    if arguments.output:
+        with open(arguments.output, 'w') as fd:
+            json.dump(report, fd, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Benchmark the interpreter backends over a set of small programs.
+
+Each program exercises one kind of work: function calls, arithmetic loops,
+floating point arithmetic and comparisons, string building, property access on
+objects and prototypes, arrays, the array built-ins, the same loops in
+functions called repeatedly, and closures. Every program is run with each
+backend of the ``Interpreter``, reporting the best time and the speedup over
+the ``visitor`` backend. Every backend must produce the same result for a
+program, or the benchmark fails.
+"""
+import gc
+import sys
+import time
+
+from bigrig.interpreter.interpreter import Interpreter, BACKENDS
+
+PROGRAMS = (
+    ('calls', u'''
+        function fib(n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }
+        fib(16);
+    '''),
+    ('loops', u'''
+        var total = 0;
+        for (var i = 0; i < 6000; i++) {
+            if (i % 3 == 0) { total += i * 2; } else { total -= i >> 1; }
+        }
+        total;
+    '''),
+    ('arithmetic', u'''
+        var x = 0.5, y = 0, n = 0;
+        for (var i = 1; i < 3000; i++) {
+            x = x * 1.0001 + i / 7 - (i % 5);
+            y = (y + i * 3) % 1000;
+            if (x > y && i >= 10 || i <= 2) { n++; }
+        }
+        n + (x < 0 ? 0 : 1);
+    '''),
+    ('strings', u'''
+        var s = '', words = ['alpha', 'beta', 'gamma', 'delta'];
+        for (var i = 0; i < 1500; i++) {
+            s += words[i % 4].charAt(0) + i;
+        }
+        s.length;
+    '''),
+    ('objects', u'''
+        function Point(x, y) { this.x = x; this.y = y; }
+        Point.prototype.add = function (other) {
+            return new Point(this.x + other.x, this.y + other.y);
+        };
+        var p = new Point(0, 0), step = {x: 1, y: 2};
+        for (var i = 0; i < 1500; i++) { p = p.add(step); }
+        p.x + p.y;
+    '''),
+    ('arrays', u'''
+        var a = [];
+        for (var i = 0; i < 1500; i++) { a.push(i * i); }
+        var sum = 0;
+        for (var j = 0; j < a.length; j++) { sum += a[j]; }
+        sum;
+    '''),
+    ('builtins', u'''
+        var a = [];
+        for (var i = 0; i < 1000; i++) { a.push(i); }
+        var total = 0;
+        for (var k = 0; k < 3; k++) {
+            var b = a.map(function (x) { return x * 2; })
+                     .filter(function (x) { return x % 3 == 0; });
+            total += b.reduce(function (s, x) { return s + x; }, 0);
+            total += b.indexOf(600) + a.slice(10, 900).concat(b).join(',').length;
+        }
+        total;
+    '''),
+    ('hotloops', u'''
+        function work(n) {
+            var total = 0;
+            for (var i = 0; i < n; i++) {
+                if (i % 3 == 0) { total += i * 2; } else { total -= i >> 1; }
+            }
+            return total;
+        }
+        var total = 0;
+        for (var k = 0; k < 30; k++) { total += work(200); }
+        total;
+    '''),
+    ('hotstrings', u'''
+        function build(n, sep) {
+            var s = '';
+            for (var i = 0; i < n; i++) { s += sep + i; }
+            return s;
+        }
+        var length = 0;
+        for (var k = 0; k < 30; k++) { length += build(100, ',').length; }
+        length;
+    '''),
+    ('closures', u'''
+        function counter() { var n = 0; return function () { return ++n; }; }
+        var c = counter(), last;
+        for (var i = 0; i < 3000; i++) { last = c(); }
+        last;
+    '''),
+)
+
+def run_program(source, backend):
+    interpreter = Interpreter(backend=backend)
+    result = interpreter.execute_string(source)
+    return interpreter.to_string(result)
+
+def measure(source, backend, repeat):
+    """
+    Run a program ``repeat`` times, returning its result and the best time.
+    """
+    best = None
+    for i in xrange(repeat):
+        gc.collect()
+        start = time.time()
+        result = run_program(source, backend)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return result, best
+
+def main(argv=None):
+    import argparse
+    argparser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    argparser.add_argument('--repeat', type=int, default=3,
+                           help='Runs per program, the best time is reported')
+    argparser.add_argument('--backend', action='append', dest='backends',
+                           choices=BACKENDS, help='Only run the given backend(s)')
+    argparser.add_argument('--program', action='append', dest='programs',
+                           help='Only run the given program(s)')
+    arguments = argparser.parse_args(argv)
+    backends = arguments.backends or BACKENDS
+    print '%-10s %-10s %10s %8s' % ('program', 'backend', 'seconds', 'speedup')
+    for name, source in PROGRAMS:
+        if arguments.programs and name not in arguments.programs:
+            continue
+        expected = baseline = None
+        for backend in backends:
+            result, seconds = measure(source, backend, arguments.repeat)
+            if expected is None:
+                expected, baseline = result, seconds
+            elif result != expected:
+                raise AssertionError('%s gave %s with %s, expected %s' % (
+                    name, result, backend, expected
+                ))
+            print '%-10s %-10s %10.4f %7.2fx' % (
+                name, backend, seconds, baseline / seconds
+            )
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Compare the memory held by legacy and compact tokens.
+
+Scans a sample source through a ``TokenStreamAllowReserved`` with the
+character stream ``Scanner``, which makes a ``Token``, a ``Locator`` and a
+value string for every token, and with the ``BufferScanner`` and
+``FastScanner``, which make ``CompactToken`` objects. For each format it
+reports the objects allocated and kept alive by the tokens, per 1,000
+tokens, counting objects shared between tokens once, along with their size
+and the scanning time.
+"""
+import gc
+import sys
+import time
+from cStringIO import StringIO
+
+from bigrig.parser import scanner
+
+SAMPLE = u'''
+function Point(x, y) {
+    this.x = x;
+    this.y = y;
+}
+Point.prototype.distance = function (other) {
+    var dx = this.x - other.x, dy = this.y - other.y;
+    // Reserved words are allowed as property names.
+    return Math.sqrt(dx * dx + dy * dy) + this['class'] + other.implements;
+};
+for (var i = 0; i < 100; i++) {
+    if (i % 3 === 0 && i !== 0) { total += new Point(i, 2.5e3).distance(origin); }
+    else { label = "point " + i + '\\n'; }
+}
+'''
+
+def make_stream_scanner(source):
+    return scanner.make_stream_scanner(StringIO(source.encode('utf-8')))
+
+def make_buffer_scanner(source):
+    return scanner.make_string_scanner(source)
+
+def make_fast_scanner(source):
+    return scanner.make_string_scanner(source, fast=True)
+
+FORMATS = (
+    ('Token', make_stream_scanner),
+    ('CompactToken', make_buffer_scanner),
+    ('CompactToken (fast)', make_fast_scanner),
+)
+
+def scan_tokens(make_scanner, source):
+    """
+    Scan ``source`` through a token stream, returning the tokens it produces.
+    """
+    stream = scanner.TokenStreamAllowReserved(make_scanner(source))
+    tokens = []
+    while True:
+        token = stream.next()
+        tokens.append(token)
+        if token.type == scanner.EOF:
+            return tokens
+
+def count_objects(tokens, shared):
+    """
+    Count the objects, and their size in bytes, reachable from ``tokens``
+    that are not in ``shared``, counting each object once.
+    """
+    seen = set(id(obj) for obj in shared)
+    count = 0
+    size = 0
+    pending = list(tokens)
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        count += 1
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return count, size
+
+def main(argv=None):
+    source = SAMPLE * 50
+    print '%-20s %8s %16s %16s %10s' % (
+        'format', 'tokens', 'objects/1000', 'bytes/1000', 'us/token'
+    )
+    for name, make_scanner in FORMATS:
+        start = time.time()
+        tokens = scan_tokens(make_scanner, source)
+        elapsed = time.time() - start
+        # The source buffer and its filename are allocated once per file.
+        shared = [source, None]
+        for token in tokens:
+            if hasattr(token, 'source'):
+                shared.extend([token.source, token.source.text])
+                break
+        count, size = count_objects(tokens, shared)
+        per_thousand = 1000.0 / len(tokens)
+        print '%-20s %8d %16.0f %16.0f %10.2f' % (
+            name, len(tokens), count * per_thousand, size * per_thousand,
+            elapsed / len(tokens) * 1e6
+        )
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,62 @@
+"""
+Compare the memory held by object and compact syntax trees.
+
+Parses the ``library`` corpus entry with the ``Parser``, which makes an
+object for every node and list in the tree and a locator for every token a
+node starts at, and with the ``CompactParser``, which stores the tree in
+the arrays of a ``CompactTree``. For each format it reports the objects
+allocated and kept alive by the tree, per 1,000 nodes, counting the source
+buffer shared with the scanner once, along with their size and the parsing
+time.
+"""
+import sys
+import time
+
+from bigrig.parser.compact import CompactParser
+from bigrig.parser.parser import Parser
+from bigrig.parser.scanner import make_string_scanner, TokenStreamAllowReserved
+
+from .corpus import make_corpus
+from .frontend import count_nodes
+from .tokens import count_objects
+
+def parse_objects(source):
+    parser = Parser(TokenStreamAllowReserved(make_string_scanner(source)))
+    program = parser.parse()
+    return program, program
+
+def parse_compact(source):
+    parser = CompactParser(TokenStreamAllowReserved(make_string_scanner(source)))
+    program = parser.parse()
+    return program, program.tree
+
+FORMATS = (
+    ('Node', parse_objects),
+    ('CompactTree', parse_compact),
+)
+
+def main(argv=None):
+    source = dict(make_corpus())['library'][0]
+    print '%-14s %8s %16s %16s %10s' % (
+        'format', 'nodes', 'objects/1000', 'bytes/1000', 'us/node'
+    )
+    for name, parse in FORMATS:
+        start = time.time()
+        program, tree = parse(source)
+        elapsed = time.time() - start
+        nodes = count_nodes(program)
+        # The source buffer is shared with the scanner, and its line table
+        # is only built when a position is read.
+        shared = [source, None]
+        locator = program.locator
+        if locator is not None:
+            shared.extend([locator.source, locator.source.text])
+        count, size = count_objects([tree], shared)
+        per_thousand = 1000.0 / nodes
+        print '%-14s %8d %16.0f %16.0f %10.2f' % (
+            name, nodes, count * per_thousand, size * per_thousand,
+            elapsed / nodes * 1e6
+        )
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
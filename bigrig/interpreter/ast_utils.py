@@ -1,5 +1,7 @@
-from ..parser.ast import ExpressionStatement, StringLiteral
+from ..parser.ast import ExpressionStatement, StringLiteral, Name
+from ..parser.parser import LazyFunctionBody
 from ..parser.visitor import NodeVisitor
+from .literals import constants
 
 
 def code_is_strict(code):
@@ -18,11 +20,84 @@ def code_is_strict(code):
     return strict
 
 
+class ScopeLayout(object):
+    """
+    The slots of the bindings of a declarative environment record, in the
+    order that the bindings are created.
+    """
+    def __init__(self, names=()):
+        self.slots = {}
+        self.names = []
+        # The slot and argument index of the first parameter of each name
+        self.parameters = []
+        # The slot of each function declaration
+        self.function_slots = []
+        # The slot of ``arguments``, unless a parameter or function has the name
+        self.arguments_slot = None
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+
+def make_function_layout(parameters, function_declarations, variable_declarations):
+    """
+    Lay out the bindings of a function's environment in the order that
+    declaration binding instantiation creates them.
+
+    10.5
+    """
+    layout = ScopeLayout()
+    for index, parameter in enumerate(parameters):
+        parameter = constants.identifier(parameter)
+        if parameter not in layout.slots:
+            layout.parameters.append((layout.add(parameter), index))
+    for declaration in function_declarations:
+        name = constants.identifier(declaration.name)
+        layout.function_slots.append(layout.add(name))
+    if u'arguments' not in layout.slots:
+        layout.arguments_slot = layout.add(u'arguments')
+    for declaration in variable_declarations:
+        layout.add(constants.identifier(declaration.name))
+    return layout
+
+
+class StaticScope(object):
+    """
+    An environment that code will run in, as seen while visiting the code.
+
+    Scopes of catch clauses belong to the scope of the function they are in.
+    A function that calls ``eval`` or has a ``with`` statement is dynamic,
+    and names are not resolved through any of its scopes.
+    """
+    def __init__(self, layout=None, function=None):
+        self.layout = layout
+        self.function = function or self
+        self.dynamic = False
+
+
 class DeclarationVisitor(NodeVisitor):
+    """
+    Collects the declarations of programs and functions, and resolves the
+    names in functions to the (depth, slot) of their bindings where the
+    environments that hold them are known ahead of time.
+    """
     def __init__(self):
         super(DeclarationVisitor, self).__init__()
         self.scope_stack = None
         self.node_scopes = None
+        self.layouts = None
+        self.resolutions = None
+        self.references = None
+        # The static scopes around the visited node, innermost first, and
+        # those around the body of the function being visited
+        self.chain = ()
+        self.function_chain = ()
 
     def is_strict(self, code):
         return self.current_scope_is_strict() or code_is_strict(code)
@@ -43,26 +118,89 @@ class DeclarationVisitor(NodeVisitor):
     def current_scope_is_strict(self):
         return bool(self.scope_stack) and self.scope_stack[-1][2]
 
+    def mark_dynamic(self):
+        if self.chain:
+            self.chain[0].function.dynamic = True
+
+    def visit_Name(self, node):
+        self.references.append((node, self.chain))
+
+    def visit_CallExpression(self, node):
+        callee = node.expression
+        if isinstance(callee, Name) and constants.identifier(callee.value) == u'eval':
+            self.mark_dynamic()
+        self.visit_node(node)
+
+    def visit_WithStatement(self, node):
+        self.mark_dynamic()
+        self.visit_node(node)
+
+    def visit_TryStatement(self, node):
+        self.visit(node.try_block)
+        if node.catch_var is not None:
+            chain = self.chain
+            function = chain and chain[0].function or None
+            layout = ScopeLayout([node.catch_var.value])
+            self.chain = (StaticScope(layout, function),) + chain
+            self.visit(node.catch_block)
+            self.chain = chain
+        self.visit(node.finally_block)
+
     def visit_VariableDeclaration(self, node):
         scope = self.current_variable_declaration_scope()
         scope.append(node)
         self.visit(node.value)
 
-    def visit_FunctionDeclaration(self, node):
+    def visit_function(self, node, chain, parameters):
+        """
+        Visit a function whose environment will be in the scopes of
+        ``chain``, returning its declarations and the layout of its
+        environment.
+        """
+        if isinstance(node.body, LazyFunctionBody):
+            # The body is visited once it is parsed, on the first call.
+            node.body.outer_strict = self.current_scope_is_strict()
+            return None, None
         strict = self.is_strict(node.body)
-        scope = self.current_function_declaration_scope()
-        scope.append(node)
         self.enter_scope(strict)
+        scope = StaticScope()
+        saved_chains = self.chain, self.function_chain
+        self.chain = self.function_chain = (scope,) + chain
         self.visit(node.body)
+        self.chain, self.function_chain = saved_chains
         function_scope = self.leave_scope()
-        self.node_scopes[node] = function_scope
+        scope.layout = make_function_layout(
+            parameters, function_scope[0], function_scope[1]
+        )
+        return function_scope, scope.layout
+
+    def add_function(self, node, chain):
+        function_scope, layout = self.visit_function(
+            node, chain, node.parameters or []
+        )
+        if function_scope is not None:
+            self.node_scopes[node] = function_scope
+            self.layouts[node] = layout
+
+    def visit_FunctionDeclaration(self, node):
+        scope = self.current_function_declaration_scope()
+        scope.append(node)
+        # Declared functions are in the variable environment of their code
+        self.add_function(node, self.function_chain)
 
     def visit_FunctionExpression(self, node):
-        strict = self.is_strict(node.body)
-        self.enter_scope(strict)
-        self.visit(node.body)
-        function_scope = self.leave_scope()
-        self.node_scopes[node] = function_scope
+        # The environment holding the name of a named function expression
+        layout = ScopeLayout([node.name] if node.name else [])
+        self.add_function(node, (StaticScope(layout),) + self.chain)
+
+    def visit_PropertyGetter(self, node):
+        # Accessors are made as function expressions in a new environment
+        self.visit_function(node, (StaticScope(ScopeLayout()),) + self.chain, [])
+
+    def visit_PropertySetter(self, node):
+        self.visit_function(
+            node, (StaticScope(ScopeLayout()),) + self.chain, [node.parameter]
+        )
 
     def visit_Program(self, node):
         strict = self.is_strict(node.statements)
@@ -71,8 +209,26 @@ class DeclarationVisitor(NodeVisitor):
         program_scope = self.leave_scope()
         self.node_scopes[node] = program_scope
 
-    def get_node_scopes(self, node):
-        self.scope_stack = []
+    def resolve_references(self):
+        for node, chain in self.references:
+            name = constants.identifier(node.value)
+            for depth, scope in enumerate(chain):
+                if scope.function.dynamic:
+                    break
+                slot = scope.layout.slots.get(name)
+                if slot is not None:
+                    self.resolutions[node] = (depth, slot)
+                    break
+
+    def get_node_scopes(self, node, strict=False):
+        # The scope of the code containing the node
+        self.scope_stack = [([], [], strict)]
+        self.chain = self.function_chain = ()
         self.node_scopes = {}
+        self.layouts = {}
+        self.resolutions = {}
+        self.references = []
         self.visit(node)
+        self.resolve_references()
+        self.references = None
         return self.node_scopes
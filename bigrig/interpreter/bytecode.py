@@ -0,0 +1,1230 @@
+"""
+Compiles abstract syntax trees into bytecode for the ``VirtualMachine``.
+
+A program, function or eval body is compiled to a ``Code`` object holding a
+flat list of instructions, each an opcode followed by one integer argument,
+and the tables the arguments index: a pool of constants, the identifiers
+used by the code and the functions it creates. Literals and identifiers are
+decoded and operators resolved once, when the code is compiled.
+
+Jumps go straight to instruction offsets, so ``break``, ``continue`` and
+``return`` compile to plain jumps, with the ``finally`` blocks they leave
+compiled inline on the way out. Exceptions are caught by handlers the code
+sets up around ``try`` blocks.
+
+A few common sequences compile to superinstructions: counting a variable up
+or down, loading a property with a constant name and comparing two values
+to branch on the result.
+
+Programs are compiled together with all of their functions by
+``compile_program``, and the result can be written to a ``.bigc`` file and
+loaded again to be run without scanning or parsing the source. The marshal
+format of the file is specific to the version of Python that wrote it.
+"""
+import marshal
+import struct
+import sys
+import zlib
+
+from ..parser import ast
+from ..parser.parser import LazyFunctionBody, make_string_parser
+from .exceptions import ESError, ESTypeError, ESSyntaxError, ESReferenceError
+from .ast_utils import DeclarationVisitor, code_is_strict
+from .literals import (
+    IdentifierParser, StringLiteralParser, NumberLiteralParser, constants
+)
+
+FORMAT_VERSION = 1
+MAGIC = 'BIGC'
+HEADER = struct.Struct('<4sIBBI')
+SUFFIX = '.bigc'
+
+# The instruction set, roughly in order of how often instructions run. The
+# argument of each is described by the comment above it.
+OPCODE_NAMES = (
+    # A name index; pushes the value of the identifier.
+    'LOAD_NAME',
+    # A constant index; pushes the constant.
+    'LOAD_CONST',
+    # A name index; pops a value and assigns it to the identifier.
+    'STORE_NAME',
+    # Pops a value.
+    'POP',
+    # An index into ``OPERATORS``; pops two values and pushes the result.
+    'BINARY',
+    # The target offset shifted left by 5 bits, above an index into
+    # ``OPERATORS``; pops two values and jumps if applying the operator to
+    # them gives false, or true.
+    'COMPARE_JUMP_IF_FALSE',
+    'COMPARE_JUMP_IF_TRUE',
+    # A target offset; jumps.
+    'JUMP',
+    # A target offset; pops a value and jumps if it is false, or true.
+    'JUMP_IF_FALSE',
+    'JUMP_IF_TRUE',
+    # A constant index of a property name; replaces an object with the
+    # value of its property.
+    'LOAD_DOT',
+    # The number of arguments, above the name index of the callee plus one
+    # shifted left by 16 bits. Pops the arguments, a function and the this
+    # value, and pushes the result of calling the function.
+    'CALL',
+    # A name index shifted left by 3 bits, above ``COUNT_`` flags; counts
+    # the variable up or down, pushing its old or new value.
+    'COUNT_NAME',
+    # Pops a key, and replaces an object with the value of its property.
+    'LOAD_INDEX',
+    # A constant index of a property name; pushes a method of an object
+    # above it.
+    'LOAD_METHOD_DOT',
+    # Pops a value and makes it the completion value of the code.
+    'POP_RESULT',
+    # Pops a value and returns it.
+    'RETURN',
+    # Pushes a copy of the top value, or of the top two.
+    'DUP',
+    'DUP2',
+    # Converts the key above an object to a string, once the object is
+    # checked to have properties.
+    'PROPERTY_KEY',
+    # Pops a key, and replaces an object with the value of its property.
+    'LOAD_PROPERTY',
+    # Pops a value, a key and an object, assigns the property and pushes
+    # the value.
+    'STORE_PROPERTY',
+    # Replaces a key with the method it names of the object below it.
+    'LOAD_METHOD',
+    # ``COUNT_`` flags; pops a key and an object and counts the property up
+    # or down, pushing its old or new value.
+    'COUNT_PROPERTY',
+    # A name index; pushes the this value and function a call of the
+    # identifier passes.
+    'LOAD_CALLEE_NAME',
+    # Like ``CALL``, but a call of the ``eval`` function is a direct one.
+    'CALL_EVAL',
+    # Like ``CALL``, but constructs an object with a constructor.
+    'NEW',
+    # Push constants without an entry in the pool.
+    'LOAD_UNDEFINED',
+    'LOAD_NULL',
+    'LOAD_THIS',
+    # Pops the top value and the one below it when the top one is false,
+    # and otherwise only the top one; jumps to the target offset with the
+    # value left. ``JUMP_IF_TRUE_OR_POP`` likewise.
+    'JUMP_IF_FALSE_OR_POP',
+    'JUMP_IF_TRUE_OR_POP',
+    # Unary operators on the top value.
+    'NOT',
+    'NEGATE',
+    'TO_NUMBER',
+    'BITWISE_NOT',
+    'TYPEOF',
+    # A name index; pushes the type of the identifier's value.
+    'TYPEOF_NAME',
+    # A name index; deletes the binding and pushes whether it was deleted.
+    'DELETE_NAME',
+    # Pops a key and an object, deletes the property and pushes whether it
+    # was deleted.
+    'DELETE_PROPERTY',
+    # Moves the value below the top two values to the top.
+    'ROTATE3',
+    # An offset to handle exceptions at, until the handler is popped.
+    'SETUP_TRY',
+    'POP_TRY',
+    # A name index; pops an exception and binds it to the identifier in a
+    # new scope.
+    'ENTER_CATCH',
+    # Pops an object whose properties make up a new scope.
+    'ENTER_WITH',
+    # Leaves the scope of a ``catch`` or ``with`` block.
+    'POP_ENV',
+    # Pops a value to return from the code after leaving ``finally``
+    # blocks, and returns it.
+    'SET_RETURN',
+    'RETURN_SAVED',
+    # Pops a value and throws it.
+    'THROW',
+    # A constant index of a message shifted left by 2 bits, above an index
+    # into ``ERROR_CLASSES``; raises an error.
+    'RAISE',
+    # Replaces an object with an iterator over its enumerable property
+    # names.
+    'FOR_IN_START',
+    # A target offset; pushes the next name of the iterator on top of the
+    # stack, or jumps if there are none left.
+    'FOR_IN_NEXT',
+    # A constant index of the length and the indexes of the elements on
+    # the stack; pops the elements and pushes an array.
+    'MAKE_ARRAY',
+    # A constant index of the names and kinds of the properties on the
+    # stack; pops them and pushes an object.
+    'MAKE_OBJECT',
+    # A function index; pushes a function.
+    'MAKE_FUNCTION',
+    # A function index shifted left by 1 bit, above whether the function is
+    # strict; pushes a getter or setter function.
+    'MAKE_ACCESSOR',
+    # A constant index of a pattern and flags; pushes a regular expression.
+    'MAKE_REGEXP',
+    # Ends the code, with its completion value.
+    'END',
+)
+
+OPCODES = {}
+for _opcode, _name in enumerate(OPCODE_NAMES):
+    OPCODES[_name] = _opcode
+    globals()[_name] = _opcode
+del _opcode, _name
+
+# Flags of ``COUNT_`` instructions
+COUNT_DECREMENT = 1
+COUNT_PREFIX = 2
+COUNT_DISCARD = 4
+
+# Operators applied by ``BINARY`` and compare-and-branch instructions
+OPERATORS = (
+    '+', '-', '*', '/', '%', '<<', '>>', '>>>', '&', '^', '|',
+    '<', '>', '<=', '>=', '==', '!=', '===', '!==', 'instanceof', 'in'
+)
+OPERATOR_INDEXES = dict((op, index) for index, op in enumerate(OPERATORS))
+COMPARE_OPERATORS = frozenset(OPERATORS[11:])
+
+# Errors raised by ``RAISE`` instructions
+ERROR_CLASSES = (ESTypeError, ESSyntaxError, ESReferenceError)
+
+# Kinds of properties in an object literal
+DATA_PROPERTY = 0
+GETTER_PROPERTY = 1
+SETTER_PROPERTY = 2
+
+# Kinds of blocks a jump may leave
+LOOP_BLOCK = 'loop'
+SWITCH_BLOCK = 'switch'
+LABELLED_BLOCK = 'labelled'
+HANDLER_BLOCK = 'handler'
+FINALLY_BLOCK = 'finally'
+SCOPE_BLOCK = 'scope'
+PENDING_BLOCK = 'pending'
+
+EMPTY_LABELS = frozenset()
+
+COUNT_NODES = (ast.PrefixCountOperation, ast.PostfixCountOperation)
+
+class BytecodeError(Exception):
+    """
+    Raised for ``.bigc`` data that can not be loaded.
+    """
+    pass
+
+
+class Code(object):
+    """
+    The bytecode of a program, function or eval body.
+
+    The code of a function stands in for its syntax tree node, with the
+    same ``name``, ``parameters`` and ``body`` attributes, so functions can
+    be made from either.
+    """
+    body = None
+
+    def __init__(self, name=None, parameters=None, strict=False, filename=None):
+        self.name = name
+        self.parameters = parameters or []
+        self.strict = strict
+        self.filename = filename
+        self.instructions = []
+        self.constants = []
+        self.names = []
+        # The codes of nested functions, or for code compiled as it is run
+        # their syntax tree nodes.
+        self.functions = []
+        # Indexes into ``functions`` of the declared functions
+        self.function_declarations = []
+        self.variables = []
+
+    def __repr__(self):
+        return '<Code %s>' % (self.name or self.filename or '<anonymous>')
+
+
+class Label(object):
+    """
+    An instruction offset jumps are made to before it is known.
+    """
+    __slots__ = ('offset',)
+
+    def __init__(self):
+        self.offset = None
+
+
+class Block(object):
+    """
+    A statement around the code being compiled that jumps out of it have to
+    leave: a loop or other breakable statement, an exception handler or a
+    scope.
+    """
+    __slots__ = (
+        'kind', 'labels', 'break_label', 'continue_label', 'finally_block',
+        'stack_items'
+    )
+
+    def __init__(self, kind, labels=EMPTY_LABELS, break_label=None,
+                 continue_label=None, finally_block=None, stack_items=0):
+        self.kind = kind
+        self.labels = labels
+        self.break_label = break_label
+        self.continue_label = continue_label
+        self.finally_block = finally_block
+        self.stack_items = stack_items
+
+
+class CodeCompiler(object):
+    """
+    Compiles the statements of a ``Code``.
+
+    Expressions are compiled by the ``compile_<class name>`` method for their
+    node class to instructions pushing their value. Statements are compiled
+    by the same methods, which also take the set of labels of the statement.
+
+    Given the ``scopes`` of the declarations of a tree, nested functions are
+    compiled too, and otherwise their nodes are kept to be compiled on their
+    first call.
+    """
+    def __init__(self, code, scopes=None, results=False):
+        self.code = code
+        self.strict = code.strict
+        self.scopes = scopes
+        self.results = results
+        self.blocks = []
+        self.fixups = []
+        self.constant_indexes = {}
+        self.name_indexes = {}
+        self.function_indexes = {}
+
+    #
+    # Emitting instructions
+    #
+
+    def emit(self, opcode, argument=0):
+        self.code.instructions.extend((opcode, argument))
+
+    def emit_jump(self, opcode, label, low=0, shift=0):
+        """
+        Emit a jump to ``label``, whose offset is shifted left by ``shift``
+        bits above ``low`` in the argument.
+        """
+        self.fixups.append((len(self.code.instructions) + 1, label, shift, low))
+        self.emit(opcode)
+
+    def emit_error(self, error_class, message):
+        self.emit(RAISE, self.add_constant(message) << 2 | ERROR_CLASSES.index(error_class))
+
+    def mark(self, label):
+        label.offset = len(self.code.instructions)
+
+    def finish(self):
+        self.emit(END)
+        instructions = self.code.instructions
+        for index, label, shift, low in self.fixups:
+            instructions[index] = label.offset << shift | low
+        self.fixups = []
+
+    def add_constant(self, value):
+        # Keyed on the representation, which tells apart 0 and -0, and
+        # strings from numbers.
+        key = (value.__class__, repr(value))
+        index = self.constant_indexes.get(key)
+        if index is None:
+            index = self.constant_indexes[key] = len(self.code.constants)
+            self.code.constants.append(value)
+        return index
+
+    def add_name(self, name):
+        index = self.name_indexes.get(name)
+        if index is None:
+            index = self.name_indexes[name] = len(self.code.names)
+            self.code.names.append(name)
+        return index
+
+    def add_function(self, node, function=None):
+        """
+        Add a nested function, compiling it given the scopes of its tree.
+        """
+        index = self.function_indexes.get(node)
+        if index is None:
+            if function is None:
+                function = node
+            if self.scopes is not None:
+                function = compile_function_code(
+                    function, self.scopes, self.code.filename
+                )
+            index = self.function_indexes[node] = len(self.code.functions)
+            self.code.functions.append(function)
+        return index
+
+    def get_identifier(self, value):
+        return constants.identifier(value)
+
+    def call_argument(self, count, name):
+        if name is None:
+            return count
+        return count | (self.add_name(name) + 1) << 16
+
+    #
+    # Dispatch
+    #
+
+    def compile_statement(self, node, labels=EMPTY_LABELS):
+        getattr(self, 'compile_%s' % node.__class__.__name__)(node, labels)
+
+    def compile_statements(self, statements):
+        for statement in statements:
+            self.compile_statement(statement)
+
+    def compile_value(self, node):
+        """
+        Compile an expression to instructions pushing its value.
+        """
+        getattr(self, 'compile_%s' % node.__class__.__name__)(node)
+
+    def compile_effect(self, node):
+        """
+        Compile an expression whose value is not used.
+        """
+        if isinstance(node, ast.Assignment):
+            self.compile_assignment(node, discard=True)
+        elif isinstance(node, COUNT_NODES):
+            self.compile_count_operation(node, discard=True)
+        else:
+            self.compile_value(node)
+            self.emit(POP)
+
+    def compile_jump(self, node, label, when):
+        """
+        Compile an expression to instructions jumping to ``label`` if its
+        value converted to a boolean is ``when``.
+        """
+        if isinstance(node, ast.UnaryOperation) and node.op == '!':
+            self.compile_jump(node.expression, label, not when)
+        elif isinstance(node, ast.BinaryOperation) and node.op in ('&&', '||'):
+            if (node.op == '&&') != when:
+                # Either operand decides
+                self.compile_jump(node.left, label, when)
+                self.compile_jump(node.right, label, when)
+            else:
+                skip = Label()
+                self.compile_jump(node.left, skip, not when)
+                self.compile_jump(node.right, label, when)
+                self.mark(skip)
+        elif isinstance(node, ast.CompareOperation):
+            self.compile_value(node.left)
+            self.compile_value(node.right)
+            if when:
+                opcode = COMPARE_JUMP_IF_TRUE
+            else:
+                opcode = COMPARE_JUMP_IF_FALSE
+            self.emit_jump(opcode, label, OPERATOR_INDEXES[node.op], 5)
+        elif isinstance(node, (ast.TrueNode, ast.FalseNode)):
+            if isinstance(node, ast.TrueNode) == when:
+                self.emit_jump(JUMP, label)
+        else:
+            self.compile_value(node)
+            self.emit_jump(when and JUMP_IF_TRUE or JUMP_IF_FALSE, label)
+
+    #
+    # Blocks
+    #
+
+    def push_block(self, kind, **kwargs):
+        block = Block(kind, **kwargs)
+        self.blocks.append(block)
+        return block
+
+    def pop_block(self):
+        self.blocks.pop()
+
+    def unwind(self, depth):
+        """
+        Emit the instructions leaving the blocks from ``depth`` up.
+        """
+        blocks = self.blocks
+        for i in range(len(blocks) - 1, depth - 1, -1):
+            block = blocks[i]
+            kind = block.kind
+            if kind == FINALLY_BLOCK:
+                self.emit(POP_TRY)
+                # The finally block runs outside of the try statement.
+                self.blocks = blocks[:i]
+                try:
+                    self.compile_finally(block.finally_block)
+                finally:
+                    self.blocks = blocks
+            elif kind == HANDLER_BLOCK:
+                self.emit(POP_TRY)
+            elif kind == SCOPE_BLOCK:
+                self.emit(POP_ENV)
+            for _ in range(block.stack_items):
+                self.emit(POP)
+
+    def find_block(self, target, kinds):
+        """
+        Find the depth of the innermost block of one of ``kinds``, or with
+        the ``target`` label.
+        """
+        for i in range(len(self.blocks) - 1, -1, -1):
+            block = self.blocks[i]
+            if target is None:
+                if block.kind in kinds:
+                    return i
+            elif target in block.labels and block.kind in kinds + (LABELLED_BLOCK,):
+                return i
+        return None
+
+    #
+    # Literals
+    #
+
+    def compile_literal(self, parser, value):
+        # 7.8
+        try:
+            value = parser.parse_string(value, allow_octal=not self.strict)
+        except ESError, e:
+            # Raised when the literal is evaluated, as by the visitor.
+            self.emit_error(e.__class__, e.message)
+        else:
+            self.emit(LOAD_CONST, self.add_constant(value))
+
+    def compile_NumberLiteral(self, node):
+        self.compile_literal(NumberLiteralParser, node.value)
+
+    def compile_StringLiteral(self, node):
+        self.compile_literal(StringLiteralParser, node.value)
+
+    def compile_TrueNode(self, node):
+        self.emit(LOAD_CONST, self.add_constant(True))
+
+    def compile_FalseNode(self, node):
+        self.emit(LOAD_CONST, self.add_constant(False))
+
+    def compile_NullNode(self, node):
+        self.emit(LOAD_NULL)
+
+    def compile_ThisNode(self, node):
+        self.emit(LOAD_THIS)
+
+    def compile_RegExpLiteral(self, node):
+        # Strip the ``/``s here
+        self.emit(MAKE_REGEXP, self.add_constant((node.pattern[1:-1], node.flags)))
+
+    def compile_ArrayLiteral(self, node):
+        # 11.1.4
+        indexes = []
+        for i, element in enumerate(node.elements):
+            if not isinstance(element, ast.Elision):
+                self.compile_value(element)
+                indexes.append(i)
+        layout = (len(node.elements), tuple(indexes))
+        self.emit(MAKE_ARRAY, self.add_constant(layout))
+
+    def compile_ObjectLiteral(self, node):
+        # 11.1.5
+        properties = []
+        for prop in node.properties:
+            if isinstance(prop, ast.ObjectProperty):
+                name = prop.name
+                if isinstance(name, ast.PropertyName):
+                    name = self.get_identifier(name.value)
+                else:
+                    parser = StringLiteralParser
+                    if isinstance(name, ast.NumberLiteral):
+                        parser = NumberLiteralParser
+                    try:
+                        name = parser.parse_string(name.value, allow_octal=not self.strict)
+                    except ESError, e:
+                        self.emit_error(e.__class__, e.message)
+                        return
+                self.compile_value(prop.value)
+                properties.append((name, DATA_PROPERTY))
+            else:
+                declaration = ast.FunctionExpression()
+                if isinstance(prop, ast.PropertySetter):
+                    declaration.parameters = [prop.parameter]
+                    kind = SETTER_PROPERTY
+                else:
+                    kind = GETTER_PROPERTY
+                declaration.body = prop.body
+                strict = self.strict or code_is_strict(prop.body)
+                if self.scopes is not None:
+                    self.scopes.update(
+                        DeclarationVisitor().get_node_scopes(declaration, self.strict)
+                    )
+                index = self.add_function(prop, declaration)
+                self.emit(MAKE_ACCESSOR, index << 1 | strict)
+                properties.append((prop.name, kind))
+        self.emit(MAKE_OBJECT, self.add_constant(tuple(properties)))
+
+    def compile_FunctionExpression(self, node):
+        self.emit(MAKE_FUNCTION, self.add_function(node))
+
+    #
+    # References
+    #
+
+    def compile_Name(self, node):
+        # 11.1.2
+        self.emit(LOAD_NAME, self.add_name(self.get_identifier(node.value)))
+
+    def compile_DotProperty(self, node):
+        # 11.2.1
+        self.compile_value(node.object)
+        self.emit(LOAD_DOT, self.add_constant(node.key))
+
+    def compile_BracketProperty(self, node):
+        self.compile_value(node.object)
+        self.compile_value(node.key)
+        self.emit(LOAD_INDEX)
+
+    def compile_property_reference(self, node):
+        """
+        Compile a property access to instructions pushing its object and
+        key.
+        """
+        self.compile_value(node.object)
+        if isinstance(node, ast.DotProperty):
+            self.emit(LOAD_CONST, self.add_constant(node.key))
+        else:
+            self.compile_value(node.key)
+        self.emit(PROPERTY_KEY)
+
+    #
+    # Calls
+    #
+
+    def compile_CallExpression(self, node):
+        # 11.2.3
+        expression = node.expression
+        arguments = node.arguments or []
+        name = None
+        if isinstance(expression, ast.Name):
+            name = self.get_identifier(expression.value)
+            self.emit(LOAD_CALLEE_NAME, self.add_name(name))
+        elif isinstance(expression, ast.DotProperty):
+            name = expression.key
+            self.compile_value(expression.object)
+            self.emit(LOAD_METHOD_DOT, self.add_constant(name))
+        elif isinstance(expression, ast.BracketProperty):
+            self.compile_property_reference(expression)
+            self.emit(LOAD_METHOD)
+        else:
+            self.emit(LOAD_UNDEFINED)
+            self.compile_value(expression)
+        for argument in arguments:
+            self.compile_value(argument)
+        # 15.1.2.1.1
+        opcode = name == 'eval' and CALL_EVAL or CALL
+        self.emit(opcode, self.call_argument(len(arguments), name))
+
+    def compile_NewExpression(self, node):
+        # 11.2.2
+        expression = node.expression
+        arguments = node.arguments or []
+        name = None
+        if isinstance(expression, ast.Name):
+            name = self.get_identifier(expression.value)
+        elif isinstance(expression, ast.DotProperty):
+            name = expression.key
+        self.compile_value(expression)
+        for argument in arguments:
+            self.compile_value(argument)
+        self.emit(NEW, self.call_argument(len(arguments), name))
+
+    #
+    # Operators
+    #
+
+    def compile_UnaryOperation(self, node):
+        # 11.4.6 - 11.4.9
+        self.compile_value(node.expression)
+        self.emit({'+': TO_NUMBER, '-': NEGATE, '~': BITWISE_NOT, '!': NOT}[node.op])
+
+    def compile_TypeofOperation(self, node):
+        # 11.4.3
+        expression = node.expression
+        if isinstance(expression, ast.Name):
+            name = self.get_identifier(expression.value)
+            self.emit(TYPEOF_NAME, self.add_name(name))
+        else:
+            self.compile_value(expression)
+            self.emit(TYPEOF)
+
+    def compile_DeleteOperation(self, node):
+        # 11.4.1
+        expression = node.expression
+        if isinstance(expression, ast.Name):
+            if self.strict:
+                self.emit_error(
+                    ESSyntaxError,
+                    'Cannot delete an unqualified identifier in strict mode.'
+                )
+            else:
+                name = self.get_identifier(expression.value)
+                self.emit(DELETE_NAME, self.add_name(name))
+        elif isinstance(expression, ast.PropertyAccess):
+            self.compile_property_reference(expression)
+            self.emit(DELETE_PROPERTY)
+        else:
+            self.compile_value(expression)
+            self.emit(POP)
+            self.emit(LOAD_CONST, self.add_constant(True))
+
+    def compile_VoidOperation(self, node):
+        # 11.4.2
+        self.compile_value(node.expression)
+        self.emit(POP)
+        self.emit(LOAD_UNDEFINED)
+
+    def compile_invalid_assignment(self, name):
+        self.emit_error(ESTypeError, 'Cannot assign to %s in strict mode' % name)
+
+    def is_strict_restricted(self, name):
+        return self.strict and name in ('eval', 'arguments')
+
+    def compile_count_operation(self, node, discard=False):
+        # 11.3.1, 11.3.2, 11.4.4, 11.4.5
+        flags = 0
+        if node.op == '--':
+            flags |= COUNT_DECREMENT
+        if isinstance(node, ast.PrefixCountOperation):
+            flags |= COUNT_PREFIX
+        if discard:
+            flags |= COUNT_DISCARD
+        target = node.expression
+        if isinstance(target, ast.Name):
+            name = self.get_identifier(target.value)
+            if self.is_strict_restricted(name):
+                self.compile_invalid_assignment(name)
+            else:
+                self.emit(COUNT_NAME, self.add_name(name) << 3 | flags)
+        elif isinstance(target, ast.PropertyAccess):
+            self.compile_property_reference(target)
+            self.emit(COUNT_PROPERTY, flags)
+        else:
+            self.compile_value(target)
+            self.emit(POP)
+            self.emit_error(ESReferenceError, 'Invalid assignment')
+
+    compile_PrefixCountOperation = compile_count_operation
+    compile_PostfixCountOperation = compile_count_operation
+
+    def compile_BinaryOperation(self, node):
+        op = node.op
+        if op == '&&' or op == '||':
+            # 11.11
+            end = Label()
+            self.compile_value(node.left)
+            if op == '&&':
+                self.emit_jump(JUMP_IF_FALSE_OR_POP, end)
+            else:
+                self.emit_jump(JUMP_IF_TRUE_OR_POP, end)
+            self.compile_value(node.right)
+            self.mark(end)
+        elif op == ',':
+            # 11.14
+            self.compile_effect(node.left)
+            self.compile_value(node.right)
+        else:
+            self.compile_value(node.left)
+            self.compile_value(node.right)
+            self.emit(BINARY, OPERATOR_INDEXES[op])
+
+    compile_CompareOperation = compile_BinaryOperation
+
+    def compile_Conditional(self, node):
+        # 11.12
+        otherwise, end = Label(), Label()
+        self.compile_jump(node.condition, otherwise, False)
+        self.compile_value(node.then_expression)
+        self.emit_jump(JUMP, end)
+        self.mark(otherwise)
+        self.compile_value(node.else_expression)
+        self.mark(end)
+
+    def compile_assignment(self, node, discard=False):
+        # 11.13
+        target = node.target
+        op = node.op
+        if isinstance(target, ast.Name):
+            name = self.get_identifier(target.value)
+            if self.is_strict_restricted(name):
+                self.compile_invalid_assignment(name)
+                return
+            index = self.add_name(name)
+            if op != '=':
+                self.emit(LOAD_NAME, index)
+            self.compile_value(node.value)
+            if op != '=':
+                self.emit(BINARY, OPERATOR_INDEXES[op[:-1]])
+            if not discard:
+                self.emit(DUP)
+            self.emit(STORE_NAME, index)
+        elif isinstance(target, ast.PropertyAccess):
+            self.compile_property_reference(target)
+            if op != '=':
+                self.emit(DUP2)
+                self.emit(LOAD_PROPERTY)
+            self.compile_value(node.value)
+            if op != '=':
+                self.emit(BINARY, OPERATOR_INDEXES[op[:-1]])
+            self.emit(STORE_PROPERTY)
+            if discard:
+                self.emit(POP)
+        else:
+            self.compile_value(target)
+            self.emit(POP)
+            self.compile_value(node.value)
+            self.emit(POP)
+            self.emit_error(ESReferenceError, 'Invalid assignment')
+
+    def compile_Assignment(self, node):
+        self.compile_assignment(node)
+
+    #
+    # Statements
+    #
+
+    def compile_Block(self, node, labels=EMPTY_LABELS):
+        self.compile_statements(node.statements)
+
+    def compile_ExpressionStatement(self, node, labels=EMPTY_LABELS):
+        if self.results:
+            self.compile_value(node.expression)
+            self.emit(POP_RESULT)
+        else:
+            self.compile_effect(node.expression)
+
+    def compile_EmptyStatement(self, node, labels=EMPTY_LABELS):
+        pass
+
+    compile_FunctionDeclaration = compile_EmptyStatement
+
+    def compile_VariableStatement(self, node, labels=EMPTY_LABELS):
+        # 12.2
+        for declaration in node.declarations:
+            self.compile_VariableDeclaration(declaration)
+
+    def compile_VariableDeclaration(self, node):
+        name = self.get_identifier(node.name)
+        if self.is_strict_restricted(name):
+            self.compile_invalid_assignment(name)
+        elif node.value:
+            self.compile_value(node.value)
+            self.emit(STORE_NAME, self.add_name(name))
+
+    def compile_IfStatement(self, node, labels=EMPTY_LABELS):
+        # 12.5
+        otherwise = Label()
+        self.compile_jump(node.condition, otherwise, False)
+        self.compile_statement(node.then_statement)
+        if node.else_statement:
+            end = Label()
+            self.emit_jump(JUMP, end)
+            self.mark(otherwise)
+            self.compile_statement(node.else_statement)
+            self.mark(end)
+        else:
+            self.mark(otherwise)
+
+    def compile_loop_body(self, node, labels, end, next, stack_items=0):
+        self.push_block(
+            LOOP_BLOCK, labels=labels, break_label=end, continue_label=next,
+            stack_items=stack_items
+        )
+        self.compile_statement(node)
+        self.pop_block()
+
+    def compile_DoWhileStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.1
+        body, condition, end = Label(), Label(), Label()
+        self.mark(body)
+        self.compile_loop_body(node.body, labels, end, condition)
+        self.mark(condition)
+        self.compile_jump(node.condition, body, True)
+        self.mark(end)
+
+    def compile_WhileStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.2
+        body, condition, end = Label(), Label(), Label()
+        self.emit_jump(JUMP, condition)
+        self.mark(body)
+        self.compile_loop_body(node.body, labels, end, condition)
+        self.mark(condition)
+        self.compile_jump(node.condition, body, True)
+        self.mark(end)
+
+    def compile_ForStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.3
+        initialize = node.initialize
+        if isinstance(initialize, ast.Statement):
+            self.compile_statement(initialize)
+        elif initialize:
+            self.compile_effect(initialize)
+        body, next, condition, end = Label(), Label(), Label(), Label()
+        self.emit_jump(JUMP, condition)
+        self.mark(body)
+        self.compile_loop_body(node.body, labels, end, next)
+        self.mark(next)
+        if node.next:
+            self.compile_effect(node.next)
+        self.mark(condition)
+        if node.condition:
+            self.compile_jump(node.condition, body, True)
+        else:
+            self.emit_jump(JUMP, body)
+        self.mark(end)
+
+    def compile_ForInStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.4
+        self.compile_value(node.enumerable)
+        self.emit(FOR_IN_START)
+        next, end = Label(), Label()
+        self.mark(next)
+        self.emit_jump(FOR_IN_NEXT, end)
+        each = node.each
+        if isinstance(each, ast.VariableDeclaration):
+            self.compile_VariableDeclaration(each)
+            name = self.get_identifier(each.name)
+            if not self.is_strict_restricted(name):
+                self.emit(STORE_NAME, self.add_name(name))
+        elif isinstance(each, ast.Name):
+            name = self.get_identifier(each.value)
+            if self.is_strict_restricted(name):
+                self.compile_invalid_assignment(name)
+            else:
+                self.emit(STORE_NAME, self.add_name(name))
+        elif isinstance(each, ast.PropertyAccess):
+            self.compile_property_reference(each)
+            self.emit(ROTATE3)
+            self.emit(STORE_PROPERTY)
+            self.emit(POP)
+        else:
+            self.compile_value(each)
+            self.emit(POP)
+            self.emit_error(ESReferenceError, 'Invalid assignment')
+        self.compile_loop_body(node.body, labels, end, next, stack_items=1)
+        self.emit_jump(JUMP, next)
+        self.mark(end)
+        self.emit(POP)
+
+    def compile_labelled(self, node, labels):
+        end = Label()
+        self.push_block(LABELLED_BLOCK, labels=labels, break_label=end)
+        self.compile_statement(node)
+        self.pop_block()
+        self.mark(end)
+
+    def compile_LabelledStatement(self, node, labels=EMPTY_LABELS):
+        # 12.12
+        labels = labels | frozenset([node.label.value])
+        statement = node.statement
+        if isinstance(statement, (ast.IterationStatement, ast.SwitchStatement,
+                                  ast.LabelledStatement)):
+            self.compile_statement(statement, labels)
+        else:
+            self.compile_labelled(statement, labels)
+
+    def compile_ContinueStatement(self, node, labels=EMPTY_LABELS):
+        # 12.7
+        depth = self.find_block(node.target, (LOOP_BLOCK,))
+        if depth is None or self.blocks[depth].continue_label is None:
+            return self.emit_error(ESSyntaxError, 'Illegal continue statement')
+        self.unwind(depth + 1)
+        self.emit_jump(JUMP, self.blocks[depth].continue_label)
+
+    def compile_BreakStatement(self, node, labels=EMPTY_LABELS):
+        # 12.8
+        depth = self.find_block(node.target, (LOOP_BLOCK, SWITCH_BLOCK))
+        if depth is None:
+            return self.emit_error(ESSyntaxError, 'Illegal break statement')
+        self.unwind(depth + 1)
+        self.emit_jump(JUMP, self.blocks[depth].break_label)
+
+    def compile_ReturnStatement(self, node, labels=EMPTY_LABELS):
+        # 12.9
+        if node.expression is None:
+            self.emit(LOAD_UNDEFINED)
+        else:
+            self.compile_value(node.expression)
+        for block in self.blocks:
+            if block.kind == FINALLY_BLOCK:
+                self.emit(SET_RETURN)
+                self.unwind(0)
+                self.emit(RETURN_SAVED)
+                break
+        else:
+            self.emit(RETURN)
+
+    def compile_Throw(self, node, labels=EMPTY_LABELS):
+        # 12.13
+        self.compile_value(node.exception)
+        self.emit(THROW)
+
+    def compile_SwitchStatement(self, node, labels=EMPTY_LABELS):
+        # 12.11
+        self.compile_value(node.expression)
+        end = Label()
+        default = end
+        clause_labels = []
+        strict_equal = OPERATOR_INDEXES['===']
+        for clause in node.cases:
+            label = Label()
+            clause_labels.append(label)
+            if clause.label is None:
+                default = label
+            else:
+                self.emit(DUP)
+                self.compile_value(clause.label)
+                self.emit_jump(COMPARE_JUMP_IF_TRUE, label, strict_equal, 5)
+        self.emit_jump(JUMP, default)
+        self.push_block(SWITCH_BLOCK, labels=labels, break_label=end, stack_items=1)
+        # Execution falls through the clauses following the selected one.
+        for clause, label in zip(node.cases, clause_labels):
+            self.mark(label)
+            self.compile_statements(clause.statements)
+        self.pop_block()
+        self.mark(end)
+        self.emit(POP)
+
+    def compile_TryStatement(self, node, labels=EMPTY_LABELS):
+        # 12.14
+        end = Label()
+        if node.finally_block:
+            handler = Label()
+            self.emit_jump(SETUP_TRY, handler)
+            self.push_block(FINALLY_BLOCK, finally_block=node.finally_block)
+            self.compile_try_catch(node)
+            self.pop_block()
+            self.emit(POP_TRY)
+            self.compile_finally(node.finally_block)
+            self.emit_jump(JUMP, end)
+            # Run with the exception on the stack, which is thrown again.
+            self.mark(handler)
+            self.push_block(PENDING_BLOCK, stack_items=1)
+            self.compile_finally(node.finally_block)
+            self.pop_block()
+            self.emit(THROW)
+        else:
+            self.compile_try_catch(node)
+        self.mark(end)
+
+    def compile_finally(self, node):
+        # The value of a finally block is not the value of the statement.
+        results = self.results
+        self.results = False
+        try:
+            self.compile_statement(node)
+        finally:
+            self.results = results
+
+    def compile_try_catch(self, node):
+        if not node.catch_var:
+            return self.compile_statement(node.try_block)
+        handler, end = Label(), Label()
+        self.emit_jump(SETUP_TRY, handler)
+        self.push_block(HANDLER_BLOCK)
+        self.compile_statement(node.try_block)
+        self.pop_block()
+        self.emit(POP_TRY)
+        self.emit_jump(JUMP, end)
+        self.mark(handler)
+        self.emit(ENTER_CATCH, self.add_name(node.catch_var.value))
+        self.push_block(SCOPE_BLOCK)
+        self.compile_statement(node.catch_block)
+        self.pop_block()
+        self.emit(POP_ENV)
+        self.mark(end)
+
+    def compile_WithStatement(self, node, labels=EMPTY_LABELS):
+        # 12.10
+        if self.strict:
+            return self.emit_error(
+                ESSyntaxError, 'The with statement is not allowed in strict mode code'
+            )
+        self.compile_value(node.expression)
+        self.emit(ENTER_WITH)
+        self.push_block(SCOPE_BLOCK)
+        self.compile_statement(node.statement)
+        self.pop_block()
+        self.emit(POP_ENV)
+
+#
+# Compiling code
+#
+
+def compile_function_code(node, scopes, filename=None):
+    """
+    Compile a program or function with all of its nested functions, given
+    the scopes of the declarations of its tree.
+    """
+    if isinstance(getattr(node, 'body', None), LazyFunctionBody):
+        outer_strict = node.body.outer_strict
+        node.body = node.body.parse()
+        scopes.update(DeclarationVisitor().get_node_scopes(node, outer_strict))
+    function_declarations, variable_declarations, strict = scopes[node]
+    if isinstance(node, ast.Program):
+        code = Code(strict=strict, filename=filename)
+        statements = node.statements
+    else:
+        name = node.name and IdentifierParser.parse_string(node.name)
+        parameters = [
+            IdentifierParser.parse_string(parameter)
+            for parameter in node.parameters or []
+        ]
+        code = Code(name, parameters, strict, filename)
+        statements = node.body or []
+    compiler = CodeCompiler(code, scopes, isinstance(node, ast.Program))
+    code.function_declarations = [
+        compiler.add_function(declaration) for declaration in function_declarations
+    ]
+    code.variables = [declaration.name for declaration in variable_declarations]
+    compiler.compile_statements(statements)
+    compiler.finish()
+    return code
+
+def compile_program(program, filename=None):
+    """
+    Compile a program with all of its functions.
+    """
+    scopes = DeclarationVisitor().get_node_scopes(program)
+    return compile_function_code(program, scopes, filename)
+
+def compile_source(source, filename=None):
+    """
+    Parse and compile the source of a program.
+    """
+    if isinstance(source, unicode):
+        source = source.encode('utf-8')
+    return compile_program(make_string_parser(source, filename).parse(), filename)
+
+def compile_statements(statements, strict, results=True, name=None, parameters=None):
+    """
+    Compile a statement list about to be run, leaving its functions to be
+    compiled on their first call.
+    """
+    code = Code(name, parameters, strict)
+    compiler = CodeCompiler(code, results=results)
+    compiler.compile_statements(statements)
+    compiler.finish()
+    return code
+
+def compile_function(node, strict):
+    """
+    Compile the body of a function about to be called.
+    """
+    return compile_statements(
+        node.body or [], strict, False, node.name, node.parameters
+    )
+
+#
+# Disassembly
+#
+
+def disassemble(code):
+    """
+    List the instructions of a code as text, one per line.
+    """
+    lines = []
+    instructions = code.instructions
+    for offset in range(0, len(instructions), 2):
+        opcode, argument = instructions[offset:offset + 2]
+        name = OPCODE_NAMES[opcode]
+        detail = ''
+        if name in ('LOAD_CONST', 'LOAD_DOT', 'LOAD_METHOD_DOT', 'MAKE_ARRAY',
+                    'MAKE_OBJECT', 'MAKE_REGEXP'):
+            detail = repr(code.constants[argument])
+        elif name in ('LOAD_NAME', 'STORE_NAME', 'TYPEOF_NAME', 'DELETE_NAME',
+                      'LOAD_CALLEE_NAME', 'ENTER_CATCH'):
+            detail = code.names[argument]
+        elif name == 'COUNT_NAME':
+            detail = code.names[argument >> 3]
+        elif name == 'BINARY':
+            detail = OPERATORS[argument]
+        elif name.startswith('COMPARE_JUMP'):
+            detail = '%s to %d' % (OPERATORS[argument & 31], argument >> 5)
+        elif name in ('MAKE_FUNCTION', 'MAKE_ACCESSOR'):
+            detail = repr(code.functions[argument >> (name == 'MAKE_ACCESSOR')])
+        lines.append('%5d %-22s %d %s' % (offset, name, argument, detail))
+    return '\n'.join(lines)
+
+#
+# Serialization
+#
+
+def encode_code(code):
+    """
+    Turn a code and its nested functions into nested tuples that can be
+    marshalled.
+    """
+    functions = []
+    for function in code.functions:
+        if not isinstance(function, Code):
+            raise ValueError('%r has functions that are not compiled' % code)
+        functions.append(encode_code(function))
+    return (
+        code.name, tuple(code.parameters), code.strict, code.filename,
+        tuple(code.instructions), tuple(code.constants), tuple(code.names),
+        tuple(functions), tuple(code.function_declarations),
+        tuple(code.variables)
+    )
+
+def decode_code(data):
+    """
+    Rebuild a code encoded by ``encode_code``.
+    """
+    (name, parameters, strict, filename, instructions, constants, names,
+     functions, function_declarations, variables) = data
+    code = Code(name, list(parameters), strict, filename)
+    code.instructions = list(instructions)
+    code.constants = list(constants)
+    code.names = list(names)
+    code.functions = [decode_code(function) for function in functions]
+    code.function_declarations = list(function_declarations)
+    code.variables = list(variables)
+    return code
+
+def dumps(code):
+    """
+    Serialize a code to the bytes of a ``.bigc`` file.
+    """
+    payload = zlib.compress(marshal.dumps(encode_code(code), 2), 1)
+    checksum = zlib.crc32(payload) & 0xffffffff
+    return HEADER.pack(
+        MAGIC, FORMAT_VERSION, sys.version_info[0], sys.version_info[1],
+        checksum
+    ) + payload
+
+def loads(data):
+    """
+    Rebuild a code from the bytes of a ``.bigc`` file, raising
+    ``BytecodeError`` if they are not a whole file for this version.
+    """
+    if len(data) < HEADER.size:
+        raise BytecodeError('Truncated bytecode file')
+    magic, version, major, minor, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise BytecodeError('Not a bytecode file')
+    if version != FORMAT_VERSION or (major, minor) != sys.version_info[:2]:
+        raise BytecodeError('Bytecode file from another version')
+    payload = data[HEADER.size:]
+    if zlib.crc32(payload) & 0xffffffff != checksum:
+        raise BytecodeError('Corrupt bytecode file')
+    try:
+        return decode_code(marshal.loads(zlib.decompress(payload)))
+    except (ValueError, EOFError, TypeError, zlib.error), e:
+        raise BytecodeError('Corrupt bytecode file: %s' % e)
+
+def dump(code, path):
+    with open(path, 'wb') as fd:
+        fd.write(dumps(code))
+
+def load(path):
+    with open(path, 'rb') as fd:
+        return loads(fd.read())
@@ -0,0 +1,951 @@
+"""
+Compiles abstract syntax trees into trees of Python closures.
+
+The ``EvaluationVisitor`` looks up the visitor method of a node every time it
+is evaluated, and decodes literals, identifiers and operators as it goes.
+The ``ClosureCompiler`` does all of that once, turning each node into a
+closure specialized for its operator, literal value or identifier and for
+the strictness of the code it is in. Running the closures evaluates the code
+as the visitor would: statements return completion tuples, and expressions
+return values or, where a reference is needed, ``Reference`` objects.
+
+Function bodies are compiled on their first call and kept by the compiler.
+The rarely used ``with`` statement, whose scope is only known when it runs,
+is left to the visitor.
+"""
+import math
+import weakref
+
+from ..parser import ast
+from .types import (
+    Undefined, Null, NumberType, StringType, ObjectType, BooleanType,
+    get_primitive_type, check_object_coercible, NaN
+)
+from .exceptions import ESError, ESTypeError, ESReferenceError
+from .environment import (
+    Reference, DeclarativeEnvironmentRecord
+)
+from .objects import PropertyDescriptor, is_callable
+from .objects.base import FunctionInstance, ObjectInstance
+from .literals import (
+    StringLiteralParser, NumberLiteralParser, constants
+)
+
+# The completion of statements ending normally without a value
+NORMAL = ('normal', None, None)
+
+# Expressions that evaluate to a ``Reference``
+REFERENCE_NODES = (ast.Name, ast.PropertyAccess)
+
+# Expressions that always evaluate to a boolean
+BOOLEAN_NODES = (ast.CompareOperation, ast.TrueNode, ast.FalseNode)
+
+EMPTY_LABELS = frozenset()
+
+def resolve_binding(env, name):
+    """
+    Find the environment record in ``env`` or its outer environments that
+    binds ``name``, or ``None`` for an unresolvable name.
+
+    10.2.2.1
+    """
+    while env is not None:
+        record = env.environment_record
+        if record.__class__ is DeclarativeEnvironmentRecord:
+            if name in record.names:
+                return record
+        elif record.has_binding(name):
+            return record
+        env = env.outer
+    return None
+
+def constant(value):
+    return lambda: value
+
+def raise_error(error):
+    def raise_():
+        raise error
+    return raise_
+
+class ClosureCompiler(object):
+    """
+    Compiles statements and expressions into closures taking no arguments.
+
+    Expressions are compiled by the ``compile_<class name>`` method for their
+    node class, or to a closure calling the ``EvaluationVisitor`` if there is
+    none. Statements are compiled by the same methods, which also take the
+    set of labels of the statement.
+    """
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.visitor = interpreter.evaluation_visitor
+        # Compiled function bodies, weakly keyed by their nodes
+        self.functions = weakref.WeakKeyDictionary()
+        self.strict = False
+        self._compiler_cache = {}
+
+    #
+    # Running code
+    #
+
+    def execute_statements(self, statements):
+        """
+        Compile and run a statement list in the current execution context.
+        """
+        return self.compile_code(statements)()
+
+    def execute_function(self, node):
+        """
+        Run the body of a function, compiling it on the first call.
+        """
+        body = self.functions.get(node)
+        if body is None:
+            body = self.functions[node] = self.compile_code(node.body)
+        return body()
+
+    def compile_code(self, statements):
+        """
+        Compile the statement list of a program, function or eval code.
+        """
+        # Code is compiled as it is entered, in the strict context of the code.
+        previous = self.strict
+        self.strict = self.interpreter.in_strict_code()
+        try:
+            return self.compile_statement_list(statements)
+        finally:
+            self.strict = previous
+
+    #
+    # Dispatch
+    #
+
+    def get_compiler(self, node):
+        node_class = node.__class__
+        compiler = self._compiler_cache.get(node_class)
+        if compiler is None:
+            compiler = getattr(
+                self, 'compile_%s' % node_class.__name__, self.generic_compile
+            )
+            self._compiler_cache[node_class] = compiler
+        return compiler
+
+    def generic_compile(self, node, labels=None):
+        visit = self.visitor.visit
+        return lambda: visit(node)
+
+    def compile(self, node):
+        """
+        Compile an expression to a closure returning its value or reference.
+        """
+        return self.get_compiler(node)(node)
+
+    def compile_value(self, node):
+        """
+        Compile an expression to a closure returning its value.
+        """
+        if isinstance(node, ast.Name):
+            return self.compile_name_value(node)
+        elif isinstance(node, ast.PropertyAccess):
+            return self.compile_property_value(node)
+        return self.get_compiler(node)(node)
+
+    def compile_condition(self, node):
+        """
+        Compile an expression to a closure returning its value as a boolean.
+        """
+        value = self.compile_value(node)
+        if isinstance(node, BOOLEAN_NODES) or (
+                isinstance(node, ast.UnaryOperation) and node.op == '!'):
+            return value
+        to_boolean = self.interpreter.to_boolean
+        return lambda: to_boolean(value())
+
+    def compile_statement(self, node, labels=EMPTY_LABELS):
+        return self.get_compiler(node)(node, labels)
+
+    def compile_statement_list(self, statements):
+        compiled = [self.compile_statement(statement) for statement in statements]
+        exception_to_error = self.interpreter.exception_to_error
+        def execute():
+            value = None
+            try:
+                for statement in compiled:
+                    completion = statement()
+                    if completion[0] != 'normal':
+                        if completion[1] is None and completion[0] != 'return':
+                            # Breaks and continues carry the value so far, 12.1
+                            return (completion[0], value, completion[2])
+                        return completion
+                    if completion[1] is not None:
+                        value = completion[1]
+            except ESError, e:
+                return ('throw', exception_to_error(e), None)
+            if value is None:
+                return NORMAL
+            return ('normal', value, None)
+        return execute
+
+    #
+    # References
+    #
+
+    def get_identifier(self, value):
+        return constants.identifier(value)
+
+    def compile_Name(self, node):
+        # 11.1.2
+        name = self.get_identifier(node.value)
+        strict = self.strict
+        contexts = self.interpreter.execution_contexts
+        def reference():
+            env = contexts[-1].lexical_environment
+            return env.get_identifier_reference(name, strict=strict)
+        return reference
+
+    def compile_name_value(self, node):
+        name = self.get_identifier(node.value)
+        strict = self.strict
+        contexts = self.interpreter.execution_contexts
+        def value():
+            record = resolve_binding(contexts[-1].lexical_environment, name)
+            if record is None:
+                raise ESReferenceError('%s is not defined' % name)
+            return record.get_binding_value(name, strict)
+        return value
+
+    def get_constant_key(self, node):
+        """
+        Return the key of a property access as a string if it is a name or a
+        literal, or ``None``.
+        """
+        interpreter = self.interpreter
+        if isinstance(node, ast.DotProperty):
+            return interpreter.to_string(node.key)
+        key = node.key
+        try:
+            if isinstance(key, ast.StringLiteral):
+                return constants.string(key.value, self.strict)
+            elif isinstance(key, ast.NumberLiteral):
+                return interpreter.to_string(
+                    constants.number(key.value, self.strict)
+                )
+        except ESError:
+            # Raised when the key is evaluated instead.
+            pass
+        return None
+
+    def compile_property_key(self, node):
+        """
+        Compile the key of a property access to a closure converting it to a
+        string, or return the key itself when it is constant.
+        """
+        constant_key = self.get_constant_key(node)
+        if constant_key is not None:
+            return constant_key
+        key = self.compile_value(node.key)
+        to_string = self.interpreter.to_string
+        return lambda: to_string(key())
+
+    def compile_property_access(self, node, make_result):
+        # 11.2.1
+        obj = self.compile_value(node.object)
+        key = self.compile_property_key(node)
+        if isinstance(key, basestring):
+            def access():
+                base = obj()
+                check_object_coercible(base)
+                return make_result(base, key)
+        else:
+            compiled_key = key
+            def access():
+                base = obj()
+                key = compiled_key()
+                check_object_coercible(base)
+                return make_result(base, key)
+        return access
+
+    def compile_DotProperty(self, node):
+        strict = self.strict
+        def make_reference(base, key):
+            return Reference(base, key, strict=strict)
+        return self.compile_property_access(node, make_reference)
+
+    compile_BracketProperty = compile_DotProperty
+
+    def get_cached_reader(self, node):
+        """
+        Return the function reading the property accessed by ``node`` from
+        an ``ObjectInstance`` through the inline cache of the access, or
+        ``None`` when its key is not constant.
+        """
+        name = self.get_constant_key(node)
+        if name is None:
+            return None
+        return self.interpreter.get_property_cache(node, name).get
+
+    def compile_property_value(self, node):
+        strict = self.strict
+        get_value = self.interpreter.get_value
+        cached_get = self.get_cached_reader(node)
+        def get_property(base, key):
+            if cached_get is not None and isinstance(base, ObjectInstance):
+                return cached_get(base)
+            elif isinstance(base, ObjectType):
+                return base.get(key)
+            return get_value(Reference(base, key, strict=strict))
+        return self.compile_property_access(node, get_property)
+
+    #
+    # Literals
+    #
+
+    def compile_ThisNode(self, node):
+        # 11.1.1
+        contexts = self.interpreter.execution_contexts
+        return lambda: contexts[-1].this_binding
+
+    def compile_NullNode(self, node):
+        return constant(Null)
+
+    def compile_TrueNode(self, node):
+        return constant(True)
+
+    def compile_FalseNode(self, node):
+        return constant(False)
+
+    def compile_literal(self, parser, value):
+        # 7.8
+        try:
+            return constant(
+                parser.parse_string(value, allow_octal=not self.strict)
+            )
+        except ESError, e:
+            # Raised when the literal is evaluated, as by the visitor.
+            return raise_error(e)
+
+    def compile_NumberLiteral(self, node):
+        return self.compile_literal(NumberLiteralParser, node.value)
+
+    def compile_StringLiteral(self, node):
+        return self.compile_literal(StringLiteralParser, node.value)
+
+    def compile_PropertyName(self, node):
+        return constant(self.get_identifier(node.value))
+
+    def compile_ArrayLiteral(self, node):
+        # 11.1.4
+        interpreter = self.interpreter
+        elements = []
+        indexes = []
+        for i, element in enumerate(node.elements):
+            if not isinstance(element, ast.Elision):
+                elements.append(self.compile_value(element))
+                indexes.append(i)
+        length = len(node.elements)
+        def array_literal():
+            return interpreter.ArrayConstructor.from_elements(
+                [element() for element in elements], length, indexes
+            )
+        return array_literal
+
+    def compile_ObjectProperty(self, node):
+        name = self.compile_value(node.name)
+        value = self.compile_value(node.value)
+        to_string = self.interpreter.to_string
+        def object_property():
+            prop_name = to_string(name())
+            descriptor = PropertyDescriptor(
+                value=value(), writable=True, enumerable=True, configurable=True
+            )
+            return (prop_name, descriptor)
+        return object_property
+
+    def compile_ObjectLiteral(self, node):
+        # 11.1.5
+        interpreter = self.interpreter
+        properties = [self.compile(prop) for prop in node.properties]
+        define_literal_property = self.visitor.define_literal_property
+        strict = self.strict
+        def object_literal():
+            new_obj = interpreter.ObjectConstructor.construct([])
+            for prop in properties:
+                name, descriptor = prop()
+                define_literal_property(new_obj, name, descriptor, strict)
+            return new_obj
+        return object_literal
+
+    #
+    # Calls
+    #
+
+    def check_callable(self, function, name):
+        if not isinstance(function, FunctionInstance) or not is_callable(function):
+            raise ESTypeError('%s is not a function' % name)
+
+    def compile_arguments(self, arguments):
+        arguments = [self.compile_value(argument) for argument in arguments or []]
+        if not arguments:
+            return lambda: []
+        return lambda: [argument() for argument in arguments]
+
+    def compile_CallExpression(self, node):
+        # 11.2.3
+        interpreter = self.interpreter
+        arguments = self.compile_arguments(node.arguments)
+        check_callable = self.check_callable
+        expression = node.expression
+        if isinstance(expression, ast.Name):
+            name = self.get_identifier(expression.value)
+            strict = self.strict
+            contexts = interpreter.execution_contexts
+            is_eval = name == 'eval'
+            def call():
+                record = resolve_binding(contexts[-1].lexical_environment, name)
+                if record is None:
+                    raise ESReferenceError('%s is not defined' % name)
+                function = record.get_binding_value(name, strict)
+                args = arguments()
+                check_callable(function, name)
+                this = record.implicit_this_value()
+                # 15.1.2.1.1
+                if is_eval and function is interpreter.EvalFunctionInstance:
+                    return function.call(this, args, direct=True)
+                return function.call(this, args)
+            return call
+        elif isinstance(expression, ast.PropertyAccess):
+            strict = self.strict
+            get_value = interpreter.get_value
+            cached_get = self.get_cached_reader(expression)
+            def get_method(base, key):
+                if cached_get is not None and isinstance(base, ObjectInstance):
+                    function = cached_get(base)
+                elif isinstance(base, ObjectType):
+                    function = base.get(key)
+                else:
+                    function = get_value(Reference(base, key, strict=strict))
+                args = arguments()
+                check_callable(function, key)
+                if key == 'eval' and function is interpreter.EvalFunctionInstance:
+                    return function.call(base, args, direct=True)
+                return function.call(base, args)
+            return self.compile_property_access(expression, get_method)
+        function = self.compile_value(expression)
+        def call():
+            value = function()
+            args = arguments()
+            check_callable(value, '')
+            return value.call(Undefined, args)
+        return call
+
+    def compile_NewExpression(self, node):
+        # 11.2.2
+        reference = self.compile(node.expression)
+        arguments = self.compile_arguments(node.arguments)
+        get_value = self.interpreter.get_value
+        get_qualified_name = self.visitor.get_qualified_name
+        def new():
+            ref = reference()
+            constructor = get_value(ref)
+            if get_primitive_type(constructor) is not ObjectType or \
+                    not callable(getattr(constructor, 'construct', None)):
+                name = get_qualified_name(ref)
+                raise ESTypeError('%s is not a constructor' % name)
+            return constructor.construct(arguments())
+        return new
+
+    def compile_FunctionExpression(self, node):
+        visit_function_expression = self.visitor.visit_FunctionExpression
+        return lambda: visit_function_expression(node)
+
+    #
+    # Operators
+    #
+
+    def compile_UnaryOperation(self, node):
+        # 11.4.6 - 11.4.9
+        expression = self.compile_value(node.expression)
+        op = node.op
+        interpreter = self.interpreter
+        if op == '+':
+            to_number = interpreter.to_number
+            return lambda: to_number(expression())
+        elif op == '-':
+            to_number = interpreter.to_number
+            def negate():
+                old_value = to_number(expression())
+                if math.isnan(old_value):
+                    return NaN
+                return -old_value
+            return negate
+        elif op == '~':
+            to_int32 = interpreter.to_int32
+            return lambda: ~to_int32(expression())
+        elif op == '!':
+            to_boolean = interpreter.to_boolean
+            return lambda: not to_boolean(expression())
+        return self.generic_compile(node)
+
+    def compile_TypeofOperation(self, node):
+        # 11.4.3
+        reference = self.compile(node.expression)
+        get_value = self.interpreter.get_value
+        def typeof():
+            val = reference()
+            if isinstance(val, Reference):
+                if val.is_unresolvable_reference():
+                    return "undefined"
+                val = get_value(val)
+            primitive_type = get_primitive_type(val)
+            if primitive_type is Undefined:
+                return "undefined"
+            elif primitive_type is Null:
+                return "null"
+            elif primitive_type is BooleanType:
+                return "boolean"
+            elif primitive_type is NumberType:
+                return "number"
+            elif primitive_type is StringType:
+                return "string"
+            elif isinstance(val, FunctionInstance):
+                return "function"
+            return "object"
+        return typeof
+
+    def compile_DeleteOperation(self, node):
+        # 11.4.1
+        if isinstance(node.expression, REFERENCE_NODES):
+            visit_delete = self.visitor.visit_DeleteOperation
+            return lambda: visit_delete(node)
+        expression = self.compile_value(node.expression)
+        def delete():
+            expression()
+            return True
+        return delete
+
+    def compile_VoidOperation(self, node):
+        # 11.4.2
+        expression = self.compile_value(node.expression)
+        def void():
+            expression()
+            return Undefined
+        return void
+
+    def compile_count_operation(self, node, prefix):
+        # 11.3.1, 11.3.2, 11.4.4, 11.4.5
+        interpreter = self.interpreter
+        to_number = interpreter.to_number
+        increment = node.op == '++' and 1 or -1
+        strict = self.strict
+        target = node.expression
+        if isinstance(target, ast.Name):
+            name = self.get_identifier(target.value)
+            if not (strict and name in ('eval', 'arguments')):
+                contexts = interpreter.execution_contexts
+                def count():
+                    record = resolve_binding(contexts[-1].lexical_environment, name)
+                    if record is None:
+                        raise ESReferenceError('%s is not defined' % name)
+                    old_value = to_number(record.get_binding_value(name, strict))
+                    new_value = old_value + increment
+                    record.set_mutable_binding(name, new_value, strict)
+                    if prefix:
+                        return new_value
+                    return old_value
+                return count
+        reference = self.compile(target)
+        check_valid_ref = self.visitor.check_valid_ref
+        get_value = interpreter.get_value
+        put_value = interpreter.put_value
+        def count():
+            ref = reference()
+            check_valid_ref(ref)
+            old_value = to_number(get_value(ref))
+            new_value = old_value + increment
+            put_value(ref, new_value)
+            if prefix:
+                return new_value
+            return old_value
+        return count
+
+    def compile_PrefixCountOperation(self, node):
+        return self.compile_count_operation(node, True)
+
+    def compile_PostfixCountOperation(self, node):
+        return self.compile_count_operation(node, False)
+
+    def make_binary_operator(self, op):
+        """
+        Return the function applying a binary operator to two values.
+        """
+        return self.visitor.binary_operators[op]
+
+    def compile_BinaryOperation(self, node):
+        left = self.compile_value(node.left)
+        right = self.compile_value(node.right)
+        op = node.op
+        if op == '&&' or op == '||':
+            # 11.11
+            to_boolean = self.interpreter.to_boolean
+            is_and = op == '&&'
+            def logical():
+                lval = left()
+                if to_boolean(lval) != is_and:
+                    return lval
+                return right()
+            return logical
+        operator = self.make_binary_operator(op)
+        return lambda: operator(left(), right())
+
+    def make_compare_operator(self, op):
+        """
+        Return the function applying a relational or equality operator to
+        two values, or ``None`` for other operators.
+        """
+        return self.visitor.compare_operators.get(op)
+
+    def compile_CompareOperation(self, node):
+        left = self.compile_value(node.left)
+        right = self.compile_value(node.right)
+        operator = self.make_compare_operator(node.op)
+        return lambda: operator(left(), right())
+
+    def compile_Conditional(self, node):
+        # 11.12
+        condition = self.compile_condition(node.condition)
+        then_expression = self.compile_value(node.then_expression)
+        else_expression = self.compile_value(node.else_expression)
+        def conditional():
+            if condition():
+                return then_expression()
+            return else_expression()
+        return conditional
+
+    def compile_Assignment(self, node):
+        # 11.13
+        interpreter = self.interpreter
+        value = self.compile_value(node.value)
+        strict = self.strict
+        target = node.target
+        if node.op == '=' and isinstance(target, ast.Name):
+            name = self.get_identifier(target.value)
+            if not (strict and name in ('eval', 'arguments')):
+                return self.compile_name_assignment(name, value)
+        elif node.op == '=' and isinstance(target, ast.PropertyAccess):
+            put_value = interpreter.put_value
+            def put_property(base, key):
+                rval = value()
+                if isinstance(base, ObjectType):
+                    base.put(key, rval, strict)
+                else:
+                    put_value(Reference(base, key, strict=strict), rval)
+                return rval
+            return self.compile_property_access(target, put_property)
+        reference = self.compile(target)
+        check_valid_ref = self.visitor.check_valid_ref
+        get_value = interpreter.get_value
+        put_value = interpreter.put_value
+        if node.op == '=':
+            def assign():
+                lref = reference()
+                check_valid_ref(lref)
+                rval = value()
+                put_value(lref, rval)
+                return rval
+            return assign
+        operator = self.make_binary_operator(node.op[:-1])
+        def compound_assign():
+            lref = reference()
+            check_valid_ref(lref)
+            lval = get_value(lref)
+            r = operator(lval, value())
+            put_value(lref, r)
+            return r
+        return compound_assign
+
+    def compile_name_assignment(self, name, value):
+        interpreter = self.interpreter
+        strict = self.strict
+        contexts = interpreter.execution_contexts
+        def assign():
+            record = resolve_binding(contexts[-1].lexical_environment, name)
+            rval = value()
+            # 8.7.2
+            if record is not None:
+                record.set_mutable_binding(name, rval, strict)
+            elif strict:
+                raise ESReferenceError('Cannot resolve referenced name: %s' % name)
+            else:
+                interpreter.Global.put(name, rval, False)
+            return rval
+        return assign
+
+    #
+    # Statements
+    #
+
+    def compile_Block(self, node, labels=EMPTY_LABELS):
+        return self.compile_statement_list(node.statements)
+
+    def compile_Program(self, node, labels=EMPTY_LABELS):
+        return self.compile_statement_list(node.statements)
+
+    def compile_ExpressionStatement(self, node, labels=EMPTY_LABELS):
+        expression = self.compile_value(node.expression)
+        return lambda: ('normal', expression(), None)
+
+    def compile_EmptyStatement(self, node, labels=EMPTY_LABELS):
+        return constant(NORMAL)
+
+    compile_FunctionDeclaration = compile_EmptyStatement
+
+    def compile_VariableStatement(self, node, labels=EMPTY_LABELS):
+        # 12.2
+        declarations = []
+        for declaration in node.declarations:
+            compiled = self.compile_VariableDeclaration(declaration)
+            if compiled is not None:
+                declarations.append(compiled)
+        def variable_statement():
+            for declaration in declarations:
+                declaration()
+            return NORMAL
+        return variable_statement
+
+    def compile_VariableDeclaration(self, node):
+        """
+        Compile a declaration, or return ``None`` for declarations that do
+        nothing when run.
+        """
+        name = self.get_identifier(node.name)
+        if self.strict and name in ('eval', 'arguments'):
+            visit_variable_declaration = self.visitor.visit_VariableDeclaration
+            return lambda: visit_variable_declaration(node)
+        elif node.value:
+            return self.compile_name_assignment(name, self.compile_value(node.value))
+        return None
+
+    def compile_IfStatement(self, node, labels=EMPTY_LABELS):
+        # 12.5
+        condition = self.compile_condition(node.condition)
+        then_statement = self.compile_statement(node.then_statement)
+        if node.else_statement:
+            else_statement = self.compile_statement(node.else_statement)
+        else:
+            else_statement = constant(NORMAL)
+        def if_statement():
+            if condition():
+                return then_statement()
+            return else_statement()
+        return if_statement
+
+    def compile_loop(self, condition, body, labels, next=None, first=True):
+        """
+        Compile a loop running ``body`` while ``condition`` is true, and
+        ``next`` after each iteration. Unless ``first`` is true the condition
+        is only checked after the first iteration.
+        """
+        def loop():
+            v = None
+            checked = first
+            while not checked or condition():
+                checked = True
+                completion = body()
+                comp_type, value, target = completion
+                if value is not None:
+                    v = value
+                if comp_type != 'normal':
+                    in_label_set = target is None or target in labels
+                    if comp_type == 'break' and in_label_set:
+                        break
+                    elif comp_type != 'continue' or not in_label_set:
+                        return completion
+                if next is not None:
+                    next()
+            return ('normal', v, None)
+        return loop
+
+    def compile_DoWhileStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.1
+        return self.compile_loop(
+            self.compile_condition(node.condition),
+            self.compile_statement(node.body), labels, first=False
+        )
+
+    def compile_WhileStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.2
+        return self.compile_loop(
+            self.compile_condition(node.condition),
+            self.compile_statement(node.body), labels
+        )
+
+    def compile_ForStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.3
+        initialize = node.initialize
+        if isinstance(initialize, ast.Statement):
+            initialize = self.compile_statement(initialize)
+        elif initialize:
+            initialize = self.compile_value(initialize)
+        if node.condition:
+            condition = self.compile_condition(node.condition)
+        else:
+            condition = constant(True)
+        next = node.next and self.compile_value(node.next) or None
+        loop = self.compile_loop(
+            condition, self.compile_statement(node.body), labels, next
+        )
+        if not initialize:
+            return loop
+        def for_statement():
+            initialize()
+            return loop()
+        return for_statement
+
+    def compile_ForInStatement(self, node, labels=EMPTY_LABELS):
+        # 12.6.4
+        interpreter = self.interpreter
+        enumerable = self.compile_value(node.enumerable)
+        body = self.compile_statement(node.body)
+        each = node.each
+        if isinstance(each, ast.VariableDeclaration):
+            visit_variable_declaration = self.visitor.visit_VariableDeclaration
+            each = lambda: visit_variable_declaration(node.each)
+        else:
+            each = self.compile(each)
+        put_value = interpreter.put_value
+        def for_in_statement():
+            expr_val = enumerable()
+            if expr_val is Null or expr_val is Undefined:
+                return NORMAL
+            obj = interpreter.to_object(expr_val)
+            v = None
+            seen = set()
+            current = obj
+            while current is not None:
+                for key in current.own_property_names():
+                    if key in seen:
+                        continue
+                    desc = current.get_own_property(key)
+                    if desc is Undefined or not desc.enumerable:
+                        continue
+                    seen.add(key)
+                    put_value(each(), key)
+                    completion = body()
+                    comp_type, value, target = completion
+                    if value is not None:
+                        v = value
+                    if comp_type != 'normal':
+                        in_label_set = target is None or target in labels
+                        if comp_type == 'break' and in_label_set:
+                            return ('normal', v, None)
+                        elif comp_type != 'continue' or not in_label_set:
+                            return completion
+                current = getattr(current, 'prototype', None)
+            return ('normal', v, None)
+        return for_in_statement
+
+    def compile_LabelledStatement(self, node, labels=EMPTY_LABELS):
+        # 12.12
+        label = node.label.value
+        statement = self.compile_statement(node.statement, labels | set([label]))
+        def labelled_statement():
+            completion = statement()
+            if completion[0] == 'break' and completion[2] == label:
+                return ('normal', completion[1], None)
+            return completion
+        return labelled_statement
+
+    def compile_ContinueStatement(self, node, labels=EMPTY_LABELS):
+        return constant(('continue', None, node.target))
+
+    def compile_BreakStatement(self, node, labels=EMPTY_LABELS):
+        return constant(('break', None, node.target))
+
+    def compile_ReturnStatement(self, node, labels=EMPTY_LABELS):
+        # 12.9
+        if node.expression is None:
+            return constant(('return', None, None))
+        expression = self.compile_value(node.expression)
+        return lambda: ('return', expression(), None)
+
+    def compile_Throw(self, node, labels=EMPTY_LABELS):
+        # 12.13
+        exception = self.compile_value(node.exception)
+        return lambda: ('throw', exception(), None)
+
+    def compile_SwitchStatement(self, node, labels=EMPTY_LABELS):
+        # 12.11
+        strict_equal = self.interpreter.strict_equal
+        expression = self.compile_value(node.expression)
+        clauses = []
+        default = None
+        for i, clause in enumerate(node.cases):
+            if clause.label is None:
+                default = i
+                selector = None
+            else:
+                selector = self.compile_value(clause.label)
+            clauses.append(
+                (selector, self.compile_statement_list(clause.statements))
+            )
+        def switch_statement():
+            expr_val = expression()
+            start = default
+            for i, (selector, statements) in enumerate(clauses):
+                if selector is not None and strict_equal(selector(), expr_val):
+                    start = i
+                    break
+            v = None
+            if start is None:
+                return NORMAL
+            for selector, statements in clauses[start:]:
+                comp_type, value, target = statements()
+                if value is not None:
+                    v = value
+                if comp_type == 'break' and target is None:
+                    break
+                elif comp_type != 'normal':
+                    return (comp_type, v, target)
+            return ('normal', v, None)
+        return switch_statement
+
+    def compile_WithStatement(self, node, labels=EMPTY_LABELS):
+        # 12.10
+        visit_statement_list = self.visitor.visit_statement_list
+        statements = [node]
+        return lambda: visit_statement_list(statements)
+
+    def compile_TryStatement(self, node, labels=EMPTY_LABELS):
+        # 12.14
+        interpreter = self.interpreter
+        exception_to_error = interpreter.exception_to_error
+        contexts = interpreter.execution_contexts
+        try_block = self.compile_statement(node.try_block)
+        catch_block = finally_block = None
+        if node.catch_var:
+            identifier = node.catch_var.value
+            catch_block = self.compile_statement(node.catch_block)
+        if node.finally_block:
+            finally_block = self.compile_statement(node.finally_block)
+        def try_statement():
+            try:
+                result = try_block()
+            except ESError, e:
+                result = ('throw', exception_to_error(e), None)
+            if catch_block is not None and result[0] == 'throw':
+                execution_context = contexts[-1]
+                old_env = execution_context.lexical_environment
+                catch_env = old_env.new_declarative_environment(old_env)
+                env = catch_env.environment_record
+                env.create_mutable_binding(identifier)
+                env.set_mutable_binding(identifier, result[1], False)
+                execution_context.lexical_environment = catch_env
+                try:
+                    result = catch_block()
+                finally:
+                    execution_context.lexical_environment = old_env
+            if finally_block is not None:
+                completion = finally_block()
+                if completion[0] != 'normal':
+                    return completion
+            return result
+        return try_statement
@@ -8,23 +8,13 @@ from .objects import PropertyDescriptor
 from .exceptions import ESTypeError, ESReferenceError
 
 
-class Binding(object):
-    """
-    A name binding in an execution context.
-    """
-    def __init__(self, value=None, can_delete=True, is_mutable=True):
-        self.value = value
-        self.can_delete = can_delete
-        self.is_mutable = is_mutable
-
-
 class EnvironmentRecord(object):
     """
     Associates names with bindings in an syntactic context.
 
     10.2.1
     """
-    pass
+    __slots__ = ()
 
 
 class DeclarativeEnvironmentRecord(EnvironmentRecord):
@@ -32,43 +22,86 @@ class DeclarativeEnvironmentRecord(EnvironmentRecord):
     Associates names with bindings in functions, variable declarations, catch 
     clauses, etc.
 
+    The values of the bindings are kept in the flat ``values`` list, at the
+    slots that ``names`` maps the identifiers to. A record made for a
+    ``ScopeLayout`` shares the layout's mapping, and starts with a slot for
+    each of its names, until a binding is added or deleted. Slots of deleted
+    bindings are not reused. A slot holding ``None`` is an uninitialized
+    immutable binding.
+
     10.2.1.1
     """
-    def __init__(self):
-        self.bindings = {}
+    __slots__ = ('layout', 'names', 'values', 'immutable', 'deletable')
+
+    def __init__(self, layout=None):
+        self.layout = layout
+        if layout is None:
+            self.names = {}
+            self.values = []
+        else:
+            self.names = layout.slots
+            self.values = [Undefined] * len(layout.names)
+        self.immutable = ()
+        self.deletable = ()
+
+    def unshare_names(self):
+        # Copy the mapping shared with the layout before changing it
+        if self.layout is not None:
+            self.names = dict(self.names)
+            self.layout = None
+
+    def add_slot(self, identifier):
+        self.unshare_names()
+        slot = self.names[identifier] = len(self.values)
+        self.values.append(Undefined)
+        return slot
 
     def has_binding(self, identifier):
         """
         10.2.1.1.1
         """
-        return identifier in self.bindings
+        return identifier in self.names
 
-    def create_mutable_binding(self, identifier, can_delete=True):
+    def create_mutable_binding(self, identifier, can_delete=False):
         """
         10.2.1.1.2
         """
-        binding = Binding(value=Undefined, can_delete=can_delete, is_mutable=True)
-        self.bindings[identifier] = binding
-        return binding
+        slot = self.names.get(identifier)
+        if slot is None:
+            slot = self.add_slot(identifier)
+        self.values[slot] = Undefined
+        if can_delete:
+            if not self.deletable:
+                self.deletable = set()
+            self.deletable.add(slot)
+        return slot
 
     def set_mutable_binding(self, identifier, value, strict=False):
         """
         10.2.1.1.3
         """
-        binding = self.bindings[identifier]
-        if binding.is_mutable:
-            binding.value = value
+        self.set_slot_value(self.names[identifier], value, strict)
+
+    def set_slot_value(self, slot, value, strict=False):
+        if slot not in self.immutable:
+            self.values[slot] = value
         elif strict:
-            raise ESTypeError('%s is immutable' % identifier)
+            raise ESTypeError('%s is immutable' % self.get_slot_name(slot))
+
+    def get_slot_name(self, slot):
+        for name, index in self.names.iteritems():
+            if index == slot:
+                return name
 
     def get_binding_value(self, identifier, strict=False):
         """
         10.2.1.1.4
         """
-        if identifier not in self.bindings and strict:
-            raise ESReferenceError('%s is undefined' % identifier)
-        binding = self.bindings.get(identifier)
-        value = binding and binding.value
+        slot = self.names.get(identifier)
+        if slot is None:
+            value = None
+        else:
+            value = self.values[slot]
         if value is None and strict:
             raise ESReferenceError('%s is undefined' % identifier)
         elif value is None:
@@ -79,11 +112,14 @@ class DeclarativeEnvironmentRecord(EnvironmentRecord):
         """
         10.2.1.1.5
         """
-        if identifier not in self.bindings:
+        slot = self.names.get(identifier)
+        if slot is None:
             return True
-        binding = self.bindings[identifier]
-        if binding.can_delete:
-            del self.bindings[identifier]
+        if slot in self.deletable:
+            self.unshare_names()
+            del self.names[identifier]
+            self.values[slot] = None
+            self.deletable.discard(slot)
             return True
         return False
 
@@ -91,17 +127,24 @@ class DeclarativeEnvironmentRecord(EnvironmentRecord):
         """
         10.2.1.1.7
         """
-        binding = Binding(value=None, can_delete=False, is_mutable=False)
-        self.bindings[identifier] = binding
-        return binding
+        slot = self.names.get(identifier)
+        if slot is None:
+            slot = self.add_slot(identifier)
+        self.values[slot] = None
+        if not self.immutable:
+            self.immutable = set()
+        self.immutable.add(slot)
+        if slot in self.deletable:
+            self.deletable.discard(slot)
+        return slot
 
     def initialize_immutable_binding(self, identifier, value):
         """
         10.2.1.1.8
         """
-        binding = self.bindings[identifier]
-        if binding.value is None:
-            binding.value = value
+        slot = self.names[identifier]
+        if self.values[slot] is None:
+            self.values[slot] = value
 
     def implicit_this_value(self):
         """
@@ -116,6 +159,8 @@ class ObjectEnvironmentRecord(EnvironmentRecord):
 
     10.2.1.2
     """
+    __slots__ = ('bindings', 'provide_this')
+
     def __init__(self, bindings, provide_this=False):
         # bindings here is an ObjectInstance
         self.bindings = bindings
@@ -127,14 +172,14 @@ class ObjectEnvironmentRecord(EnvironmentRecord):
         """
         return self.bindings.has_property(identifier)
 
-    def create_mutable_binding(self, identifier, can_delete=True):
+    def create_mutable_binding(self, identifier, can_delete=False):
         """
         10.2.1.2.2
         """
         if not self.bindings.has_property(identifier):
             configurable = can_delete
             desc = PropertyDescriptor(
-                value=None, writable=True, enumerable=True, configurable=True
+                value=Undefined, writable=True, enumerable=True, configurable=True
             )
             self.bindings.define_own_property(identifier, desc, True) # FIXME
 
@@ -177,6 +222,8 @@ class LexicalEnvironment(object):
 
     10.2
     """
+    __slots__ = ('outer', 'environment_record')
+
     def __init__(self):
         self.outer = None
         self.environment_record = None
@@ -192,13 +239,13 @@ class LexicalEnvironment(object):
         elif self.outer is None:
             return Reference(Undefined, identifier, strict=strict)
 
-    def new_declarative_environment(self, outer):
+    def new_declarative_environment(self, outer, layout=None):
         """
         10.2.2.2
         """
         env = LexicalEnvironment()
         env.outer = outer
-        env.environment_record = DeclarativeEnvironmentRecord()
+        env.environment_record = DeclarativeEnvironmentRecord(layout)
         return env
 
     def new_object_environment(self, obj, outer):
@@ -218,6 +265,8 @@ class ExecutionContext(object):
 
     10.3
     """
+    __slots__ = ('lexical_environment', 'variable_environment', 'this_binding')
+
     def __init__(self, lexical_environment, variable_environment, this_binding):
         self.lexical_environment = lexical_environment
         self.variable_environment = variable_environment
@@ -230,6 +279,8 @@ class Reference(object):
 
     8.7
     """
+    __slots__ = ('base', 'name', 'strict')
+
     def __init__(self, base, name, strict=False):
         self.base = base
         self.name = name
@@ -273,3 +324,46 @@ class Reference(object):
         Returns whether the base is undefined.
         """
         return self.base is Undefined
+
+
+class SlotReference(Reference):
+    """
+    A reference to a binding that was resolved ahead of time to a slot of a
+    declarative environment record.
+    """
+    __slots__ = ('slot',)
+
+    def __init__(self, base, name, slot, strict=False):
+        self.base = base
+        self.name = name
+        self.slot = slot
+        self.strict = strict
+
+    def get_slot_value(self):
+        """
+        Returns the value of the binding.
+        """
+        value = self.base.values[self.slot]
+        if value is None:
+            return self.base.get_binding_value(self.name, self.strict)
+        return value
+
+    def set_slot_value(self, value):
+        """
+        Sets the value of the binding.
+        """
+        self.base.set_slot_value(self.slot, value, self.strict)
+
+
+class CachedReference(Reference):
+    """
+    A reference to a property with a constant name, read through the inline
+    cache of the site that made it.
+    """
+    __slots__ = ('cache',)
+
+    def __init__(self, base, name, cache, strict=False):
+        self.base = base
+        self.name = name
+        self.cache = cache
+        self.strict = strict
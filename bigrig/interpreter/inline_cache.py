@@ -0,0 +1,147 @@
+"""
+Inline caches for property reads.
+
+Each site reading a property with a constant name, as ``o.name`` or
+``o["name"]``, keeps a ``PropertyCache`` of the shapes of the objects it has
+read from, and of where the property was found for each: in the object
+itself, or in one of its prototypes. A read from an object of a remembered
+shape takes the value straight from the values of the object holding the
+property, once the prototypes in between are checked to be the same objects
+with the same shapes, without walking the prototype chain or building
+descriptors.
+
+A site that has seen one shape is monomorphic, and one that has seen up to
+``MAX_ENTRIES`` shapes polymorphic. Sites seeing more are megamorphic, and
+read objects of other shapes the slow way. Exotic objects and objects in
+dictionary mode are never cached, nor are properties found on them.
+"""
+from .types import Undefined
+
+# Shapes remembered by a site before it is megamorphic
+MAX_ENTRIES = 4
+
+# Names whose reads from functions are checked by ``FunctionInstance.get``,
+# 15.3.5.4
+UNCACHED_NAMES = frozenset([u'caller'])
+
+# States of a site
+UNINITIALIZED = 'uninitialized'
+MONOMORPHIC = 'monomorphic'
+POLYMORPHIC = 'polymorphic'
+MEGAMORPHIC = 'megamorphic'
+
+
+class PropertyCache(object):
+    """
+    The shapes seen by a site reading the property ``name``, with hit and
+    miss counts. Only a description of the site is kept, so caches held in
+    tables keyed weakly by their sites do not keep them alive.
+    """
+    __slots__ = ('site', 'name', 'entries', 'hits', 'misses', 'megamorphic')
+
+    def __init__(self, site, name):
+        self.site = describe_site(site)
+        self.name = name
+        # (shape, prototype, ((holder, holder shape), ...), index) tuples.
+        # The prototype is that of objects read from, or ``None`` when the
+        # property is their own, and the holders lead from it to the object
+        # holding the property, whose value is at the index. Prototypes are
+        # set once objects are made, so only the first needs checking.
+        self.entries = []
+        self.hits = 0
+        self.misses = 0
+        self.megamorphic = False
+
+    @property
+    def state(self):
+        if self.megamorphic:
+            return MEGAMORPHIC
+        elif not self.entries:
+            return UNINITIALIZED
+        elif len(self.entries) == 1:
+            return MONOMORPHIC
+        return POLYMORPHIC
+
+    def get(self, obj):
+        """
+        Return the value of the property of an ``ObjectInstance``.
+        """
+        shape = obj.shape
+        for entry_shape, prototype, chain, index in self.entries:
+            if entry_shape is shape:
+                if prototype is None:
+                    self.hits += 1
+                    return obj.values[index]
+                if obj.prototype is prototype:
+                    for holder, holder_shape in chain:
+                        if holder.shape is not holder_shape:
+                            break
+                    else:
+                        self.hits += 1
+                        return holder.values[index]
+                break
+        self.misses += 1
+        return self.lookup(obj)
+
+    def lookup(self, obj):
+        """
+        Read the property of ``obj`` the slow way, remembering where it was
+        found.
+        """
+        name = self.name
+        if name in UNCACHED_NAMES:
+            return obj.get(name)
+        chain = []
+        holder = obj
+        while True:
+            if holder.exotic or holder.properties is not None:
+                return obj.get(name)
+            index = holder.shape.slots.get(name)
+            if index is not None:
+                break
+            holder = holder.prototype
+            if holder is None:
+                return Undefined
+            chain.append((holder, holder.shape))
+        shape = obj.shape
+        entry = (shape, chain and obj.prototype or None, tuple(chain), index)
+        entries = self.entries
+        for i, other in enumerate(entries):
+            if other[0] is shape:
+                # Objects of the shape have other prototypes, or their
+                # prototypes have changed.
+                entries[i] = entry
+                break
+        else:
+            if len(entries) < MAX_ENTRIES:
+                entries.append(entry)
+            else:
+                self.megamorphic = True
+        return holder.values[index]
+
+
+def describe_site(site):
+    """
+    Describe the site of a cache, a syntax tree node or a ``(code, offset)``
+    pair, for statistics.
+    """
+    if isinstance(site, tuple):
+        code, offset = site
+        return '%r+%d' % (code, offset)
+    locator = getattr(site, 'locator', None)
+    if locator is None:
+        return type(site).__name__
+    return '%s:%s:%s' % (locator.filename, locator.line, locator.column)
+
+
+def get_statistics(caches):
+    """
+    Return ``(site, name, state, hits, misses)`` tuples describing the
+    caches that have been read through, those missing most often first.
+    """
+    statistics = [
+        (cache.site, cache.name, cache.state, cache.hits, cache.misses)
+        for cache in caches if cache.hits or cache.misses
+    ]
+    statistics.sort(key=lambda row: (-row[4], -row[3], row[0]))
+    return statistics
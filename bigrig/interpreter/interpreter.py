@@ -3,6 +3,7 @@
 """
 from itertools import izip_longest
 import math
+import weakref
 from ..parser.visitor import NodeVisitor
 from ..parser.ast import Program, Function, ExpressionStatement, StringLiteral
 from ..parser import ParseException
@@ -12,7 +13,10 @@ from .exceptions import (
     ESRangeError, ESEvalError, ESURIError, WrappedError
 )
 from .environment import ExecutionContext, EnvironmentRecord, Reference
-from .types import Conversions, Undefined, Null, NumberType, ObjectType, get_primitive_type
+from .types import (
+    Conversions, Undefined, Null, NumberType, ObjectType, NUMBER_TYPES,
+    STRING_TYPES, get_primitive_type
+)
 from .objects import PropertyDescriptor, is_accessor_descriptor, is_data_descriptor
 from .objects.object import ObjectConstructor, ObjectPrototype
 from .objects.function import (
@@ -23,7 +27,7 @@ from .objects.arguments import Arguments
 from .objects.array import ArrayConstructor, ArrayPrototype
 from .objects.boolean import BooleanConstructor, BooleanPrototype
 from .objects.date import DateConstructor, DatePrototype
-from .objects.error import create_error
+from .objects.error import create_error, ErrorInstance
 from .objects.global_obj import GlobalObject
 from .objects.math import MathObject
 from .objects.number import NumberConstructor, NumberPrototype
@@ -31,22 +35,60 @@ from .objects.regexp import RegExpConstructor, RegExpPrototype
 from .objects.string import StringConstructor, StringPrototype
 from .objects.console import ConsoleObject
 from .visitor import EvaluationVisitor
+from .compiler import ClosureCompiler
+from .jit import TieredCompiler, ProfilingVisitor
+from .vm import VirtualMachine
 from .environment import LexicalEnvironment, ExecutionContext, ObjectEnvironmentRecord
-from .ast_utils import DeclarationVisitor
-from .literals import IdentifierParser
+from .ast_utils import DeclarationVisitor, make_function_layout
+from .inline_cache import PropertyCache
+from .literals import constants
+
 
+# Ways of executing code: walking the syntax tree with the
+# ``EvaluationVisitor``, compiling it to closures with the
+# ``ClosureCompiler`` first, walking it until the ``TieredCompiler``
+# translates hot functions to Python, or compiling it to bytecode run by the
+# ``VirtualMachine``.
+BACKENDS = ('visitor', 'closure', 'tiered', 'bytecode')
 
 class Interpreter(Conversions):
     """
     Object responsible for holding state and executing ECMAScript code.
     """
-    def __init__(self):
+    def __init__(self, lazy_functions=False, ast_cache=None, backend='visitor',
+                 cache_statistics=False):
+        if backend not in BACKENDS:
+            raise ValueError('Unknown backend: %s' % backend)
+        self.lazy_functions = lazy_functions
+        self.ast_cache = ast_cache
+        # With ``cache_statistics`` every inline cache made is kept, so that
+        # statistics include those of code that has since been freed.
+        self.all_inline_caches = [] if cache_statistics else None
         self.execution_contexts = []
-        self.declarations = {}
+        # Tables about syntax tree nodes, and code objects, are weakly keyed,
+        # so that code built by ``eval`` or ``Function`` is freed with them.
+        self.declarations = weakref.WeakKeyDictionary()
+        self.layouts = weakref.WeakKeyDictionary()
+        self.resolutions = weakref.WeakKeyDictionary()
+        # The inline caches of property reads, by syntax tree node, and by
+        # offset for each code object the ``VirtualMachine`` runs
+        self.inline_caches = weakref.WeakKeyDictionary()
+        self.code_caches = weakref.WeakKeyDictionary()
         self.strict_contexts = []
-        self.label_sets = {}
+        self.label_sets = weakref.WeakKeyDictionary()
         self.declaration_visitor = DeclarationVisitor()
-        self.evaluation_visitor = EvaluationVisitor(self)
+        self.backend = backend
+        self.compiler = None
+        self.jit = None
+        if backend == 'tiered':
+            self.jit = TieredCompiler(self)
+            self.evaluation_visitor = ProfilingVisitor(self, self.jit)
+        else:
+            self.evaluation_visitor = EvaluationVisitor(self)
+        if backend == 'closure':
+            self.compiler = ClosureCompiler(self)
+        elif backend == 'bytecode':
+            self.compiler = VirtualMachine(self)
         self.setup()
 
     def setup(self):
@@ -56,6 +98,11 @@ class Interpreter(Conversions):
         # Prototypes
         self.ObjectPrototype = ObjectPrototype(self)
         self.FunctionPrototype = FunctionPrototype(self)
+        for prototype in (self.ObjectPrototype, self.FunctionPrototype):
+            for name in prototype.own_property_names():
+                method = prototype.get(name)
+                if isinstance(method, NativeFunctionInstance):
+                    method.prototype = self.FunctionPrototype
         self.NumberPrototype = NumberPrototype(self)
         self.BooleanPrototype = BooleanPrototype(self)
         self.StringPrototype = StringPrototype(self)
@@ -192,7 +239,7 @@ class Interpreter(Conversions):
         if strict and declaration.parameters:
             seen = set()
             for parameter in declaration.parameters:
-                name = IdentifierParser.parse_string(parameter)
+                name = constants.identifier(parameter)
                 if name in seen:
                     raise ESSyntaxError(
                         'Duplicate parameter names not allowed in strict mode'
@@ -203,7 +250,7 @@ class Interpreter(Conversions):
                     )
                 seen.add(name)
         if strict and declaration.name:
-            name = IdentifierParser.parse_string(declaration.name)
+            name = constants.identifier(declaration.name)
             if name in (u'eval', u'arguments'):
                 raise ESSyntaxError(
                     'Use of %s as a function name is not allowed in strict mode' % name
@@ -225,17 +272,89 @@ class Interpreter(Conversions):
             func.define_own_property('arguments', PropertyDescriptor.clone(desc), False)
         return func
 
-    def visit_declarations(self, ast):
-        declaration_map = self.declaration_visitor.get_node_scopes(ast)
+    def visit_declarations(self, ast, strict=False):
+        visitor = self.declaration_visitor
+        declaration_map = visitor.get_node_scopes(ast, strict)
         self.declarations.update(declaration_map)
+        self.layouts.update(visitor.layouts)
+        self.resolutions.update(visitor.resolutions)
+
+    def get_function_layout(self, node, function_declarations, variable_declarations):
+        """
+        Return the layout of the environment of a function's code.
+        """
+        layout = self.layouts.get(node)
+        if layout is None:
+            layout = self.layouts[node] = make_function_layout(
+                node.parameters or [], function_declarations, variable_declarations
+            )
+        return layout
+
+    def get_property_cache(self, site, name):
+        """
+        Return the inline cache of a site reading the property ``name``.
+        """
+        cache = self.inline_caches.get(site)
+        if cache is None:
+            cache = self.inline_caches[site] = self.make_property_cache(site, name)
+        return cache
+
+    def make_property_cache(self, site, name):
+        """
+        Make a new inline cache for a site reading the property ``name``.
+        """
+        cache = PropertyCache(site, name)
+        if self.all_inline_caches is not None:
+            self.all_inline_caches.append(cache)
+        return cache
+
+    def get_code_caches(self, code):
+        """
+        Return the inline caches of the property reads of a code object, by
+        instruction offset.
+        """
+        caches = self.code_caches.get(code)
+        if caches is None:
+            caches = self.code_caches[code] = {}
+        return caches
+
+    def get_inline_caches(self):
+        """
+        Return the inline caches of all the property reads still alive, or
+        of all those ever made given ``cache_statistics``.
+        """
+        if self.all_inline_caches is not None:
+            return list(self.all_inline_caches)
+        caches = self.inline_caches.values()
+        for code_caches in self.code_caches.values():
+            caches.extend(code_caches.itervalues())
+        return caches
+
+    def parse_function_body(self, node):
+        """
+        Parse the pre-parsed body of a function and visit its declarations.
+        """
+        body = node.body
+        try:
+            node.body = body.parse()
+        except ParseException, e:
+            raise ESSyntaxError(e.message)
+        self.visit_declarations(node, body.outer_strict)
+        return self.declarations[node]
 
     def make_string_parser(self, string, filename=None):
-        return make_string_parser(string, filename=filename)
+        return make_string_parser(
+            string, filename=filename, lazy_functions=self.lazy_functions
+        )
 
     def execute_statements(self, statements):
+        if self.compiler is not None:
+            return self.compiler.execute_statements(statements)
         return self.evaluation_visitor.visit_statement_list(statements)
 
     def execute_function(self, node):
+        if self.compiler is not None:
+            return self.compiler.execute_function(node)
         return self.execute_statements(node.body)
 
     def execute_program(self, program):
@@ -251,13 +370,64 @@ class Interpreter(Conversions):
             self.leave_strict_context()
         return value
 
+    def execute_code(self, code):
+        """
+        Execute a program compiled to bytecode ahead of time.
+        """
+        if self.backend != 'bytecode':
+            raise ValueError('Bytecode is only run by the bytecode backend')
+        self.compiler.prepare(code)
+        function_declarations, variable_declarations, strict = self.declarations[code]
+        self.declaration_binding_instantiation(
+            'global', function_declarations, variable_declarations, strict=strict
+        )
+        self.enter_strict_context(strict)
+        try:
+            completion_type, value, target = self.compiler.run(code)
+        finally:
+            self.leave_strict_context()
+        return value
+
+    def parse_string(self, string, filename=None):
+        """
+        Parse a program, from the abstract syntax tree cache if there is one.
+        """
+        parser = self.make_string_parser(string, filename=filename)
+        if self.ast_cache is not None:
+            return self.ast_cache.parse(parser)
+        return parser.parse()
+
     def execute_string(self, string, filename=None):
         try:
-            program = self.make_string_parser(string, filename=filename).parse()
+            program = self.parse_string(string, filename=filename)
             return self.execute_program(program)
         except ParseException, e:
             return self.SyntaxErrorConstructor.construct([e.message])
 
+    def execute_files(self, paths, workers=1):
+        """
+        Execute script files, given as paths or open file objects, in order,
+        parsing them in ``workers`` processes ahead of execution. Stops at the
+        first script that does not parse or results in an error, returning the
+        error, and otherwise returns the result of the last script.
+        """
+        from ..parser.parallel import iter_parse_many
+        programs = iter_parse_many(
+            paths, workers, lazy_functions=self.lazy_functions,
+            ast_cache=self.ast_cache
+        )
+        result = None
+        try:
+            for program in programs:
+                result = self.execute_program(program)
+                if isinstance(result, ErrorInstance):
+                    break
+        except ParseException, e:
+            result = self.SyntaxErrorConstructor.construct([e.message])
+        finally:
+            programs.close()
+        return result
+
     def declaration_binding_instantiation(self, declaration_binding_type,
                                           function_declarations, variable_declarations,
                                           function_instance=None, arguments=None, strict=False):
@@ -267,6 +437,10 @@ class Interpreter(Conversions):
         # 10.4.3 for function code
         variable_env = self.execution_context.variable_environment
         env = variable_env.environment_record
+        if declaration_binding_type == 'function' and env.layout is not None:
+            return self.instantiate_function_bindings(
+                env, function_declarations, function_instance, arguments, strict
+            )
         configurable_bindings = declaration_binding_type == 'eval'
         names = []
         # If we're in a function call, bind the passed arguments
@@ -274,13 +448,13 @@ class Interpreter(Conversions):
             names = function_instance.formal_parameters
             for name, value in izip_longest(names, arguments, fillvalue=Undefined):
                 if name is not Undefined:
-                    name = IdentifierParser.parse_string(name)
+                    name = constants.identifier(name)
                 if not env.has_binding(name):
                     env.create_mutable_binding(name)
                     env.set_mutable_binding(name, value, strict=strict)
         # Step 5
         for function_declaration in function_declarations:
-            function_name = IdentifierParser.parse_string(function_declaration.name)
+            function_name = constants.identifier(function_declaration.name)
             func = self.create_function(function_declaration, variable_env, strict)
             if not env.has_binding(function_name):
                 env.create_mutable_binding(function_name, configurable_bindings)
@@ -308,13 +482,47 @@ class Interpreter(Conversions):
                 env.create_mutable_binding('arguments')
                 env.set_mutable_binding('arguments', arguments_object, strict=False)
         for variable_declaration in variable_declarations:
-            variable_name = variable_declaration.name
+            variable_name = constants.identifier(variable_declaration.name)
             if not env.has_binding(variable_name):
                 env.create_mutable_binding(variable_name, configurable_bindings)
                 env.set_mutable_binding(variable_name, Undefined, strict=strict)
 
+    def instantiate_function_bindings(self, env, function_declarations,
+                                      function_instance, arguments, strict):
+        """
+        Bind the arguments, functions and ``arguments`` object of a function
+        call in the slots of an environment record made for the layout of
+        the function, in the same way as declaration binding instantiation.
+        Variables start in their slots as ``undefined``.
+
+        10.5
+        """
+        layout = env.layout
+        values = env.values
+        num_arguments = len(arguments)
+        for slot, index in layout.parameters:
+            if index < num_arguments:
+                values[slot] = arguments[index]
+        if function_declarations:
+            variable_env = self.execution_context.variable_environment
+            for slot, declaration in zip(layout.function_slots, function_declarations):
+                values[slot] = self.create_function(declaration, variable_env, strict)
+        if layout.arguments_slot is not None:
+            arguments_object = self.Arguments.create_arguments_object(
+                function_instance, function_instance.formal_parameters,
+                arguments, env, strict
+            )
+            if strict:
+                env.create_immutable_binding('arguments')
+                env.initialize_immutable_binding('arguments', arguments_object)
+            else:
+                values[layout.arguments_slot] = arguments_object
+
     def strict_equal(self, x, y):
         # 11.9.6
+        if (type(x) in NUMBER_TYPES and type(y) in NUMBER_TYPES) or \
+                (type(x) in STRING_TYPES and type(y) in STRING_TYPES):
+            return x == y
         to_primitive = self.to_primitive
         tx = get_primitive_type(x)
         ty = get_primitive_type(y)
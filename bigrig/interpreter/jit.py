@@ -0,0 +1,1109 @@
+"""
+Tiered execution of script functions.
+
+Functions start out run by the ``EvaluationVisitor``, which costs nothing to
+set up, while a ``FunctionProfile`` counts their calls and loop iterations
+and the types of the arguments they are called with. Once a function is hot
+its body is translated to the source of a Python function, which is built
+with ``compile``. Its locals become Python locals, and operators on values
+known to be numbers or strings become Python operators. Parameters are
+specialized on the argument types seen so far, guarded when the function is
+entered. A call failing a guard is run by the visitor instead, and a function
+failing them too often is translated again for the wider set of types.
+
+Only functions whose locals can not be seen from elsewhere are translated, so
+those with nested functions, ``eval``, ``arguments`` or ``with`` are always
+run by the visitor, as are those using statements the translator does not
+handle.
+"""
+import math
+import weakref
+
+from ..parser import ast
+from ..parser.visitor import NodeVisitor
+from .types import (
+    Undefined, Null, NaN, NumberType, StringType, BooleanType, ObjectType,
+    NUMBER_TYPES, STRING_TYPES, get_primitive_type, check_object_coercible,
+    is_primitive
+)
+from .exceptions import ESError, ESTypeError, ESReferenceError, WrappedError
+from .environment import Reference
+from .objects import PropertyDescriptor
+from .objects.base import FunctionInstance, ObjectInstance
+from .visitor import EvaluationVisitor
+from .compiler import ClosureCompiler, resolve_binding
+from .literals import IdentifierParser, StringLiteralParser, NumberLiteralParser
+
+# Calls plus loop iterations after which a function is translated
+HOT_THRESHOLD = 200
+
+# Failed guards after which a translated function is thrown away
+MAX_DEOPTIMIZATIONS = 8
+
+# Translations of a function before it is left to the visitor for good
+MAX_TRANSLATIONS = 3
+
+# Returned by translated functions whose guards fail
+DEOPTIMIZED = object()
+
+# Kinds of values, as seen in arguments and inferred for expressions
+NUMBER = 'number'
+STRING = 'string'
+BOOLEAN = 'boolean'
+OBJECT = 'object'
+UNKNOWN = 'unknown'
+
+# Statements and expressions that are never translated
+UNSUPPORTED_NODES = (
+    ast.FunctionExpression, ast.FunctionDeclaration, ast.WithStatement,
+    ast.TryStatement, ast.ForInStatement, ast.SwitchStatement,
+    ast.LabelledStatement, ast.DeleteOperation, ast.PropertyGetter,
+    ast.PropertySetter
+)
+
+ARITHMETIC_OPERATORS = frozenset(['+', '-', '*'])
+RELATIONAL_OPERATORS = frozenset(['<', '>', '<=', '>='])
+BOOLEAN_OPERATORS = frozenset([
+    '<', '>', '<=', '>=', '==', '!=', '===', '!==', 'instanceof', 'in'
+])
+EQUALITY_OPERATORS = {'==': '==', '===': '==', '!=': '!=', '!==': '!='}
+
+# Names of the generic operator functions in translated code
+OPERATOR_NAMES = {
+    '*': 'op_multiply', '/': 'op_divide', '%': 'op_modulo', '+': 'op_add',
+    '-': 'op_subtract', '<<': 'op_left_shift', '>>': 'op_right_shift',
+    '>>>': 'op_unsigned_right_shift', '&': 'op_and', '^': 'op_xor',
+    '|': 'op_or', 'instanceof': 'op_instanceof', 'in': 'op_in',
+    '<': 'op_less', '>': 'op_greater', '<=': 'op_less_or_equal',
+    '>=': 'op_greater_or_equal', '==': 'op_equal', '!=': 'op_not_equal',
+    '===': 'op_strict_equal', '!==': 'op_strict_not_equal',
+}
+
+
+class NotTranslatable(Exception):
+    """
+    A function uses something the translator does not handle.
+    """
+    pass
+
+
+def kind_of(value):
+    """
+    The kind of a value, for profiling arguments.
+    """
+    value_type = type(value)
+    if value_type in NUMBER_TYPES:
+        return NUMBER
+    elif value_type in STRING_TYPES:
+        return STRING
+    elif value_type is bool:
+        return BOOLEAN
+    elif isinstance(value, ObjectType):
+        return OBJECT
+    return UNKNOWN
+
+def join_kinds(first, second):
+    """
+    The kind of a value that is either of kind ``first`` or ``second``, where
+    ``None`` is the kind of a value that has not been seen yet.
+    """
+    if first is None:
+        return second
+    elif second is None or first == second:
+        return first
+    return UNKNOWN
+
+
+class FunctionProfile(object):
+    """
+    What is known of the calls to a function, and its translation.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.back_edges = 0
+        self.argument_kinds = []
+        self.code = None
+        self.source = None
+        self.deoptimizations = 0
+        self.translations = 0
+        self.translatable = True
+
+    def record(self, arguments, count):
+        """
+        Record a call with the first ``count`` of ``arguments``.
+        """
+        self.calls += 1
+        kinds = self.argument_kinds
+        for i in xrange(count):
+            if i < len(arguments):
+                kind = kind_of(arguments[i])
+            else:
+                kind = UNKNOWN
+            if i == len(kinds):
+                kinds.append(kind)
+            elif kinds[i] != kind:
+                kinds[i] = UNKNOWN
+
+    def is_hot(self, threshold):
+        return self.calls + self.back_edges >= threshold
+
+    def deoptimize(self):
+        """
+        Count a failed guard, throwing the translation away after too many.
+        """
+        self.deoptimizations += 1
+        if self.deoptimizations >= MAX_DEOPTIMIZATIONS:
+            self.code = self.source = None
+            self.deoptimizations = self.calls = self.back_edges = 0
+            if self.translations >= MAX_TRANSLATIONS:
+                self.translatable = False
+
+
+class ProfilingVisitor(EvaluationVisitor):
+    """
+    An ``EvaluationVisitor`` counting loop iterations of the function it runs.
+    """
+    def __init__(self, interpreter, jit):
+        self.jit = jit
+        super(ProfilingVisitor, self).__init__(interpreter)
+
+    def back_edge(self):
+        active = self.jit.active
+        if active:
+            active[-1].back_edges += 1
+
+
+class AssignmentOrder(NodeVisitor):
+    """
+    Finds the locals of a function that are assigned before they are read on
+    every path, by a top level statement.
+    """
+    def __init__(self, local_names):
+        super(AssignmentOrder, self).__init__()
+        self.local_names = local_names
+        self.seen = set()
+        self.assigned = set()
+
+    def get_assigned(self, statements):
+        for statement in statements:
+            if isinstance(statement, ast.ForStatement):
+                self.visit_top_level(statement.initialize)
+                self.visit(statement.condition)
+                self.visit(statement.next)
+                self.visit(statement.body)
+            else:
+                self.visit_top_level(statement)
+        return self.assigned
+
+    def visit_top_level(self, node):
+        if isinstance(node, ast.VariableStatement):
+            for declaration in node.declarations:
+                self.visit(declaration.value)
+                if declaration.value:
+                    self.see(IdentifierParser.parse_string(declaration.name), True)
+        elif isinstance(node, ast.ExpressionStatement):
+            self.visit_top_level(node.expression)
+        elif isinstance(node, ast.Assignment) and node.op == '=' and \
+                isinstance(node.target, ast.Name):
+            self.visit(node.value)
+            self.see(IdentifierParser.parse_string(node.target.value), True)
+        else:
+            self.visit(node)
+
+    def see(self, name, assigned=False):
+        if name in self.local_names and name not in self.seen:
+            self.seen.add(name)
+            if assigned:
+                self.assigned.add(name)
+
+    def visit_Name(self, node):
+        self.see(IdentifierParser.parse_string(node.value))
+
+    def visit_VariableDeclaration(self, node):
+        self.visit(node.value)
+        self.see(IdentifierParser.parse_string(node.name))
+
+
+class SourceTranslator(object):
+    """
+    Translates the body of a function to the source of a Python function.
+
+    The Python function takes the function instance, the ``this`` value and
+    the argument list, and returns the result of the call, or ``DEOPTIMIZED``
+    without running any code when an argument fails its guard. Expressions
+    are translated to Python expressions along with the kind of their value.
+    Assignments can only be translated as statements, since Python has no
+    assignment expressions.
+    """
+    def __init__(self, node, declarations, parameter_kinds, name,
+                 get_property_cache=None):
+        function_declarations, variable_declarations, strict = declarations
+        if function_declarations:
+            raise NotTranslatable('nested function declarations')
+        self.node = node
+        self.get_property_cache = get_property_cache
+        self.strict = strict
+        self.name = name
+        self.parameters = []
+        self.locals = {}
+        for i, parameter in enumerate(node.parameters or []):
+            parameter = IdentifierParser.parse_string(parameter)
+            if parameter not in self.locals:
+                self.locals[parameter] = 'v%d' % len(self.locals)
+                self.parameters.append((i, parameter))
+        for declaration in variable_declarations:
+            name = IdentifierParser.parse_string(declaration.name)
+            if name not in self.locals:
+                self.locals[name] = 'v%d' % len(self.locals)
+        for name in self.locals:
+            if name in ('eval', 'arguments'):
+                raise NotTranslatable(name)
+        self.parameter_kinds = {}
+        for i, parameter in self.parameters:
+            kind = UNKNOWN
+            if i < len(parameter_kinds) and parameter_kinds[i] in (NUMBER, STRING):
+                kind = parameter_kinds[i]
+            self.parameter_kinds[parameter] = kind
+        assigned = AssignmentOrder(self.locals).get_assigned(node.body)
+        self.initial_kinds = {}
+        for name in self.locals:
+            if name in self.parameter_kinds:
+                self.initial_kinds[name] = self.parameter_kinds[name]
+            elif name in assigned:
+                self.initial_kinds[name] = None
+            else:
+                self.initial_kinds[name] = UNKNOWN
+        self.constants = {}
+
+    def translate(self):
+        """
+        Return the source of the function and the constants it refers to.
+        """
+        # Local kinds start out unseen and are widened by the assignments
+        # found on each pass, until a pass finds nothing new.
+        self.kinds = dict(self.initial_kinds)
+        for i in xrange(10):
+            self.assigned_kinds = dict(self.kinds)
+            source = self.translate_function()
+            kinds = self.assigned_kinds
+            if kinds == self.kinds:
+                if None not in kinds.values():
+                    return source, self.constants
+                for name, kind in kinds.items():
+                    if kind is None:
+                        kinds[name] = UNKNOWN
+            self.kinds = kinds
+        raise NotTranslatable('local kinds did not settle')
+
+    #
+    # Output
+    #
+
+    def translate_function(self):
+        self.lines = []
+        self.indent = 1
+        self.temporaries = 0
+        self.loops = []
+        self.uses_this = False
+        self.uses_scope = False
+        self.translate_statements(self.node.body)
+        if not self.node.body or \
+                not isinstance(self.node.body[-1], ast.ReturnStatement):
+            self.emit('return Undefined')
+        body = self.lines
+        self.lines = []
+        self.emit('n = len(arguments)')
+        for i, parameter in self.parameters:
+            variable = self.locals[parameter]
+            self.emit('%s = arguments[%d] if n > %d else Undefined' % (variable, i, i))
+            # Parameters keep their guard only if assignments kept their kind.
+            kind = self.kinds[parameter]
+            if kind is NUMBER:
+                self.emit('if type(%s) not in NUMBER_TYPES: return DEOPTIMIZED' % variable)
+            elif kind is STRING:
+                self.emit('if type(%s) not in STRING_TYPES: return DEOPTIMIZED' % variable)
+        parameters = set(parameter for i, parameter in self.parameters)
+        for name, variable in sorted(self.locals.items()):
+            if name not in parameters:
+                self.emit('%s = Undefined' % variable)
+        if self.uses_scope:
+            self.emit('scope = function.scope')
+        if self.uses_this and not self.strict:
+            self.emit('this = bind_this(this)')
+        self.emit('strict_contexts.append(%r)' % self.strict)
+        self.emit('try:')
+        prologue = self.lines
+        lines = ['def %s(function, this, arguments):' % self.name]
+        lines.extend(prologue)
+        lines.extend('    ' + line for line in body)
+        lines.append('    finally:')
+        lines.append('        strict_contexts.pop()')
+        return '\n'.join(lines) + '\n'
+
+    def emit(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def temporary(self):
+        self.temporaries += 1
+        return 't%d' % self.temporaries
+
+    def constant(self, value):
+        """
+        Return a Python expression for a literal value.
+        """
+        value_type = type(value)
+        if value_type in (int, long, unicode, str) or (
+                value_type is float and not math.isnan(value) and
+                not math.isinf(value)):
+            return repr(value)
+        name = 'k%d' % len(self.constants)
+        self.constants[name] = value
+        return name
+
+    def unsupported(self, node):
+        raise NotTranslatable(node.__class__.__name__)
+
+    #
+    # Statements
+    #
+
+    def translate_statements(self, statements):
+        start = len(self.lines)
+        for statement in statements:
+            self.translate_statement(statement)
+        if len(self.lines) == start:
+            self.emit('pass')
+
+    def translate_block(self, statement):
+        self.indent += 1
+        if isinstance(statement, ast.Block):
+            self.translate_statements(statement.statements)
+        else:
+            self.translate_statements([statement])
+        self.indent -= 1
+
+    def translate_statement(self, node):
+        if isinstance(node, UNSUPPORTED_NODES):
+            self.unsupported(node)
+        method = getattr(self, 'statement_%s' % node.__class__.__name__, None)
+        if method is None:
+            self.unsupported(node)
+        method(node)
+
+    def statement_Block(self, node):
+        for statement in node.statements:
+            self.translate_statement(statement)
+
+    def statement_EmptyStatement(self, node):
+        pass
+
+    def statement_ExpressionStatement(self, node):
+        self.translate_effect(node.expression)
+
+    def statement_VariableStatement(self, node):
+        for declaration in node.declarations:
+            if declaration.value:
+                name = IdentifierParser.parse_string(declaration.name)
+                self.assign_local(name, declaration.value)
+
+    def statement_IfStatement(self, node):
+        self.emit('if %s:' % self.translate_condition(node.condition))
+        self.translate_block(node.then_statement)
+        if node.else_statement:
+            self.emit('else:')
+            self.translate_block(node.else_statement)
+
+    def translate_loop(self, node, condition, continue_lines, tail_lines):
+        """
+        Emit a loop around the body of ``node``. The ``continue_lines`` are
+        run by a ``continue`` statement before the Python ``continue``, and
+        the ``tail_lines`` at the end of each iteration.
+        """
+        self.emit('while %s:' % condition)
+        self.loops.append(continue_lines)
+        self.translate_block(node.body)
+        self.loops.pop()
+        self.indent += 1
+        for line in tail_lines:
+            self.emit(line)
+        self.indent -= 1
+
+    def effect_lines(self, node):
+        """
+        Translate an expression for its effects to a list of lines.
+        """
+        lines, indent = self.lines, self.indent
+        self.lines, self.indent = [], 0
+        try:
+            if node is not None:
+                self.translate_effect(node)
+            return self.lines
+        finally:
+            self.lines, self.indent = lines, indent
+
+    def statement_WhileStatement(self, node):
+        # 12.6.2
+        condition = self.translate_condition(node.condition)
+        self.translate_loop(node, condition, [], [])
+
+    def statement_DoWhileStatement(self, node):
+        # 12.6.1
+        check = 'if not %s: break' % self.translate_condition(node.condition)
+        self.translate_loop(node, 'True', [check], [check])
+
+    def statement_ForStatement(self, node):
+        # 12.6.3
+        initialize = node.initialize
+        if isinstance(initialize, ast.Statement):
+            self.translate_statement(initialize)
+        elif initialize:
+            self.translate_effect(initialize)
+        condition = 'True'
+        if node.condition:
+            condition = self.translate_condition(node.condition)
+        next_lines = self.effect_lines(node.next)
+        self.translate_loop(node, condition, next_lines, next_lines)
+
+    def statement_ContinueStatement(self, node):
+        if node.target is not None or not self.loops:
+            self.unsupported(node)
+        for line in self.loops[-1]:
+            self.emit(line)
+        self.emit('continue')
+
+    def statement_BreakStatement(self, node):
+        if node.target is not None or not self.loops:
+            self.unsupported(node)
+        self.emit('break')
+
+    def statement_ReturnStatement(self, node):
+        # 12.9
+        if node.expression is None:
+            self.emit('return Undefined')
+        else:
+            self.emit('return %s' % self.translate_value(node.expression)[0])
+
+    def statement_Throw(self, node):
+        # 12.13
+        self.emit('raise WrappedError(%s)' % self.translate_value(node.exception)[0])
+
+    #
+    # Assignments
+    #
+
+    def translate_effect(self, node):
+        """
+        Emit an expression evaluated only for its effects, as assignments can
+        be.
+        """
+        if isinstance(node, ast.Assignment):
+            self.translate_assignment(node)
+        elif isinstance(node, (ast.PrefixCountOperation, ast.PostfixCountOperation)):
+            self.translate_count(node)
+        elif isinstance(node, ast.BinaryOperation) and node.op == ',':
+            self.translate_effect(node.left)
+            self.translate_effect(node.right)
+        else:
+            self.emit(self.translate_value(node)[0])
+
+    def local_variable(self, node):
+        """
+        Return the local name of an assignment target, or ``None``.
+        """
+        if isinstance(node, ast.Name):
+            return IdentifierParser.parse_string(node.value)
+        return None
+
+    def assign_local(self, name, value_node):
+        value, kind = self.translate_value(value_node)
+        self.set_local(name, value, kind)
+
+    def set_local(self, name, value, kind):
+        if name in self.locals:
+            self.assigned_kinds[name] = join_kinds(self.assigned_kinds[name], kind)
+            self.emit('%s = %s' % (self.locals[name], value))
+        else:
+            self.uses_scope = True
+            self.emit('put_name(scope, %r, %s, %r)' % (name, value, self.strict))
+
+    def translate_assignment(self, node):
+        # 11.13
+        target = node.target
+        name = self.local_variable(target)
+        if name is not None:
+            if node.op == '=':
+                self.assign_local(name, node.value)
+                return
+            current = self.translate_name(name)
+            value = self.translate_value(node.value)
+            result, kind = self.binary_operation(node.op[:-1], current, value)
+            self.set_local(name, result, kind)
+        elif isinstance(target, ast.PropertyAccess):
+            reference = self.translate_reference(target)
+            if node.op == '=':
+                value = self.translate_value(node.value)[0]
+                self.emit('put_reference(%s, %s)' % (reference, value))
+                return
+            temporary = self.temporary()
+            self.emit('%s = %s' % (temporary, reference))
+            current = ('get_reference(%s)' % temporary, UNKNOWN)
+            value = self.translate_value(node.value)
+            result = self.binary_operation(node.op[:-1], current, value)[0]
+            self.emit('put_reference(%s, %s)' % (temporary, result))
+        else:
+            self.unsupported(node)
+
+    def translate_count(self, node):
+        # 11.3.1, 11.3.2, 11.4.4, 11.4.5
+        step = node.op == '++' and '+ 1' or '- 1'
+        name = self.local_variable(node.expression)
+        if name is not None:
+            value, kind = self.translate_name(name)
+            if kind is not NUMBER:
+                value = 'to_number(%s)' % value
+            self.set_local(name, '%s %s' % (value, step), NUMBER)
+        elif isinstance(node.expression, ast.PropertyAccess):
+            temporary = self.temporary()
+            self.emit('%s = %s' % (temporary, self.translate_reference(node.expression)))
+            self.emit('put_reference(%s, to_number(get_reference(%s)) %s)' % (
+                temporary, temporary, step
+            ))
+        else:
+            self.unsupported(node)
+
+    def translate_reference(self, node):
+        obj = self.translate_value(node.object)[0]
+        return 'reference(%s, %s, %r)' % (obj, self.translate_key(node), self.strict)
+
+    #
+    # Expressions
+    #
+
+    def translate_value(self, node):
+        """
+        Return a Python expression for the value of ``node`` and its kind.
+        """
+        if isinstance(node, UNSUPPORTED_NODES):
+            self.unsupported(node)
+        method = getattr(self, 'value_%s' % node.__class__.__name__, None)
+        if method is None:
+            self.unsupported(node)
+        return method(node)
+
+    def translate_condition(self, node):
+        value, kind = self.translate_value(node)
+        if kind is BOOLEAN:
+            return value
+        return 'to_boolean(%s)' % value
+
+    def translate_name(self, name):
+        if name in self.locals:
+            return self.locals[name], self.kinds[name]
+        elif name in ('eval', 'arguments'):
+            raise NotTranslatable(name)
+        self.uses_scope = True
+        return 'get_name(scope, %r, %r)' % (name, self.strict), UNKNOWN
+
+    def translate_key(self, node):
+        if isinstance(node, ast.DotProperty):
+            return repr(unicode(node.key))
+        return self.translate_value(node.key)[0]
+
+    def translate_arguments(self, arguments):
+        values = [self.translate_value(argument)[0] for argument in arguments or []]
+        return '[%s]' % ', '.join(values)
+
+    def value_Name(self, node):
+        # 11.1.2
+        return self.translate_name(IdentifierParser.parse_string(node.value))
+
+    def value_ThisNode(self, node):
+        # 11.1.1
+        self.uses_this = True
+        return 'this', UNKNOWN
+
+    def value_NullNode(self, node):
+        return 'Null', UNKNOWN
+
+    def value_TrueNode(self, node):
+        return 'True', BOOLEAN
+
+    def value_FalseNode(self, node):
+        return 'False', BOOLEAN
+
+    def translate_literal(self, parser, node):
+        # 7.8
+        try:
+            return self.constant(
+                parser.parse_string(node.value, allow_octal=not self.strict)
+            )
+        except ESError:
+            raise NotTranslatable('invalid literal')
+
+    def value_NumberLiteral(self, node):
+        return self.translate_literal(NumberLiteralParser, node), NUMBER
+
+    def value_StringLiteral(self, node):
+        return self.translate_literal(StringLiteralParser, node), STRING
+
+    def value_RegExpLiteral(self, node):
+        return 'regexp(%r, %r)' % (node.pattern[1:-1], node.flags), OBJECT
+
+    def value_ArrayLiteral(self, node):
+        # 11.1.4
+        elements = []
+        indexes = []
+        for i, element in enumerate(node.elements):
+            if not isinstance(element, ast.Elision):
+                elements.append(self.translate_value(element)[0])
+                indexes.append(i)
+        return 'array_literal(%d, %r, [%s])' % (
+            len(node.elements), tuple(indexes), ', '.join(elements)
+        ), OBJECT
+
+    def property_name(self, node):
+        if isinstance(node, ast.PropertyName):
+            return IdentifierParser.parse_string(node.value)
+        elif isinstance(node, ast.StringLiteral):
+            parser = StringLiteralParser
+        elif isinstance(node, ast.NumberLiteral):
+            parser = NumberLiteralParser
+        else:
+            self.unsupported(node)
+        try:
+            value = parser.parse_string(node.value, allow_octal=not self.strict)
+        except ESError:
+            raise NotTranslatable('invalid literal')
+        if isinstance(value, basestring):
+            return value
+        raise NotTranslatable('numeric property name')
+
+    def value_ObjectLiteral(self, node):
+        # 11.1.5
+        properties = []
+        for prop in node.properties:
+            if not isinstance(prop, ast.ObjectProperty):
+                self.unsupported(prop)
+            name = self.property_name(prop.name)
+            value = self.translate_value(prop.value)[0]
+            properties.append('(%r, %s)' % (name, value))
+        return 'object_literal([%s], %r)' % (
+            ', '.join(properties), self.strict
+        ), OBJECT
+
+    def property_cache(self, node):
+        """
+        Return a Python expression for the inline cache of a dot property,
+        or ``None``.
+        """
+        if self.get_property_cache is None or \
+                not isinstance(node, ast.DotProperty):
+            return None
+        return self.constant(
+            self.get_property_cache(node, unicode(node.key))
+        )
+
+    def value_DotProperty(self, node):
+        # 11.2.1
+        obj = self.translate_value(node.object)[0]
+        cache = self.property_cache(node)
+        if cache is not None:
+            return 'get_cached(%s, %s, %r)' % (obj, cache, self.strict), UNKNOWN
+        return 'get_property(%s, %s, %r)' % (
+            obj, self.translate_key(node), self.strict
+        ), UNKNOWN
+
+    value_BracketProperty = value_DotProperty
+
+    def value_CallExpression(self, node):
+        # 11.2.3
+        expression = node.expression
+        if isinstance(expression, ast.Name):
+            name = IdentifierParser.parse_string(expression.value)
+            if name not in self.locals:
+                if name == 'eval':
+                    raise NotTranslatable(name)
+                self.uses_scope = True
+                callee = 'callee_name(scope, %r, %r)' % (name, self.strict)
+            else:
+                callee = 'callee_value(%s, %r)' % (self.locals[name], name)
+        elif isinstance(expression, ast.PropertyAccess):
+            cache = self.property_cache(expression)
+            if cache is not None:
+                callee = 'callee_cached(%s, %s, %r)' % (
+                    self.translate_value(expression.object)[0], cache,
+                    self.strict
+                )
+            else:
+                callee = 'callee_property(%s, %s, %r)' % (
+                    self.translate_value(expression.object)[0],
+                    self.translate_key(expression), self.strict
+                )
+        else:
+            callee = 'callee_value(%s, u"")' % self.translate_value(expression)[0]
+        return 'call(%s, %s)' % (
+            callee, self.translate_arguments(node.arguments)
+        ), UNKNOWN
+
+    def value_NewExpression(self, node):
+        # 11.2.2
+        constructor = self.translate_value(node.expression)[0]
+        return 'construct(%s, %s)' % (
+            constructor, self.translate_arguments(node.arguments)
+        ), OBJECT
+
+    def value_UnaryOperation(self, node):
+        # 11.4.6 - 11.4.9
+        value, kind = self.translate_value(node.expression)
+        op = node.op
+        if op == '!':
+            if kind is BOOLEAN:
+                return '(not %s)' % value, BOOLEAN
+            return '(not to_boolean(%s))' % value, BOOLEAN
+        elif op == '~':
+            return '(~to_int32(%s))' % value, NUMBER
+        elif kind is not NUMBER:
+            value = 'to_number(%s)' % value
+        if op == '-':
+            return '(-%s)' % value, NUMBER
+        return value, NUMBER
+
+    def value_TypeofOperation(self, node):
+        # 11.4.3
+        expression = node.expression
+        if isinstance(expression, ast.Name):
+            name = IdentifierParser.parse_string(expression.value)
+            if name not in self.locals:
+                if name in ('eval', 'arguments'):
+                    raise NotTranslatable(name)
+                self.uses_scope = True
+                return 'typeof_name(scope, %r, %r)' % (name, self.strict), STRING
+        return 'typeof(%s)' % self.translate_value(expression)[0], STRING
+
+    def value_VoidOperation(self, node):
+        # 11.4.2
+        return '(%s, Undefined)[1]' % self.translate_value(node.expression)[0], UNKNOWN
+
+    def binary_operation(self, op, left, right):
+        """
+        Return the Python expression and kind applying ``op`` to two
+        translated operands.
+        """
+        left, left_kind = left
+        right, right_kind = right
+        if left_kind is None or right_kind is None:
+            # Unseen locals stay unseen until a later pass.
+            return 'None', None
+        numbers = left_kind is NUMBER and right_kind is NUMBER
+        if op == '+':
+            # 11.6.1
+            if numbers:
+                return '(%s + %s)' % (left, right), NUMBER
+            elif left_kind is STRING and right_kind is STRING:
+                return '(%s + %s)' % (left, right), STRING
+            elif left_kind is STRING:
+                return 'concat_left(%s, %s)' % (left, right), STRING
+            elif right_kind is STRING:
+                return 'concat_right(%s, %s)' % (left, right), STRING
+            return 'op_add(%s, %s)' % (left, right), UNKNOWN
+        elif op == ',':
+            return '(%s, %s)[1]' % (left, right), right_kind
+        elif numbers and op in ARITHMETIC_OPERATORS:
+            return '(%s %s %s)' % (left, op, right), NUMBER
+        elif numbers and op == '/':
+            return 'divide(%s, %s)' % (left, right), NUMBER
+        elif numbers and op == '%':
+            return 'modulo(%s, %s)' % (left, right), NUMBER
+        elif numbers and op in RELATIONAL_OPERATORS:
+            return '(%s %s %s)' % (left, op, right), BOOLEAN
+        elif op in EQUALITY_OPERATORS and (numbers or (
+                left_kind is STRING and right_kind is STRING)):
+            return '(%s %s %s)' % (left, EQUALITY_OPERATORS[op], right), BOOLEAN
+        elif op in ('&&', '||'):
+            # 11.11
+            if left_kind is BOOLEAN and right_kind is BOOLEAN:
+                return '(%s %s %s)' % (left, op == '&&' and 'and' or 'or', right), BOOLEAN
+            return '%s(%s, lambda: %s)' % (
+                op == '&&' and 'logical_and' or 'logical_or', left, right
+            ), join_kinds(left_kind, right_kind)
+        kind = op in BOOLEAN_OPERATORS and BOOLEAN or NUMBER
+        return '%s(%s, %s)' % (OPERATOR_NAMES[op], left, right), kind
+
+    def value_BinaryOperation(self, node):
+        left = self.translate_value(node.left)
+        right = self.translate_value(node.right)
+        return self.binary_operation(node.op, left, right)
+
+    value_CompareOperation = value_BinaryOperation
+
+    def value_Conditional(self, node):
+        # 11.12
+        condition = self.translate_condition(node.condition)
+        then_value, then_kind = self.translate_value(node.then_expression)
+        else_value, else_kind = self.translate_value(node.else_expression)
+        return '(%s if %s else %s)' % (
+            then_value, condition, else_value
+        ), join_kinds(then_kind, else_kind)
+
+    def value_Assignment(self, node):
+        raise NotTranslatable('assignment within an expression')
+
+    value_PrefixCountOperation = value_PostfixCountOperation = value_Assignment
+
+
+class TieredCompiler(object):
+    """
+    Profiles calls to script functions and runs hot ones as Python code.
+    """
+    def __init__(self, interpreter, threshold=HOT_THRESHOLD):
+        self.interpreter = interpreter
+        self.threshold = threshold
+        # Profiles weakly keyed by function nodes
+        self.profiles = weakref.WeakKeyDictionary()
+        self.active = []
+        self.namespace = None
+        self.translated = 0
+
+    def get_profile(self, node):
+        profile = self.profiles.get(node)
+        if profile is None:
+            profile = self.profiles[node] = FunctionProfile()
+        return profile
+
+    def call(self, function, this, arguments):
+        """
+        Call a script function, translating it first if it is hot.
+        """
+        profile = self.get_profile(function.node)
+        if profile.code is None and profile.translatable and \
+                profile.is_hot(self.threshold):
+            self.translate(function, profile)
+        code = profile.code
+        if code is not None:
+            result = code(function, this, arguments)
+            if result is not DEOPTIMIZED:
+                return result
+            profile.deoptimize()
+        profile.record(arguments, len(function.formal_parameters))
+        self.active.append(profile)
+        try:
+            return function.interpret(this, arguments)
+        finally:
+            self.active.pop()
+
+    def translate(self, function, profile):
+        """
+        Build the Python function for a script function, or mark it as not
+        translatable.
+        """
+        node = function.node
+        declarations = self.interpreter.declarations.get(node)
+        if declarations is None:
+            return
+        profile.translations += 1
+        self.translated += 1
+        name = 'jit_%d' % self.translated
+        try:
+            translator = SourceTranslator(
+                node, declarations, profile.argument_kinds, name,
+                self.interpreter.get_property_cache
+            )
+            source, constants = translator.translate()
+        except NotTranslatable:
+            profile.translatable = False
+            return
+        if self.namespace is None:
+            self.namespace = self.make_namespace()
+        namespace = dict(self.namespace)
+        namespace.update(constants)
+        code = compile(source, '<%s>' % name, 'exec')
+        exec code in namespace
+        profile.code = namespace[name]
+        profile.source = source
+
+    def make_namespace(self):
+        """
+        Make the globals of translated code.
+        """
+        interpreter = self.interpreter
+        closure_compiler = ClosureCompiler(interpreter)
+        to_boolean = interpreter.to_boolean
+        to_number = interpreter.to_number
+        to_string = interpreter.to_string
+        to_primitive = interpreter.to_primitive
+        get_value = interpreter.get_value
+        put_value = interpreter.put_value
+        check_callable = closure_compiler.check_callable
+        define_literal_property = interpreter.evaluation_visitor.define_literal_property
+
+        def bind_this(this):
+            # 10.4.3
+            if this is Undefined or this is Null:
+                return interpreter.Global
+            elif is_primitive(this):
+                return interpreter.to_object(this)
+            return this
+
+        def get_name(scope, name, strict):
+            record = resolve_binding(scope, name)
+            if record is None:
+                raise ESReferenceError('%s is not defined' % name)
+            return record.get_binding_value(name, strict)
+
+        def put_name(scope, name, value, strict):
+            # 8.7.2
+            record = resolve_binding(scope, name)
+            if record is not None:
+                record.set_mutable_binding(name, value, strict)
+            elif strict:
+                raise ESReferenceError('Cannot resolve referenced name: %s' % name)
+            else:
+                interpreter.Global.put(name, value, False)
+
+        def typeof(value):
+            # 11.4.3
+            primitive_type = get_primitive_type(value)
+            if primitive_type is Undefined:
+                return "undefined"
+            elif primitive_type is Null:
+                return "null"
+            elif primitive_type is BooleanType:
+                return "boolean"
+            elif primitive_type is NumberType:
+                return "number"
+            elif primitive_type is StringType:
+                return "string"
+            elif isinstance(value, FunctionInstance):
+                return "function"
+            return "object"
+
+        def typeof_name(scope, name, strict):
+            record = resolve_binding(scope, name)
+            if record is None:
+                return "undefined"
+            return typeof(record.get_binding_value(name, strict))
+
+        def property_key(base, key):
+            # 11.2.1
+            check_object_coercible(base)
+            if type(key) in STRING_TYPES:
+                return key
+            return to_string(key)
+
+        def get_property(base, key, strict):
+            key = property_key(base, key)
+            if isinstance(base, ObjectType):
+                return base.get(key)
+            return get_value(Reference(base, key, strict=strict))
+
+        def get_cached(base, cache, strict):
+            if isinstance(base, ObjectInstance):
+                return cache.get(base)
+            return get_property(base, cache.name, strict)
+
+        def reference(base, key, strict):
+            return Reference(base, property_key(base, key), strict=strict)
+
+        def put_reference(ref, value):
+            base = ref.base
+            if isinstance(base, ObjectType):
+                base.put(ref.name, value, ref.strict)
+            else:
+                put_value(ref, value)
+
+        def callee_name(scope, name, strict):
+            record = resolve_binding(scope, name)
+            if record is None:
+                raise ESReferenceError('%s is not defined' % name)
+            function = record.get_binding_value(name, strict)
+            return function, record.implicit_this_value(), name
+
+        def callee_property(base, key, strict):
+            return get_property(base, key, strict), base, key
+
+        def callee_cached(base, cache, strict):
+            return get_cached(base, cache, strict), base, cache.name
+
+        def callee_value(function, name):
+            return function, Undefined, name
+
+        def call(callee, arguments):
+            # 11.2.3
+            function, this, name = callee
+            check_callable(function, name)
+            return function.call(this, arguments)
+
+        def construct(constructor, arguments):
+            # 11.2.2
+            if get_primitive_type(constructor) is not ObjectType or \
+                    not callable(getattr(constructor, 'construct', None)):
+                raise ESTypeError('Value is not a constructor')
+            return constructor.construct(arguments)
+
+        def array_literal(length, indexes, elements):
+            # 11.1.4
+            return interpreter.ArrayConstructor.from_elements(
+                elements, length, indexes
+            )
+
+        def object_literal(properties, strict):
+            # 11.1.5
+            obj = interpreter.ObjectConstructor.construct([])
+            for name, value in properties:
+                descriptor = PropertyDescriptor(
+                    value=value, writable=True, enumerable=True, configurable=True
+                )
+                define_literal_property(obj, name, descriptor, strict)
+            return obj
+
+        def regexp(pattern, flags):
+            return interpreter.RegExpConstructor.construct([pattern, flags])
+
+        def concat_left(string, value):
+            return string + to_string(to_primitive(value))
+
+        def concat_right(value, string):
+            return to_string(to_primitive(value)) + string
+
+        def divide(left, right):
+            if right == 0:
+                return NaN
+            return left / right
+
+        def modulo(left, right):
+            if right == 0:
+                return NaN
+            return left % right
+
+        def logical_and(left, right):
+            if not to_boolean(left):
+                return left
+            return right()
+
+        def logical_or(left, right):
+            if to_boolean(left):
+                return left
+            return right()
+
+        namespace = {
+            'Undefined': Undefined, 'Null': Null, 'DEOPTIMIZED': DEOPTIMIZED,
+            'NUMBER_TYPES': NUMBER_TYPES, 'STRING_TYPES': STRING_TYPES,
+            'WrappedError': WrappedError,
+            'strict_contexts': interpreter.strict_contexts,
+            'to_boolean': to_boolean, 'to_number': to_number,
+            'to_int32': interpreter.to_int32,
+        }
+        for op, name in OPERATOR_NAMES.items():
+            if op in BOOLEAN_OPERATORS:
+                namespace[name] = closure_compiler.make_compare_operator(op)
+            else:
+                namespace[name] = closure_compiler.make_binary_operator(op)
+        for helper in (bind_this, get_name, put_name, typeof, typeof_name,
+                       get_property, get_cached, reference, put_reference,
+                       callee_name, callee_property, callee_cached,
+                       callee_value, call, construct,
+                       array_literal, object_literal, regexp, concat_left,
+                       concat_right, divide, modulo, logical_and, logical_or):
+            namespace[helper.__name__] = helper
+        namespace['get_reference'] = get_value
+        return namespace
@@ -1,6 +1,10 @@
 """
 Parsing support for ECMAScript literal values.
 """
+from ..parser.charclass import (
+    is_identifier_start, is_identifier_part, make_regex_class, WHITESPACE,
+    LINE_TERMINATOR
+)
 from .exceptions import ESSyntaxError
 
 DECIMAL_DIGITS = set(u'0123456789')
@@ -24,6 +28,8 @@ LINE_TERMINATORS = set('\u000A\u000D\u2028\u2029'.decode('unicode-escape'))
 CONTROL_CLASS_CHARS = set(u'dDsSw')
 CONTROL_ESCAPE_CHARS = set(u'tnvfr')
 CONTROL_LETTERS = set(u'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+# The ``\s`` class is WhiteSpace and LineTerminator, 15.10.2.12
+SPACE_CLASS = make_regex_class(WHITESPACE | LINE_TERMINATOR)
 NaN = float('nan')
 
 
@@ -70,7 +76,7 @@ class IdentifierParser(LiteralParser):
     """
     Parse and return identifier value with escapes computed.
     """
-    def parse_unicode_escape(self):
+    def parse_unicode_escape(self, start=False):
         self.expect(u'\\')
         self.expect(u'u')
         chars = []
@@ -79,15 +85,21 @@ class IdentifierParser(LiteralParser):
                 raise ESSyntaxError('Invalid identifier: %s' % self.string)
             chars.append(self.advance())
         char = unichr(int(u''.join(chars), 16))
-        if char not in HEX_DIGITS:
+        if start:
+            valid = is_identifier_start(char)
+        else:
+            valid = is_identifier_part(char)
+        if not valid:
             raise ESSyntaxError('Invalid identifier: %s' % self.string)
         return char
 
     def parse(self):
+        if u'\\' not in self.string:
+            return self.string
         chars = []
         while self.pos < len(self.string):
             if self.peek() == u'\\':
-                char = self.parse_unicode_escape()
+                char = self.parse_unicode_escape(start=not chars)
             else:
                 char = self.advance()
             chars.append(char)
@@ -312,6 +324,10 @@ class RegExpParser(LiteralParser):
     syntax.
     """
     # 15.10.1
+    def __init__(self, string):
+        super(RegExpParser, self).__init__(string)
+        self.in_class = False
+
     def parse_hex_digits(self, count):
         digits = []
         for i in range(count):
@@ -336,6 +352,12 @@ class RegExpParser(LiteralParser):
             return u'\\' + char
         elif char in CONTROL_CLASS_CHARS or char in CONTROL_ESCAPE_CHARS:
             self.advance()
+            if char == u's':
+                if self.in_class:
+                    return SPACE_CLASS
+                return u'[%s]' % SPACE_CLASS
+            elif char == u'S' and not self.in_class:
+                return u'[^%s]' % SPACE_CLASS
             return u'\\' + char
         elif char == u'x':
             self.advance()
@@ -362,6 +384,68 @@ class RegExpParser(LiteralParser):
             if char == '\\':
                 parts.append(self.parse_atom_escape())
             else:
+                if char == u'[':
+                    self.in_class = True
+                elif char == u']':
+                    self.in_class = False
                 parts.append(char)
                 self.advance()
         return u''.join(parts)
+
+
+class ConstantPool(object):
+    """
+    Decoded literal values, keyed by the raw token text of the literal.
+
+    Number and string literals are kept apart for strict code, where octal
+    forms are not allowed. Literals that fail to decode are not stored, so
+    they raise again each time they are decoded. The pool is emptied once it
+    holds ``max_size`` values of a kind, which bounds it when much code is
+    built with ``eval``.
+    """
+    def __init__(self, max_size=65536):
+        self.max_size = max_size
+        self.identifiers = {}
+        self.numbers = ({}, {})
+        self.strings = ({}, {})
+
+    def decode(self, cache, parser, value, **kwargs):
+        if len(cache) >= self.max_size:
+            cache.clear()
+        result = cache[value] = parser.parse_string(value, **kwargs)
+        return result
+
+    def identifier(self, value):
+        try:
+            return self.identifiers[value]
+        except KeyError:
+            return self.decode(self.identifiers, IdentifierParser, value)
+
+    def number(self, value, strict=False):
+        allow_octal = not strict
+        cache = self.numbers[allow_octal]
+        try:
+            return cache[value]
+        except KeyError:
+            return self.decode(
+                cache, NumberLiteralParser, value, allow_octal=allow_octal
+            )
+
+    def string(self, value, strict=False):
+        allow_octal = not strict
+        cache = self.strings[allow_octal]
+        try:
+            return cache[value]
+        except KeyError:
+            return self.decode(
+                cache, StringLiteralParser, value, allow_octal=allow_octal
+            )
+
+    def clear(self):
+        self.identifiers.clear()
+        for cache in self.numbers + self.strings:
+            cache.clear()
+
+
+# Decoded values are immutable, so every interpreter shares the one pool.
+constants = ConstantPool()
@@ -2,93 +2,70 @@
 Classes and utilities for adding location information to syntax tree nodes.
 """
 from __future__ import absolute_import
-import types
-from functools import wraps
 
-from ..parser import parser, node
+from ..parser import parser
 
 class LocatedNodeMixin(object):
     """
-    Adds location information for abstract syntax tree nodes.
+    Makes a parser track locations regardless of its ``track_locations``
+    argument.
+
+    Parsers create nodes with their locations themselves, so this is kept
+    only for classes that mix it in.
     """
     def __init__(self, *args, **kwargs):
         super(LocatedNodeMixin, self).__init__(*args, **kwargs)
-        self._method_cache = {}
-
-    def get_next_locator(self):
-        token = self.token_stream.peek()
-        return token.locator
-
-    def wrap_method(self, method):
-        """
-        Create a new parse method that adds locator information to the node
-        it returns.
-        """
-        @wraps(method)
-        def wrapped(self, *args, **kwargs):
-            locator = self.get_next_locator()
-            result = method(*args, **kwargs)
-            if isinstance(result, node.Node):
-                result.locator = locator
-            return result
-        return types.MethodType(wrapped, self)
+        self.track_locations = True
 
-    def __getattribute__(self, name):
-        cache = super(LocatedNodeMixin, self).__getattribute__('_method_cache')
-        if name in cache:
-            return cache[name]
-        elif name.startswith('parse_'):
-            original = object.__getattribute__(self, name)
-            wrapped = self.wrap_method(original)
-            cache[name] = wrapped
-            return wrapped
-        return super(LocatedNodeMixin, self).__getattribute__(name)
-
-class LocatorParser(LocatedNodeMixin, parser.Parser):
-    """
-    Concrete implementation of a location tracking parser.
-    """
-    pass
+# Parsers track locations by default.
+LocatorParser = parser.Parser
 
 #
 # Utility functions
 #
 
-def make_string_parser(string, filename=None, line=0, column=0, encoding='utf-8'):
+def make_string_parser(string, filename=None, line=0, column=0, encoding='utf-8',
+                       fast=False, lazy_functions=False):
     """
     Make a parser for a string that produces nodes with location information.
     """
     from ..parser.scanner import make_string_scanner, TokenStreamAllowReserved
     scanner = make_string_scanner(
-        string, filename, line, column, encoding
+        string, filename, line, column, encoding, fast
     )
     stream = TokenStreamAllowReserved(scanner)
-    return LocatorParser(stream)
+    return LocatorParser(stream, lazy_functions=lazy_functions)
 
-def parse_string(string, filename=None, line=0, column=0, encoding='utf-8'):
+def parse_string(string, filename=None, line=0, column=0, encoding='utf-8',
+                 fast=False, lazy_functions=False):
     """
     Parse a string into an abstract syntax tree whose nodes have location information.
     """
     parse = make_string_parser(
-        string, filename, line, column, encoding
+        string, filename, line, column, encoding, fast, lazy_functions
     )
     return parse.parse()
 
-def make_file_parser(fd, filename=None, line=0, column=0, encoding='utf-8'):
+def make_file_parser(fd, filename=None, line=0, column=0, encoding='utf-8',
+                     fast=False, lazy_functions=False):
     """
     Make a parser for a file that produces nodes with location information.
     """
     from ..parser.scanner import make_file_scanner, TokenStreamAllowReserved
     scanner = make_file_scanner(
-        fd, filename, line, column, encoding
+        fd, filename, line, column, encoding, fast
     )
     stream = TokenStreamAllowReserved(scanner)
-    return LocatorParser(stream)
+    return LocatorParser(stream, lazy_functions=lazy_functions)
 
-def parse_file(filename, line=0, column=0, encoding='utf-8'):
+def parse_file(filename, line=0, column=0, encoding='utf-8', fast=False,
+               lazy_functions=False):
     """
     Parse a file into an abstract syntax tree whose nodes have location information.
     """
-    fd = open(filename, 'rb')
-    parse = make_file_parser(fd, filename, line, column, encoding)
+    # The source is read up front, so the file need not stay open.
+    with open(filename, 'rb') as fd:
+        parse = make_file_parser(
+            fd, filename, line, column, encoding, fast, lazy_functions
+        )
     return parse.parse()
@@ -8,35 +8,82 @@ from ..types import (
 from ..exceptions import ESTypeError
 
 
+# Attribute flags of a property, packed into an int by descriptors and
+# shapes
+WRITABLE = 1
+ENUMERABLE = 2
+CONFIGURABLE = 4
+ATTRIBUTES = WRITABLE | ENUMERABLE | CONFIGURABLE
+
+# Flags of descriptors that have a field, shifted past its attribute flag
+HAS_WRITABLE = WRITABLE << 3
+HAS_ENUMERABLE = ENUMERABLE << 3
+HAS_CONFIGURABLE = CONFIGURABLE << 3
+HAS_ATTRIBUTES = ATTRIBUTES << 3
+
+
+def attribute_property(flag):
+    """
+    Make a property reading and writing one packed attribute field of a
+    ``PropertyDescriptor``, ``None`` when it is absent.
+    """
+    present = flag << 3
+    def get(self):
+        flags = self.flags
+        if flags & present:
+            return bool(flags & flag)
+        return None
+    def set(self, value):
+        flags = self.flags & ~(flag | present)
+        if value is not None:
+            flags |= present
+            if value:
+                flags |= flag
+        self.flags = flags
+    return property(get, set)
+
+
 class PropertyDescriptor(object):
     """
     Structure containing property flags and value or get/set functions.
+
+    The ``writable``, ``enumerable`` and ``configurable`` fields are packed
+    into ``flags``, as a bit telling whether each is present and a bit
+    holding its value.
     """
+    __slots__ = ('get', 'set', 'value', 'flags')
+
     # 8.6.1
     def __init__(self, get=None, set=None, enumerable=None,
                  configurable=None, writable=None, value=None):
         self.get = get
         self.set = set
-        self.enumerable = enumerable
-        self.configurable = configurable
-        self.writable = writable
         self.value = value
+        flags = 0
+        if writable is not None:
+            flags = HAS_WRITABLE | (WRITABLE if writable else 0)
+        if enumerable is not None:
+            flags |= HAS_ENUMERABLE | (ENUMERABLE if enumerable else 0)
+        if configurable is not None:
+            flags |= HAS_CONFIGURABLE | (CONFIGURABLE if configurable else 0)
+        self.flags = flags
+
+    writable = attribute_property(WRITABLE)
+    enumerable = attribute_property(ENUMERABLE)
+    configurable = attribute_property(CONFIGURABLE)
 
     @classmethod
     def clone(cls, d):
-        return cls(
-            get=d.get, set=d.set, enumerable=d.enumerable,
-            configurable=d.configurable, writable=d.writable, value=d.value
-        )
+        descriptor = cls(get=d.get, set=d.set, value=d.value)
+        descriptor.flags = d.flags
+        return descriptor
 
     def empty(self):
         return self.get is None and \
                self.set is None and \
-               self.enumerable is None and \
-               self.configurable is None and \
-               self.writable is None and \
-               self.value is None
-        
+               self.value is None and \
+               not self.flags
+
 
 def is_accessor_descriptor(descriptor):
     """
@@ -57,7 +104,7 @@ def is_data_descriptor(descriptor):
     # 8.10.2
     if descriptor is Undefined:
         return False
-    if descriptor.value is None and descriptor.writable is None:
+    if descriptor.value is None and not descriptor.flags & HAS_WRITABLE:
         return False
     return True
 
@@ -15,6 +15,10 @@ class Arguments(ObjectInstance):
 
     10.6
     """
+    __slots__ = ('strict', 'parameter_map')
+    es_class = 'Arguments'
+    exotic = True
+
     def __init__(self, interpreter):
         super(Arguments, self).__init__(interpreter)
         self.strict = False
@@ -28,7 +32,6 @@ class Arguments(ObjectInstance):
         args_length = len(args)
         names_length = len(names)
         obj = Arguments(self.interpreter)
-        obj.es_class = 'Arguments'
         obj.prototype = self.interpreter.ObjectPrototype
         obj.strict = strict
         length_descriptor = PropertyDescriptor(
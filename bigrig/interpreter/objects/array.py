@@ -1,30 +1,199 @@
 """
 Specification objects for the ``Array`` built-in.
 """
-from . import PropertyDescriptor, is_callable
+from . import PropertyDescriptor, WRITABLE, is_callable
 from .base import ObjectInstance, FunctionInstance
 from .function import define_native_method
+from .shape import DEFAULT_FLAGS, get_flags, make_descriptor
 from ..exceptions import ESTypeError, ESRangeError
-from ..types import Undefined, Null, NumberType, ObjectType, get_arguments, get_primitive_type
+from ..types import (
+    Undefined, Null, NumberType, ObjectType, STRING_TYPES, get_arguments,
+    get_primitive_type
+)
+
+# Array indexes are below 2 ** 32 - 1, 15.4
+MAX_ARRAY_INDEX = 4294967295
+
+
+def to_array_index(name):
+    """
+    Return the array index that the property name ``name`` is the canonical
+    string of, or ``None`` when it is not an array index.
+
+    15.4
+    """
+    if name.isdigit():
+        # ``isdigit`` also accepts other digits, some of which ``int`` does
+        # not parse, and the others are not canonical
+        try:
+            index = int(name)
+        except ValueError:
+            return None
+        if index < MAX_ARRAY_INDEX and unicode(index) == name:
+            return index
+    return None
+
+
+def iter_elements(o, start, stop):
+    """
+    Iterate over the ``(index, value)`` pairs of the elements of ``o`` at
+    the indexes from ``start`` up to ``stop`` that it has, as the array
+    built-ins do by checking ``[[HasProperty]]`` and calling ``[[Get]]`` for
+    each index.
+
+    Elements still held in the list of a dense array are its own data
+    properties, so they are read straight from the list, while indexes past
+    its end, or of an array made sparse by a callback, are looked up.
+    """
+    elements = o.elements if isinstance(o, ArrayInstance) else None
+    for index in xrange(start, stop):
+        if elements is not None and index < len(elements) and \
+                o.elements is elements:
+            yield index, elements[index]
+        else:
+            name = unicode(index)
+            if o.has_property(name):
+                yield index, o.get(name)
+
+
+def get_dense_elements(o, length):
+    """
+    Return the list of elements of ``o`` when it is a dense array holding
+    every index below ``length``, or ``None``.
+    """
+    if not isinstance(o, ArrayInstance):
+        return None
+    elements = o.elements
+    if elements is not None and len(elements) >= length:
+        return elements
+    return None
 
 
 class ArrayInstance(ObjectInstance):
     """
     The specialized ``Array`` object class.
 
+    Arrays start out dense, keeping the values of the elements at indexes
+    below ``len(elements)`` in the ``elements`` list, each an ordinary
+    writable, enumerable and configurable data property, and the value of
+    their ``length`` property in ``length``, which may be larger when the
+    array ends in holes. Arrays given holes, elements with other attributes
+    or a ``length`` that is not writable are made sparse, moving both into
+    the descriptors of dictionary mode, and stay sparse.
+
     15.4.5
     """
+    __slots__ = ('elements', 'length')
     es_class = 'Array'
+    exotic = True
+
     def __init__(self, interpreter):
         super(ArrayInstance, self).__init__(interpreter)
-        self.set_property('length', 0, writable=True)
+        self.elements = []
+        self.length = 0
+
+    def get_own_property(self, name):
+        """
+        8.12.1
+        """
+        elements = self.elements
+        if elements is not None:
+            index = to_array_index(name)
+            if index is not None:
+                if index < len(elements):
+                    return make_descriptor(elements[index], DEFAULT_FLAGS)
+                return Undefined
+            elif name == 'length':
+                return make_descriptor(self.length, WRITABLE)
+        return super(ArrayInstance, self).get_own_property(name)
+
+    def get(self, name):
+        """
+        8.12.3
+        """
+        elements = self.elements
+        if elements is not None:
+            index = to_array_index(name)
+            if index is not None:
+                if index < len(elements):
+                    return elements[index]
+            elif name == 'length':
+                return self.length
+        return super(ArrayInstance, self).get(name)
+
+    def put(self, name, value, throw=False):
+        """
+        8.12.5
+        """
+        elements = self.elements
+        if elements is not None:
+            index = to_array_index(name)
+            if index is not None:
+                count = len(elements)
+                if index < count:
+                    elements[index] = value
+                    return
+                # Appending is an ordinary put when a prototype has the index
+                elif index == count and self.extensible and (
+                        self.prototype is None or
+                        self.prototype.get_property(name) is Undefined):
+                    elements.append(value)
+                    if index >= self.length:
+                        self.length = index + 1
+                    return
+            elif name == 'length':
+                self.set_dense_length(value)
+                return
+        super(ArrayInstance, self).put(name, value, throw)
+
+    def has_property(self, name):
+        """
+        8.12.6
+        """
+        elements = self.elements
+        if elements is not None:
+            index = to_array_index(name)
+            if index is not None and index < len(elements):
+                return True
+        return super(ArrayInstance, self).has_property(name)
+
+    def delete(self, name, throw=False):
+        """
+        8.12.7
+        """
+        elements = self.elements
+        if elements is not None:
+            index = to_array_index(name)
+            if index is not None:
+                count = len(elements)
+                if index >= count:
+                    return True
+                elif index == count - 1:
+                    # Deleting the last element leaves a hole at the end
+                    elements.pop()
+                    return True
+                self.make_sparse()
+        return super(ArrayInstance, self).delete(name, throw)
 
     def define_own_property(self, name, desc, throw):
         """
         Override behavior for the ``length`` and array index ``name`` cases.
 
+        Dense arrays define their elements and ``length`` in place when they
+        can, and are made sparse otherwise.
+
         15.4.5.1
         """
+        if self.elements is not None:
+            index = to_array_index(name)
+            if index is None and name != 'length':
+                return super(ArrayInstance, self).define_own_property(
+                    name, desc, throw
+                )
+            elif self.define_dense_property(index, desc):
+                return True
+            self.make_sparse()
+
         # Aliases
         default = super(ArrayInstance, self).define_own_property
         i = self.interpreter
@@ -32,10 +201,6 @@ class ArrayInstance(ObjectInstance):
         to_number = i.to_number
         to_uint32 = i.to_uint32
 
-        # Utilities
-        def is_array_index(p):
-            return p == to_string(to_uint32(p))
-
         def reject():
             if throw:
                 raise ESTypeError('Invalid property assignment %s' % name)
@@ -44,6 +209,7 @@ class ArrayInstance(ObjectInstance):
         # Actual logic
         old_len_desc = self.get_own_property('length')
         old_length = old_len_desc.value
+        index = to_array_index(name)
         if name == 'length':
             if desc.value is None:
                 return default(name, desc, throw)
@@ -77,8 +243,7 @@ class ArrayInstance(ObjectInstance):
                 new_desc = PropertyDescriptor(writable=False)
                 default(name, new_desc, False)
             return True
-        elif is_array_index(name):
-            index = to_uint32(name)
+        elif index is not None:
             if index >= old_length and old_len_desc.writable is False:
                 return reject()
             succeeded = default(name, desc, False)
@@ -90,6 +255,79 @@ class ArrayInstance(ObjectInstance):
         else:
             return default(name, desc, throw)
 
+    def define_dense_property(self, index, desc):
+        """
+        Define the element at ``index``, or the ``length`` when it is
+        ``None``, of a dense array in place, returning whether it could be.
+        """
+        if desc.get is not None or desc.set is not None:
+            return False
+        elements = self.elements
+        flags = desc.flags
+        present = flags >> 3
+        if index is None:
+            if (flags ^ WRITABLE) & present:
+                return False
+            if desc.value is not None:
+                self.set_dense_length(desc.value)
+            return True
+        count = len(elements)
+        if index < count:
+            # Elements may only be given the attributes they already have
+            if present & ~flags:
+                return False
+            if desc.value is not None:
+                elements[index] = desc.value
+            return True
+        elif index == count and self.extensible and \
+                get_flags(desc) == DEFAULT_FLAGS:
+            elements.append(desc.value)
+            if index >= self.length:
+                self.length = index + 1
+            return True
+        return False
+
+    def set_dense_length(self, value):
+        """
+        Set the ``length`` of a dense array, removing the elements past it.
+        """
+        i = self.interpreter
+        length = i.to_uint32(value)
+        if length != i.to_number(value):
+            raise ESRangeError('Invalid length value %s' % i.to_number(value))
+        del self.elements[length:]
+        self.length = length
+
+    def make_sparse(self):
+        """
+        Move the elements and ``length`` of a dense array into the
+        descriptors of dictionary mode.
+        """
+        elements = self.elements
+        if elements is None:
+            return
+        self.make_dictionary()
+        properties = self.properties
+        names = [unicode(index) for index in range(len(elements))]
+        for name, value in zip(names, elements):
+            properties[name] = make_descriptor(value, DEFAULT_FLAGS)
+        properties['length'] = make_descriptor(self.length, WRITABLE)
+        self.property_names[:0] = names + ['length']
+        self.elements = None
+        self.length = None
+
+    def own_property_names(self):
+        """
+        The indexes of the elements of a dense array come first, followed by
+        ``length`` and the other properties in the order they were added.
+        """
+        names = super(ArrayInstance, self).own_property_names()
+        elements = self.elements
+        if elements is not None:
+            indexes = [unicode(index) for index in range(len(elements))]
+            names[:0] = indexes + ['length']
+        return names
+
 
 class ArrayConstructor(FunctionInstance):
     """
@@ -121,8 +359,6 @@ class ArrayConstructor(FunctionInstance):
 
         15.4.2
         """
-        obj = ArrayInstance(self.interpreter)
-        obj.prototype = self.interpreter.ArrayPrototype
         num_args = len(arguments)
         if num_args == 1:
             length = arguments[0]
@@ -130,16 +366,33 @@ class ArrayConstructor(FunctionInstance):
             if is_number:
                 uint_length = self.interpreter.to_uint32(length)
                 if length == uint_length:
-                    obj.set_property('length', length, writable=True)
-                    return obj
+                    return self.from_elements([], uint_length)
                 else:
                     raise ESRangeError('Invalid length value')
-        obj.set_property('length', num_args, writable=True)
-        for i, arg in enumerate(arguments):
+        return self.from_elements(list(arguments))
+
+    def from_elements(self, elements, length=None, indexes=None):
+        """
+        Build an ``Array`` holding the values in the list ``elements``, which
+        it takes, at the given increasing ``indexes``, or at the first indexes
+        when there are none, with the given ``length``, or as many elements.
+
+        The elements of arrays without holes are filled in at once.
+        """
+        obj = ArrayInstance(self.interpreter)
+        obj.prototype = self.interpreter.ArrayPrototype
+        if length is None:
+            length = len(elements)
+        if not indexes or indexes[-1] == len(indexes) - 1:
+            obj.elements = elements
+            obj.length = length
+            return obj
+        obj.length = length
+        for index, value in zip(indexes, elements):
             desc = PropertyDescriptor(
-                value=arg, writable=True, enumerable=True, configurable=True
+                value=value, writable=True, enumerable=True, configurable=True
             )
-            obj.define_own_property(unicode(i), desc, False)
+            obj.define_own_property(unicode(index), desc, False)
         return obj
 
     #
@@ -236,28 +489,29 @@ class ArrayPrototype(ArrayInstance):
         15.4.4.4
         """
         o = self.interpreter.to_object(this)
-        array = self.interpreter.ArrayConstructor.construct([])
         items = [o] + arguments
+        values = []
+        indexes = []
         index = 0
         for item in items:
             if getattr(item, 'es_class', None) == 'Array':
                 length = item.get('length')
-                for i in range(length):
-                    p = unicode(i)
-                    if item.has_property(p):
-                        element = item.get(p)
-                        desc = PropertyDescriptor(
-                            value=element, writable=True, enumerable=True, configurable=True
-                        )
-                        array.define_own_property(unicode(index), desc, False)
-                    index += 1
+                elements = get_dense_elements(item, length)
+                if elements is not None:
+                    values.extend(elements[:length])
+                    indexes.extend(xrange(index, index + length))
+                else:
+                    for i, element in iter_elements(item, 0, length):
+                        values.append(element)
+                        indexes.append(index + i)
+                index += length
             else:
-                desc = PropertyDescriptor(
-                    value=item, writable=True, enumerable=True, configurable=True
-                )
-                array.define_own_property(unicode(index), desc, False)
+                values.append(item)
+                indexes.append(index)
                 index += 1
-        return array
+        return self.interpreter.ArrayConstructor.from_elements(
+            values, indexes[-1] + 1 if indexes else 0, indexes
+        )
 
     def join_method(self, this, arguments):
         """
@@ -276,15 +530,28 @@ class ArrayPrototype(ArrayInstance):
         if length == 0:
             return u''
         strings = []
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                element = o.get(index)
-                if element is Undefined or element is Null:
-                    element = ''
+        start = 0
+        elements = get_dense_elements(o, length)
+        if elements is not None:
+            # Converting primitives calls no code that could change the array
+            for element in elements[:length]:
+                if type(element) in STRING_TYPES:
+                    strings.append(element)
+                elif element is Undefined or element is Null:
+                    strings.append(u'')
+                elif isinstance(element, ObjectType):
+                    break
                 else:
-                    element = to_string(element)
-                strings.append(element)
+                    strings.append(to_string(element))
+            start = len(strings)
+        for i in range(start, length):
+            # Holes are joined as empty strings, as undefined is
+            element = o.get(unicode(i))
+            if element is Undefined or element is Null:
+                element = u''
+            else:
+                element = to_string(element)
+            strings.append(element)
         return separator.join(strings)
 
     def pop_method(self, this, arguments):
@@ -394,16 +661,20 @@ class ArrayPrototype(ArrayInstance):
             end = max(length + end, 0)
         else:
             end = min(end, length)
-        array = self.interpreter.ArrayConstructor.construct([])
-        for new_index, old_index in enumerate(range(start, end)):
-            p = unicode(old_index)
-            if o.has_property(p):
-                value = o.get(p)
-                desc = PropertyDescriptor(
-                    value=value, writable=True, enumerable=True, configurable=True
-                )
-                array.define_own_property(unicode(new_index), desc, False)
-        return array
+        # ``to_integer`` keeps zeros as floats, which slices refuse
+        start, end = int(start), int(end)
+        from_elements = self.interpreter.ArrayConstructor.from_elements
+        elements = get_dense_elements(o, end)
+        if elements is not None:
+            return from_elements(elements[start:end])
+        values = []
+        indexes = []
+        for index, value in iter_elements(o, start, end):
+            values.append(value)
+            indexes.append(index - start)
+        return from_elements(
+            values, indexes[-1] + 1 if indexes else 0, indexes
+        )
 
     def sort_compare(self, obj, j, k, comparefn):
         """
@@ -547,17 +818,15 @@ class ArrayPrototype(ArrayInstance):
             return -1
         search_element, from_index = get_arguments(arguments, count=2)
         from_index = self.interpreter.to_integer(from_index)
-        if from_index < 0:
+        if from_index >= length:
+            return -1
+        elif from_index < 0:
             from_index = max(0, length - abs(from_index))
-        index = from_index
         strict_equal = self.interpreter.strict_equal
-        while index < length:
-            key = unicode(index)
-            if o.has_property(key):
-                element = o.get(key)
-                if strict_equal(element, search_element):
-                    return index
-            index = index + 1
+        # ``to_integer`` keeps zeros as floats, which ``xrange`` refuses
+        for index, element in iter_elements(o, int(from_index), length):
+            if strict_equal(element, search_element):
+                return index
         return -1
 
     def last_index_of_method(self, this, arguments):
@@ -598,13 +867,10 @@ class ArrayPrototype(ArrayInstance):
         if not is_callable(callback):
             raise ESTypeError('callback is not a function')
         to_boolean = self.interpreter.to_boolean
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                value = o.get(index)
-                result = callback.call(this_arg, [value, i, o])
-                if to_boolean(result) is False:
-                    return False
+        for i, value in iter_elements(o, 0, length):
+            result = callback.call(this_arg, [value, i, o])
+            if to_boolean(result) is False:
+                return False
         return True
 
     def some_method(self, this, arguments):
@@ -619,13 +885,10 @@ class ArrayPrototype(ArrayInstance):
         if not is_callable(callback):
             raise ESTypeError('callback is not a function')
         to_boolean = self.interpreter.to_boolean
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                value = o.get(index)
-                result = callback.call(this_arg, [value, i, o])
-                if to_boolean(result) is True:
-                    return True
+        for i, value in iter_elements(o, 0, length):
+            result = callback.call(this_arg, [value, i, o])
+            if to_boolean(result) is True:
+                return True
         return False
 
     def for_each_method(self, this, arguments):
@@ -639,11 +902,8 @@ class ArrayPrototype(ArrayInstance):
         callback, this_arg = get_arguments(arguments, count=2)
         if not is_callable(callback):
             raise ESTypeError('callback is not a function')
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                value = o.get(index)
-                result = callback.call(this_arg, [value, i, o])
+        for i, value in iter_elements(o, 0, length):
+            callback.call(this_arg, [value, i, o])
         return Undefined
 
     def map_method(self, this, arguments):
@@ -657,17 +917,14 @@ class ArrayPrototype(ArrayInstance):
         callback, this_arg = get_arguments(arguments, count=2)
         if not is_callable(callback):
             raise ESTypeError('callback is not a function')
-        array = self.interpreter.ArrayConstructor.construct([length])
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                value = o.get(index)
-                result = callback.call(this_arg, [value, i, o])
-                desc = PropertyDescriptor(
-                    value=result, writable=True, enumerable=True, configurable=True
-                )
-                array.define_own_property(index, desc, False)
-        return array
+        results = []
+        indexes = []
+        for i, value in iter_elements(o, 0, length):
+            results.append(callback.call(this_arg, [value, i, o]))
+            indexes.append(i)
+        return self.interpreter.ArrayConstructor.from_elements(
+            results, length, indexes
+        )
 
     def filter_method(self, this, arguments):
         """
@@ -680,21 +937,13 @@ class ArrayPrototype(ArrayInstance):
         callback, this_arg = get_arguments(arguments, count=2)
         if not is_callable(callback):
             raise ESTypeError('callback is not a function')
-        array = self.interpreter.ArrayConstructor.construct([])
         to_boolean = self.interpreter.to_boolean
-        target_index = 0
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                value = o.get(index)
-                result = callback.call(this_arg, [value, i, o])
-                if to_boolean(result) is True:
-                    desc = PropertyDescriptor(
-                        value=value, writable=True, enumerable=True, configurable=True
-                    )
-                    array.define_own_property(unicode(target_index), desc, False)
-                    target_index = target_index + 1
-        return array
+        selected = []
+        for i, value in iter_elements(o, 0, length):
+            result = callback.call(this_arg, [value, i, o])
+            if to_boolean(result) is True:
+                selected.append(value)
+        return self.interpreter.ArrayConstructor.from_elements(selected)
 
     def reduce_method(self, this, arguments):
         """
@@ -707,24 +956,18 @@ class ArrayPrototype(ArrayInstance):
         callback, initial_value = get_arguments(arguments, count=2)
         if not is_callable(callback):
             raise ESTypeError('callback is not a function')
-        accumulator = None
+        elements = iter_elements(o, 0, length)
         if len(arguments) < 2:
-            if length == 0:
-                raise ESTypeError()
-            for i in range(length):
-                index = unicode(i)
-                if o.has_property(index):
-                    accumulator = o.get(index)
-                    break
-            if accumulator is None:
-                raise ESTypeError()
+            # The first element is the initial value, and is not passed to
+            # the callback again
+            for i, accumulator in elements:
+                break
+            else:
+                raise ESTypeError('Reduce of empty array with no initial value')
         else:
             accumulator = initial_value
-        for i in range(length):
-            index = unicode(i)
-            if o.has_property(index):
-                value = o.get(index)
-                accumulator = callback.call(this, [accumulator, value, i, o])
+        for i, value in elements:
+            accumulator = callback.call(this, [accumulator, value, i, o])
         return accumulator
 
     def reduce_right_method(self, this, arguments):
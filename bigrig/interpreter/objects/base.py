@@ -4,8 +4,11 @@ Classes for the basic ES Object instances.
 from ..types import ObjectType, Undefined, get_primitive_type, is_primitive
 from ..exceptions import ESTypeError
 from . import (
-    PropertyDescriptor, is_callable, is_data_descriptor,
-    is_accessor_descriptor, is_generic_descriptor
+    PropertyDescriptor, WRITABLE, ENUMERABLE, CONFIGURABLE, is_callable,
+    is_data_descriptor, is_accessor_descriptor, is_generic_descriptor
+)
+from .shape import (
+    ROOT_SHAPE, EXOTIC_ROOT_SHAPE, DEFAULT_FLAGS, get_flags, make_descriptor
 )
 
 
@@ -13,15 +16,29 @@ class ObjectInstance(ObjectType):
     """
     The basic internal class type for objects.
 
+    Properties are kept in the values of a ``Shape`` until the object is
+    moved into dictionary mode, after which ``properties`` holds their
+    descriptors and ``property_names`` the order they were added in.
+
     8.6
     """
+    __slots__ = (
+        'interpreter', 'prototype', 'extensible', 'shape', 'values',
+        'properties', 'property_names'
+    )
     es_class = "Object"
-    prototype = None
-    extensible = True
+    # Set by classes overriding the internal property methods, which ``get``
+    # and ``put`` must then always go through.
+    exotic = False
 
     def __init__(self, interpreter):
         self.interpreter = interpreter
-        self.properties = {} # Mapping of unicode to PropertyDescriptor
+        self.prototype = None
+        self.extensible = True
+        self.shape = EXOTIC_ROOT_SHAPE if self.exotic else ROOT_SHAPE
+        self.values = []
+        self.properties = None # Mapping of unicode to PropertyDescriptor
+        self.property_names = None
 
     #
     # Internal Specification Methods
@@ -31,9 +48,13 @@ class ObjectInstance(ObjectType):
         """
         8.12.1
         """
-        if name not in self.properties:
+        properties = self.properties
+        if properties is not None:
+            return properties.get(name, Undefined)
+        index = self.shape.slots.get(name)
+        if index is None:
             return Undefined
-        return self.properties[name]
+        return make_descriptor(self.values[index], self.shape.flags[index])
 
     def get_property(self, name):
         """
@@ -50,7 +71,22 @@ class ObjectInstance(ObjectType):
         """
         8.12.3
         """
-        desc = self.get_property(name)
+        # Values held in shapes are read without building their descriptors
+        desc = Undefined
+        obj = self
+        while obj is not None:
+            if obj.exotic:
+                desc = obj.get_property(name)
+                break
+            properties = obj.properties
+            if properties is None:
+                index = obj.shape.slots.get(name)
+                if index is not None:
+                    return obj.values[index]
+            elif name in properties:
+                desc = properties[name]
+                break
+            obj = obj.prototype
         if desc is Undefined:
             return Undefined
         if is_data_descriptor(desc):
@@ -92,6 +128,20 @@ class ObjectInstance(ObjectType):
         """
         8.12.5
         """
+        if self.properties is None and not self.exotic:
+            # Writable values held in the shape, and new properties not
+            # found on the prototypes, need no descriptors.
+            shape = self.shape
+            index = shape.slots.get(name)
+            if index is not None:
+                if shape.flags[index] & WRITABLE:
+                    self.values[index] = value
+                    return
+            elif self.extensible and (
+                    self.prototype is None or
+                    self.prototype.get_property(name) is Undefined):
+                self.add_property(name, value, DEFAULT_FLAGS)
+                return
         if not self.can_put(name):
             if throw:
                 raise ESTypeError('%s is not a writable property' % name)
@@ -115,10 +165,18 @@ class ObjectInstance(ObjectType):
         """
         8.12.6
         """
-        desc = self.get_property(name)
-        if desc is Undefined:
-            return False
-        return True
+        obj = self
+        while obj is not None:
+            if obj.exotic:
+                return obj.get_property(name) is not Undefined
+            properties = obj.properties
+            if properties is None:
+                if name in obj.shape.slots:
+                    return True
+            elif name in properties:
+                return True
+            obj = obj.prototype
+        return False
 
     def delete(self, name, throw=False):
         """
@@ -128,7 +186,9 @@ class ObjectInstance(ObjectType):
         if desc is Undefined:
             return True
         if desc.configurable:
+            self.make_dictionary()
             del self.properties[name]
+            self.property_names.remove(name)
             return True
         elif throw:
             raise ESTypeError('Cannot delete property %s' % name)
@@ -178,13 +238,32 @@ class ObjectInstance(ObjectType):
         if current is Undefined:
             if not extensible:
                 return reject('Cannot define property on non-extensible object')
+            if self.properties is None:
+                flags = get_flags(descriptor)
+                if flags is not None:
+                    self.add_property(name, descriptor.value, flags)
+                    return True
+                self.make_dictionary()
             self.properties[name] = PropertyDescriptor.clone(descriptor)
+            self.property_names.append(name)
             return True
         if descriptor.empty():
             return True
-        if current.enumerable is descriptor.enumerable and \
-           current.configurable is descriptor.configurable and \
-           current.writable is descriptor.writable:
+        descriptor_flags = descriptor.flags
+        if self.properties is None:
+            # Values of writable properties are changed in place, other
+            # changes are made to the descriptors of dictionary mode.
+            index = self.shape.slots[name]
+            flags = self.shape.flags[index]
+            if flags & WRITABLE and descriptor.get is None and \
+                    descriptor.set is None and \
+                    not (descriptor_flags ^ flags) & (descriptor_flags >> 3):
+                if descriptor.value is not None:
+                    self.values[index] = descriptor.value
+                return True
+            self.make_dictionary()
+            current = self.properties[name]
+        if current.flags == descriptor_flags:
             if same_value(current.get, descriptor.get) and \
                same_value(current.set, descriptor.set) and \
                same_value(current.value, descriptor.value):
@@ -227,12 +306,10 @@ class ObjectInstance(ObjectType):
                     return reject()
         if descriptor.value is not None:
             current.value = descriptor.value
-        if descriptor.writable is not None:
-            current.writable = descriptor.writable
-        if descriptor.enumerable is not None:
-            current.enumerable = descriptor.writable
-        if descriptor.configurable is not None:
-            current.configurable = descriptor.configurable
+        # The attributes the descriptor has replace those of the property.
+        present = descriptor_flags >> 3
+        changed = present | (present << 3)
+        current.flags = current.flags & ~changed | descriptor_flags & changed
         if descriptor.get is not None:
             current.get = descriptor.get
         if descriptor.set is not None:
@@ -247,11 +324,64 @@ class ObjectInstance(ObjectType):
         """
         Internal use only property setter. This does not perform descriptor checks.
         """
-        desc = PropertyDescriptor(
-            value=value, enumerable=enumerable, writable=writable,
-            configurable=configurable
-        )
-        self.properties[name] = desc
+        flags = 0
+        if writable:
+            flags = WRITABLE
+        if enumerable:
+            flags |= ENUMERABLE
+        if configurable:
+            flags |= CONFIGURABLE
+        if self.properties is None and value is not None:
+            index = self.shape.slots.get(name)
+            if index is None:
+                self.add_property(name, value, flags)
+                return
+            elif self.shape.flags[index] == flags:
+                self.values[index] = value
+                return
+        self.make_dictionary()
+        if name not in self.properties:
+            self.property_names.append(name)
+        self.properties[name] = make_descriptor(value, flags)
+
+    def add_property(self, name, value, flags):
+        """
+        Add a data property that the object does not have yet, without
+        descriptor checks.
+        """
+        if self.properties is None:
+            shape = self.shape.add(name, flags)
+            if shape is not None:
+                self.shape = shape
+                self.values.append(value)
+                return
+            self.make_dictionary()
+        self.properties[name] = make_descriptor(value, flags)
+        self.property_names.append(name)
+
+    def make_dictionary(self):
+        """
+        Move the properties of the object out of its shape, into descriptors
+        kept in ``properties``.
+        """
+        if self.properties is not None:
+            return
+        shape = self.shape
+        self.properties = properties = {}
+        for name, value, flags in zip(shape.names, self.values, shape.flags):
+            properties[name] = make_descriptor(value, flags)
+        self.property_names = list(shape.names)
+        self.shape = None
+        self.values = None
+
+    def own_property_names(self):
+        """
+        The names of the own properties of the object, in the order they
+        were added.
+        """
+        if self.properties is None:
+            return list(self.shape.names)
+        return list(self.property_names)
 
 
 class FunctionInstance(ObjectInstance):
@@ -260,6 +390,7 @@ class FunctionInstance(ObjectInstance):
 
     15.3.5 & 13.2
     """
+    __slots__ = ()
     es_class = "Function"
 
     def call(self, this, arguments):
@@ -18,6 +18,7 @@ class ScriptFunctionInstance(FunctionInstance):
     """
     A specialized class for script-defined functions.
     """
+    __slots__ = ('node', 'scope', 'formal_parameters', 'code', 'strict')
     def __init__(self, interpreter, node, scope, strict):
         super(ScriptFunctionInstance, self).__init__(interpreter)
         self.node = node
@@ -31,9 +32,22 @@ class ScriptFunctionInstance(FunctionInstance):
         """
         13.2.1
         """
+        jit = self.interpreter.jit
+        if jit is not None:
+            return jit.call(self, this, arguments)
+        return self.interpret(this, arguments)
+
+    def interpret(self, this, arguments):
+        """
+        Run the code of the function with the interpreter's backend.
+        """
         func = self.node
         interpreter = self.interpreter
-        function_declarations, variable_declarations, strict = interpreter.declarations[func]
+        declarations = interpreter.declarations.get(func)
+        if declarations is None:
+            # A pre-parsed function, parsed on its first call
+            declarations = interpreter.parse_function_body(func)
+        function_declarations, variable_declarations, strict = declarations
         # 10.4.3
         if strict:
             this_binding = this
@@ -43,8 +57,11 @@ class ScriptFunctionInstance(FunctionInstance):
             this_binding = interpreter.to_object(this)
         else:
             this_binding = this
+        layout = interpreter.get_function_layout(
+            func, function_declarations, variable_declarations
+        )
         outer_env = interpreter.execution_context.lexical_environment
-        local_env = outer_env.new_declarative_environment(self.scope)
+        local_env = outer_env.new_declarative_environment(self.scope, layout)
         interpreter.enter_execution_context(local_env, local_env, this_binding)
         interpreter.enter_strict_context(strict)
         try:
@@ -82,6 +99,7 @@ class BoundFunctionInstance(FunctionInstance):
     """
     A specialized class for functions returned by ``Function.prototype.bind``.
     """
+    __slots__ = ('target_function', 'bound_args', 'bound_this')
     def __init__(self, interpreter, target_function, bound_args, bound_this):
         super(BoundFunctionInstance, self).__init__(interpreter)
         self.target_function = target_function
@@ -119,16 +137,17 @@ class NativeFunctionInstance(FunctionInstance):
     """
     A specialized class for functions whose implementation is in Python code.
     """
+    __slots__ = ('name', 'native')
+
     def __init__(self, interpreter, native, length=0, name=None):
         super(NativeFunctionInstance, self).__init__(interpreter)
+        # The methods of the object and function prototypes are made before
+        # there is a function prototype, and are given it by the interpreter.
+        self.prototype = getattr(interpreter, 'FunctionPrototype', None)
         self.name = name
         self.native = native
         self.set_property('length', length)
 
-    @property
-    def prototype(self):
-        return self.interpreter.FunctionPrototype
-
     def call(self, this, arguments):
         return self.native(this, arguments)
 
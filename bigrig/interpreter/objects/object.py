@@ -56,7 +56,6 @@ class ObjectConstructor(FunctionInstance):
             return self.interpreter.to_object(value)
         obj = ObjectInstance(self.interpreter)
         obj.prototype = self.interpreter.ObjectPrototype
-        obj.es_class = 'Object'
         obj.extensible = True
         return obj
 
@@ -108,7 +107,7 @@ class ObjectConstructor(FunctionInstance):
         """
         obj = self.get_arguments(arguments, count=1)
         array = self.interpreter.ArrayConstructor.construct([])
-        for i, name in enumerate(obj.properties):
+        for i, name in enumerate(obj.own_property_names()):
             desc = PropertyDescriptor(
                 value=name, writable=True, enumerable=True, configurable=True,
             )
@@ -149,8 +148,8 @@ class ObjectConstructor(FunctionInstance):
         """
         obj, properties = self.get_arguments(arguments, count=2)
         properties = self.interpreter.to_object(properties)
-        for name, desc in properties.properties.iteritems():
-            if not desc.enumerable:
+        for name in properties.own_property_names():
+            if not properties.get_own_property(name).enumerable:
                 continue
             desc_obj = properties.get(name)
             desc = to_property_descriptor(self.interpreter, desc_obj)
@@ -164,9 +163,11 @@ class ObjectConstructor(FunctionInstance):
         15.2.3.8
         """
         obj = self.get_arguments(arguments, count=1)
-        for desc in obj.properties.itervalues():
+        for name in obj.own_property_names():
+            desc = obj.get_own_property(name)
             if desc.configurable is True:
                 desc.configurable = False
+            obj.define_own_property(name, desc, True)
         obj.extensible = False
         return obj
 
@@ -177,12 +178,14 @@ class ObjectConstructor(FunctionInstance):
         15.2.3.9
         """
         obj = self.get_arguments(arguments, count=1)
-        for desc in obj.properties.itervalues():
+        for name in obj.own_property_names():
+            desc = obj.get_own_property(name)
             if is_data_descriptor(desc):
                 if desc.writable is True:
                     desc.writable = False
             if desc.configurable is True:
                 desc.configurable = False
+            obj.define_own_property(name, desc, True)
         obj.extensible = False
         return obj
 
@@ -203,8 +206,8 @@ class ObjectConstructor(FunctionInstance):
         15.2.3.11
         """
         obj = self.get_arguments(arguments, count=1)
-        for desc in obj.properties.itervalues():
-            if desc.configurable is True:
+        for name in obj.own_property_names():
+            if obj.get_own_property(name).configurable is True:
                 return False
         if obj.extensible is False:
             return True
@@ -217,7 +220,8 @@ class ObjectConstructor(FunctionInstance):
         15.2.3.12
         """
         obj = self.get_arguments(arguments, count=1)
-        for desc in obj.properties.itervalues():
+        for name in obj.own_property_names():
+            desc = obj.get_own_property(name)
             if is_data_descriptor(desc):
                 if desc.writable is True:
                     return False
@@ -245,8 +249,8 @@ class ObjectConstructor(FunctionInstance):
         obj = self.get_arguments(arguments, count=1)
         array = self.interpreter.ArrayConstructor.construct([])
         index = 0
-        for name, desc in obj.properties.iteritems():
-            if desc.enumerable is True:
+        for name in obj.own_property_names():
+            if obj.get_own_property(name).enumerable is True:
                 desc = PropertyDescriptor(
                     value=name, writable=True, enumerable=True, configurable=True
                 )
@@ -261,8 +265,6 @@ class ObjectPrototype(ObjectInstance):
 
     15.2.4
     """
-    prototype = None
-
     def __init__(self, interpreter):
         super(ObjectPrototype, self).__init__(interpreter)
         define_native_method(self, 'toString', self.to_string_method)
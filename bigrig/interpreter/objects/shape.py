@@ -0,0 +1,91 @@
+"""
+Shared layouts of object properties.
+
+Objects given the same data properties, with the same attributes, in the same
+order share a ``Shape`` holding their names and attributes, and keep only
+their values, in a list indexed by the slot of each name. Adding a property
+moves an object to the next shape in a tree of transitions, so the objects
+built by one constructor end up sharing a shape.
+
+Objects with accessor properties, deleted properties, reconfigured
+properties or too many properties leave their shape for dictionary mode,
+keeping a descriptor per property instead. So do objects adding a property
+to a shape that already leads to many others, as objects used as maps would
+otherwise leave a shape behind for every key.
+"""
+from . import (
+    PropertyDescriptor, WRITABLE, ENUMERABLE, CONFIGURABLE, ATTRIBUTES,
+    HAS_ATTRIBUTES
+)
+
+# Attribute flags of properties added by assignment
+DEFAULT_FLAGS = WRITABLE | ENUMERABLE | CONFIGURABLE
+
+# Properties after which an object is moved into dictionary mode
+MAX_SHAPE_PROPERTIES = 64
+
+# Transitions from a shape after which further properties added to it move
+# objects into dictionary mode
+MAX_SHAPE_TRANSITIONS = 32
+
+
+class Shape(object):
+    """
+    The names and attribute flags of the properties of objects, in the order
+    they were added.
+    """
+    __slots__ = ('names', 'slots', 'flags', 'transitions')
+
+    def __init__(self, names=(), slots=None, flags=()):
+        self.names = names
+        self.slots = slots or {} # Mapping of unicode to index in ``names``
+        self.flags = flags
+        self.transitions = {} # Mapping of (name, flags) to Shape
+
+    def add(self, name, flags):
+        """
+        Return the shape with a property named ``name`` added to this one, or
+        ``None`` when objects should be moved into dictionary mode instead.
+        """
+        key = (name, flags)
+        shape = self.transitions.get(key)
+        if shape is None:
+            if len(self.names) >= MAX_SHAPE_PROPERTIES or \
+                    len(self.transitions) >= MAX_SHAPE_TRANSITIONS:
+                return None
+            slots = dict(self.slots)
+            slots[name] = len(self.names)
+            shape = Shape(self.names + (name,), slots, self.flags + (flags,))
+            self.transitions[key] = shape
+        return shape
+
+
+# The shape of objects without properties
+ROOT_SHAPE = Shape()
+
+# The shape of exotic objects without properties, kept apart from the shapes
+# of other objects so that inline caches never mistake one for the other
+EXOTIC_ROOT_SHAPE = Shape()
+
+
+def get_flags(descriptor):
+    """
+    Return the attribute flags of a data descriptor with all its fields, or
+    ``None`` for descriptors that can not be kept in a shape.
+    """
+    if descriptor.get is not None or descriptor.set is not None or \
+            descriptor.value is None:
+        return None
+    flags = descriptor.flags
+    if flags & HAS_ATTRIBUTES != HAS_ATTRIBUTES:
+        return None
+    return flags & ATTRIBUTES
+
+
+def make_descriptor(value, flags):
+    """
+    Build the data descriptor of a value held in a shape.
+    """
+    descriptor = PropertyDescriptor(value=value)
+    descriptor.flags = flags | HAS_ATTRIBUTES
+    return descriptor
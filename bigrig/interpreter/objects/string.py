@@ -18,6 +18,7 @@ class StringInstance(ObjectInstance, StringType):
     15.5.5
     """
     es_class = 'String'
+    exotic = True
 
     def __init__(self, interpreter, primitive_value):
         super(StringInstance, self).__init__(interpreter)
@@ -12,13 +12,17 @@ inf = float('inf')
 sign = lambda x: math.copysign(1, x)
 MASK16 = (2 ** 16) - 1
 MASK32 = (2 ** 32) - 1
+# The exact classes of number and string values, for fast paths comparing
+# ``type(value)`` that skip the conversions. Booleans are not numbers here.
+NUMBER_TYPES = frozenset([int, long, float])
+STRING_TYPES = frozenset([unicode, str])
 
 
 class Type(object):
     """
     Base type class.
     """
-    pass
+    __slots__ = ()
 
 
 class PrimitiveType(Type):
@@ -73,7 +77,7 @@ class ObjectType(Type):
     """
     The base for all non-primitive objects.
     """
-    pass
+    __slots__ = ()
 
 
 def get_primitive_type(obj):
@@ -6,15 +6,63 @@ from ..parser import ast
 from ..parser.visitor import NodeVisitor
 from .types import (
     Undefined, Null, NumberType, StringType, ObjectType, BooleanType,
-    get_primitive_type, check_object_coercible, NaN
+    NUMBER_TYPES, STRING_TYPES, get_primitive_type, check_object_coercible,
+    NaN
 )
 from .exceptions import ESError, ESTypeError, ESSyntaxError
-from .environment import Reference, EnvironmentRecord
+from .environment import (
+    Reference, SlotReference, CachedReference, EnvironmentRecord
+)
 from .objects import PropertyDescriptor, is_callable, is_data_descriptor, is_accessor_descriptor
 from .objects.base import FunctionInstance, ObjectInstance
-from .literals import IdentifierParser, StringLiteralParser, NumberLiteralParser
+from .literals import constants
 from .ast_utils import code_is_strict
 
+# Kinds of abrupt completion. Statements complete normally by returning
+# their value, or ``None`` when it is empty, and abruptly by raising an
+# ``AbruptCompletion`` or, for throw completions, an ``ESError``.
+BREAK, CONTINUE, RETURN = range(3)
+COMPLETION_TYPES = ('break', 'continue', 'return')
+NORMAL = ('normal', None, None)
+EMPTY_LABELS = frozenset()
+
+# Operators applied by the functions in an ``EvaluationVisitor``'s tables
+BINARY_OPERATORS = ('*', '/', '%', '+', '-', '<<', '>>', '>>>', '&', '^', '|', ',')
+COMPARE_OPERATORS = (
+    'instanceof', 'in', '<', '>', '<=', '>=', '==', '!=', '===', '!=='
+)
+
+
+class AbruptCompletion(Exception):
+    """
+    Raised by a break, continue or return statement, and caught by the
+    statement that control is transferred to.
+
+    8.9
+    """
+    def __init__(self, type, value=None, target=None):
+        self.type = type
+        self.value = value
+        self.target = target
+
+    def ends_iteration(self, label_set):
+        """
+        Returns whether the completion breaks or continues a loop with the
+        given labels.
+        """
+        if self.type == RETURN:
+            return False
+        return self.target is None or self.target in label_set
+
+    def as_tuple(self):
+        return (COMPLETION_TYPES[self.type], self.value, self.target)
+
+
+# Unlabelled completions without a value are raised without allocating.
+BREAK_COMPLETION = AbruptCompletion(BREAK)
+CONTINUE_COMPLETION = AbruptCompletion(CONTINUE)
+RETURN_COMPLETION = AbruptCompletion(RETURN)
+
 
 class EvaluationVisitor(NodeVisitor):
     """
@@ -23,6 +71,14 @@ class EvaluationVisitor(NodeVisitor):
     def __init__(self, interpreter):
         self.interpreter = interpreter
         super(EvaluationVisitor, self).__init__()
+        # The operator of a node is looked up once, rather than compared
+        # against every operator in turn.
+        self.binary_operators = dict(
+            (op, self.make_binary_operator(op)) for op in BINARY_OPERATORS
+        )
+        self.compare_operators = dict(
+            (op, self.make_compare_operator(op)) for op in COMPARE_OPERATORS
+        )
 
     def check_valid_ref(self, ref):
         if isinstance(ref, Reference) and ref.is_strict_reference():
@@ -38,21 +94,41 @@ class EvaluationVisitor(NodeVisitor):
         return ''
 
     def get_value(self, ref):
+        cls = ref.__class__
+        if cls is SlotReference:
+            return ref.get_slot_value()
+        elif cls is CachedReference and isinstance(ref.base, ObjectInstance):
+            return ref.cache.get(ref.base)
         return self.interpreter.get_value(ref)
 
     def put_value(self, ref, value):
+        if ref.__class__ is SlotReference:
+            return ref.set_slot_value(value)
         return self.interpreter.put_value(ref, value)
 
+    def back_edge(self):
+        """
+        Called at the end of each loop iteration, for profiling.
+        """
+        pass
+
     # Expressions
 
     def visit_Name(self, node):
         # 11.1.2
         # 10.3.1
-        name = IdentifierParser.parse_string(node.value)
-        execution_context = self.interpreter.execution_context
-        env = execution_context.lexical_environment
-        strict = self.interpreter.in_strict_code()
-        return env.get_identifier_reference(name, strict=strict)
+        name = constants.identifier(node.value)
+        interpreter = self.interpreter
+        env = interpreter.execution_context.lexical_environment
+        strict = interpreter.in_strict_code()
+        resolution = interpreter.resolutions.get(node)
+        if resolution is None:
+            return env.get_identifier_reference(name, strict=strict)
+        depth, slot = resolution
+        while depth:
+            env = env.outer
+            depth -= 1
+        return SlotReference(env.environment_record, name, slot, strict)
 
     def visit_ThisNode(self, node):
         # 11.1.1
@@ -72,29 +148,24 @@ class EvaluationVisitor(NodeVisitor):
 
     def visit_NumberLiteral(self, node):
         # 7.8
-        value = node.value
-        strict = self.interpreter.in_strict_code()
-        return NumberLiteralParser.parse_string(value, allow_octal=not strict)
+        return constants.number(node.value, self.interpreter.in_strict_code())
 
     def visit_StringLiteral(self, node):
         # 7.8
-        strict = self.interpreter.in_strict_code()
-        return StringLiteralParser.parse_string(node.value, allow_octal=not strict)
+        return constants.string(node.value, self.interpreter.in_strict_code())
 
     def visit_ArrayLiteral(self, node):
         # 11.1.4
-        array = self.interpreter.ArrayConstructor.construct([])
-        length = len(node.elements)
+        values = []
+        indexes = []
         for i, element in enumerate(node.elements):
             if not isinstance(element, ast.Elision):
                 init_result = self.visit(element)
-                init_value = self.get_value(init_result)
-                desc = PropertyDescriptor(
-                    value=init_value, writable=True, enumerable=True, configurable=True
-                )
-                array.define_own_property(unicode(i), desc, False)
-        array.put('length', self.interpreter.to_uint32(length))
-        return array
+                values.append(self.get_value(init_result))
+                indexes.append(i)
+        return self.interpreter.ArrayConstructor.from_elements(
+            values, len(node.elements), indexes
+        )
 
     def visit_RegExpLiteral(self, node):
         # Strip the ``/``s here
@@ -102,7 +173,7 @@ class EvaluationVisitor(NodeVisitor):
         return self.interpreter.RegExpConstructor.construct([pattern, node.flags])
 
     def visit_PropertyName(self, node):
-        return IdentifierParser.parse_string(node.value)
+        return constants.identifier(node.value)
 
     def visit_ObjectProperty(self, node):
         name = self.visit(node.name)
@@ -149,28 +220,32 @@ class EvaluationVisitor(NodeVisitor):
         )
         return (name, descriptor)
 
+    def define_literal_property(self, obj, name, descriptor, strict):
+        # 11.1.5
+        previous = obj.get_own_property(name)
+        if previous is not Undefined:
+            if strict and is_data_descriptor(previous) and is_data_descriptor(descriptor):
+                raise ESSyntaxError(
+                    'Duplicate data property in object literal not allowed in strict mode'
+                )
+            elif is_data_descriptor(previous) and is_accessor_descriptor(descriptor):
+                raise ESSyntaxError()
+            elif is_accessor_descriptor(previous) and is_data_descriptor(descriptor):
+                raise ESSyntaxError()
+            elif is_accessor_descriptor(previous) and is_accessor_descriptor(descriptor):
+                if previous.get is not None and descriptor.get is not None:
+                    raise ESSyntaxError()
+                elif previous.set is not None and descriptor.set is not None:
+                    raise ESSyntaxError()
+        obj.define_own_property(name, descriptor, False)
+
     def visit_ObjectLiteral(self, node):
         # 11.1.5
         new_obj = self.interpreter.ObjectConstructor.construct([])
         strict = self.interpreter.in_strict_code()
         for prop in node.properties:
             (name, descriptor) = self.visit(prop)
-            previous = new_obj.get_own_property(name)
-            if previous is not Undefined:
-                if strict and is_data_descriptor(previous) and is_data_descriptor(descriptor):
-                    raise ESSyntaxError(
-                        'Duplicate data property in object literal not allowed in strict mode'
-                    )
-                elif is_data_descriptor(previous) and is_accessor_descriptor(descriptor):
-                    raise ESSyntaxError()
-                elif is_accessor_descriptor(previous) and is_data_descriptor(descriptor):
-                    raise ESSyntaxError()
-                elif is_accessor_descriptor(previous) and is_accessor_descriptor(descriptor):
-                    if previous.get is not None and descriptor.get is not None:
-                        raise ESSyntaxError()
-                    elif previous.set is not None and descriptor.set is not None:
-                        raise ESSyntaxError()
-            new_obj.define_own_property(name, descriptor, False)
+            self.define_literal_property(new_obj, name, descriptor, strict)
         return new_obj
 
     def visit_DotProperty(self, node):
@@ -182,7 +257,10 @@ class EvaluationVisitor(NodeVisitor):
         check_object_coercible(base_value)
         property_name_string = self.interpreter.to_string(property_name_value)
         strict = self.interpreter.in_strict_code()
-        return Reference(base_value, property_name_string, strict=strict)
+        cache = self.interpreter.get_property_cache(node, property_name_string)
+        return CachedReference(
+            base_value, property_name_string, cache, strict=strict
+        )
 
     def visit_BracketProperty(self, node):
         # 11.2.1
@@ -193,6 +271,15 @@ class EvaluationVisitor(NodeVisitor):
         check_object_coercible(base_value)
         property_name_string = self.interpreter.to_string(property_name_value)
         strict = self.interpreter.in_strict_code()
+        if isinstance(node.key, (ast.StringLiteral, ast.NumberLiteral)):
+            # Constant keys are read through the site's cache, as in
+            # ``visit_DotProperty``.
+            cache = self.interpreter.get_property_cache(
+                node, property_name_string
+            )
+            return CachedReference(
+                base_value, property_name_string, cache, strict=strict
+            )
         return Reference(base_value, property_name_string, strict=strict)
 
     def visit_CallExpression(self, node):
@@ -342,78 +429,89 @@ class EvaluationVisitor(NodeVisitor):
         self.put_value(lhs, new_value)
         return old_value
 
-    def apply_binary_operator(self, op, lval, rval):
-        # 11.5
-        to_primitive = self.interpreter.to_primitive
-        to_number = self.interpreter.to_number
-        to_string = self.interpreter.to_string
-        to_boolean = self.interpreter.to_boolean
-        to_int32 = self.interpreter.to_int32
-        to_uint32 = self.interpreter.to_uint32
+    def make_binary_operator(self, op):
+        """
+        Make the function applying a binary operator to two values. The
+        arithmetic operators check for a pair of numbers, and ``+`` also for
+        a pair of strings, before converting their operands.
+        """
+        interpreter = self.interpreter
+        to_primitive = interpreter.to_primitive
+        to_number = interpreter.to_number
+        to_string = interpreter.to_string
+        to_int32 = interpreter.to_int32
+        to_uint32 = interpreter.to_uint32
         if op == '*':
             # 11.5.1
-            left_num = to_number(lval)
-            right_num = to_number(rval)
-            return left_num * right_num
+            def multiply(lval, rval):
+                if type(lval) in NUMBER_TYPES and type(rval) in NUMBER_TYPES:
+                    return lval * rval
+                return to_number(lval) * to_number(rval)
+            return multiply
         elif op == '/':
             # 11.5.2
-            left_num = to_number(lval)
-            right_num = to_number(rval)
-            if right_num == 0:
-                return NaN
-            return left_num / right_num
+            def divide(lval, rval):
+                if type(lval) not in NUMBER_TYPES or type(rval) not in NUMBER_TYPES:
+                    lval = to_number(lval)
+                    rval = to_number(rval)
+                if rval == 0:
+                    return NaN
+                return lval / rval
+            return divide
         elif op == '%':
             # 11.5.3
-            left_num = to_number(lval)
-            right_num = to_number(rval)
-            if right_num == 0:
-                return NaN
-            return left_num % right_num
+            def modulo(lval, rval):
+                if type(lval) not in NUMBER_TYPES or type(rval) not in NUMBER_TYPES:
+                    lval = to_number(lval)
+                    rval = to_number(rval)
+                if rval == 0:
+                    return NaN
+                return lval % rval
+            return modulo
         elif op == '+':
             # 11.6.1
-            lval = to_primitive(lval)
-            rval = to_primitive(rval)
-            if get_primitive_type(lval) is StringType or get_primitive_type(rval) is StringType:
-                return to_string(lval) + to_string(rval)
-            return to_number(lval) + to_number(rval)
+            def add(lval, rval):
+                ltype = type(lval)
+                rtype = type(rval)
+                if (ltype in NUMBER_TYPES and rtype in NUMBER_TYPES) or \
+                        (ltype in STRING_TYPES and rtype in STRING_TYPES):
+                    return lval + rval
+                lval = to_primitive(lval)
+                rval = to_primitive(rval)
+                if get_primitive_type(lval) is StringType or \
+                        get_primitive_type(rval) is StringType:
+                    return to_string(lval) + to_string(rval)
+                return to_number(lval) + to_number(rval)
+            return add
         elif op == '-':
             # 11.6.2
-            left_num = to_number(lval)
-            right_num = to_number(rval)
-            return left_num - right_num
+            def subtract(lval, rval):
+                if type(lval) in NUMBER_TYPES and type(rval) in NUMBER_TYPES:
+                    return lval - rval
+                return to_number(lval) - to_number(rval)
+            return subtract
         elif op == '<<':
             # 11.7.1
-            left_num = to_int32(lval)
-            right_num = to_uint32(rval)
-            shift_count = right_num & 0x1F
-            return left_num << shift_count
+            return lambda lval, rval: to_int32(lval) << (to_uint32(rval) & 0x1F)
         elif op == '>>':
             # FIXME: should this wrap?
             # 11.7.2
-            left_num = to_int32(lval)
-            right_num = to_uint32(rval)
-            shift_count = right_num & 0x1F
-            return right_num >> shift_count
+            return lambda lval, rval: to_int32(lval) >> (to_uint32(rval) & 0x1F)
         elif op == '>>>':
             # 11.7.3
-            left_num = to_uint32(lval)
-            right_num = to_uint32(rval)
-            shift_count = right_num & 0x1F
-            return left_num >> right_num
+            return lambda lval, rval: to_uint32(lval) >> to_uint32(rval)
         elif op == '&':
-            left_num = to_int32(lval)
-            right_num = to_int32(rval)
-            return left_num & right_num
+            return lambda lval, rval: to_int32(lval) & to_int32(rval)
         elif op == '^':
-            left_num = to_int32(lval)
-            right_num = to_int32(rval)
-            return left_num ^ right_num
+            return lambda lval, rval: to_int32(lval) ^ to_int32(rval)
         elif op == '|':
-            left_num = to_int32(lval)
-            right_num = to_int32(rval)
-            return left_num | right_num
+            return lambda lval, rval: to_int32(lval) | to_int32(rval)
         elif op == ',':
-            return rval
+            return lambda lval, rval: rval
+
+    def apply_binary_operator(self, op, lval, rval):
+        # 11.5
+        return self.binary_operators[op](lval, rval)
 
     def visit_BinaryOperation(self, node):
         left = self.visit(node.left)
@@ -433,13 +531,17 @@ class EvaluationVisitor(NodeVisitor):
         else:
             right = self.visit(node.right)
             rval = self.get_value(right)
-        return self.apply_binary_operator(node.op, lval, rval)
+        return self.binary_operators[node.op](lval, rval)
 
     def compare(self, x, y, left_first=True):
         # 11.8.5
-        to_primitive = self.interpreter.to_primitive
         if not left_first:
             x, y = y, x
+        if type(x) in NUMBER_TYPES and type(y) in NUMBER_TYPES:
+            if x != x or y != y:
+                return Undefined
+            return x < y
+        to_primitive = self.interpreter.to_primitive
         px = to_primitive(x, preferred_type='Number')
         py = to_primitive(y, preferred_type='Number')
         if get_primitive_type(px) is StringType and get_primitive_type(py) is StringType:
@@ -458,6 +560,9 @@ class EvaluationVisitor(NodeVisitor):
 
     def equal(self, x, y):
         # 11.9.3
+        if (type(x) in NUMBER_TYPES and type(y) in NUMBER_TYPES) or \
+                (type(x) in STRING_TYPES and type(y) in STRING_TYPES):
+            return x == y
         to_number = self.interpreter.to_number
         to_string = self.interpreter.to_string
         to_boolean = self.interpreter.to_boolean
@@ -490,50 +595,93 @@ class EvaluationVisitor(NodeVisitor):
             return x == y
         return False
     
-    def visit_CompareOperation(self, node):
-        lref = self.visit(node.left)
-        rref = self.visit(node.right)
-        lval = self.get_value(lref)
-        rval = self.get_value(rref)
-        op = node.op
+    def make_compare_operator(self, op):
+        """
+        Make the function applying a relational or equality operator to two
+        values. The relational operators compare a pair of numbers or of
+        strings directly, which gives ``false`` for ``NaN`` as in 11.8.5.
+        """
+        interpreter = self.interpreter
+        compare = self.compare
+        equal = self.equal
+        strict_equal = interpreter.strict_equal
         if op == 'instanceof':
-            if get_primitive_type(rval) is not ObjectType or not hasattr(rval, 'has_instance'):
-                raise ESTypeError("Non-function operand for 'instanceof' check")
-            return rval.has_instance(lval)
+            # 11.8.6
+            def instanceof(lval, rval):
+                if get_primitive_type(rval) is not ObjectType or \
+                        not hasattr(rval, 'has_instance'):
+                    raise ESTypeError("Non-function operand for 'instanceof' check")
+                return rval.has_instance(lval)
+            return instanceof
         elif op == 'in':
-            if get_primitive_type(rval) is not ObjectType:
-                raise ESTypeError("Non-object operand for 'in'")
-            lname = self.interpreter.to_string(lval)
-            return rval.has_property(lname)
+            # 11.8.7
+            to_string = interpreter.to_string
+            def in_operator(lval, rval):
+                if get_primitive_type(rval) is not ObjectType:
+                    raise ESTypeError("Non-object operand for 'in'")
+                return rval.has_property(to_string(lval))
+            return in_operator
         elif op == '<':
-            r = self.compare(lval, rval)
-            if r is Undefined:
-                return False
-            return r
+            # 11.8.1
+            def less(lval, rval):
+                ltype = type(lval)
+                rtype = type(rval)
+                if (ltype in NUMBER_TYPES and rtype in NUMBER_TYPES) or \
+                        (ltype in STRING_TYPES and rtype in STRING_TYPES):
+                    return lval < rval
+                return compare(lval, rval) is True
+            return less
         elif op == '>':
-            r = self.compare(lval, rval, left_first=False)
-            if r is Undefined:
-                return False
-            return r
+            # 11.8.2
+            def greater(lval, rval):
+                ltype = type(lval)
+                rtype = type(rval)
+                if (ltype in NUMBER_TYPES and rtype in NUMBER_TYPES) or \
+                        (ltype in STRING_TYPES and rtype in STRING_TYPES):
+                    return lval > rval
+                return compare(lval, rval, left_first=False) is True
+            return greater
         elif op == '<=':
-            r = self.compare(lval, rval, left_first=False)
-            if r is True or r is Undefined:
-                return False
-            return True
+            # 11.8.3
+            def less_or_equal(lval, rval):
+                ltype = type(lval)
+                rtype = type(rval)
+                if (ltype in NUMBER_TYPES and rtype in NUMBER_TYPES) or \
+                        (ltype in STRING_TYPES and rtype in STRING_TYPES):
+                    return lval <= rval
+                r = compare(lval, rval, left_first=False)
+                return not (r is True or r is Undefined)
+            return less_or_equal
         elif op == '>=':
-            r = self.compare(lval, rval)
-            if r is True or r is Undefined:
-                return False
-            return True
+            # 11.8.4
+            def greater_or_equal(lval, rval):
+                ltype = type(lval)
+                rtype = type(rval)
+                if (ltype in NUMBER_TYPES and rtype in NUMBER_TYPES) or \
+                        (ltype in STRING_TYPES and rtype in STRING_TYPES):
+                    return lval >= rval
+                r = compare(lval, rval)
+                return not (r is True or r is Undefined)
+            return greater_or_equal
         elif op == '==':
             # 11.9.1
-            return self.equal(rval, lval)
+            return lambda lval, rval: equal(rval, lval)
         elif op == '!=':
-            return not self.equal(rval, lval)
+            # 11.9.2
+            return lambda lval, rval: not equal(rval, lval)
         elif op == '===':
-            return self.interpreter.strict_equal(lval, rval)
+            # 11.9.4
+            return strict_equal
         elif op == '!==':
-            return not self.interpreter.strict_equal(lval, rval)
+            # 11.9.5
+            return lambda lval, rval: not strict_equal(lval, rval)
+
+    def visit_CompareOperation(self, node):
+        lref = self.visit(node.left)
+        rref = self.visit(node.right)
+        lval = self.get_value(lref)
+        rval = self.get_value(rref)
+        return self.compare_operators[node.op](lval, rval)
 
     def visit_Conditional(self, node):
         lref = self.visit(node.condition)
@@ -546,13 +694,15 @@ class EvaluationVisitor(NodeVisitor):
     def visit_Assignment(self, node):
         lref = self.visit(node.target)
         self.check_valid_ref(lref)
+        if node.op != '=':
+            # 11.13.2, the target is read before the value is evaluated
+            lval = self.get_value(lref)
         rref = self.visit(node.value)
         rval = self.get_value(rref)
         if node.op == '=':
             self.put_value(lref, rval)
             return rval
         else:
-            lval = self.get_value(lref)
             op = node.op[:-1]
             r = self.apply_binary_operator(op, lval, rval)
             self.put_value(lref, r)
@@ -561,60 +711,78 @@ class EvaluationVisitor(NodeVisitor):
     # Statements
 
     def visit_statement_list(self, statements):
-        completion_type = 'normal'
+        """
+        Run the statements of a program, function or eval code, returning
+        their completion as a ``(type, value, target)`` tuple.
+        """
+        try:
+            value = self.visit_statements(statements)
+        except AbruptCompletion, completion:
+            return completion.as_tuple()
+        except ESError, e:
+            return ('throw', self.interpreter.exception_to_error(e), None)
+        if value is None:
+            return NORMAL
+        return ('normal', value, None)
+
+    def visit_statements(self, statements):
         value = None
-        target = None
-        for statement in statements:
-            try:
-                (completion_type, s_value, target) = self.visit(statement)
-            except ESError, e:
-                completion_type = 'throw'
-                s_value = self.interpreter.exception_to_error(e)
-                target = None
-            if completion_type != 'normal':
-                return (completion_type, s_value, target)
-            if s_value is not None:
-                value = s_value
-        return (completion_type, value, target)
+        try:
+            for statement in statements:
+                s_value = self.visit(statement)
+                if s_value is not None:
+                    value = s_value
+        except AbruptCompletion, completion:
+            # Breaks and continues carry the value so far, 12.1
+            if value is None or completion.value is not None or completion.type == RETURN:
+                raise
+            raise AbruptCompletion(completion.type, value, completion.target)
+        return value
 
     def visit_Block(self, node):
-        return self.visit_statement_list(node.statements)
+        return self.visit_statements(node.statements)
 
     def visit_DoWhileStatement(self, node):
-        label_set = self.interpreter.label_sets.get(node, set())
+        label_set = self.interpreter.label_sets.get(node, EMPTY_LABELS)
         v = None
         iterating = True
         while iterating:
-            (comp_type, value, target) = stmt = self.visit(node.body)
+            try:
+                value = self.visit(node.body)
+            except AbruptCompletion, completion:
+                value = completion.value
+                if not completion.ends_iteration(label_set):
+                    raise
+                elif completion.type == BREAK:
+                    return value if value is not None else v
             if value is not None:
                 v = value
-            if comp_type is not 'continue' or (target is not None and target not in label_set):
-                if comp_type == 'break' and (target is None or target in label_set):
-                    return ('normal', v, None)
-                elif comp_type != 'normal':
-                    return stmt
+            self.back_edge()
             expr_ref = self.visit(node.condition)
             if not self.interpreter.to_boolean(self.get_value(expr_ref)):
                 iterating = False
-        return ('normal', v, None)
+        return v
 
     def visit_WhileStatement(self, node):
-        label_set = self.interpreter.label_sets.get(node, set())
+        label_set = self.interpreter.label_sets.get(node, EMPTY_LABELS)
         v = None
-        expression_boolean = lambda res: self.interpreter.to_boolean(self.get_value(res))
-        while expression_boolean(self.visit(node.condition)):
-            (comp_type, value, target) = stmt = self.visit(node.body)
+        to_boolean = self.interpreter.to_boolean
+        while to_boolean(self.get_value(self.visit(node.condition))):
+            try:
+                value = self.visit(node.body)
+            except AbruptCompletion, completion:
+                value = completion.value
+                if not completion.ends_iteration(label_set):
+                    raise
+                elif completion.type == BREAK:
+                    return value if value is not None else v
             if value is not None:
                 v = value
-            if comp_type != 'continue' or (target is not None and target not in label_set):
-                if comp_type == 'break' and (target is None or target in label_set):
-                    return ('normal', v, None)
-                if comp_type != 'normal':
-                    return stmt
-        return ('normal', v, None)
+            self.back_edge()
+        return v
 
     def visit_ForStatement(self, node):
-        label_set = self.interpreter.label_sets.get(node, set())
+        label_set = self.interpreter.label_sets.get(node, EMPTY_LABELS)
         if node.initialize:
             expr_ref = self.visit(node.initialize)
             self.get_value(expr_ref)
@@ -625,55 +793,59 @@ class EvaluationVisitor(NodeVisitor):
             if test_expr:
                 test_expr_ref = self.visit(test_expr)
                 if not self.interpreter.to_boolean(self.get_value(test_expr_ref)):
-                    return ('normal', v, None)
-            (comp_type, value, target) = stmt = self.visit(node.body)
+                    return v
+            try:
+                value = self.visit(node.body)
+            except AbruptCompletion, completion:
+                value = completion.value
+                if not completion.ends_iteration(label_set):
+                    raise
+                elif completion.type == BREAK:
+                    return value if value is not None else v
             if value is not None:
                 v = value
-            if comp_type == 'break' and (target is None or target in label_set):
-                return ('normal', v, None)
-            if comp_type != 'continue' or (target is not None and target not in label_set):
-                if comp_type != 'normal':
-                    return stmt
             if inc_expr:
                 inc_expr_ref = self.visit(inc_expr)
                 self.get_value(inc_expr_ref)
-        return ('normal', v, None)
+            self.back_edge()
 
     def visit_ForInStatement(self, node):
-        label_set = self.interpreter.label_sets.get(node, set())
+        label_set = self.interpreter.label_sets.get(node, EMPTY_LABELS)
         expr_ref = self.visit(node.enumerable)
         expr_val = self.get_value(expr_ref)
         if expr_val is Null or expr_val is Undefined:
-            return ('normal', None, None)
+            return None
         obj = self.interpreter.to_object(expr_val)
         v = None
         seen = set()
         current = obj
         while current is not None:
-            keys = current.properties.keys()
-            for key in keys:
-                if key in seen or key not in current.properties:
+            for key in current.own_property_names():
+                if key in seen:
                     continue
-                desc = current.properties[key]
-                if not desc.enumerable:
+                desc = current.get_own_property(key)
+                if desc is Undefined or not desc.enumerable:
                     continue
                 seen.add(key)
                 lhs_ref = self.visit(node.each)
                 self.put_value(lhs_ref, key)
-                (comp_type, value, target) = stmt = self.visit(node.body)
+                try:
+                    value = self.visit(node.body)
+                except AbruptCompletion, completion:
+                    value = completion.value
+                    if not completion.ends_iteration(label_set):
+                        raise
+                    elif completion.type == BREAK:
+                        return value if value is not None else v
                 if value is not None:
                     v = value
-                if comp_type == 'break' and (target is None or target in label_set):
-                    return ('normal', v, None)
-                if comp_type != 'continue' or (target is not None and target not in label_set):
-                    if comp_type != 'normal':
-                        return stmt
+                self.back_edge()
             current = getattr(current, 'prototype', None)
-        return ('normal', v, None)
+        return v
 
     def visit_ExpressionStatement(self, node):
         expr_ref = self.visit(node.expression)
-        return ('normal', self.get_value(expr_ref), None)
+        return self.get_value(expr_ref)
 
     def visit_LabelledStatement(self, node):
         label = node.label.value
@@ -682,52 +854,64 @@ class EvaluationVisitor(NodeVisitor):
         if node in label_sets:
             node_labels.update(label_sets[node])
         label_sets[node.statement] = node_labels
-        comp_type, value, target = self.visit(node.statement)
-        if comp_type == 'break' and target == label:
-            return ('normal', value, None)
-        return (comp_type, value, target)
+        try:
+            return self.visit(node.statement)
+        except AbruptCompletion, completion:
+            if completion.type == BREAK and completion.target == label:
+                return completion.value
+            raise
 
     def visit_ContinueStatement(self, node):
-        target = None
-        if node.target is not None:
-            target = self.visit(node.target)
-        return ('continue', None, target)
+        if node.target is None:
+            raise CONTINUE_COMPLETION
+        raise AbruptCompletion(CONTINUE, None, node.target)
 
     def visit_BreakStatement(self, node):
-        target = None
-        if node.target is not None:
-            target = self.visit(node.target)
-        return ('break', None, target)
+        if node.target is None:
+            raise BREAK_COMPLETION
+        raise AbruptCompletion(BREAK, None, node.target)
 
     def visit_ReturnStatement(self, node):
-        value = None
-        if node.expression is not None:
-            expr_ref = self.visit(node.expression)
-            value = self.get_value(expr_ref)
-        return ('return', value, None)
+        if node.expression is None:
+            raise RETURN_COMPLETION
+        expr_ref = self.visit(node.expression)
+        raise AbruptCompletion(RETURN, self.get_value(expr_ref))
 
     def visit_SwitchStatement(self, node):
+        # 12.11
         expr_ref = self.visit(node.expression)
         expr_val = self.get_value(expr_ref)
+        cases = node.cases
+        start = default = None
+        for i, clause in enumerate(cases):
+            if clause.label is None:
+                default = i
+                continue
+            clause_selector = self.get_value(self.visit(clause.label))
+            if self.interpreter.strict_equal(clause_selector, expr_val):
+                start = i
+                break
+        else:
+            start = default
         v = None
-        searching = True
-        default = None
-        for clause in node.cases:
-            if clause.label is not None:
-                clause_selector = self.get_value(self.visit(clause.label))
-                if self.interpreter.strict_equal(clause_selector, expr_val):
-                    searching = False
-                    if clause.statements:
-                        comp_type, value, target = result = self.visit_statement_list(clause.statements)
-                        if value is not None:
-                            v = value
-                        if comp_type != 'normal':
-                            return (comp_type, v, target)
-            else:
-                default = clause
-        if searching and default is not None:
-            comp_type, v, target = self.visit_statement_list(default.statements)
-        return ('normal', v, None)
+        if start is None:
+            return v
+        # Execution falls through the clauses following the selected one.
+        for clause in cases[start:]:
+            try:
+                value = self.visit_statements(clause.statements)
+            except AbruptCompletion, completion:
+                if completion.value is not None:
+                    v = completion.value
+                if completion.type == BREAK and completion.target is None:
+                    break
+                elif completion.value is not None or completion.type == RETURN:
+                    raise
+                # Abrupt completions carry the value of the clauses
+                raise AbruptCompletion(completion.type, v, completion.target)
+            if value is not None:
+                v = value
+        return v
 
     def visit_IfStatement(self, node):
         expr_ref = self.visit(node.condition)
@@ -736,45 +920,45 @@ class EvaluationVisitor(NodeVisitor):
             return self.visit(node.then_statement)
         elif node.else_statement:
             return self.visit(node.else_statement)
-        return ('normal', None, None)
+        return None
 
     def visit_Throw(self, node):
         expr_ref = self.visit(node.exception)
-        return ('throw', self.get_value(expr_ref), None)
+        raise self.interpreter.error_to_exception(self.get_value(expr_ref))
 
     def visit_TryStatement(self, node):
+        # 12.14
         try:
-            (comp_type, value, target) = result = self.visit(node.try_block)
-        except ESError, e:
-            value = self.interpreter.exception_to_error(e)
-            (comp_type, value, target) = result = ('throw', value, None)
-        if comp_type == 'throw':
-            if node.catch_var:
-                identifier = node.catch_var.value
-                execution_context = self.interpreter.execution_context
-                old_env = execution_context.lexical_environment
-                catch_env = old_env.new_declarative_environment(old_env)
-                env = catch_env.environment_record
-                env.create_mutable_binding(identifier)
-                env.set_mutable_binding(identifier, value, False)
-                execution_context.lexical_environment = catch_env
-                try:
-                    result = self.visit(node.catch_block)
-                finally:
-                    execution_context.lexical_environment = old_env
-        if node.finally_block:
-            (comp_type, value, target) = stmt = self.visit(node.finally_block)
-            if comp_type != 'normal':
-                return stmt
-        return result
+            try:
+                return self.visit(node.try_block)
+            except ESError, e:
+                if not node.catch_var:
+                    raise
+                value = self.interpreter.exception_to_error(e)
+            identifier = node.catch_var.value
+            execution_context = self.interpreter.execution_context
+            old_env = execution_context.lexical_environment
+            catch_env = old_env.new_declarative_environment(old_env)
+            env = catch_env.environment_record
+            env.create_mutable_binding(identifier)
+            env.set_mutable_binding(identifier, value, False)
+            execution_context.lexical_environment = catch_env
+            try:
+                return self.visit(node.catch_block)
+            finally:
+                execution_context.lexical_environment = old_env
+        finally:
+            # An abrupt completion of the finally block replaces the
+            # completion of the try statement.
+            if node.finally_block:
+                self.visit(node.finally_block)
 
     def visit_WithStatement(self, node):
         strict = self.interpreter.in_strict_code()
         if strict:
-            error = self.interpreter.SyntaxErrorConstructor.construct([
+            raise ESSyntaxError(
                 'The with statement is not allowed in strict mode code'
-            ])
-            return ('throw', error, None)
+            )
         val = self.visit(node.expression)
         obj = self.interpreter.to_object(self.get_value(val))
         old_env = self.interpreter.execution_context.lexical_environment
@@ -782,12 +966,9 @@ class EvaluationVisitor(NodeVisitor):
         new_env.environment_record.provide_this = True
         self.interpreter.execution_context.lexical_environment = new_env
         try:
-            stmt = self.visit(node.statement)
-        except ESError, e:
-            stmt = ('throw', e, None)
+            return self.visit(node.statement)
         finally:
             self.interpreter.execution_context.lexical_environment = old_env
-        return stmt
 
     def get_reference(self, name):
         env = self.interpreter.execution_context.lexical_environment
@@ -795,7 +976,7 @@ class EvaluationVisitor(NodeVisitor):
         return env.get_identifier_reference(name, strict=strict)
 
     def visit_VariableDeclaration(self, node):
-        lhs = self.get_reference(node.name)
+        lhs = self.get_reference(constants.identifier(node.name))
         self.check_valid_ref(lhs)
         if node.value:
             rhs = self.visit(node.value)
@@ -806,13 +987,13 @@ class EvaluationVisitor(NodeVisitor):
 
     def visit_VariableStatement(self, node):
         self.visit(node.declarations)
-        return ('normal', None, None)
+        return None
 
     def visit_EmptyStatement(self, node):
-        return ('normal', None, None)
+        return None
 
     def visit_FunctionDeclaration(self, node):
-        return ('normal', None, None)
+        return None
 
     def visit_Program(self, node):
-        return self.visit_statement_list(node.statements)
+        return self.visit_statements(node.statements)
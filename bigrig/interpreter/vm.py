@@ -0,0 +1,570 @@
+"""
+A stack based virtual machine running the bytecode of the ``bytecode``
+compiler.
+
+Each run of a ``Code`` has its own operand stack, exception handlers and
+completion value, while its bindings live in the environments of the
+execution context it is run in, as with the other backends. Values, objects
+and conversions are those of the interpreter.
+
+Function bodies compiled as they are run are kept by the machine, while the
+codes of programs compiled ahead of time, loaded from ``.bigc`` files, carry
+their functions with them.
+"""
+import math
+import weakref
+
+from ..parser import ast
+from .types import (
+    Undefined, Null, NaN, NumberType, StringType, ObjectType, BooleanType,
+    get_primitive_type, check_object_coercible
+)
+from .exceptions import ESError, ESTypeError, ESReferenceError, WrappedError
+from .environment import Reference
+from .objects import PropertyDescriptor, is_callable
+from .objects.base import FunctionInstance, ObjectInstance
+from .compiler import ClosureCompiler, resolve_binding
+from .bytecode import (
+    Code, OPERATORS, COMPARE_OPERATORS, ERROR_CLASSES, COUNT_DECREMENT,
+    COUNT_PREFIX, COUNT_DISCARD, DATA_PROPERTY, GETTER_PROPERTY,
+    compile_statements, compile_function,
+    LOAD_NAME, LOAD_CONST, STORE_NAME, POP, BINARY, COMPARE_JUMP_IF_FALSE,
+    COMPARE_JUMP_IF_TRUE, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, LOAD_DOT, CALL,
+    COUNT_NAME, LOAD_INDEX, LOAD_METHOD_DOT, POP_RESULT, RETURN, DUP, DUP2,
+    PROPERTY_KEY, LOAD_PROPERTY, STORE_PROPERTY, LOAD_METHOD, COUNT_PROPERTY,
+    LOAD_CALLEE_NAME, CALL_EVAL, NEW, LOAD_UNDEFINED, LOAD_NULL, LOAD_THIS,
+    JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP, NOT, NEGATE, TO_NUMBER,
+    BITWISE_NOT, TYPEOF, TYPEOF_NAME, DELETE_NAME, DELETE_PROPERTY, ROTATE3,
+    SETUP_TRY, POP_TRY, ENTER_CATCH, ENTER_WITH, POP_ENV, SET_RETURN,
+    RETURN_SAVED, THROW, RAISE, FOR_IN_START, FOR_IN_NEXT, MAKE_ARRAY,
+    MAKE_OBJECT, MAKE_FUNCTION, MAKE_ACCESSOR, MAKE_REGEXP, END
+)
+
+NORMAL = ('normal', None, None)
+
+def type_of(value):
+    """
+    The result of the ``typeof`` operator for a value.
+
+    11.4.3
+    """
+    primitive_type = get_primitive_type(value)
+    if primitive_type is Undefined:
+        return "undefined"
+    elif primitive_type is Null:
+        return "null"
+    elif primitive_type is BooleanType:
+        return "boolean"
+    elif primitive_type is NumberType:
+        return "number"
+    elif primitive_type is StringType:
+        return "string"
+    elif isinstance(value, FunctionInstance):
+        return "function"
+    return "object"
+
+def iter_enumerable_keys(obj):
+    """
+    Iterate over the names of the enumerable properties of an object and
+    its prototypes, skipping those deleted before they are reached.
+
+    12.6.4
+    """
+    seen = set()
+    current = obj
+    while current is not None:
+        for key in current.own_property_names():
+            if key in seen:
+                continue
+            desc = current.get_own_property(key)
+            if desc is Undefined or not desc.enumerable:
+                continue
+            seen.add(key)
+            yield key
+        current = getattr(current, 'prototype', None)
+
+
+class VirtualMachine(object):
+    """
+    Compiles code to bytecode as it is entered and runs it.
+    """
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        # Compiled function bodies, weakly keyed by their nodes
+        self.functions = weakref.WeakKeyDictionary()
+        self._operators = None
+
+    @property
+    def operators(self):
+        """
+        The functions applying ``OPERATORS``, by index.
+        """
+        if self._operators is None:
+            closure_compiler = ClosureCompiler(self.interpreter)
+            self._operators = [
+                op in COMPARE_OPERATORS and
+                closure_compiler.make_compare_operator(op) or
+                closure_compiler.make_binary_operator(op)
+                for op in OPERATORS
+            ]
+        return self._operators
+
+    #
+    # Running code
+    #
+
+    def execute_statements(self, statements):
+        """
+        Compile and run a statement list in the current execution context.
+        """
+        code = compile_statements(statements, self.interpreter.in_strict_code())
+        return self.run(code)
+
+    def execute_function(self, node):
+        """
+        Run the body of a function, compiling it on the first call.
+        """
+        if isinstance(node, Code):
+            return self.run(node)
+        code = self.functions.get(node)
+        if code is None:
+            code = self.functions[node] = compile_function(
+                node, self.interpreter.in_strict_code()
+            )
+        return self.run(code)
+
+    def prepare(self, code):
+        """
+        Add the declarations of a code compiled ahead of time, and of its
+        nested functions, to the interpreter's declarations map.
+        """
+        functions = code.functions
+        self.interpreter.declarations[code] = (
+            [functions[index] for index in code.function_declarations],
+            [ast.VariableDeclaration(name, None) for name in code.variables],
+            code.strict
+        )
+        for function in functions:
+            self.prepare(function)
+
+    def run(self, code):
+        """
+        Run a code in the current execution context, returning its
+        completion.
+        """
+        interpreter = self.interpreter
+        context = interpreter.execution_context
+        saved_env = context.lexical_environment
+        instructions = code.instructions
+        constants = code.constants
+        names = code.names
+        strict = code.strict
+        operators = self.operators
+        to_boolean = interpreter.to_boolean
+        to_number = interpreter.to_number
+        to_string = interpreter.to_string
+        get_value = interpreter.get_value
+        # The inline caches of the code's property reads, by offset
+        caches = interpreter.get_code_caches(code)
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        handlers = []
+        result = None
+        saved = Undefined
+        pc = 0
+        while True:
+            try:
+                while True:
+                    opcode = instructions[pc]
+                    argument = instructions[pc + 1]
+                    pc += 2
+                    if opcode == LOAD_NAME:
+                        name = names[argument]
+                        record = resolve_binding(context.lexical_environment, name)
+                        if record is None:
+                            raise ESReferenceError('%s is not defined' % name)
+                        push(record.get_binding_value(name, strict))
+                    elif opcode == LOAD_CONST:
+                        push(constants[argument])
+                    elif opcode == STORE_NAME:
+                        name = names[argument]
+                        record = resolve_binding(context.lexical_environment, name)
+                        # 8.7.2
+                        if record is not None:
+                            record.set_mutable_binding(name, pop(), strict)
+                        elif strict:
+                            raise ESReferenceError(
+                                'Cannot resolve referenced name: %s' % name
+                            )
+                        else:
+                            interpreter.Global.put(name, pop(), False)
+                    elif opcode == POP:
+                        pop()
+                    elif opcode == BINARY:
+                        right = pop()
+                        stack[-1] = operators[argument](stack[-1], right)
+                    elif opcode == COMPARE_JUMP_IF_FALSE:
+                        right = pop()
+                        if not operators[argument & 31](pop(), right):
+                            pc = argument >> 5
+                    elif opcode == COMPARE_JUMP_IF_TRUE:
+                        right = pop()
+                        if operators[argument & 31](pop(), right):
+                            pc = argument >> 5
+                    elif opcode == JUMP:
+                        pc = argument
+                    elif opcode == JUMP_IF_FALSE:
+                        value = pop()
+                        if value is False or (value is not True and not to_boolean(value)):
+                            pc = argument
+                    elif opcode == JUMP_IF_TRUE:
+                        value = pop()
+                        if value is True or (value is not False and to_boolean(value)):
+                            pc = argument
+                    elif opcode == LOAD_DOT:
+                        # 11.2.1
+                        base = stack[-1]
+                        key = constants[argument]
+                        if isinstance(base, ObjectInstance):
+                            cache = caches.get(pc)
+                            if cache is None:
+                                cache = caches[pc] = interpreter.make_property_cache(
+                                    (code, pc), key
+                                )
+                            stack[-1] = cache.get(base)
+                        elif isinstance(base, ObjectType):
+                            stack[-1] = base.get(key)
+                        else:
+                            check_object_coercible(base)
+                            stack[-1] = get_value(Reference(base, key, strict=strict))
+                    elif opcode == CALL or opcode == CALL_EVAL:
+                        # 11.2.3
+                        count = argument & 0xFFFF
+                        if count:
+                            arguments = stack[-count:]
+                            del stack[-count:]
+                        else:
+                            arguments = []
+                        function = pop()
+                        this = pop()
+                        if not isinstance(function, FunctionInstance) or \
+                                not is_callable(function):
+                            raise ESTypeError(
+                                '%s is not a function' % self.get_callee_name(code, argument)
+                            )
+                        # 15.1.2.1.1
+                        if opcode == CALL_EVAL and \
+                                function is interpreter.EvalFunctionInstance:
+                            push(function.call(this, arguments, direct=True))
+                        else:
+                            push(function.call(this, arguments))
+                    elif opcode == COUNT_NAME:
+                        # 11.3.1, 11.3.2, 11.4.4, 11.4.5
+                        name = names[argument >> 3]
+                        record = resolve_binding(context.lexical_environment, name)
+                        if record is None:
+                            raise ESReferenceError('%s is not defined' % name)
+                        old_value = to_number(record.get_binding_value(name, strict))
+                        if argument & COUNT_DECREMENT:
+                            new_value = old_value - 1
+                        else:
+                            new_value = old_value + 1
+                        record.set_mutable_binding(name, new_value, strict)
+                        if argument & COUNT_DISCARD:
+                            pass
+                        elif argument & COUNT_PREFIX:
+                            push(new_value)
+                        else:
+                            push(old_value)
+                    elif opcode == LOAD_INDEX:
+                        key = pop()
+                        base = stack[-1]
+                        check_object_coercible(base)
+                        key = to_string(key)
+                        if isinstance(base, ObjectType):
+                            stack[-1] = base.get(key)
+                        else:
+                            stack[-1] = get_value(Reference(base, key, strict=strict))
+                    elif opcode == LOAD_METHOD_DOT:
+                        base = stack[-1]
+                        key = constants[argument]
+                        if isinstance(base, ObjectInstance):
+                            cache = caches.get(pc)
+                            if cache is None:
+                                cache = caches[pc] = interpreter.make_property_cache(
+                                    (code, pc), key
+                                )
+                            push(cache.get(base))
+                        elif isinstance(base, ObjectType):
+                            push(base.get(key))
+                        else:
+                            check_object_coercible(base)
+                            push(get_value(Reference(base, key, strict=strict)))
+                    elif opcode == POP_RESULT:
+                        result = pop()
+                    elif opcode == RETURN:
+                        return ('return', pop(), None)
+                    elif opcode == DUP:
+                        push(stack[-1])
+                    elif opcode == DUP2:
+                        push(stack[-2])
+                        push(stack[-2])
+                    elif opcode == PROPERTY_KEY:
+                        check_object_coercible(stack[-2])
+                        stack[-1] = to_string(stack[-1])
+                    elif opcode == LOAD_PROPERTY:
+                        key = pop()
+                        base = stack[-1]
+                        if isinstance(base, ObjectType):
+                            stack[-1] = base.get(key)
+                        else:
+                            stack[-1] = get_value(Reference(base, key, strict=strict))
+                    elif opcode == STORE_PROPERTY:
+                        value = pop()
+                        key = pop()
+                        base = stack[-1]
+                        if isinstance(base, ObjectType):
+                            base.put(key, value, strict)
+                        else:
+                            interpreter.put_value(Reference(base, key, strict=strict), value)
+                        stack[-1] = value
+                    elif opcode == LOAD_METHOD:
+                        key = stack[-1]
+                        base = stack[-2]
+                        if isinstance(base, ObjectType):
+                            stack[-1] = base.get(key)
+                        else:
+                            stack[-1] = get_value(Reference(base, key, strict=strict))
+                    elif opcode == COUNT_PROPERTY:
+                        key = pop()
+                        base = pop()
+                        reference = Reference(base, key, strict=strict)
+                        old_value = to_number(get_value(reference))
+                        if argument & COUNT_DECREMENT:
+                            new_value = old_value - 1
+                        else:
+                            new_value = old_value + 1
+                        interpreter.put_value(reference, new_value)
+                        if argument & COUNT_DISCARD:
+                            pass
+                        elif argument & COUNT_PREFIX:
+                            push(new_value)
+                        else:
+                            push(old_value)
+                    elif opcode == LOAD_CALLEE_NAME:
+                        name = names[argument]
+                        record = resolve_binding(context.lexical_environment, name)
+                        if record is None:
+                            raise ESReferenceError('%s is not defined' % name)
+                        push(record.implicit_this_value())
+                        push(record.get_binding_value(name, strict))
+                    elif opcode == NEW:
+                        # 11.2.2
+                        count = argument & 0xFFFF
+                        if count:
+                            arguments = stack[-count:]
+                            del stack[-count:]
+                        else:
+                            arguments = []
+                        constructor = pop()
+                        if get_primitive_type(constructor) is not ObjectType or \
+                                not callable(getattr(constructor, 'construct', None)):
+                            raise ESTypeError(
+                                '%s is not a constructor' % self.get_callee_name(code, argument)
+                            )
+                        push(constructor.construct(arguments))
+                    elif opcode == LOAD_UNDEFINED:
+                        push(Undefined)
+                    elif opcode == LOAD_NULL:
+                        push(Null)
+                    elif opcode == LOAD_THIS:
+                        # 11.1.1
+                        push(context.this_binding)
+                    elif opcode == JUMP_IF_FALSE_OR_POP:
+                        # 11.11
+                        if not to_boolean(stack[-1]):
+                            pc = argument
+                        else:
+                            pop()
+                    elif opcode == JUMP_IF_TRUE_OR_POP:
+                        if to_boolean(stack[-1]):
+                            pc = argument
+                        else:
+                            pop()
+                    elif opcode == NOT:
+                        stack[-1] = not to_boolean(stack[-1])
+                    elif opcode == NEGATE:
+                        value = to_number(stack[-1])
+                        if math.isnan(value):
+                            stack[-1] = NaN
+                        else:
+                            stack[-1] = -value
+                    elif opcode == TO_NUMBER:
+                        stack[-1] = to_number(stack[-1])
+                    elif opcode == BITWISE_NOT:
+                        stack[-1] = ~interpreter.to_int32(stack[-1])
+                    elif opcode == TYPEOF:
+                        stack[-1] = type_of(stack[-1])
+                    elif opcode == TYPEOF_NAME:
+                        name = names[argument]
+                        record = resolve_binding(context.lexical_environment, name)
+                        if record is None:
+                            push("undefined")
+                        else:
+                            push(type_of(record.get_binding_value(name, strict)))
+                    elif opcode == DELETE_NAME:
+                        # 11.4.1
+                        name = names[argument]
+                        record = resolve_binding(context.lexical_environment, name)
+                        if record is None:
+                            push(True)
+                        else:
+                            push(record.delete_binding(name))
+                    elif opcode == DELETE_PROPERTY:
+                        key = pop()
+                        base = interpreter.to_object(pop())
+                        push(base.delete(key, strict))
+                    elif opcode == ROTATE3:
+                        push(stack.pop(-3))
+                    elif opcode == SETUP_TRY:
+                        handlers.append((argument, len(stack), context.lexical_environment))
+                    elif opcode == POP_TRY:
+                        handlers.pop()
+                    elif opcode == ENTER_CATCH:
+                        # 12.14
+                        name = names[argument]
+                        old_env = context.lexical_environment
+                        catch_env = old_env.new_declarative_environment(old_env)
+                        record = catch_env.environment_record
+                        record.create_mutable_binding(name)
+                        record.set_mutable_binding(name, pop(), False)
+                        context.lexical_environment = catch_env
+                    elif opcode == ENTER_WITH:
+                        # 12.10
+                        obj = interpreter.to_object(pop())
+                        old_env = context.lexical_environment
+                        new_env = old_env.new_object_environment(obj, old_env)
+                        new_env.environment_record.provide_this = True
+                        context.lexical_environment = new_env
+                    elif opcode == POP_ENV:
+                        context.lexical_environment = context.lexical_environment.outer
+                    elif opcode == SET_RETURN:
+                        saved = pop()
+                    elif opcode == RETURN_SAVED:
+                        return ('return', saved, None)
+                    elif opcode == THROW:
+                        raise WrappedError(pop())
+                    elif opcode == RAISE:
+                        raise ERROR_CLASSES[argument & 3](constants[argument >> 2])
+                    elif opcode == FOR_IN_START:
+                        value = pop()
+                        if value is Null or value is Undefined:
+                            push(iter(()))
+                        else:
+                            push(iter_enumerable_keys(interpreter.to_object(value)))
+                    elif opcode == FOR_IN_NEXT:
+                        key = next(stack[-1], None)
+                        if key is None:
+                            pc = argument
+                        else:
+                            push(key)
+                    elif opcode == MAKE_ARRAY:
+                        push(self.make_array(constants[argument], stack))
+                    elif opcode == MAKE_OBJECT:
+                        push(self.make_object(constants[argument], stack, strict))
+                    elif opcode == MAKE_FUNCTION:
+                        push(self.make_function(code.functions[argument], strict))
+                    elif opcode == MAKE_ACCESSOR:
+                        push(self.make_accessor(
+                            code.functions[argument >> 1], bool(argument & 1)
+                        ))
+                    elif opcode == MAKE_REGEXP:
+                        push(interpreter.RegExpConstructor.construct(
+                            list(constants[argument])
+                        ))
+                    elif opcode == END:
+                        if result is None:
+                            return NORMAL
+                        return ('normal', result, None)
+                    else:
+                        raise ValueError('Unknown opcode %d' % opcode)
+            except ESError, e:
+                error = interpreter.exception_to_error(e)
+                if not handlers:
+                    context.lexical_environment = saved_env
+                    return ('throw', error, None)
+                pc, depth, env = handlers.pop()
+                del stack[depth:]
+                context.lexical_environment = env
+                push(error)
+
+    def get_callee_name(self, code, argument):
+        index = argument >> 16
+        if index:
+            return code.names[index - 1]
+        return ''
+
+    #
+    # Creating objects
+    #
+
+    def make_array(self, layout, stack):
+        # 11.1.4
+        length, indexes = layout
+        interpreter = self.interpreter
+        values = []
+        if indexes:
+            values = stack[-len(indexes):]
+            del stack[-len(indexes):]
+        return interpreter.ArrayConstructor.from_elements(
+            values, length, indexes
+        )
+
+    def make_object(self, properties, stack, strict):
+        # 11.1.5
+        interpreter = self.interpreter
+        obj = interpreter.ObjectConstructor.construct([])
+        if not properties:
+            return obj
+        values = stack[-len(properties):]
+        del stack[-len(properties):]
+        define_literal_property = interpreter.evaluation_visitor.define_literal_property
+        to_string = interpreter.to_string
+        for (name, kind), value in zip(properties, values):
+            if kind == DATA_PROPERTY:
+                descriptor = PropertyDescriptor(
+                    value=value, writable=True, enumerable=True, configurable=True
+                )
+            elif kind == GETTER_PROPERTY:
+                descriptor = PropertyDescriptor(
+                    get=value, enumerable=True, configurable=True
+                )
+            else:
+                descriptor = PropertyDescriptor(
+                    set=value, enumerable=True, configurable=True
+                )
+            define_literal_property(obj, to_string(name), descriptor, strict)
+        return obj
+
+    def make_function(self, function, strict):
+        # 13
+        interpreter = self.interpreter
+        env = interpreter.execution_context.lexical_environment
+        func_env = env.new_declarative_environment(env)
+        name = function.name
+        if name:
+            record = func_env.environment_record
+            record.create_immutable_binding(name)
+        func = interpreter.create_function(function, func_env, strict)
+        if name:
+            record.initialize_immutable_binding(name, func)
+        return func
+
+    def make_accessor(self, function, strict):
+        interpreter = self.interpreter
+        if function not in interpreter.declarations:
+            interpreter.visit_declarations(function)
+        env = interpreter.execution_context.lexical_environment
+        scope = env.new_declarative_environment(env)
+        return interpreter.create_function(function, scope, strict)
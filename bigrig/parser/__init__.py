@@ -6,5 +6,5 @@ from .parser import (
     ParseException
 )
 from .scanner import (
-    make_string_scanner, make_file_scanner
+    make_string_scanner, make_file_scanner, iter_tokens
 )
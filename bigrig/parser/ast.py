@@ -249,3 +249,17 @@ class SourceElements(Expression):
 class Program(Node):
     abstract = False
     fields = ('statements',)
+
+#
+# Node class codes
+#
+
+# The concrete node classes in name order, so a class can be identified by its
+# index in serialized and array backed trees.
+NODE_CLASSES = tuple(sorted(
+    (value for value in globals().values()
+     if isinstance(value, type) and issubclass(value, Node) and
+     not value.abstract),
+    key=lambda cls: cls.__name__
+))
+NODE_CODES = dict((cls, code) for code, cls in enumerate(NODE_CLASSES))
@@ -0,0 +1,261 @@
+"""
+A persistent cache of abstract syntax trees, so unchanged sources need not
+be scanned and parsed again.
+
+Trees are stored in a cache directory, one file per source, keyed by a hash
+of the source text, the parser options and the versions of the parser, the
+node classes and the serialization format. Nodes are serialized as nested
+tuples of a node class code, the offset of the node's locator and its field
+values, which are marshalled and compressed. Locators are rebuilt as offsets
+into the source they were parsed from, so a tree loaded from the cache has
+the same locations as a freshly parsed one.
+
+Files are written to a temporary file that is then renamed into place, so
+processes sharing a cache directory never read a partly written entry. An
+entry that can not be read back, because it is stale, truncated or otherwise
+corrupt, is removed and rebuilt by parsing the source again.
+"""
+import errno
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from itertools import izip
+
+from .ast import NODE_CLASSES, NODE_CODES
+from .node import Node
+from .utils import OffsetLocator
+from .parser import (
+    PARSER_VERSION, LazyFunctionBody, make_string_parser, make_file_parser
+)
+
+FORMAT_VERSION = 1
+MAGIC = 'BRAC'
+HEADER = struct.Struct('<4s40sI')
+SUFFIX = '.ast'
+
+LAZY_FUNCTION_BODY_CODE = -1
+
+def make_fingerprint():
+    """
+    Describe everything that changes the cached trees or their format.
+    """
+    classes = ';'.join(
+        '%s(%s)' % (cls.__name__, ','.join(cls.fields + cls.attributes))
+        for cls in NODE_CLASSES
+    )
+    return '%d:%d:%d.%d:%s' % (
+        PARSER_VERSION, FORMAT_VERSION, sys.version_info[0],
+        sys.version_info[1], classes
+    )
+
+FINGERPRINT = make_fingerprint()
+
+class CacheError(Exception):
+    """
+    Raised for cache entries that can not be read back.
+    """
+    pass
+
+#
+# Serialization
+#
+
+def encode_tree(node):
+    """
+    Turn a tree into nested tuples, lists and simple values that can be
+    marshalled.
+    """
+    codes = NODE_CODES
+    def encode(value):
+        if isinstance(value, Node):
+            locator = value.locator
+            if locator is not None:
+                locator = locator.offset
+            items = [codes[value.__class__], locator]
+            for name in value.fields:
+                items.append(encode(getattr(value, name)))
+            return tuple(items)
+        elif isinstance(value, list):
+            return [encode(item) for item in value]
+        elif isinstance(value, LazyFunctionBody):
+            return (LAZY_FUNCTION_BODY_CODE, value.start, value.end)
+        return value
+    return encode(node)
+
+def decode_tree(data, parser):
+    """
+    Rebuild a tree encoded by ``encode_tree``. Locators and pre-parsed
+    function bodies refer to the source of the given parser.
+    """
+    classes = NODE_CLASSES
+    source = parser.token_stream.scanner.source
+    locators = {}
+    def decode(value):
+        kind = type(value)
+        if kind is tuple:
+            code = value[0]
+            if code == LAZY_FUNCTION_BODY_CODE:
+                return LazyFunctionBody(parser, value[1], value[2])
+            cls = classes[code]
+            node = cls.__new__(cls)
+            for name, field in izip(cls.fields, value[2:]):
+                setattr(node, name, decode(field))
+            offset = value[1]
+            if offset is not None:
+                # Nodes starting at the same offset share a locator.
+                locator = locators.get(offset)
+                if locator is None:
+                    locator = locators[offset] = OffsetLocator(source, offset)
+                node.locator = locator
+            else:
+                node.locator = None
+            return node
+        elif kind is list:
+            return [decode(item) for item in value]
+        return value
+    return decode(data)
+
+def dump_tree(node, key):
+    """
+    Serialize a tree to the bytes of a cache entry.
+    """
+    payload = zlib.compress(marshal.dumps(encode_tree(node), 2), 1)
+    checksum = zlib.crc32(payload) & 0xffffffff
+    return HEADER.pack(MAGIC, key, checksum) + payload
+
+def load_tree(data, key, parser):
+    """
+    Rebuild a tree from the bytes of a cache entry, raising ``CacheError``
+    if they are not a whole entry for ``key``.
+    """
+    if len(data) < HEADER.size:
+        raise CacheError('Truncated cache entry')
+    magic, entry_key, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC or entry_key != key:
+        raise CacheError('Not a cache entry for this source')
+    payload = data[HEADER.size:]
+    if zlib.crc32(payload) & 0xffffffff != checksum:
+        raise CacheError('Corrupt cache entry')
+    try:
+        return decode_tree(marshal.loads(zlib.decompress(payload)), parser)
+    except (ValueError, EOFError, TypeError, IndexError, zlib.error), e:
+        raise CacheError('Corrupt cache entry: %s' % e)
+
+#
+# The cache directory
+#
+
+class ASTCache(object):
+    """
+    A directory of cached abstract syntax trees.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(directory)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def make_key(self, text, parser):
+        """
+        Make the key for the tree of a source text parsed by ``parser``.
+        """
+        digest = hashlib.sha1(FINGERPRINT)
+        digest.update('%s:%d:%d:' % (
+            parser.__class__.__name__, parser.track_locations,
+            parser.lazy_functions
+        ))
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key, parser):
+        """
+        Load the tree stored under ``key``, or return ``None`` if there is no
+        usable entry. Unusable entries are removed.
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, 'rb') as fd:
+                data = fd.read()
+        except IOError:
+            return None
+        try:
+            return load_tree(data, key, parser)
+        except CacheError:
+            self.remove(path)
+            return None
+
+    def store(self, key, node):
+        """
+        Store a tree under ``key``, replacing any entry atomically.
+        """
+        data = dump_tree(node, key)
+        fd, temp_path = tempfile.mkstemp(
+            prefix='.' + key, suffix='.tmp', dir=self.directory
+        )
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                temp.write(data)
+            os.rename(temp_path, self.get_path(key))
+        except (IOError, OSError):
+            # Another process may have stored the same entry first.
+            self.remove(temp_path)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def parse(self, parser):
+        """
+        Parse the whole source of ``parser``, loading the tree from the cache
+        if it is there and storing it if not.
+
+        Only parsers scanning a buffer have a source to cache the tree of,
+        others just parse.
+        """
+        source = getattr(parser.token_stream.scanner, 'source', None)
+        if source is None:
+            return parser.parse()
+        key = self.make_key(source.text, parser)
+        program = self.load(key, parser)
+        if program is not None:
+            self.hits += 1
+            return program
+        self.misses += 1
+        program = parser.parse()
+        self.store(key, program)
+        return program
+
+    def parse_string(self, string, filename=None, line=0, column=0,
+                     encoding='utf-8', fast=False, lazy_functions=False):
+        """
+        Parse a string into an abstract syntax tree, using the cache.
+        """
+        parser = make_string_parser(
+            string, filename, line, column, encoding, fast, lazy_functions
+        )
+        return self.parse(parser)
+
+    def parse_file(self, filename, line=0, column=0, encoding='utf-8',
+                   fast=False, lazy_functions=False):
+        """
+        Parse the file specified by filename into an abstract syntax tree,
+        using the cache.
+        """
+        with open(filename, 'rb') as fd:
+            parser = make_file_parser(
+                fd, filename, line, column, encoding, fast, lazy_functions
+            )
+        return self.parse(parser)
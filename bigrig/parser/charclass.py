@@ -0,0 +1,185 @@
+"""
+Precomputed character class tables for classifying source characters.
+
+The tables are built once at import time: sorted range tables of the code
+points having each flag, and from those a flat table of flags for every
+character in the Basic Multilingual Plane, so each check is a single index.
+Characters outside the BMP are rare enough to be classified with
+``unicodedata`` directly.
+
+The checks all accept the empty string, as returned by streams at the end of
+the input, and return ``False`` for it.
+"""
+import unicodedata as ud
+from itertools import groupby, imap, izip
+
+#
+# Classification flags
+#
+
+IDENTIFIER_START = 1
+IDENTIFIER_PART = 2
+WHITESPACE = 4
+LINE_TERMINATOR = 8
+
+IDENTIFIER_START_CHARS = frozenset((u'$', u'_'))
+IDENTIFIER_START_CLASSES = frozenset(('Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Nl'))
+IDENTIFIER_PART_CLASSES = frozenset(('Mn', 'Mc', 'Nd', 'Pc','Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Nl'))
+WHITESPACE_CHARS = frozenset((
+    u'\u0009', u'\u000b', u'\u000c', u'\u0020', u'\u00a0', u'\ufeff'
+))
+LINE_TERMINATOR_CHARS = frozenset((u'\u000a', u'\u000d', u'\u2028', u'\u2029'))
+
+BMP_LIMIT = 0x10000
+ALL_FLAGS = (IDENTIFIER_START, IDENTIFIER_PART, WHITESPACE, LINE_TERMINATOR)
+
+def build_category_flags():
+    """
+    Map unicode categories to the flags they imply.
+    """
+    category_flags = dict.fromkeys(IDENTIFIER_PART_CLASSES, IDENTIFIER_PART)
+    for category in IDENTIFIER_START_CLASSES:
+        category_flags[category] |= IDENTIFIER_START
+    category_flags['Zs'] = WHITESPACE
+    return category_flags
+
+def build_char_flags():
+    """
+    Map the characters classified by the specification rather than by their
+    unicode category to their flags.
+    """
+    char_flags = dict.fromkeys(
+        IDENTIFIER_START_CHARS, IDENTIFIER_START | IDENTIFIER_PART
+    )
+    char_flags.update(dict.fromkeys(WHITESPACE_CHARS, WHITESPACE))
+    char_flags.update(dict.fromkeys(LINE_TERMINATOR_CHARS, LINE_TERMINATOR))
+    return char_flags
+
+CATEGORY_FLAGS = build_category_flags()
+CHAR_FLAGS = build_char_flags()
+
+def classify(char):
+    """
+    Compute the classification flags of a character from its unicode
+    category. This is the reference the tables are built from.
+    """
+    return CATEGORY_FLAGS.get(ud.category(char), 0) | CHAR_FLAGS.get(char, 0)
+
+#
+# Table construction
+#
+
+def build_range_tables():
+    """
+    Build ``(starts, ends)`` range tables of BMP code points for each flag.
+    Ranges are inclusive.
+    """
+    # Group the code points into runs sharing a category, which keeps the
+    # per code point work inside ``unicodedata`` and ``itertools``.
+    intervals = dict((flag, []) for flag in ALL_FLAGS)
+    code = 0
+    categories = imap(ud.category, imap(unichr, xrange(BMP_LIMIT)))
+    for category, group in groupby(categories):
+        length = sum(1 for i in group)
+        char_flags = CATEGORY_FLAGS.get(category, 0)
+        for flag in ALL_FLAGS:
+            if char_flags & flag:
+                intervals[flag].append((code, code + length - 1))
+        code += length
+    for char, char_flags in CHAR_FLAGS.iteritems():
+        code = ord(char)
+        for flag in ALL_FLAGS:
+            if char_flags & flag:
+                intervals[flag].append((code, code))
+    tables = {}
+    for flag in ALL_FLAGS:
+        starts = []
+        ends = []
+        for start, end in sorted(intervals[flag]):
+            if ends and start <= ends[-1] + 1:
+                ends[-1] = max(end, ends[-1])
+            else:
+                starts.append(start)
+                ends.append(end)
+        tables[flag] = (tuple(starts), tuple(ends))
+    return tables
+
+def build_bmp_table(range_tables):
+    """
+    Build a table of the flags of every BMP character, indexed by code point.
+    """
+    table = bytearray(BMP_LIMIT)
+    for flag, (starts, ends) in range_tables.iteritems():
+        for start, end in izip(starts, ends):
+            for code in xrange(start, end + 1):
+                table[code] |= flag
+    return table
+
+RANGE_TABLES = build_range_tables()
+BMP_TABLE = build_bmp_table(RANGE_TABLES)
+
+#
+# Lookups
+#
+
+def is_identifier_start(char):
+    if not char:
+        return False
+    code = ord(char)
+    if code < BMP_LIMIT:
+        return BMP_TABLE[code] & IDENTIFIER_START != 0
+    return CATEGORY_FLAGS.get(ud.category(char), 0) & IDENTIFIER_START != 0
+
+def is_identifier_part(char):
+    if not char:
+        return False
+    code = ord(char)
+    if code < BMP_LIMIT:
+        return BMP_TABLE[code] & IDENTIFIER_PART != 0
+    return CATEGORY_FLAGS.get(ud.category(char), 0) & IDENTIFIER_PART != 0
+
+def is_whitespace_char(char):
+    if not char:
+        return False
+    code = ord(char)
+    if code < BMP_LIMIT:
+        return BMP_TABLE[code] & WHITESPACE != 0
+    return CATEGORY_FLAGS.get(ud.category(char), 0) & WHITESPACE != 0
+
+def is_line_terminator(char):
+    return char in LINE_TERMINATOR_CHARS
+
+#
+# Regular expression support
+#
+
+def make_regex_class(flags):
+    """
+    Build the contents of a regular expression character class, without the
+    enclosing brackets, matching the BMP characters that have any of the
+    given ``flags``.
+    """
+    def escape(code):
+        char = unichr(code)
+        if char in u'\\]^-':
+            return u'\\' + char
+        return char
+    intervals = []
+    for flag in ALL_FLAGS:
+        if flag & flags:
+            intervals.extend(zip(*RANGE_TABLES[flag]))
+    pieces = []
+    start = end = None
+    for interval_start, interval_end in sorted(intervals):
+        if end is not None and interval_start <= end + 1:
+            end = max(end, interval_end)
+            continue
+        if end is not None:
+            pieces.append((start, end))
+        start, end = interval_start, interval_end
+    if end is not None:
+        pieces.append((start, end))
+    return u''.join(
+        start == end and escape(start) or u'%s-%s' % (escape(start), escape(end))
+        for start, end in pieces
+    )
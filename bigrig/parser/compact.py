@@ -0,0 +1,340 @@
+"""
+A compact, array backed abstract syntax tree.
+
+Rather than an object per node, a ``CompactTree`` stores every node of a
+tree in parallel ``array.array`` columns: its class code, the offset of its
+locator and where its field values start. Field values are tagged integers,
+referring to another node, to a run of list items or to a pool of the
+literal values, names and operators of the tree. A node of three fields
+takes a couple of dozen bytes, rather than the best part of a hundred for a
+node object and its slots.
+
+Nodes are read through views, made when a node is reached. Views are
+instances of subclasses of the ``bigrig.parser.ast`` node classes, with the
+same names, that read their fields and locator from the tree, so they
+support ``iter_fields``, ``iter_children``, ``NodeVisitor`` dispatch and
+``isinstance`` checks like the nodes they stand for. Views are read only,
+and compare equal, and hash alike, when they are views of the same node.
+
+The ``CompactParser`` builds these trees through ``CompactNodeFactory``.
+Trees pickle as their columns and literal pool, so they are cheap to store
+or send to another process.
+"""
+from array import array
+
+from .ast import NODE_CLASSES, NODE_CODES, Program
+from .factory import NodeFactory
+from .node import Node
+from .parser import BaseParser
+from .utils import OffsetLocator, Source
+
+# Field value tags, stored in the low bits of field values
+NONE = 0
+NODE = 1
+LIST = 2
+CONSTANT = 3
+TAG_BITS = 2
+TAG_MASK = 3
+
+NO_LOCATOR = -1
+
+class CompactTree(object):
+    """
+    The nodes of an abstract syntax tree, stored in arrays.
+
+    Locators are stored as offsets into the ``source``, and read back as
+    ``OffsetLocator`` objects, so a tree without a source has no locations.
+    """
+    def __init__(self, source=None):
+        self.source = source
+        self.kinds = array('B')
+        self.locators = array('i')
+        self.field_starts = array('i')
+        self.fields = array('i')
+        self.list_starts = array('i')
+        self.list_lengths = array('i')
+        self.list_items = array('i')
+        self.constants = []
+        self.constant_indexes = {}
+        self.root = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    #
+    # Building
+    #
+
+    def add_node(self, kind, fields, locator=None):
+        """
+        Add a node of the class with code ``kind``, returning its view.
+        """
+        index = len(self.kinds)
+        self.kinds.append(kind)
+        if locator is None or self.source is None:
+            self.locators.append(NO_LOCATOR)
+        else:
+            self.locators.append(locator.offset)
+        self.field_starts.append(len(self.fields))
+        # Encode first, as lists add their items as they are encoded.
+        values = [self.encode(value) for value in fields]
+        self.fields.extend(values)
+        return VIEW_CLASSES[kind](self, index)
+
+    def encode(self, value):
+        """
+        Encode a field value as a tagged integer.
+        """
+        if value is None:
+            return NONE
+        elif value.__class__ in VIEW_CLASS_SET and value.tree is self:
+            return value.index << TAG_BITS | NODE
+        elif isinstance(value, list):
+            items = [self.encode(item) for item in value]
+            index = len(self.list_starts)
+            self.list_starts.append(len(self.list_items))
+            self.list_lengths.append(len(items))
+            self.list_items.extend(items)
+            return index << TAG_BITS | LIST
+        return self.add_constant(value) << TAG_BITS | CONSTANT
+
+    def add_constant(self, value):
+        """
+        Add a value to the pool, returning its index. Equal strings share
+        an entry.
+        """
+        key = value
+        if not isinstance(value, basestring):
+            # Other values, such as nodes of other trees, are kept as is.
+            key = id(value)
+        index = self.constant_indexes.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.constant_indexes[key] = index
+        return index
+
+    #
+    # Reading
+    #
+
+    def get_node(self, index):
+        """
+        Get a view of the node at ``index``.
+        """
+        return VIEW_CLASSES[self.kinds[index]](self, index)
+
+    def decode(self, value):
+        """
+        Decode a tagged field value.
+        """
+        tag = value & TAG_MASK
+        if tag == NODE:
+            index = value >> TAG_BITS
+            return VIEW_CLASSES[self.kinds[index]](self, index)
+        elif tag == LIST:
+            index = value >> TAG_BITS
+            start = self.list_starts[index]
+            items = self.list_items[start:start + self.list_lengths[index]]
+            return [self.decode(item) for item in items]
+        elif tag == CONSTANT:
+            return self.constants[value >> TAG_BITS]
+        return None
+
+    def get_field(self, index, number):
+        return self.decode(self.fields[self.field_starts[index] + number])
+
+    def get_locator(self, index):
+        offset = self.locators[index]
+        if offset == NO_LOCATOR:
+            return None
+        return OffsetLocator(self.source, offset)
+
+    #
+    # Pickling
+    #
+
+    def __getstate__(self):
+        source = self.source
+        if source is not None:
+            source = (
+                source.text, source.filename, source.line, source.column,
+                source.offset, source.base
+            )
+        columns = dict(
+            (name, getattr(self, name).tostring()) for name in ARRAY_COLUMNS
+        )
+        root = None
+        if self.root is not None:
+            root = self.root.index
+        return {
+            'source': source,
+            'columns': columns,
+            'constants': self.constants,
+            'root': root,
+        }
+
+    def __setstate__(self, state):
+        source = state['source']
+        if source is not None:
+            source = Source(*source)
+        self.__init__(source)
+        for name, data in state['columns'].iteritems():
+            getattr(self, name).fromstring(data)
+        self.constants = state['constants']
+        for index, value in enumerate(self.constants):
+            if isinstance(value, basestring):
+                self.constant_indexes[value] = index
+            else:
+                self.constant_indexes[id(value)] = index
+        if state['root'] is not None:
+            self.root = self.get_node(state['root'])
+
+ARRAY_COLUMNS = (
+    'kinds', 'locators', 'field_starts', 'fields', 'list_starts',
+    'list_lengths', 'list_items'
+)
+
+#
+# Views
+#
+
+def make_view_class(node_class):
+    """
+    Make the view class for a node class.
+    """
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Node) and getattr(other, 'tree', None) is self.tree
+            and other.index == self.index
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        return '<%s view of node %d>' % (node_class.__name__, self.index)
+
+    def make_field_property(number):
+        return property(lambda self: self.tree.get_field(self.index, number))
+
+    attrs = {
+        '__slots__': ('tree', 'index'),
+        '__module__': __name__,
+        '__doc__': 'A view of a ``%s`` node in a ``CompactTree``.' % (
+            node_class.__name__
+        ),
+        '__init__': __init__,
+        '__eq__': __eq__,
+        '__ne__': __ne__,
+        '__hash__': __hash__,
+        '__repr__': __repr__,
+        'locator': property(lambda self: self.tree.get_locator(self.index)),
+    }
+    for number, name in enumerate(node_class.fields):
+        attrs[name] = make_field_property(number)
+    return type(node_class)(node_class.__name__, (node_class,), attrs)
+
+VIEW_CLASSES = tuple(make_view_class(cls) for cls in NODE_CLASSES)
+VIEW_CLASS_SET = frozenset(VIEW_CLASSES)
+
+#
+# Tree building
+#
+
+def make_create_method(node_class):
+    """
+    Make a factory method that adds a node of ``node_class`` to the tree,
+    taking its fields and an optional locator like the ``NodeFactory``
+    methods.
+    """
+    kind = NODE_CODES[node_class]
+    count = len(node_class.fields)
+    def create(self, *args, **kwargs):
+        locator = kwargs.get('locator')
+        if len(args) > count:
+            locator = args[count]
+        return self.tree.add_node(kind, args[:count], locator)
+    create.__name__ = 'create_%s' % node_class.__name__.lower()
+    return create
+
+def make_create_methods():
+    """
+    Make a compact tree building method for each node creating method of
+    the ``NodeFactory``. Methods are matched to the node classes they create
+    by name, ignoring case and underscores.
+    """
+    classes = dict(
+        (cls.__name__.lower(), cls) for cls in NODE_CLASSES
+    )
+    methods = {}
+    for name in dir(NodeFactory):
+        if not name.startswith('create_'):
+            continue
+        node_class = classes.get(name[len('create_'):].replace('_', ''))
+        if node_class is not None:
+            methods[name] = make_create_method(node_class)
+    return methods
+
+class CompactNodeFactory(NodeFactory):
+    """
+    Builds the abstract syntax tree in a ``CompactTree`` instead of as node
+    objects. The factory methods return views of the nodes they add.
+    """
+    def __init__(self, *args, **kwargs):
+        super(CompactNodeFactory, self).__init__(*args, **kwargs)
+        scanner = getattr(self.token_stream, 'scanner', None)
+        self.tree = CompactTree(getattr(scanner, 'source', None))
+
+    def create_program(self, statements, locator=None):
+        program = self.tree.add_node(
+            NODE_CODES[Program], (statements,), locator
+        )
+        self.tree.root = program
+        return program
+
+for name, method in make_create_methods().iteritems():
+    if name != 'create_program':
+        setattr(CompactNodeFactory, name, method)
+
+class CompactParser(CompactNodeFactory, BaseParser):
+    """
+    A parser building a ``CompactTree``. Parsing returns views of the nodes
+    in the tree, which is the ``tree`` attribute of the parser and of every
+    view.
+    """
+    pass
+
+#
+# Utilities
+#
+
+def make_string_parser(string, filename=None, line=0, column=0, encoding='utf-8',
+                       fast=False, lazy_functions=False):
+    """
+    Make a parser for the given string building a ``CompactTree``.
+    """
+    from .scanner import make_string_scanner, TokenStreamAllowReserved
+    scanner = make_string_scanner(
+        string, filename, line, column, encoding, fast
+    )
+    stream = TokenStreamAllowReserved(scanner)
+    return CompactParser(stream, lazy_functions=lazy_functions)
+
+def parse_string(string, filename=None, line=0, column=0, encoding='utf-8',
+                 fast=False, lazy_functions=False):
+    """
+    Parse a given string into a ``CompactTree``, returning a view of its
+    ``Program`` node.
+    """
+    parser = make_string_parser(
+        string, filename, line, column, encoding, fast, lazy_functions
+    )
+    return parser.parse()
@@ -3,6 +3,9 @@ from .ast import *
 class NodeFactory(object):
     """
     Encapsulates abstract syntax tree node creation.
+
+    Every node is created with the ``locator`` of the token it starts at, or
+    ``None`` when the parser is not tracking locations.
     """
 
     def is_valid_left_hand_side(self, expression):
@@ -12,167 +15,218 @@ class NodeFactory(object):
     # Statements
     #
 
-    def create_block(self, statements):
-        return Block(statements)
+    def create_block(self, statements, locator=None):
+        return Block(statements, locator=locator)
 
-    def create_do_while_statement(self, condition, body):
-        return DoWhileStatement(condition, body)
+    def create_do_while_statement(self, condition, body, locator=None):
+        return DoWhileStatement(condition, body, locator=locator)
 
-    def create_while_statement(self, condition, body):
-        return WhileStatement(condition, body)
+    def create_while_statement(self, condition, body, locator=None):
+        return WhileStatement(condition, body, locator=locator)
     
-    def create_for_statement(self, initializer, condition, next, body):
-        return ForStatement(initializer, condition, next, body)
+    def create_for_statement(self, initializer, condition, next, body, locator=None):
+        return ForStatement(initializer, condition, next, body, locator=locator)
 
-    def create_for_in_statement(self, each, enumerable, body):
-        return ForInStatement(each, enumerable, body)
+    def create_for_in_statement(self, each, enumerable, body, locator=None):
+        return ForInStatement(each, enumerable, body, locator=locator)
 
-    def create_expression_statement(self, expression):
-        return ExpressionStatement(expression)
+    def create_expression_statement(self, expression, locator=None):
+        return ExpressionStatement(expression, locator=locator)
 
-    def create_labelled_statement(self, label, statement):
-        return LabelledStatement(label, statement)
+    def create_labelled_statement(self, label, statement, locator=None):
+        return LabelledStatement(label, statement, locator=locator)
 
-    def create_continue_statement(self, target):
-        return ContinueStatement(target)
+    def create_continue_statement(self, target, locator=None):
+        return ContinueStatement(target, locator=locator)
 
-    def create_break_statement(self, target):
-        return BreakStatement(target)
+    def create_break_statement(self, target, locator=None):
+        return BreakStatement(target, locator=locator)
 
-    def create_return_statement(self, expression):
-        return ReturnStatement(expression)
+    def create_return_statement(self, expression, locator=None):
+        return ReturnStatement(expression, locator=locator)
 
-    def create_case_clause(self, label, statements):
-        return CaseClause(label, statements)
+    def create_case_clause(self, label, statements, locator=None):
+        return CaseClause(label, statements, locator=locator)
 
-    def create_switch_statement(self, expression, cases):
-        return SwitchStatement(expression, cases)
+    def create_switch_statement(self, expression, cases, locator=None):
+        return SwitchStatement(expression, cases, locator=locator)
 
-    def create_if_statement(self, condition, then_statement, else_statement):
-        return IfStatement(condition, then_statement, else_statement)
+    def create_if_statement(self, condition, then_statement, else_statement, locator=None):
+        return IfStatement(condition, then_statement, else_statement, locator=locator)
 
-    def create_try_statement(self, try_block, catch_var, catch_block, finally_block):
-        return TryStatement(try_block, catch_var, catch_block, finally_block)
+    def create_try_statement(self, try_block, catch_var, catch_block, finally_block, locator=None):
+        return TryStatement(try_block, catch_var, catch_block, finally_block, locator=locator)
 
-    def create_with_statement(self, expression, statement):
-        return WithStatement(expression, statement)
+    def create_with_statement(self, expression, statement, locator=None):
+        return WithStatement(expression, statement, locator=locator)
 
-    def create_variable_declaration(self, name, value):
-        return VariableDeclaration(name, value)
+    def create_variable_declaration(self, name, value, locator=None):
+        return VariableDeclaration(name, value, locator=locator)
 
-    def create_variable_statement(self, declarations):
-        return VariableStatement(declarations)
+    def create_variable_statement(self, declarations, locator=None):
+        return VariableStatement(declarations, locator=locator)
 
-    def create_empty_statement(self):
-        return EmptyStatement()
+    def create_empty_statement(self, locator=None):
+        return EmptyStatement(locator=locator)
 
     #
     # Expressions
     #
 
-    def create_null_node(self):
-        return NullNode()
+    def create_null_node(self, locator=None):
+        return NullNode(locator=locator)
 
-    def create_true_node(self):
-        return TrueNode()
+    def create_true_node(self, locator=None):
+        return TrueNode(locator=locator)
 
-    def create_false_node(self):
-        return FalseNode()
+    def create_false_node(self, locator=None):
+        return FalseNode(locator=locator)
 
-    def create_this_node(self):
-        return ThisNode()
+    def create_this_node(self, locator=None):
+        return ThisNode(locator=locator)
 
-    def create_name(self, value):
-        return Name(value)
+    def create_name(self, value, locator=None):
+        return Name(value, locator=locator)
 
-    def create_string_literal(self, value):
-        return StringLiteral(value)
+    def create_string_literal(self, value, locator=None):
+        return StringLiteral(value, locator=locator)
 
-    def create_number_literal(self, value):
-        return NumberLiteral(value)
+    def create_number_literal(self, value, locator=None):
+        return NumberLiteral(value, locator=locator)
 
-    def create_object_literal(self, properties):
-        return ObjectLiteral(properties)
+    def create_object_literal(self, properties, locator=None):
+        return ObjectLiteral(properties, locator=locator)
 
-    def create_object_property(self, name, value):
-        return ObjectProperty(name, value)
+    def create_object_property(self, name, value, locator=None):
+        return ObjectProperty(name, value, locator=locator)
 
-    def create_property_name(self, value):
-        return PropertyName(value)
+    def create_property_name(self, value, locator=None):
+        return PropertyName(value, locator=locator)
 
-    def create_property_getter(self, name, body):
-        return PropertyGetter(name, body)
+    def create_property_getter(self, name, body, locator=None):
+        return PropertyGetter(name, body, locator=locator)
 
-    def create_property_setter(self, name, parameter, body):
-        return PropertySetter(name, parameter, body)
+    def create_property_setter(self, name, parameter, body, locator=None):
+        return PropertySetter(name, parameter, body, locator=locator)
 
-    def create_regexp_literal(self, pattern, flags):
-        return RegExpLiteral(pattern, flags)
+    def create_regexp_literal(self, pattern, flags, locator=None):
+        return RegExpLiteral(pattern, flags, locator=locator)
 
-    def create_array_literal(self, elements):
-        return ArrayLiteral(elements)
+    def create_array_literal(self, elements, locator=None):
+        return ArrayLiteral(elements, locator=locator)
 
-    def create_elision(self):
-        return Elision()
+    def create_elision(self, locator=None):
+        return Elision(locator=locator)
 
-    def create_dot_property(self, object, key):
-        return DotProperty(object, key)
+    def create_dot_property(self, object, key, locator=None):
+        return DotProperty(object, key, locator=locator)
 
-    def create_bracket_property(self, object, key):
-        return BracketProperty(object, key)
+    def create_bracket_property(self, object, key, locator=None):
+        return BracketProperty(object, key, locator=locator)
 
-    def create_call_expression(self, expression, arguments):
-        return CallExpression(expression, arguments)
+    def create_call_expression(self, expression, arguments, locator=None):
+        return CallExpression(expression, arguments, locator=locator)
 
-    def create_new_expression(self, expression, arguments):
-        return NewExpression(expression, arguments)
+    def create_new_expression(self, expression, arguments, locator=None):
+        return NewExpression(expression, arguments, locator=locator)
 
-    def create_unary_operation(self, op, expression):
-        return UnaryOperation(op, expression)
+    def create_unary_operation(self, op, expression, locator=None):
+        return UnaryOperation(op, expression, locator=locator)
 
-    def create_typeof_operation(self, expression):
-        return TypeofOperation(expression)
+    def create_typeof_operation(self, expression, locator=None):
+        return TypeofOperation(expression, locator=locator)
 
-    def create_delete_operation(self, expression):
-        return DeleteOperation(expression)
+    def create_delete_operation(self, expression, locator=None):
+        return DeleteOperation(expression, locator=locator)
 
-    def create_void_operation(self, expression):
-        return VoidOperation(expression)
+    def create_void_operation(self, expression, locator=None):
+        return VoidOperation(expression, locator=locator)
 
-    def create_prefix_count_operation(self, op, expression):
-        return PrefixCountOperation(op, expression)
+    def create_prefix_count_operation(self, op, expression, locator=None):
+        return PrefixCountOperation(op, expression, locator=locator)
 
-    def create_postfix_count_operation(self, op, expression):
-        return PostfixCountOperation(op, expression)
+    def create_postfix_count_operation(self, op, expression, locator=None):
+        return PostfixCountOperation(op, expression, locator=locator)
 
-    def create_binary_operation(self, op, left, right):
-        return BinaryOperation(op, left, right)
+    def create_binary_operation(self, op, left, right, locator=None):
+        return BinaryOperation(op, left, right, locator=locator)
 
-    def create_compare_operation(self, op, left, right):
-        return CompareOperation(op, left, right)
+    def create_compare_operation(self, op, left, right, locator=None):
+        return CompareOperation(op, left, right, locator=locator)
 
-    def create_conditional(self, condition, then_expression, else_expression):
-        return Conditional(condition, then_expression, else_expression)
+    def create_conditional(self, condition, then_expression, else_expression, locator=None):
+        return Conditional(condition, then_expression, else_expression, locator=locator)
 
-    def create_assignment(self, op, target, value):
-        return Assignment(op, target, value)
+    def create_assignment(self, op, target, value, locator=None):
+        return Assignment(op, target, value, locator=locator)
 
-    def create_throw(self, exception):
-        return Throw(exception)
+    def create_throw(self, exception, locator=None):
+        return Throw(exception, locator=locator)
 
-    def create_function_declaration(self, name, parameters, body):
-        return FunctionDeclaration(name, parameters, body)
+    def create_function_declaration(self, name, parameters, body, locator=None):
+        return FunctionDeclaration(name, parameters, body, locator=locator)
 
-    def create_function_expression(self, name, parameters, body):
-        return FunctionExpression(name, parameters, body)
+    def create_function_expression(self, name, parameters, body, locator=None):
+        return FunctionExpression(name, parameters, body, locator=locator)
 
     def create_parameters(self, parameters):
         return parameters
 
-    def create_source_elements(self, statements):
-        return SourceElements(statements)
+    def create_source_elements(self, statements, locator=None):
+        return SourceElements(statements, locator=locator)
 
-    def create_program(self, statements):
-        return Program(statements)
+    def create_program(self, statements, locator=None):
+        return Program(statements, locator=locator)
     
         
+
+class CheckedNode(object):
+    """
+    Stands in for the nodes a ``SyntaxCheckFactory`` does not build, with
+    only what the parser asks of them.
+    """
+    __slots__ = ('valid_left_hand_side',)
+    locator = None
+
+    def __init__(self, valid_left_hand_side=False):
+        self.valid_left_hand_side = valid_left_hand_side
+
+    def is_valid_left_hand_side(self):
+        return self.valid_left_hand_side
+
+CHECKED_NAME = CheckedNode(True)
+CHECKED_PROPERTY_ACCESS = CheckedNode(True)
+CHECKED_NODE = CheckedNode()
+
+class SyntaxCheckFactory(object):
+    """
+    Builds no nodes, so that a parser only checks the syntax of its input.
+
+    Names and property accesses are told apart from the other nodes, which
+    is all the parser needs to report invalid assignment targets and labels.
+    """
+
+    def is_valid_left_hand_side(self, expression):
+        return expression.is_valid_left_hand_side()
+
+    def is_identifier(self, node):
+        return node is CHECKED_NAME
+
+    def create_name(self, value, locator=None):
+        return CHECKED_NAME
+
+    def create_dot_property(self, object, key, locator=None):
+        return CHECKED_PROPERTY_ACCESS
+
+    def create_bracket_property(self, object, key, locator=None):
+        return CHECKED_PROPERTY_ACCESS
+
+def make_check_method():
+    def create(self, *args, **kwargs):
+        return CHECKED_NODE
+    return create
+
+for name in dir(NodeFactory):
+    if name.startswith('create_') and not hasattr(SyntaxCheckFactory, name):
+        setattr(SyntaxCheckFactory, name, make_check_method())
+del name
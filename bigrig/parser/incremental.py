@@ -0,0 +1,229 @@
+"""
+Incremental scanning and parsing of source text that is appended to or
+edited, for interactive front ends and editor integrations.
+"""
+from array import array
+from bisect import bisect_left
+
+from .charclass import LINE_TERMINATOR_CHARS
+from .token import *
+from .parser import Parser, ParseException
+from .scanner import make_buffer_scanner, TokenStreamAllowReserved
+
+LINE_TERMINATORS = u''.join(LINE_TERMINATOR_CHARS)
+OPENING_TYPES = frozenset((LEFT_PAREN, LEFT_BRACKET, LEFT_CURLY_BRACE))
+CLOSING_TYPES = frozenset((RIGHT_PAREN, RIGHT_BRACKET, RIGHT_CURLY_BRACE))
+
+class SourceElement(object):
+    """
+    A parsed top level statement or function declaration.
+
+    The ``lookahead_start`` and ``lookahead_end`` are the offsets of the
+    token the parser looked at after the element, which is where the next
+    element starts. An edit starting after the lookahead can not change how
+    the element parses.
+    """
+    __slots__ = ('node', 'lookahead_start', 'lookahead_end')
+    def __init__(self, node, lookahead_start, lookahead_end):
+        self.node = node
+        self.lookahead_start = lookahead_start
+        self.lookahead_end = lookahead_end
+
+class IncrementalParser(object):
+    """
+    Keeps the scanned tokens and the parsed top level statements of a source
+    text across edits.
+
+    Edits only discard the tokens and statements that they may change, so
+    checking whether more input is needed re-scans from the last stable token
+    boundary, and parsing re-parses from the first statement that the edits
+    may have changed. Checking for more input does not parse at all while
+    brackets are open or the text ends in an unterminated token.
+    """
+    def __init__(self, text=u'', filename=None, parser_class=Parser,
+                 fast=False):
+        self.text = u''
+        self.filename = filename
+        self.parser_class = parser_class
+        self.fast = fast
+        # Scanned significant tokens: their end offsets and the bracket depth
+        # and token type code after each of them.
+        self.token_ends = array('l')
+        self.token_depths = array('l')
+        self.token_codes = array('l')
+        self.elements = []
+        self.locator = None
+        self.program = None
+        self.error = None
+        if text:
+            self.append(text)
+
+    #
+    # Edits
+    #
+
+    def append(self, text):
+        """
+        Add text to the end of the source.
+        """
+        length = len(self.text)
+        self.apply_edit(length, length, text)
+
+    def apply_edit(self, start, end, text):
+        """
+        Replace the source text between the ``start`` and ``end`` offsets
+        with ``text``.
+        """
+        if not isinstance(text, unicode):
+            text = text.decode('utf-8')
+        self.text = self.text[:start] + text + self.text[end:]
+        # A token ending at the edit may be extended by it.
+        count = bisect_left(self.token_ends, start)
+        del self.token_ends[count:]
+        del self.token_depths[count:]
+        del self.token_codes[count:]
+        # An element is kept if the edit starts after the token the parser
+        # looked ahead to when it finished the element.
+        elements = self.elements
+        count = 0
+        while count < len(elements) and elements[count].lookahead_end < start:
+            count += 1
+        del elements[count:]
+        self.program = None
+        self.error = None
+
+    #
+    # Scanning
+    #
+
+    def make_scanner(self, offset):
+        """
+        Make a scanner for the current text continuing at ``offset``.
+        """
+        scanner = make_buffer_scanner(
+            self.text, self.filename, fast=self.fast
+        )
+        scanner.seek(offset)
+        return scanner
+
+    def scan(self):
+        """
+        Scan the significant tokens not yet scanned, tracking the bracket
+        depth. Returns the depth and the type of the last token.
+        """
+        ends = self.token_ends
+        if ends:
+            depth = self.token_depths[-1]
+            code = self.token_codes[-1]
+            scanner = self.make_scanner(ends[-1])
+        else:
+            depth = 0
+            code = TYPE_TO_CODE[EOF]
+            scanner = self.make_scanner(0)
+        while True:
+            token = scanner.next()
+            type = token.type
+            if type == EOF:
+                break
+            elif type in TRIVIA_TYPES:
+                continue
+            elif type in (DIV, ASSIGN_DIV) and \
+                    TYPES[code] not in EXPRESSION_END_TYPES:
+                token = scanner.scan_regexp()
+                if token.type == REGEXP:
+                    scanner.scan_regexp_flags()
+                type = token.type
+            elif type in OPENING_TYPES:
+                depth += 1
+            elif type in CLOSING_TYPES:
+                depth -= 1
+            code = TYPE_TO_CODE[type]
+            ends.append(scanner.stream.offset)
+            self.token_depths.append(depth)
+            self.token_codes.append(code)
+        return depth, TYPES[code]
+
+    def needs_more_input(self):
+        """
+        Is the source an incomplete program that more input could complete?
+
+        Open brackets, and comments or strings left open at the end of the
+        source, are detected from the tokens alone. Otherwise the source is
+        parsed, and it needs more input if the parser ran into the end of it.
+        """
+        depth, type = self.scan()
+        if type == INVALID:
+            return self.is_continued()
+        if depth > 0:
+            return True
+        try:
+            self.parse()
+        except ParseException, e:
+            return e.token is not None and e.token.type == EOF
+        return False
+
+    def is_continued(self):
+        """
+        Can more input complete the invalid token at the end of the source?
+
+        Only an unterminated multiline comment, or a string ending in a line
+        continuation, can be completed. Other invalid tokens stay invalid.
+        """
+        ends = self.token_ends
+        scanner = self.make_scanner(len(ends) > 1 and ends[-2] or 0)
+        token = scanner.next()
+        while token.type in TRIVIA_TYPES:
+            token = scanner.next()
+        value = token.value
+        if value.startswith(u'/*'):
+            return True
+        if value[:1] in (u'"', u"'"):
+            value = value.rstrip(LINE_TERMINATORS)
+            return (len(value) - len(value.rstrip(u'\\'))) % 2 == 1
+        return False
+
+    #
+    # Parsing
+    #
+
+    def parse_elements(self):
+        """
+        Parse the elements following the kept ones to the end of the source.
+        """
+        elements = self.elements
+        offset = elements and elements[-1].lookahead_start or 0
+        stream = TokenStreamAllowReserved(self.make_scanner(offset))
+        parser = self.parser_class(stream)
+        if not elements:
+            # The program starts at the first token, like in ``parse_program``.
+            self.locator = parser.get_locator(stream.peek())
+        while True:
+            token = stream.peek()
+            if token.type == EOF:
+                break
+            if token.type == FUNCTION:
+                node = parser.parse_function_declaration()
+            else:
+                node = parser.parse_statement()
+            lookahead = stream.peek()
+            elements.append(
+                SourceElement(node, lookahead.start, lookahead.end)
+            )
+        return parser.create_program(
+            [element.node for element in elements], self.locator
+        )
+
+    def parse(self):
+        """
+        Get the abstract syntax tree of the source, re-parsing only the
+        statements the edits since the last parse may have changed.
+        """
+        if self.error is not None:
+            raise self.error
+        if self.program is None:
+            try:
+                self.program = self.parse_elements()
+            except ParseException, e:
+                self.error = e
+                raise
+        return self.program
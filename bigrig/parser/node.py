@@ -17,7 +17,11 @@ class NodeType(type):
             storage.extend(names)
             attrs[attr] = tuple(storage)
             newslots.extend(names)
-        attrs['__slots__'] = newslots
+        if bases[0] is object:
+            # Interpreters keep tables keyed weakly by node
+            newslots.append('__weakref__')
+        # Classes giving their own slots store their fields some other way.
+        attrs.setdefault('__slots__', newslots)
         attrs.setdefault('abstract', False)
         return type.__new__(cls, name, bases, attrs)
 
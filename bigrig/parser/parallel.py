@@ -0,0 +1,113 @@
+"""
+Parsing many source files at once in a pool of worker processes.
+
+Scanning and parsing are pure Python and hold the interpreter lock, so
+independent files are parsed in separate processes instead of threads. Each
+worker sends back the tree of a file encoded as by the ``cache`` module,
+marshalled, which the parent rebuilds with locators and pre-parsed function
+bodies referring to its own copy of the source. Trees are produced in the
+order of the given paths, as soon as each is ready, so the first files can
+be used while later ones are still being parsed.
+"""
+import marshal
+
+from .cache import encode_tree, decode_tree
+from .parser import ParseException, make_string_parser
+
+def parse_source(task):
+    """
+    Parse a source in a worker process, returning its marshalled tree, or
+    ``None`` if it does not parse.
+    """
+    data, filename, encoding, fast, lazy_functions = task
+    parser = make_string_parser(
+        data, filename, encoding=encoding, fast=fast,
+        lazy_functions=lazy_functions
+    )
+    try:
+        program = parser.parse()
+    except ParseException:
+        # Parsed again by the parent, to raise the exception there.
+        return None
+    return marshal.dumps(encode_tree(program), 2)
+
+def get_worker_count(workers):
+    if workers is None:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    return workers
+
+def iter_parse_many(paths, workers=None, encoding='utf-8', fast=False,
+                    lazy_functions=False, ast_cache=None):
+    """
+    Parse the files at ``paths`` in ``workers`` processes, by default one per
+    CPU, yielding their abstract syntax trees in order. Open file objects,
+    such as ``sys.stdin``, may be given instead of paths, and are read in
+    this process and named by their ``name``.
+
+    A file that does not parse raises a ``ParseException`` when its turn
+    comes. Trees found in the ``ast_cache``, if one is given, are not parsed
+    again, and parsed trees are stored there.
+    """
+    parsers = []
+    tasks = []
+    for path in paths:
+        if isinstance(path, basestring):
+            with open(path, 'rb') as fd:
+                data = fd.read()
+        else:
+            data = path.read()
+            path = path.name
+        parser = make_string_parser(
+            data, path, encoding=encoding, fast=fast,
+            lazy_functions=lazy_functions
+        )
+        program = key = None
+        if ast_cache is not None:
+            key = ast_cache.make_key(parser.token_stream.scanner.source.text,
+                                     parser)
+            program = ast_cache.load(key, parser)
+        if program is None:
+            tasks.append((data, path, encoding, fast, lazy_functions))
+        parsers.append((parser, key, program))
+    workers = min(get_worker_count(workers), len(tasks))
+    pool = None
+    if workers > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap(parse_source, tasks)
+    try:
+        for parser, key, program in parsers:
+            if program is not None:
+                ast_cache.hits += 1
+                yield program
+                continue
+            if pool is not None:
+                data = results.next()
+                if data is None:
+                    program = parser.parse()
+                else:
+                    program = decode_tree(marshal.loads(data), parser)
+            else:
+                program = parser.parse()
+            if ast_cache is not None:
+                ast_cache.misses += 1
+                ast_cache.store(key, program)
+            yield program
+        if pool is not None:
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+def parse_many(paths, workers=None, encoding='utf-8', fast=False,
+               lazy_functions=False, ast_cache=None):
+    """
+    Parse the files at ``paths``, or open file objects, in ``workers``
+    processes, returning a list of their abstract syntax trees in order.
+    """
+    return list(iter_parse_many(
+        paths, workers, encoding, fast, lazy_functions, ast_cache
+    ))
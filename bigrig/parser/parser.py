@@ -2,23 +2,79 @@
 An ECMAScript 3 parser implementation and various related utilities.
 """
 from .token import *
-from .factory import NodeFactory
+from .factory import NodeFactory, SyntaxCheckFactory
 from .ast import Name
 
+# The version of the trees the parser builds, to be bumped whenever they
+# change so that cached trees are rebuilt.
+PARSER_VERSION = 2
+
 class ParseException(Exception):
     """
     Base exception for all parse errors.
+
+    The ``token`` is the unexpected token, if there was one.
     """
-    pass
+    def __init__(self, message='', token=None):
+        super(ParseException, self).__init__(message)
+        self.token = token
+
+class LazyFunctionBody(object):
+    """
+    A pre-parsed function body, kept as the range of the source between its
+    braces until ``parse`` parses it into a list of statements.
+
+    The body is parsed by a parser like the one that pre-parsed it, so its
+    nodes have the same locations as if it had been parsed straight away.
+    The ``outer_strict`` flag is whether the code containing the function is
+    strict, which is filled in when the declarations of that code are
+    visited.
+    """
+    __slots__ = (
+        'source', 'start', 'end', 'parser_class', 'stream_class',
+        'scanner_class', 'track_locations', 'outer_strict'
+    )
+    def __init__(self, parser, start, end):
+        stream = parser.token_stream
+        self.source = stream.scanner.source
+        self.start = start
+        self.end = end
+        self.parser_class = parser.__class__
+        self.stream_class = stream.__class__
+        self.scanner_class = stream.scanner.__class__
+        self.track_locations = parser.track_locations
+        self.outer_strict = False
+
+    def parse(self):
+        source = self.source
+        scanner = self.scanner_class(
+            source.text, source.filename, source.line, source.column
+        )
+        # Share the source, and the line table built for it.
+        scanner.source = source
+        scanner.seek(self.start)
+        parser = self.parser_class(
+            self.stream_class(scanner), self.track_locations, True
+        )
+        return parser.parse_source_elements(RIGHT_CURLY_BRACE)
 
 class BaseParser(object):
     """
     This class provides an ECMAScript 3rd Edition parser but no AST creation
+
+    Each node is created with the locator of the token it starts at, unless
+    ``track_locations`` is false. If ``lazy_functions`` is true function
+    bodies are pre-parsed into a ``LazyFunctionBody`` rather than parsed.
     """
-    def __init__(self, token_stream=None):
+    def __init__(self, token_stream=None, track_locations=True,
+                 lazy_functions=False):
         self.token_stream = token_stream
         self.precedence_table = PRECEDENCE # From token
         self.accept_in = True
+        self.track_locations = track_locations
+        self.lazy_functions = lazy_functions
+        self._locator_token = None
+        self._locator = None
 
     #
     # Token utilities
@@ -36,6 +92,19 @@ class BaseParser(object):
         """
         return self.token_stream.peek().type
 
+    def get_locator(self, token):
+        """
+        Get the locator for a node starting at the given token, or ``None``
+        when not tracking locations.
+        """
+        if not self.track_locations:
+            return None
+        # Nodes starting at the same token share its locator.
+        if token is not self._locator_token:
+            self._locator_token = token
+            self._locator = token.locator
+        return self._locator
+
     def raise_unexpected_token(self, token, expected=None):
         """
         Raise a ``ParseException`` for an unexpected token.
@@ -52,7 +121,7 @@ class BaseParser(object):
         message = message_template % format_args
         if expected:
             message = message + " Expected '%s'." % expected
-        raise ParseException(message)
+        raise ParseException(message, token)
 
     def expect(self, expected):
         """
@@ -130,47 +199,56 @@ class BaseParser(object):
         """
         next = self.next()
         type = next.type
+        locator = self.get_locator(next)
         if type == IDENTIFIER and next.value in (u'get', u'set'):
             if next.value == 'get':
                 lookahead = self.peek()
                 if lookahead == COLON:
                     self.expect(COLON)
-                    name = self.create_property_name(next.value)
+                    name = self.create_property_name(next.value, locator)
                     value = self.parse_assignment_expression()
-                    assignment = self.create_object_property(name, value)
+                    assignment = self.create_object_property(
+                        name, value, locator
+                    )
                 else:
                     name = self.expect(IDENTIFIER).value
                     self.expect(LEFT_PAREN)
                     self.expect(RIGHT_PAREN)
                     body = self.parse_function_body()
-                    assignment = self.create_property_getter(name, body)
+                    assignment = self.create_property_getter(
+                        name, body, locator
+                    )
             elif next.value == 'set':
                 lookahead = self.peek()
                 if lookahead == COLON:
                     self.expect(COLON)
-                    name = self.create_property_name(next.value)
+                    name = self.create_property_name(next.value, locator)
                     value = self.parse_assignment_expression()
-                    assignment = self.create_object_property(name, value)
+                    assignment = self.create_object_property(
+                        name, value, locator
+                    )
                 else:
                     name = self.expect(IDENTIFIER).value
                     self.expect(LEFT_PAREN)
                     parameter = self.expect(IDENTIFIER).value
                     self.expect(RIGHT_PAREN)
                     body = self.parse_function_body()
-                    assignment = self.create_property_setter(name, parameter, body)
+                    assignment = self.create_property_setter(
+                        name, parameter, body, locator
+                    )
         else:
             if type == IDENTIFIER:
-                name = self.create_property_name(next.value)
+                name = self.create_property_name(next.value, locator)
             elif type == STRING:
-                name = self.create_string_literal(next.value)
+                name = self.create_string_literal(next.value, locator)
             elif type in (DECIMAL, INTEGER):
-                name = self.create_number_literal(next.value)
+                name = self.create_number_literal(next.value, locator)
             else:
                 raise self.raise_unexpected_token(next)
             self.expect(COLON)
             # Parse the value
             value = self.parse_assignment_expression()
-            assignment = self.create_object_property(name, value)
+            assignment = self.create_object_property(name, value, locator)
         if self.peek() != RIGHT_CURLY_BRACE:
             self.expect(COMMA)
         return assignment
@@ -186,12 +264,12 @@ class BaseParser(object):
             ((Identifier | String | Number) ':' AssignmentExpression))*[',']
           '}'
         """
-        self.expect(LEFT_CURLY_BRACE)
+        start = self.expect(LEFT_CURLY_BRACE)
         properties = []
         while self.peek() != RIGHT_CURLY_BRACE:
             properties.append(self.parse_property_assignment())
         self.expect(RIGHT_CURLY_BRACE)
-        return self.create_object_literal(properties)
+        return self.create_object_literal(properties, self.get_locator(start))
 
     def parse_array_literal(self):
         """
@@ -209,18 +287,18 @@ class BaseParser(object):
            Elision ','
         """
         values = []
-        self.expect(LEFT_BRACKET)
+        start = self.expect(LEFT_BRACKET)
         while self.peek() != RIGHT_BRACKET:
             if self.peek() == COMMA:
-                self.expect(COMMA)
-                values.append(self.create_elision())
+                comma = self.expect(COMMA)
+                values.append(self.create_elision(self.get_locator(comma)))
                 continue
             element = self.parse_assignment_expression()
             values.append(element)
             if self.peek() != RIGHT_BRACKET:
                 self.expect(COMMA)
         self.expect(RIGHT_BRACKET)
-        return self.create_array_literal(values)
+        return self.create_array_literal(values, self.get_locator(start))
 
     def parse_regexp_literal(self): # seen_equal?
         """
@@ -229,11 +307,13 @@ class BaseParser(object):
         """
         pattern = self.scan_regexp()
         if pattern.type != REGEXP:
-            raise ParseException("Invalid regexp pattern")
+            raise ParseException("Invalid regexp pattern", pattern)
         flags = self.scan_regexp_flags()
         if flags.type != IDENTIFIER:
-            raise ParseException("Invalid regexp flags")
-        return self.create_regexp_literal(pattern.value, flags.value)
+            raise ParseException("Invalid regexp flags", flags)
+        return self.create_regexp_literal(
+            pattern.value, flags.value, self.get_locator(pattern)
+        )
 
     #
     # Expressions
@@ -249,7 +329,9 @@ class BaseParser(object):
         while self.peek() == COMMA:
             comma = self.expect(COMMA)
             right = self.parse_assignment_expression()
-            result = self.create_binary_operation(comma.value, result, right)
+            result = self.create_binary_operation(
+                comma.value, result, right, result.locator
+            )
         return result
 
     def parse_primary_expression(self):
@@ -270,26 +352,26 @@ class BaseParser(object):
         # Consider a dict here
         type = self.peek()
         if type == THIS:
-            self.next()
-            result = self.create_this_node()
+            result = self.create_this_node(self.get_locator(self.next()))
         elif type == NULL:
-            self.next()
-            result = self.create_null_node()
+            result = self.create_null_node(self.get_locator(self.next()))
         elif type == TRUE:
-            self.next()
-            result = self.create_true_node()
+            result = self.create_true_node(self.get_locator(self.next()))
         elif type == FALSE:
-            self.next()
-            result = self.create_false_node()
+            result = self.create_false_node(self.get_locator(self.next()))
         elif type == IDENTIFIER:
             next = self.next()
-            result = self.create_name(next.value)
+            result = self.create_name(next.value, self.get_locator(next))
         elif type in (DECIMAL, INTEGER):
             next = self.next()
-            result = self.create_number_literal(next.value)
+            result = self.create_number_literal(
+                next.value, self.get_locator(next)
+            )
         elif type == STRING:
             next = self.next()
-            result = self.create_string_literal(next.value)
+            result = self.create_string_literal(
+                next.value, self.get_locator(next)
+            )
         elif type == LEFT_BRACKET:
             result = self.parse_array_literal()
         elif type == LEFT_CURLY_BRACE:
@@ -332,10 +414,12 @@ class BaseParser(object):
         """
         type = self.peek()
         if type == NEW:
-            self.expect(NEW)
+            start = self.expect(NEW)
             expression = self.parse_member_expression(False)
             arguments = self.parse_arguments()
-            result = self.create_new_expression(expression, arguments)
+            result = self.create_new_expression(
+                expression, arguments, self.get_locator(start)
+            )
         elif type == FUNCTION:
             result = self.parse_function_expression()
         else:
@@ -345,20 +429,22 @@ class BaseParser(object):
     def parse_member_expression_tail(self, allow_call, node):
         """
         ( '(' Arguments ')' | '[' Expression ']' | '.' Expression ) *
+
+        The nodes start where the expression they extend starts.
         """
         type = self.peek()
         if type == DOT:
             self.expect(DOT)
             key = self.expect(IDENTIFIER)
-            node = self.create_dot_property(node, key.value)
+            node = self.create_dot_property(node, key.value, node.locator)
         elif type == LEFT_BRACKET:
             self.expect(LEFT_BRACKET)
             index = self.parse_expression()
-            node = self.create_bracket_property(node, index)
+            node = self.create_bracket_property(node, index, node.locator)
             self.expect(RIGHT_BRACKET)
         elif type == LEFT_PAREN and allow_call:
             arguments = self.parse_arguments()
-            node = self.create_call_expression(node, arguments)
+            node = self.create_call_expression(node, arguments, node.locator)
         else:
             return node
         return self.parse_member_expression_tail(allow_call, node)
@@ -369,7 +455,7 @@ class BaseParser(object):
           MemberExpression
           'new' NewExpression
         """
-        self.expect(NEW)
+        start = self.expect(NEW)
         if self.peek() == NEW:
             expression = self.parse_new_expression()
         else:
@@ -379,7 +465,9 @@ class BaseParser(object):
         arguments = None
         if self.peek() == LEFT_PAREN:
             arguments = self.parse_arguments()
-        node = self.create_new_expression(expression, arguments)
+        node = self.create_new_expression(
+            expression, arguments, self.get_locator(start)
+        )
         return self.parse_member_expression_tail(True, node)
 
     def parse_left_hand_side_expression(self):
@@ -404,7 +492,9 @@ class BaseParser(object):
         if not self.has_line_terminator_before_next() and \
                 self.is_count_op(self.peek()):
             op = self.next()
-            return self.create_postfix_count_operation(op.value, expression)
+            return self.create_postfix_count_operation(
+                op.value, expression, expression.locator
+            )
         return expression
 
     def parse_unary_expression(self):
@@ -424,18 +514,22 @@ class BaseParser(object):
         type = self.peek()
         if self.is_count_op(type):
             op = self.next()
+            locator = self.get_locator(op)
             expression = self.parse_unary_expression()
-            return self.create_prefix_count_operation(op.value, expression)
+            return self.create_prefix_count_operation(
+                op.value, expression, locator
+            )
         elif self.is_unary_op(type):
             op = self.next()
+            locator = self.get_locator(op)
             expression = self.parse_unary_expression()
             if type == TYPEOF:
-                return self.create_typeof_operation(expression)
+                return self.create_typeof_operation(expression, locator)
             elif type == DELETE:
-                return self.create_delete_operation(expression)
+                return self.create_delete_operation(expression, locator)
             elif type == VOID:
-                return self.create_void_operation(expression)
-            return self.create_unary_operation(op.value, expression)
+                return self.create_void_operation(expression, locator)
+            return self.create_unary_operation(op.value, expression, locator)
         return self.parse_postfix_expression()
 
     def parse_binary_operator_expression(self, lhs, min_precedence=4):
@@ -456,11 +550,11 @@ class BaseParser(object):
                 next_precedence = self.precedence(self.peek())
             if self.is_comparison_op(op.type):
                 lhs = self.create_compare_operation(
-                    op.value, lhs, rhs
+                    op.value, lhs, rhs, lhs.locator
                 )
             else:
                 lhs = self.create_binary_operation(
-                    op.value, lhs, rhs
+                    op.value, lhs, rhs, lhs.locator
                 )
         return lhs
 
@@ -480,7 +574,9 @@ class BaseParser(object):
         op = self.next()
         right = self.parse_assignment_expression()
 
-        return self.create_assignment(op.value, expression, right)
+        return self.create_assignment(
+            op.value, expression, right, expression.locator
+        )
 
     def parse_conditional_expression(self):
         """
@@ -495,7 +591,9 @@ class BaseParser(object):
         left = self.parse_assignment_expression()
         self.expect(COLON)
         right = self.parse_assignment_expression()
-        return self.create_conditional(expression, left, right)
+        return self.create_conditional(
+            expression, left, right, expression.locator
+        )
 
     #
     # Statements
@@ -560,21 +658,22 @@ class BaseParser(object):
 
         Does not introduce a new execution scope.
         """
-        self.expect(LEFT_CURLY_BRACE)
+        start = self.expect(LEFT_CURLY_BRACE)
         statements = []
         while self.peek() != RIGHT_CURLY_BRACE:
             statements.append(self.parse_statement())
         self.expect(RIGHT_CURLY_BRACE)
-        return self.create_block(statements)
+        return self.create_block(statements, self.get_locator(start))
 
     def parse_variable_statement(self):
         """
         VariableStatement ::
           VariableDeclarations ';'
         """
+        locator = self.get_locator(self.token_stream.peek())
         declarations = self.parse_variable_declarations()
         self.expect_semicolon()
-        return self.create_variable_statement(declarations)
+        return self.create_variable_statement(declarations, locator)
 
     def parse_variable_declarations(self):
         """
@@ -590,7 +689,7 @@ class BaseParser(object):
                 self.expect(ASSIGN)
                 initializer = self.parse_assignment_expression()
             declaration = self.create_variable_declaration(
-                identifier.value, initializer
+                identifier.value, initializer, self.get_locator(identifier)
             )
             declarations.append(declaration)
             if self.peek() != COMMA:
@@ -603,22 +702,25 @@ class BaseParser(object):
         EmptyStatement ::
           ';'
         """
-        self.expect(SEMICOLON)
-        return self.create_empty_statement()
+        start = self.expect(SEMICOLON)
+        return self.create_empty_statement(self.get_locator(start))
 
     def parse_expression_statement(self):
         """
         ExpressionStatement ::
           Expression ';'
         """
+        locator = self.get_locator(self.token_stream.peek())
         expression = self.parse_expression()
         if self.peek() == COLON:
             if not self.is_identifier(expression):
-                self.raise_unexpected_token(self.next)
+                self.raise_unexpected_token(self.next())
             statement = self.parse_labelled_statement()
-            return self.create_labelled_statement(expression, statement)
+            return self.create_labelled_statement(
+                expression, statement, locator
+            )
         self.expect_semicolon()
-        return self.create_expression_statement(expression)
+        return self.create_expression_statement(expression, locator)
 
     def parse_labelled_statement(self):
         """
@@ -634,7 +736,7 @@ class BaseParser(object):
         IfStatement ::
           'if' '(' Expression ')' Statement ('else' Statement)?
         """
-        self.expect(IF)
+        start = self.expect(IF)
         self.expect(LEFT_PAREN)
         condition = self.parse_expression()
         self.expect(RIGHT_PAREN)
@@ -645,7 +747,7 @@ class BaseParser(object):
         else:
             else_statement = None
         return self.create_if_statement(
-            condition, then_statement, else_statement
+            condition, then_statement, else_statement, self.get_locator(start)
         )
 
     def parse_do_while_statement(self):
@@ -653,7 +755,7 @@ class BaseParser(object):
         DoStatement ::
           'do' Statement 'while' '(' Expression ')' ';'
         """
-        self.expect(DO)
+        start = self.expect(DO)
         body = self.parse_statement()
         self.expect(WHILE)
         self.expect(LEFT_PAREN)
@@ -661,19 +763,23 @@ class BaseParser(object):
         self.expect(RIGHT_PAREN)
         if self.peek() == SEMICOLON:
             self.expect(SEMICOLON)
-        return self.create_do_while_statement(condition, body)
+        return self.create_do_while_statement(
+            condition, body, self.get_locator(start)
+        )
 
     def parse_while_statement(self):
         """
         WhileStatement ::
           'while' '(' Expression ')' Statement
         """
-        self.expect(WHILE)
+        start = self.expect(WHILE)
         self.expect(LEFT_PAREN)
         expression = self.parse_expression()
         self.expect(RIGHT_PAREN)
         body = self.parse_statement()
-        return self.create_while_statement(expression, body)
+        return self.create_while_statement(
+            expression, body, self.get_locator(start)
+        )
 
     def parse_for_statement(self):
         """
@@ -688,15 +794,18 @@ class BaseParser(object):
           'for' '(' 'var' VariableDeclarationNoIn 'in' Expression ')' Statement
         """
         self.accept_in = False
-        self.expect(FOR)
+        locator = self.get_locator(self.expect(FOR))
         self.expect(LEFT_PAREN)
         initializer = None
         # Parse the initializer or possibly return a ForInStatement
         if self.peek() != SEMICOLON:
             if self.peek() == VAR:
                 # If this is a single declaration, then allow 'in'
+                variable_locator = self.get_locator(self.token_stream.peek())
                 variable_declarations = self.parse_variable_declarations()
-                variable_statement = self.create_variable_statement(variable_declarations)
+                variable_statement = self.create_variable_statement(
+                    variable_declarations, variable_locator
+                )
                 if self.peek() == IN:
                     self.expect(IN)
                     enumerable = self.parse_expression()
@@ -704,7 +813,9 @@ class BaseParser(object):
                     self.accept_in = True
                     body = self.parse_statement()
                     declaration = variable_declarations[0]
-                    return self.create_for_in_statement(declaration, enumerable, body)
+                    return self.create_for_in_statement(
+                        declaration, enumerable, body, locator
+                    )
                 else:
                     initializer = variable_statement
             else:
@@ -721,7 +832,7 @@ class BaseParser(object):
                     self.accept_in = True
                     body = self.parse_statement()
                     return self.create_for_in_statement(
-                        expression, enumerable, body
+                        expression, enumerable, body, locator
                     )
                 else:
                     initializer = expression
@@ -741,59 +852,65 @@ class BaseParser(object):
         self.expect(RIGHT_PAREN)
         self.accept_in = True
         body = self.parse_statement()
-        return self.create_for_statement(initializer, condition, next, body)
+        return self.create_for_statement(
+            initializer, condition, next, body, locator
+        )
 
     def parse_continue_statement(self):
         """
         ContinueStatement ::
           'continue' Identifier? ';'
         """
-        self.expect(CONTINUE)
+        locator = self.get_locator(self.expect(CONTINUE))
         label = None
         if self.has_line_terminator_before_next():
-            return self.create_continue_statement(label)
+            return self.create_continue_statement(label, locator)
         if self.peek() == IDENTIFIER:
             label = self.expect(IDENTIFIER).value
         self.expect_semicolon()
-        return self.create_continue_statement(label)
+        return self.create_continue_statement(label, locator)
 
     def parse_break_statement(self):
         """
         BreakStatement ::
           'break' Identifier? ';'
         """
-        self.expect(BREAK)
+        start = self.expect(BREAK)
         label = None
         if not self.has_line_terminator_before_next():
             if self.peek() == IDENTIFIER:
                 label = self.expect(IDENTIFIER).value
         self.expect_semicolon()
-        return self.create_break_statement(label)
+        return self.create_break_statement(label, self.get_locator(start))
 
     def parse_return_statement(self):
         """
         ReturnStatement ::
           'return' Expression? ';'
         """
-        self.expect(RETURN)
+        start = self.expect(RETURN)
         expression = None
         if not self.has_line_terminator_before_next():
             if self.peek() not in (SEMICOLON, RIGHT_CURLY_BRACE, EOF):
                 expression = self.parse_expression()
         self.expect_semicolon()
-        return self.create_return_statement(expression)
+        return self.create_return_statement(
+            expression, self.get_locator(start)
+        )
 
     def parse_with_statement(self):
         """
         WithStatement ::
           'with' '(' Expression ')' Statement
         """
-        self.expect(WITH)
+        start = self.expect(WITH)
         self.expect(LEFT_PAREN)
         expression = self.parse_expression()
         self.expect(RIGHT_PAREN)
         statement = self.parse_statement()
-        return self.create_with_statement(expression, statement)
+        return self.create_with_statement(
+            expression, statement, self.get_locator(start)
+        )
 
     def parse_case_clause(self):
         """
@@ -802,23 +919,25 @@ class BaseParser(object):
           'default' ':' Statement*
         """
         if self.peek() == CASE:
-            self.expect(CASE)
+            start = self.expect(CASE)
             label = self.parse_expression()
         else:
-            self.expect(DEFAULT)
+            start = self.expect(DEFAULT)
             label = None
         self.expect(COLON)
         statements = []
         while self.peek() not in (CASE, DEFAULT, RIGHT_CURLY_BRACE, EOF):
             statements.append(self.parse_statement())
-        return self.create_case_clause(label, statements)
+        return self.create_case_clause(
+            label, statements, self.get_locator(start)
+        )
 
     def parse_switch_statement(self):
         """
         SwitchStatement ::
           'switch' '(' Expression ')' '{' CaseClause* '}'
         """
-        self.expect(SWITCH)
+        start = self.expect(SWITCH)
         self.expect(LEFT_PAREN)
         expression = self.parse_expression()
         self.expect(RIGHT_PAREN)
@@ -827,20 +946,22 @@ class BaseParser(object):
         while self.peek() != RIGHT_CURLY_BRACE:
             cases.append(self.parse_case_clause())
         self.expect(RIGHT_CURLY_BRACE)
-        return self.create_switch_statement(expression, cases)
+        return self.create_switch_statement(
+            expression, cases, self.get_locator(start)
+        )
 
     def parse_throw_statement(self):
         """
         ThrowStatement ::
           'throw' Expression ';'
         """
-        self.expect(THROW)
+        start = self.expect(THROW)
         expression = None
         if self.has_line_terminator_before_next():
             raise ParseException()
         expression = self.parse_expression()
         self.expect_semicolon()
-        return self.create_throw(expression)
+        return self.create_throw(expression, self.get_locator(start))
 
     def parse_try_statement(self):
         """
@@ -855,7 +976,7 @@ class BaseParser(object):
         Finally ::
           'finally' Block
         """
-        self.expect(TRY)
+        start = self.expect(TRY)
         try_block = self.parse_block_statement()
         catch_block = None
         name = None
@@ -867,7 +988,10 @@ class BaseParser(object):
         if next == CATCH:
             self.expect(CATCH)
             self.expect(LEFT_PAREN)
-            name = self.create_name(self.expect(IDENTIFIER).value)
+            identifier = self.expect(IDENTIFIER)
+            name = self.create_name(
+                identifier.value, self.get_locator(identifier)
+            )
             self.expect(RIGHT_PAREN)
             catch_block = self.parse_block_statement()
             next = self.peek()
@@ -876,7 +1000,10 @@ class BaseParser(object):
             self.expect(FINALLY)
             finally_block = self.parse_block_statement()
 
-        return self.create_try_statement(try_block, name, catch_block, finally_block)
+        return self.create_try_statement(
+            try_block, name, catch_block, finally_block,
+            self.get_locator(start)
+        )
 
     #
     # Function parsing
@@ -888,14 +1015,20 @@ class BaseParser(object):
         FunctionDeclaration ::
           'function' Identifier '(' ParameterList? ')' '{' FunctionBody '}'
         """
-        return self.create_function_declaration(*self.parse_function(require_name=True))
+        locator = self.get_locator(self.token_stream.peek())
+        name, parameters, body = self.parse_function(require_name=True)
+        return self.create_function_declaration(
+            name, parameters, body, locator
+        )
 
     def parse_function_expression(self):
         """
         FunctionDeclaration ::
           'function' Identifier? '(' ParameterList? ')' '{' FunctionBody '}'
         """
-        return self.create_function_expression(*self.parse_function())
+        locator = self.get_locator(self.token_stream.peek())
+        name, parameters, body = self.parse_function()
+        return self.create_function_expression(name, parameters, body, locator)
     
     def parse_function(self, require_name=False):
         """
@@ -910,7 +1043,10 @@ class BaseParser(object):
         self.expect(LEFT_PAREN)
         parameters = self.parse_parameter_list()
         self.expect(RIGHT_PAREN)
-        body = self.parse_function_body()
+        if self.lazy_functions:
+            body = self.parse_lazy_function_body()
+        else:
+            body = self.parse_function_body()
         return (name, parameters, body)
 
     def parse_parameter_list(self):
@@ -938,6 +1074,23 @@ class BaseParser(object):
         self.expect(RIGHT_CURLY_BRACE)
         return statements
 
+    def parse_lazy_function_body(self):
+        """
+        Pre-parse a function body, checking its syntax with a
+        ``SyntaxChecker`` over the same tokens, without building its nodes,
+        so that syntax errors in it are reported now rather than when it is
+        parsed.
+
+        Bodies whose source can not be scanned again are parsed at once.
+        """
+        if not self.token_stream.can_seek():
+            return self.parse_function_body()
+        open_brace = self.expect(LEFT_CURLY_BRACE)
+        checker = SyntaxChecker(self.token_stream, False)
+        checker.parse_source_elements(RIGHT_CURLY_BRACE)
+        close_brace = self.expect(RIGHT_CURLY_BRACE)
+        return LazyFunctionBody(self, open_brace.end, close_brace.start)
+
     def parse_source_elements(self, until=EOF):
         """
         SourceElements::
@@ -952,7 +1105,8 @@ class BaseParser(object):
         return statements
 
     def parse_program(self):
-        return self.create_program(self.parse_source_elements())
+        locator = self.get_locator(self.token_stream.peek())
+        return self.create_program(self.parse_source_elements(), locator)
 
     def parse(self):
         return self.parse_program()
@@ -963,45 +1117,59 @@ class Parser(NodeFactory, BaseParser):
     """
     pass
 
+class SyntaxChecker(SyntaxCheckFactory, BaseParser):
+    """
+    This class parses without building a tree, only raising a
+    ``ParseException`` for a syntax error.
+    """
+    pass
+
 #
 # Utilities
 #
 
-def make_string_parser(string, filename=None, line=0, column=0, encoding='utf-8'):
+def make_string_parser(string, filename=None, line=0, column=0, encoding='utf-8',
+                       fast=False, lazy_functions=False):
     """
     Make a parser for the given string.
     """
     from .scanner import make_string_scanner, TokenStreamAllowReserved
     scanner = make_string_scanner(
-        string, filename, line, column, encoding
+        string, filename, line, column, encoding, fast
     )
     stream = TokenStreamAllowReserved(scanner)
-    return Parser(stream)
+    return Parser(stream, lazy_functions=lazy_functions)
 
-def parse_string(string, filename=None, line=0, column=0, encoding='utf-8'):
+def parse_string(string, filename=None, line=0, column=0, encoding='utf-8',
+                 fast=False, lazy_functions=False):
     """
     Parse a given string into an abstract syntax tree.
     """
     parser = make_string_parser(
-        string, filename, line, column, encoding
+        string, filename, line, column, encoding, fast, lazy_functions
     )
     return parser.parse()
 
-def make_file_parser(fd, filename=None, line=0, column=0, encoding='utf-8'):
+def make_file_parser(fd, filename=None, line=0, column=0, encoding='utf-8',
+                     fast=False, lazy_functions=False):
     """
     Make a parser for the given file descriptor.
     """
     from .scanner import make_file_scanner, TokenStreamAllowReserved
     scanner = make_file_scanner(
-        fd, filename, line, column, encoding
+        fd, filename, line, column, encoding, fast
     )
     stream = TokenStreamAllowReserved(scanner)
-    return Parser(stream)
+    return Parser(stream, lazy_functions=lazy_functions)
 
-def parse_file(filename, line=0, column=0, encoding='utf-8'):
+def parse_file(filename, line=0, column=0, encoding='utf-8', fast=False,
+               lazy_functions=False):
     """
     Parse the file specified by filename into an abstract syntax tree.
     """
-    fd = open(filename, 'rb')
-    parser = make_file_parser(fd, filename, line, column, encoding)
+    # The source is read up front, so the file need not stay open.
+    with open(filename, 'rb') as fd:
+        parser = make_file_parser(
+            fd, filename, line, column, encoding, fast, lazy_functions
+        )
     return parser.parse()
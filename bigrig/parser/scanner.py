@@ -1,19 +1,26 @@
 """
 An ECMAScript 3 lexical scanner implementation and various related utilities.
 """
+import re
 from .token import *
 from .constants import *
-from .utils import (
+from .charclass import (
     is_identifier_start, is_identifier_part, is_whitespace_char,
-    is_line_terminator, Locator, Stream
+    is_line_terminator, make_regex_class, IDENTIFIER_START, IDENTIFIER_PART,
+    WHITESPACE
+)
+from .utils import (
+    Locator, Stream, BufferStream, Source, read_source, iter_source_chunks
 )
 
 class Scanner(object):
     """
     Produces lexical tokens from a given input stream.
     """
+    stream_class = Stream
+
     def __init__(self, stream, filename=None, line=0, column=0, offset=0):
-        self.stream = Stream(stream, offset)
+        self.stream = self.stream_class(stream, offset)
         self.filename = filename
         self.line = line
         self.column = column
@@ -64,16 +71,22 @@ class Scanner(object):
         Note that this sets up location tracking and increments the
         column count.
         """
-        self.buffer.append(self.stream.next())
         self.column += 1
         if self.locator is None:
             self.locator = self.make_locator()
+        self.buffer.append(self.stream.next())
+
+    def current_value(self):
+        """
+        Get the text of the token being scanned.
+        """
+        return u''.join(self.buffer)
 
     def make_token(self, type):
         """
         Make a lexical token with the given type using the stored state.
         """
-        value = u''.join(self.buffer)
+        value = self.current_value()
         token = Token(type, value, self.locator)
         self.buffer = []
         self.locator = None
@@ -87,25 +100,11 @@ class Scanner(object):
         self.advance()
         return self.make_token(INVALID)
 
-    def is_whitespace_char(self, char):
-        if char == EOF_CHAR:
-            return False
-        return is_whitespace_char(char)
-
-    def is_line_terminator(self, char):
-        if char == EOF_CHAR:
-            return False
-        return is_line_terminator(char)
-
-    def is_identifier_start(self, char):
-        if char == EOF_CHAR:
-            return False
-        return is_identifier_start(char)
-
-    def is_identifier_part(self, char):
-        if char == EOF_CHAR:
-            return False
-        return is_identifier_part(char)
+    # The character class checks handle the end of input themselves.
+    is_whitespace_char = staticmethod(is_whitespace_char)
+    is_line_terminator = staticmethod(is_line_terminator)
+    is_identifier_start = staticmethod(is_identifier_start)
+    is_identifier_part = staticmethod(is_identifier_part)
 
     #
     # Scanning methods
@@ -206,7 +205,7 @@ class Scanner(object):
             else:
                 break
         # Check the value to see if we have a reserved name or keyword
-        value = u''.join(self.buffer)
+        value = self.current_value()
         if value in KEYWORD_TO_TYPE:
             return self.make_token(KEYWORD_TO_TYPE[value])
         elif value in RESERVED_NAMES:
@@ -541,6 +540,193 @@ class Scanner(object):
         # Fallthrough case
         return self.make_invalid_token()
 
+class BufferScanner(Scanner):
+    """
+    Produces compact lexical tokens from an in-memory unicode buffer.
+
+    Rather than collecting characters and tracking the line and column as
+    they are scanned, the scanner records the offset the token starts at and
+    makes a ``CompactToken`` referring to its span of the buffer. Lines and
+    columns are resolved from offsets by the shared ``Source`` when needed.
+    """
+    stream_class = BufferStream
+
+    def __init__(self, stream, filename=None, line=0, column=0, offset=0):
+        super(BufferScanner, self).__init__(
+            stream, filename, line, column, offset
+        )
+        self.source = Source(self.stream.text, filename, line, column, offset)
+        self.start = None
+
+    def seek(self, offset):
+        """
+        Continue scanning from the token boundary at ``offset``.
+        """
+        self.stream.offset = offset
+        self.start = None
+
+    def advance(self):
+        """
+        Move the state forward one character.
+
+        Note that this records the token start.
+        """
+        if self.start is None:
+            self.start = self.stream.offset
+        self.stream.next()
+
+    def consume_line_terminators(self):
+        """
+        Eat line terminators.
+        """
+        while self.is_line_terminator(self.peek_char()):
+            self.advance()
+
+    def current_value(self):
+        """
+        Get the text of the token being scanned.
+        """
+        if self.start is None:
+            return u''
+        return self.stream.text[self.start:self.stream.offset]
+
+    def make_token(self, type):
+        """
+        Make a compact lexical token with the given type spanning the
+        characters scanned since the token start.
+        """
+        end = self.stream.offset
+        start = self.start
+        if start is None:
+            start = end
+        self.start = None
+        return CompactToken(TYPE_TO_CODE[type], start, end, self.source)
+
+    def scan(self):
+        """
+        Produce the next token from the input buffer.
+        """
+        self.start = None
+        return super(BufferScanner, self).scan()
+
+#
+# Bulk token patterns
+#
+
+def make_punctuator_pattern():
+    """
+    Build a longest-match-first alternation of the punctuators.
+
+    ``/`` must not start a comment and ``.`` must not start a number, those
+    cases belong to the other alternatives or the fallback path.
+    """
+    special = {
+        u'/': ur'/(?!\*)',
+        u'.': ur'\.(?![0-9])',
+    }
+    punctuators = sorted(PUNCTUATOR_TO_TYPE, key=len, reverse=True)
+    alternatives = [special.get(p, re.escape(p)) for p in punctuators]
+    return u'(?P<PUNCTUATOR>%s)' % u'|'.join(alternatives)
+
+SPACE_PATTERN = u'[%s]+' % make_regex_class(WHITESPACE)
+LINETERM_PATTERN = ur'(?:\r\n|[\n\r\u2028\u2029])+'
+COMMENT_PATTERN = ur'//[^\n\r\u2028\u2029]*|/\*(?:/|[\s\S]*?\*/)'
+
+TOKEN_PATTERN = re.compile(u'|'.join([
+    u'(?P<SPACE>%s)' % SPACE_PATTERN,
+    u'(?P<LINETERM>%s)' % LINETERM_PATTERN,
+    u'(?P<COMMENT>%s)' % COMMENT_PATTERN,
+    u'(?P<NAME>[%s][%s]*)' % (
+        make_regex_class(IDENTIFIER_START), make_regex_class(IDENTIFIER_PART)
+    ),
+    ur'(?P<NUMBER>0[xX][0-9a-fA-F]*'
+    ur'|[0-9]+(?:\.[0-9]*)?(?:[eE][-+]?[0-9]*)?'
+    ur'|\.(?!0[xX])[0-9]+(?:[eE][-+]?[0-9]*)?)',
+    ur'(?P<STRING>"[^"\\\n\r\u2028\u2029]*'
+    ur'(?:\\(?:[^\r]|\r(?!\n))[^"\\\n\r\u2028\u2029]*)*"'
+    ur"|'[^'\\\n\r\u2028\u2029]*"
+    ur"(?:\\(?:[^\r]|\r(?!\n))[^'\\\n\r\u2028\u2029]*)*')",
+    make_punctuator_pattern(),
+]))
+
+TRIVIA_PATTERN = re.compile(u'(?:%s|%s|%s)+' % (
+    SPACE_PATTERN, LINETERM_PATTERN, COMMENT_PATTERN
+))
+
+KEYWORD_TO_CODE = dict(
+    (keyword, TYPE_TO_CODE[type]) for keyword, type in KEYWORD_TO_TYPE.items()
+)
+PUNCTUATOR_TO_CODE = dict(
+    (punctuator, TYPE_TO_CODE[type])
+    for punctuator, type in PUNCTUATOR_TO_TYPE.items()
+)
+RESERVED_CODE = TYPE_TO_CODE[RESERVED]
+IDENTIFIER_CODE = TYPE_TO_CODE[IDENTIFIER]
+DECIMAL_CODE = TYPE_TO_CODE[DECIMAL]
+INTEGER_CODE = TYPE_TO_CODE[INTEGER]
+GROUP_TO_CODE = {
+    'STRING': TYPE_TO_CODE[STRING],
+    'SPACE': TYPE_TO_CODE[SPACE],
+    'LINETERM': TYPE_TO_CODE[LINETERM],
+    'COMMENT': TYPE_TO_CODE[COMMENT],
+}
+
+# Pattern groups whose match must be rescanned by the fallback path when
+# followed by an escape or a character the pattern classes do not cover.
+EXTENSIBLE_GROUPS = frozenset(('NAME', 'SPACE'))
+ASTRAL_PLANES = u'\U00010000'
+
+class FastScanner(BufferScanner):
+    """
+    Produces lexical tokens from an in-memory unicode buffer, matching whole
+    tokens at once with a compiled master pattern.
+
+    Rare constructs the pattern does not cover, such as unicode escapes and
+    characters outside the BMP in identifiers, unterminated literals and the
+    end of the input, fall back to the character at a time ``BufferScanner``
+    methods, which share the same buffer and position state.
+    """
+
+    def skip_trivia(self):
+        """
+        Move past any whitespace, line terminators and comments without
+        making tokens for them.
+        """
+        stream = self.stream
+        match = TRIVIA_PATTERN.match(stream.text, stream.offset)
+        if match is not None:
+            stream.offset = match.end()
+
+    def scan(self):
+        """
+        Produce the next token from the input buffer.
+        """
+        stream = self.stream
+        text = stream.text
+        start = stream.offset
+        match = TOKEN_PATTERN.match(text, start)
+        if match is None:
+            return super(FastScanner, self).scan()
+        end = match.end()
+        kind = match.lastgroup
+        if kind in EXTENSIBLE_GROUPS and end < len(text):
+            next = text[end]
+            if next == ESCAPE or next >= ASTRAL_PLANES:
+                return super(FastScanner, self).scan()
+        stream.offset = end
+        if kind == 'NAME':
+            value = match.group()
+            code = KEYWORD_TO_CODE.get(value)
+            if code is None:
+                code = value in RESERVED_NAMES and RESERVED_CODE or IDENTIFIER_CODE
+        elif kind == 'PUNCTUATOR':
+            code = PUNCTUATOR_TO_CODE[match.group()]
+        elif kind == 'NUMBER':
+            code = text.find(u'.', start, end) != -1 and DECIMAL_CODE or INTEGER_CODE
+        else:
+            code = GROUP_TO_CODE[kind]
+        return CompactToken(code, start, end, self.source)
+
 class TokenStream(object):
     """
     A simple wrapper that does some state tracking to provide token lookahead.
@@ -585,10 +771,7 @@ class TokenStream(object):
         start_token = self.next_token
         token = self.scanner.scan_regexp()
         if token.type == REGEXP:
-            locator = start_token.locator
-            value = start_token.value
-            value = value + token.value
-            token = Token(REGEXP, value, locator)
+            token = start_token.merge(REGEXP, token)
         else:
             # Advance the scanner state upon invalid regex pattern.
             # This is probably pointless.
@@ -606,42 +789,138 @@ class TokenStream(object):
             self.next()
         return token
 
+    def can_seek(self):
+        """
+        Returns whether the scanner can scan its source again from an offset,
+        as the bodies of lazy functions are.
+        """
+        return isinstance(self.scanner, BufferScanner)
+
 class TokenStreamAllowReserved(TokenStream):
     """
     A stream that turns ``RESERVED`` tokens into ``IDENTIFIER`` tokens.
+
+    Tokens are retyped in place as they enter the lookahead, so no new
+    tokens are made.
     """
     def coerce_reserved(self, token):
         if token is not None and token.type == RESERVED:
-            return Token(IDENTIFIER, token.value, token.locator)
+            token.type = IDENTIFIER
         return token
 
-    def peek(self):
-        token = super(TokenStreamAllowReserved, self).peek()
-        return self.coerce_reserved(token)
-
     def next(self):
         token = super(TokenStreamAllowReserved, self).next()
-        return self.coerce_reserved(token)
+        self.coerce_reserved(self.next_token)
+        return token
 
 #
 # Utilities
 #
 
-def make_file_scanner(fd, filename=None, line=0, column=0, encoding='utf-8'):
+def make_file_scanner(fd, filename=None, line=0, column=0, encoding='utf-8',
+                      fast=False):
     """
     Build and return a scanner for the given file object.
+
+    The file is read and decoded into a single buffer up front, so it may be
+    closed as soon as this returns. If ``fast`` is true the buffer is scanned
+    by a ``FastScanner``.
+    """
+    text = read_source(fd, encoding)
+    return make_buffer_scanner(text, filename, line, column, fast)
+
+def make_string_scanner(string, filename=None, line=0, column=0,
+                        encoding='utf-8', fast=False):
+    """
+    Build and return a scanner for the given string object.
+
+    If ``fast`` is true the string is scanned by a ``FastScanner``.
+    """
+    if not isinstance(string, unicode):
+        string = string.decode(encoding)
+    return make_buffer_scanner(string, filename, line, column, fast)
+
+def make_buffer_scanner(text, filename=None, line=0, column=0, fast=False):
+    """
+    Build and return a scanner for the given unicode buffer.
+    """
+    scanner_class = fast and FastScanner or BufferScanner
+    return scanner_class(text, filename, line, column)
+
+def make_stream_scanner(fd, filename=None, line=0, column=0, encoding='utf-8'):
+    """
+    Build and return a scanner that reads the given file object a character
+    at a time.
     """
     import codecs
     Reader = codecs.getreader(encoding)
     stream = Reader(fd)
     return Scanner(stream, filename, line, column)
 
-def make_string_scanner(string, filename=None, line=0, column=0, encoding='utf-8'):
+CHUNK_SIZE = 65536
+
+def iter_tokens(source, chunk_size=CHUNK_SIZE, filename=None, encoding='utf-8',
+                skip_trivia=False):
     """
-    Build and return a scanner for the given string object.
+    Lazily produce the tokens of a string or file object, reading and
+    scanning it ``chunk_size`` characters or bytes at a time.
+
+    Only the chunk being scanned and the token left unfinished at its end
+    are held in memory, so memory use is bounded by the chunk size and the
+    longest token rather than the size of the input. Tokens are compact
+    tokens over the chunk they were scanned from, with locators giving
+    positions in the whole input.
+
+    A slash where an expression may start is scanned as a regular expression
+    literal, and yielded as a single ``REGEXP`` token including its flags. If
+    ``skip_trivia`` is true whitespace, line terminators and comments are
+    skipped over without making tokens for them.
     """
-    try:
-        from cStringIO import StringIO
-    except ImportError:
-        from StringIO import StringIO
-    return make_file_scanner(StringIO(string), filename, line, column, encoding)
+    chunks = iter_source_chunks(source, chunk_size, encoding)
+    text = u''
+    base = 0
+    line = 0
+    column = 0
+    last_type = None
+    exhausted = False
+    while True:
+        # Read until there is at least a chunk to scan, or more than what
+        # was left unfinished by the last chunk.
+        wanted = len(text) + chunk_size
+        while not exhausted and len(text) < wanted:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                text += chunk
+        scanner = FastScanner(text, filename, line, column)
+        scanner.source = Source(text, filename, line, column, 0, base)
+        stream = scanner.stream
+        limit = len(text)
+        while True:
+            start = stream.offset
+            if skip_trivia:
+                scanner.skip_trivia()
+            token = scanner.next()
+            type = token.type
+            if type in (DIV, ASSIGN_DIV) and last_type not in EXPRESSION_END_TYPES:
+                body = scanner.scan_regexp()
+                type = body.type
+                token = token.merge(type, body)
+                if type == REGEXP:
+                    token = token.merge(REGEXP, scanner.scan_regexp_flags())
+            # A token reaching the end of the chunk may continue in the next.
+            if token.end >= limit and not exhausted:
+                break
+            if type == EOF:
+                return
+            if type not in TRIVIA_TYPES:
+                last_type = type
+            elif skip_trivia:
+                continue
+            yield token
+        # Carry the unfinished token over to the next chunk.
+        line, column = scanner.source.get_position(base + start)
+        column -= 1
+        text = text[start:]
+        base += start
@@ -1,3 +1,5 @@
+from .utils import OffsetLocator
+
 #
 # Token Types
 #
@@ -122,6 +124,57 @@ LITERAL_TO_TYPE = {
     "<": LT,
 }
 
+PUNCTUATOR_TO_TYPE = {
+    ">>>=": ASSIGN_URSH,
+    ">>>": URSH,
+    ">>=": ASSIGN_RSH,
+    "<<=": ASSIGN_LSH,
+    "===": SHEQ,
+    "!==": SHNE,
+    ">>": RSH,
+    "<<": LSH,
+    "==": EQ,
+    "!=": NE,
+    "<=": LE,
+    ">=": GE,
+    "++": INC,
+    "--": DEC,
+    "+=": ASSIGN_ADD,
+    "-=": ASSIGN_SUB,
+    "*=": ASSIGN_MUL,
+    "/=": ASSIGN_DIV,
+    "%=": ASSIGN_MOD,
+    "&=": ASSIGN_BITAND,
+    "|=": ASSIGN_BITOR,
+    "^=": ASSIGN_BITXOR,
+    "&&": AND,
+    "||": OR,
+    ".": DOT,
+    ":": COLON,
+    ";": SEMICOLON,
+    "?": HOOK,
+    "=": ASSIGN,
+    ",": COMMA,
+    "(": LEFT_PAREN,
+    ")": RIGHT_PAREN,
+    "{": LEFT_CURLY_BRACE,
+    "}": RIGHT_CURLY_BRACE,
+    "[": LEFT_BRACKET,
+    "]": RIGHT_BRACKET,
+    "~": BITNOT,
+    "&": BITAND,
+    "|": BITOR,
+    "^": BITXOR,
+    "!": NOT,
+    "%": MOD,
+    "/": DIV,
+    "*": MUL,
+    "-": SUB,
+    "+": ADD,
+    ">": GT,
+    "<": LT,
+}
+
 KEYWORD_TO_TYPE = {
     "true": TRUE,
     "false": FALSE,
@@ -231,8 +284,30 @@ COUNT_OPS = frozenset((
     INC, DEC
 ))
 
+# Tokens that end an expression, after which a slash is a division operator
+# rather than the start of a regular expression literal.
+EXPRESSION_END_TYPES = frozenset((
+    IDENTIFIER, RESERVED, INTEGER, DECIMAL, STRING, REGEXP, THIS, TRUE, FALSE,
+    NULL, RIGHT_PAREN, RIGHT_BRACKET, RIGHT_CURLY_BRACE, INC, DEC
+))
+
+TRIVIA_TYPES = frozenset((
+    SPACE, LINETERM, COMMENT
+))
+
 #
-# Token class
+# Type codes
+#
+
+# Compact tokens store their type as an index into this table.
+TYPES = tuple(sorted(
+    value for name, value in globals().items()
+    if isinstance(value, str) and name == value
+))
+TYPE_TO_CODE = dict((type, code) for code, type in enumerate(TYPES))
+
+#
+# Token classes
 #
 
 class Token(object):
@@ -250,3 +325,57 @@ class Token(object):
 
     def __repr__(self):
         return '<Token %s>' % self
+
+    def merge(self, type, token):
+        """
+        Make a token of the given type spanning this token and the one
+        following it.
+        """
+        return Token(type, self.value + token.value, self.locator)
+
+class CompactToken(object):
+    """
+    A lexical unit in a source buffer, stored as a type code and the offsets
+    of its text in the buffer.
+
+    The ``type``, ``value`` and ``locator`` are computed on access, so the
+    token provides the same interface as ``Token``.
+    """
+    __slots__ = ('code', 'start', 'end', 'source')
+    def __init__(self, code, start, end, source):
+        self.code = code
+        self.start = start
+        self.end = end
+        self.source = source
+
+    def get_type(self):
+        return TYPES[self.code]
+
+    def set_type(self, type):
+        self.code = TYPE_TO_CODE[type]
+
+    type = property(get_type, set_type)
+
+    @property
+    def value(self):
+        return self.source.text[self.start:self.end]
+
+    @property
+    def locator(self):
+        source = self.source
+        return OffsetLocator(source, source.base + self.start)
+
+    def __str__(self):
+        return self.type
+
+    def __repr__(self):
+        return '<Token %s>' % self
+
+    def merge(self, type, token):
+        """
+        Make a token of the given type spanning this token and the one
+        following it.
+        """
+        return CompactToken(
+            TYPE_TO_CODE[type], self.start, token.end, self.source
+        )
@@ -1,29 +1,16 @@
 """
 Utilities for working with streams and characters.
 """
-import unicodedata as ud
+import codecs
+import mmap
+import re
+from array import array
+from bisect import bisect_right
 
-#
-# Character class checkers
-#
-
-IDENTIFIER_START_CHARS = frozenset((u'$', u'_'))
-IDENTIFIER_START_CLASSES = frozenset(('Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Nl'))
-IDENTIFIER_PART_CLASSES = frozenset(('Mn', 'Mc', 'Nd', 'Pc','Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Nl'))
-WHITESPACE_CHARS = frozenset((u'\u0009', u'\u000b', u'\u000c', u'\u0020', u'\u00a0'))
-LINE_TERMINATOR_CHARS = frozenset((u'\u000a', u'\u000d', u'\u2028', u'\u2029'))
-
-def is_identifier_start(char):
-    return char in IDENTIFIER_START_CHARS or ud.category(char) in IDENTIFIER_START_CLASSES
-
-def is_identifier_part(char):
-    return char in IDENTIFIER_START_CHARS or ud.category(char) in IDENTIFIER_PART_CLASSES
-    
-def is_whitespace_char(char):
-    return char in WHITESPACE_CHARS or ud.category(char) == 'Zs'
-
-def is_line_terminator(char):
-    return char in LINE_TERMINATOR_CHARS
+from .charclass import (
+    is_identifier_start, is_identifier_part, is_whitespace_char,
+    is_line_terminator
+)
 
 #
 # Utility classes
@@ -43,10 +30,90 @@ class Locator(object):
     def __repr__(self):
         return '<%s line %d, column %d>' % (self.filename, self.line, self.column)
 
+class OffsetLocator(object):
+    """
+    Source location tracking information stored as an offset into a
+    ``Source``, with the line and column resolved when they are read.
+    """
+    __slots__ = ('source', 'offset')
+    def __init__(self, source, offset):
+        self.source = source
+        self.offset = offset
+
+    @property
+    def filename(self):
+        return self.source.filename
+
+    @property
+    def line(self):
+        return self.source.get_position(self.offset)[0]
+
+    @property
+    def column(self):
+        return self.source.get_position(self.offset)[1]
+
+    def __repr__(self):
+        line, column = self.source.get_position(self.offset)
+        return '<%s line %d, column %d>' % (self.filename, line, column)
+
+LINE_TERMINATOR_PATTERN = re.compile(ur'\r\n|[\n\r\u2028\u2029]')
+
+class Source(object):
+    """
+    A unicode source buffer shared by the compact tokens scanned from it.
+
+    The ``line``, ``column`` and ``offset`` give the position scanning
+    starts from. Line and column numbers for other offsets are resolved by
+    bisecting a table of the offsets each line starts at, which is built the
+    first time a position is needed. The ``base`` is the offset of the start
+    of the buffer in the whole input, for buffers holding part of it.
+    """
+    __slots__ = (
+        'text', 'filename', 'line', 'column', 'offset', 'base', 'line_starts'
+    )
+    def __init__(self, text, filename=None, line=0, column=0, offset=0,
+                 base=0):
+        self.text = text
+        self.filename = filename
+        self.line = line
+        self.column = column
+        self.offset = offset
+        self.base = base
+        self.line_starts = None
+
+    def build_line_starts(self):
+        """
+        Build the table of offsets lines start at.
+        """
+        line_starts = array('l', [self.offset])
+        line_starts.extend(
+            match.end()
+            for match in LINE_TERMINATOR_PATTERN.finditer(self.text, self.offset)
+        )
+        return line_starts
+
+    def get_position(self, offset):
+        """
+        Get the line and column of the character at ``offset`` in the whole
+        input.
+        """
+        line_starts = self.line_starts
+        if line_starts is None:
+            line_starts = self.line_starts = self.build_line_starts()
+        offset -= self.base
+        index = bisect_right(line_starts, offset) - 1
+        column = offset - line_starts[index] + 1
+        if index == 0:
+            column += self.column
+        return self.line + index, column
+
 class Stream(object):
     """
     A light wrapper on a codecs.Reader object that provides position tracking
     and a peek method.
+
+    The ``offset`` is the character offset of the next character in the
+    stream, that is the one returned by ``peek``.
     """
     def __init__(self, stream, offset=0):
         self.stream = stream
@@ -59,6 +126,83 @@ class Stream(object):
 
     def next(self):
         char = self.next_char
+        if char:
+            self.offset += 1
         self.next_char = self.stream.read(chars=1)
         return char
 
+class BufferStream(object):
+    """
+    A ``Stream`` work-alike over an in-memory unicode buffer.
+
+    The ``offset`` is an index into ``text``, so it may be moved directly by
+    scanners that match more than one character at a time.
+    """
+    def __init__(self, text, offset=0):
+        self.text = text
+        self.offset = offset
+
+    def peek(self):
+        offset = self.offset
+        return self.text[offset:offset + 1]
+
+    def next(self):
+        offset = self.offset
+        char = self.text[offset:offset + 1]
+        if char:
+            self.offset = offset + 1
+        return char
+
+
+#
+# Source loading
+#
+
+def read_source(fd, encoding='utf-8'):
+    """
+    Read the rest of the given file object and decode it into a single
+    unicode buffer.
+
+    Files read from the start are memory mapped and decoded straight from
+    the mapping, so only the decoded copy of the source is held in memory.
+    Other file-like objects are read with a single ``read`` call.
+    """
+    decode = codecs.getdecoder(encoding)
+    try:
+        fileno = fd.fileno()
+        mapped = fd.tell() == 0
+    except (AttributeError, IOError, ValueError):
+        mapped = False
+    if mapped:
+        try:
+            data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (mmap.error, ValueError):
+            # Empty files and pipes can not be mapped
+            mapped = False
+    if not mapped:
+        return decode(fd.read())[0]
+    try:
+        return decode(data)[0]
+    finally:
+        data.close()
+
+def iter_source_chunks(source, chunk_size, encoding='utf-8'):
+    """
+    Yield a unicode string or file object in decoded chunks of up to
+    ``chunk_size`` characters or bytes.
+    """
+    if isinstance(source, unicode):
+        for start in xrange(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    if isinstance(source, str):
+        from cStringIO import StringIO
+        source = StringIO(source)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        data = source.read(chunk_size)
+        chunk = decoder.decode(data, not data)
+        if chunk:
+            yield chunk
+        if not data:
+            return
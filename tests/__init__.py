@@ -1,12 +1,33 @@
 import unittest
 
-from .scanner import TestScanner
-from .parser import TestParser
+from .scanner import TestScanner, TestFastScanner, TestStreamScanner
+from .parser import TestParser, TestIncrementalParser, TestASTCache, \
+    TestCompactTree, TestParseMany
+from .interpreter import TestInterpreter, TestClosureCompiler, \
+    TestTieredCompiler, TestVirtualMachine, TestBytecodeFiles, TestScript
 
 def test_suite():
     scanner_suite = unittest.makeSuite(TestScanner)
+    fast_scanner_suite = unittest.makeSuite(TestFastScanner)
+    stream_scanner_suite = unittest.makeSuite(TestStreamScanner)
     parser_suite = unittest.makeSuite(TestParser)
-    return unittest.TestSuite([scanner_suite, parser_suite])
+    incremental_parser_suite = unittest.makeSuite(TestIncrementalParser)
+    ast_cache_suite = unittest.makeSuite(TestASTCache)
+    compact_tree_suite = unittest.makeSuite(TestCompactTree)
+    parse_many_suite = unittest.makeSuite(TestParseMany)
+    interpreter_suite = unittest.makeSuite(TestInterpreter)
+    closure_compiler_suite = unittest.makeSuite(TestClosureCompiler)
+    tiered_compiler_suite = unittest.makeSuite(TestTieredCompiler)
+    virtual_machine_suite = unittest.makeSuite(TestVirtualMachine)
+    bytecode_files_suite = unittest.makeSuite(TestBytecodeFiles)
+    script_suite = unittest.makeSuite(TestScript)
+    return unittest.TestSuite([
+        scanner_suite, fast_scanner_suite, stream_scanner_suite, parser_suite,
+        incremental_parser_suite, ast_cache_suite, compact_tree_suite,
+        parse_many_suite, interpreter_suite, closure_compiler_suite,
+        tiered_compiler_suite, virtual_machine_suite, bytecode_files_suite,
+        script_suite
+    ])
 
 if __name__ == "__main__":
     suite = test_suite()
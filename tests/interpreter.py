@@ -0,0 +1,460 @@
+"""
+Unit tests for the interpreter.
+"""
+import unittest
+
+class TestInterpreter(unittest.TestCase):
+    backend = 'visitor'
+
+    def makeInterpreter(self):
+        from bigrig.interpreter.interpreter import Interpreter
+        return Interpreter(backend=self.backend)
+
+    def evaluate(self, string):
+        interpreter = self.makeInterpreter()
+        result = interpreter.execute_string(string)
+        return interpreter.to_string(result)
+
+    def assertEvaluatesTo(self, expected, string):
+        self.assertEqual(expected, self.evaluate(string), msg=string)
+
+    def testOperators(self):
+        tests = [
+            (u'7', '1 + 2 * 3'),
+            (u'12', '"1" + 2'),
+            (u'-4', '-16 >> 2'),
+            (u'15', '-16 >>> 28'),
+            (u'-6', '~5'),
+            (u'NaN', '1 / 0'),
+            (u'true', '"b" > "a" && 3 >= 3 && !(1 === "1")'),
+            (u'x', 'null || "x"'),
+            (u'6', 'var x = 1; x += (x = 5); x'),
+            (u'9', 'var o = {p: 1}; o["q"] = 2; o.p += 5; o.q++; o.p + o.q'),
+            (u'undefinednumberfunction', 'typeof y + typeof 1 + typeof Array'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testOperandTypes(self):
+        tests = [
+            (u'1.5x2', '0.5 * 3 + "x" + (3 - true)'),
+            (u'16', '"5" * "2" + ("6" - 1) + ({valueOf: function () { return 3; }} % 2)'),
+            (u'12', '[1] + 2'),
+            (u'false', 'NaN < 1 || NaN >= 1 || 1 <= NaN || 1 > NaN'),
+            (u'true', '"ab" < "abc" && "b" >= "abc" && 2 < "10" && "2" > "10"'),
+            (u'true', '1 == 1.0 && 1 === 1.0 && "1" == 1 && true == 1 && !(NaN == NaN)'),
+            (u'false', 'NaN === NaN || "1" === 1 || 1 !== 1.0'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testStatements(self):
+        tests = [
+            (u'211', 'var n = 0; for (var i = 0; i < 3; i++) {'
+                     ' switch (i) { case 0: n += 1; break; case 1: n += 10;'
+                     ' default: n += 100; } } n'),
+            (u'b', 'switch (3) { case 1: "a"; default: "d"; case 2: "b"; }'),
+            (u'2', 'var n = 0; outer: for (var i = 0; i < 3; i++) {'
+                   ' for (var j = 0; j < 3; j++) { if (j == 1) continue outer;'
+                   ' if (i == 2) break outer; n++; } } n'),
+            (u'5', 'var i = 0; do { i++; } while (i < 5); i'),
+            (u'4', 'var c = 0; while (true) { if (++c > 3) break; } c'),
+            (u'ab', 'var s = ""; for (var k in {a: 1, b: 2}) s += k; s'),
+            (u'TypeError', 'try { null.x; } catch (e) { e.name; }'),
+            (u'1', 'try { throw 1; } catch (e) { e; } finally { 2; }'),
+            (u'7', 'with ({w: 7}) { w; }'),
+            (u'fin', 'function f() { for (;;) { try { break; } finally { return "fin"; } } } f()'),
+            (u'0f1f', 'var s = ""; for (var i = 0; i < 2; i++) {'
+                      ' try { s += i; continue; } finally { s += "f"; } } s'),
+            (u'3', 'var n = 0; a: b: for (;;) { if (++n < 3) continue a; break b; } n'),
+            (u'1', 'do { 1; break; } while (false)'),
+            (u'5', 'switch (1) { case 1: 5; break; }'),
+            (u'7', 'b: { 7; switch (1) { case 1: break b; } }'),
+            (u'undefined', 'function f() { switch (1) { case 1: 5; return; } } typeof f()'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testFunctions(self):
+        tests = [
+            (u'144', 'function f(n) { return n < 2 ? n : f(n - 1) + f(n - 2); } f(12)'),
+            (u'3', 'var o = {a: 1, get b() { return this.a + 1; }}; o.b + o.a'),
+            (u'3', 'function g() { return arguments.length; } g(1, 2, 3)'),
+            (u'4', '(function () { var z = 4; return eval("z"); })()'),
+            (u'true', '(function () { return this; })() === this'),
+            (u'ReferenceError', '"use strict"; try { undeclared = 1; } catch (e) { e.name; }'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testScopes(self):
+        tests = [
+            (u'8', 'function f(a) { try { throw a; } catch (e) {'
+                   ' return (function () { return e + a; })(); } } f(4)'),
+            (u'120', 'var h = function fact(n) { return n < 2 ? 1 : n * fact(n - 1); }; h(5)'),
+            (u'12', 'function f() { var x = 1; var o = {get v() { var y = 2; return x + y; },'
+                    ' set v(z) { x = z; }}; o.v = 10; return o.v; } f()'),
+            (u'4', 'function f() { var x = 1; function g() { eval("var x = 3"); return x; }'
+                   ' return g() + x; } f()'),
+            (u'o', 'var x = "g"; function f() { var o = {x: "o"}; with (o) {'
+                   ' return (function () { return x; })(); } } f()'),
+            (u'function', 'function f() { return typeof g; var g = 1; function g() {} } f()'),
+            (u'false1', 'function f(a) { try { throw 1; } catch (e) { delete e;'
+                        ' return delete a + "" + e; } } f(1)'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testStaticResolution(self):
+        from bigrig.parser import parse_string
+        from bigrig.interpreter.ast_utils import DeclarationVisitor
+        program = parse_string(
+            'function f(a) { var b; function g() { return [a, b, c]; } }'
+            ' function h(d) { eval(""); return d; }'
+            ' function k(e) { with (e) { e; } }'
+        )
+        visitor = DeclarationVisitor()
+        visitor.get_node_scopes(program)
+        resolved = {}
+        for node, resolution in visitor.resolutions.items():
+            resolved[node.value] = resolution
+        # The slots of f are a, g, arguments and b. The names in h are
+        # dynamic because of the call to eval, and those in k because of
+        # the with statement.
+        self.assertEqual({u'a': (1, 0), u'b': (1, 3)}, resolved)
+
+    def testObjects(self):
+        tests = [
+            (u'zamzam', 'var o = {z: 1, a: 2, m: 3}, s = "";'
+                        ' for (var k in o) s += k; s + Object.keys(o).join("")'),
+            (u'zmb14undefined', 'var o = {z: 1, a: 2, m: 3}, s = ""; delete o.a; o.b = 4;'
+                                ' for (var k in o) s += k; s + o.z + o.b + o.a'),
+            (u'8y', 'var o = {}; Object.defineProperty(o, "x", {get: function () { return 7; }});'
+                    ' o.y = 1; o.x + o.y + Object.keys(o).join("")'),
+            (u'1undefinedtrue', 'var o = {a: 1}; Object.freeze(o); o.a = 2; o.b = 3;'
+                                ' o.a + "" + o.b + Object.isFrozen(o)'),
+            (u'4950k70', 'var o = {}, n = 0; for (var i = 0; i < 100; i++) o["k" + i] = i;'
+                         ' for (var k in o) n += o[k]; n + Object.keys(o)[70]'),
+            (u'15', 'function P(x) { this.x = x; this.y = x * 2; }'
+                    ' var a = new P(1), b = new P(2); b.y = 10; a.x + a.y + b.x + b.y'),
+            (u'10', 'var p = {}; Object.defineProperty(p, "q", {value: 1, writable: false});'
+                    ' var o = Object.create(p); o.q = 5; o.q + "" + Object.keys(o).length'),
+            (u'0true', 'var o = {a: 1, b: 2}; Object.defineProperty(o, "a", {enumerable: false});'
+                       ' Object.keys(o).length - 1 + "" + o.propertyIsEnumerable("b")'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testShapes(self):
+        interpreter = self.makeInterpreter()
+        interpreter.execute_string(
+            'function P(x) { this.x = x; this.y = x; }'
+            ' var a = new P(1), b = new P(2), c = new P(3); delete c.y;'
+        )
+        get = interpreter.Global.get
+        a, b, c = get('a'), get('b'), get('c')
+        self.assertTrue(a.shape is b.shape)
+        self.assertEqual((u'x', u'y'), a.shape.names)
+        self.assertEqual([2, 2], b.values)
+        self.assertTrue(c.shape is None)
+        self.assertEqual([u'x'], c.own_property_names())
+
+    def testPropertyDescriptors(self):
+        tests = [
+            (u'true,false,true,1', 'var o = {a: 1}; Object.defineProperty(o, "a", {enumerable: false});'
+                                   ' var d = Object.getOwnPropertyDescriptor(o, "a");'
+                                   ' [d.writable, d.enumerable, d.configurable, d.value].join()'),
+            (u'false,true,true,1', 'var o = {a: 1, b: 2}; delete o.b; Object.defineProperty(o, "a", {writable: false});'
+                                   ' o.a = 5; var d = Object.getOwnPropertyDescriptor(o, "a");'
+                                   ' [d.writable, d.enumerable, d.configurable, o.a].join()'),
+            (u'false,false,true', 'var o = {a: 1}; Object.freeze(o);'
+                                  ' var d = Object.getOwnPropertyDescriptor(o, "a");'
+                                  ' [d.writable, d.configurable, d.enumerable].join()'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testInlineCaches(self):
+        tests = [
+            (u'ppqq', 'function P() {} P.prototype.m = function () { return "p"; };'
+                      ' function f(o) { return o.m(); } var a = new P(), s = f(a) + f(a);'
+                      ' P.prototype.m = function () { return "q"; }; s + f(a) + f(new P())'),
+            (u'pop', 'function P() {} P.prototype.m = "p"; function f(o) { return o.m; }'
+                     ' var a = new P(), s = f(a); Object.prototype.m = "x"; a.m = "o";'
+                     ' s + f(a) + f(new P())'),
+            (u'xundefinedg', 'function P() {} P.prototype.m = "x"; function f(o) { return o["m"]; }'
+                             ' var s = f(new P()); delete P.prototype.m; s += f(new P());'
+                             ' Object.defineProperty(P.prototype, "m", {get: function () { return "g"; }});'
+                             ' s + f(new P())'),
+            (u'3a3', 'function f(o) { return o.length; } var s = new String("abc");'
+                     ' f(s) + f({length: "a"}) + f(s)'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testInlineCacheStatistics(self):
+        interpreter = self.makeInterpreter()
+        interpreter.execute_string(
+            'function f(o) { return o.k; }'
+            ' var p = {k: 1}; for (var i = 0; i < 10; i++) f(p);'
+            ' f({a: 1, k: 2}); f({b: 1, k: 3}); f({c: 1, k: 4});'
+        )
+        caches = [cache for cache in interpreter.get_inline_caches()
+                  if cache.name == 'k']
+        self.assertEqual(1, len(caches))
+        self.assertEqual('polymorphic', caches[0].state)
+        self.assertEqual((9, 4), (caches[0].hits, caches[0].misses))
+        interpreter.execute_string('f({d: 1, k: 5}); f({e: 1, k: 6}); f(p)')
+        self.assertEqual('megamorphic', caches[0].state)
+        self.assertEqual((10, 6), (caches[0].hits, caches[0].misses))
+
+    def testInlineCachesOfFreedCode(self):
+        import gc
+        from bigrig.interpreter.interpreter import Interpreter
+        source = (
+            'var o = {x: 1}; for (var i = 0; i < 20; i++) {'
+            ' eval("o.x + " + i); new Function("a", "return a.x + " + i)(o); }'
+        )
+        interpreter = self.makeInterpreter()
+        interpreter.execute_string(source)
+        gc.collect()
+        self.assertTrue(len(interpreter.get_inline_caches()) <= 1)
+        self.assertTrue(len(interpreter.declarations) <= 1)
+        # Statistics keep the caches of freed code
+        interpreter = Interpreter(backend=self.backend, cache_statistics=True)
+        interpreter.execute_string(source)
+        gc.collect()
+        self.assertEqual(40, len(interpreter.get_inline_caches()))
+
+    def testArrays(self):
+        tests = [
+            (u'4,1-2-3-4', 'var a = [1, 2, 3]; a[3] = 4; [a.length, a.join("-")].join()'),
+            (u'11,undefined,11,no', 'var a = [1]; a[10] = 11; [a.length, typeof a[9], a[10], 9 in a ? "yes" : "no"].join()'),
+            (u'3,no,3', 'var a = [1,,3]; [a.length, 1 in a ? "yes" : "no", a[2]].join()'),
+            (u'2,undefined,5,3', 'var a = [1, 2, 3]; a.length = 2; var s = [a.length, typeof a[2]];'
+                                 ' a.length = 5; a[2] = 3; s.concat(a.length, a[2]).join()'),
+            (u'3,no,2', 'var a = [1, 2, 3]; delete a[0]; [a.length, 0 in a ? "yes" : "no", a[1]].join()'),
+            (u'0,1,length', 'Object.getOwnPropertyNames([5, 6]).join()'),
+            (u'1,2,2', 'var a = Object.freeze([1, 2]); a[0] = 9; a[2] = 3; [a, a.length].join()'),
+            (u'3,', 'var a = [1, 2, 3]; Object.defineProperty(a, "length", {writable: false});'
+                    ' a[3] = 4; [a.length, a[3]].join()'),
+            (u'g,3', 'var a = [1, 2]; Object.defineProperty(a, "2", {get: function () { return "g"; }});'
+                     ' [a[2], a.length].join()'),
+            (u'p,own,2', 'Array.prototype[1] = "p"; var a = [0], s = a[1]; a[1] = "own";'
+                         ' [s, a[1], a.length].join()'),
+            (u'RangeError', 'try { [].length = -1; } catch (e) { e.name }'),
+            (u'undefined,3,1,1', 'var a = [1], s = typeof a["\\u00b2"]; a["\\u00b2"] = 3; a["\\u0663"] = 4;'
+                                 ' [s, a["\\u00b2"], a.length, a["3"] === undefined ? 1 : 0].join()'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testArrayBuiltins(self):
+        tests = [
+            (u'0,2,6|1,3|6|16|2', 'var a = [1, 2, 3, 4], f = function (x) { return x % 2; };'
+                                  ' [a.slice(0, 3).map(function (x, i) { return x * i; }), a.filter(f).join(),'
+                                  '  a.slice(0, 3).reduce(function (p, c) { return p + c; }),'
+                                  '  a.reduce(function (p, c) { return p + c; }, 6), a.indexOf(3)].join("|")'),
+            (u'1,2,3,9|1,3,4|1,2', 'var s = [], a = [1, 2, 3, 4];'
+                                   ' a.forEach(function (v, i) { s.push(v); if (!i) { a.pop(); a.push(9, 10); } });'
+                                   ' var t = [], b = [1, 2, 3, 4];'
+                                   ' b.forEach(function (v, i) { t.push(v); if (!i) delete b[1]; });'
+                                   ' var u = [], c = [1, 2, 3, 4];'
+                                   ' c.every(function (v, i) { u.push(v); if (i) c.length = 2; return true; });'
+                                   ' [s, t, u].join("|")'),
+            (u'1,2,3,p', 'Array.prototype[3] = "p"; var s = [], a = [1, 2, 3]; a.length = 5;'
+                         ' a.forEach(function (v) { s.push(v); }); s.join()'),
+            (u'1,o,changed', 'var a = [1, {toString: function () { a[2] = "changed"; return "o"; }}, 3];'
+                             ' a.join()'),
+            (u'1|2|3||5|6|7,7', 'var a = [1, 2].concat([3,, 5], 6, [[7]]); [a.join("|"), a.length].join()'),
+            (u'3,no,10,3||||||||11', 'var a = [1,, 3].slice(0), b = [1, 2, 3]; b[10] = 11;'
+                                      ' [a.length, 1 in a ? "yes" : "no", b.slice(1).length, b.slice(2, 11).join("|")].join()'),
+            (u'a-b-c,aa', 'var s = Object("abc"); [Array.prototype.join.call(s, "-"),'
+                          ' Array.prototype.map.call(s, function (c) { return c + c; })[0]].join()'),
+            (u'-1,-1,0,2,3', 'var a = [1, 2, 3]; [a.indexOf(3, Infinity), a.indexOf(3, 1e20),'
+                             ' a.indexOf(1, 0.0), a.indexOf(3, -Infinity), a.slice(0.0).length].join()'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testDenseArrays(self):
+        interpreter = self.makeInterpreter()
+        dense = interpreter.execute_string('var a = [1, 2, 3]; a.push(4); a')
+        self.assertEqual([1, 2, 3, 4], dense.elements)
+        self.assertEqual(None, dense.properties)
+        holey = interpreter.execute_string('var b = [1, 2]; b[5] = 6; b')
+        self.assertEqual(None, holey.elements)
+        self.assertEqual(6, holey.get(u'length'))
+        holes = interpreter.execute_string('new Array(5)')
+        self.assertEqual(([], 5), (holes.elements, holes.length))
+
+    def testLiterals(self):
+        tests = [
+            (u'8', '010'),
+            (u'8SyntaxError', 'function f() { return 010; }'
+                              ' function g() { "use strict";'
+                              ' try { return 010; } catch (e) { return e.name; } }'
+                              ' f() + g()'),
+            (u'A\u00e9', '"\\x41" + "\\u00e9"'),
+            (u'2', 'var ab = 2; \\u0061b'),
+            (u'3', 'var o = {\\u0078: 3}; o.x'),
+            (u'4', 'var a\\u0031 = 4; a1'),
+            (u'SyntaxError,SyntaxError',
+             'var names = [];'
+             ' try { eval("var \\\\u0031a"); } catch (e) { names.push(e.name); }'
+             ' try { eval("var a\\\\u002d"); } catch (e) { names.push(e.name); }'
+             ' names.join()'),
+            (u'true,true,true,false,false',
+             '[/\\s/.test("\\ufeff"), /\\s/.test("\\u2028"), /[\\s]/.test("\\ufeff"),'
+             ' /\\S/.test("\\u2028"), /[^\\s]/.test("\\ufeff")].join()'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+
+class TestClosureCompiler(TestInterpreter):
+    """
+    Run the interpreter tests with code compiled by the ``ClosureCompiler``.
+    """
+    backend = 'closure'
+
+
+class TestTieredCompiler(TestInterpreter):
+    """
+    Run the interpreter tests translating functions after their first call.
+    """
+    backend = 'tiered'
+
+    def makeInterpreter(self):
+        interpreter = super(TestTieredCompiler, self).makeInterpreter()
+        interpreter.jit.threshold = 1
+        return interpreter
+
+    def testTranslation(self):
+        interpreter = self.makeInterpreter()
+        result = interpreter.execute_string(
+            'function sum(n) { var t = 0; for (var i = 0; i < n; i++) {'
+            ' if (i % 2) continue; t += i; } return t; }'
+            'sum(10) + sum(20)'
+        )
+        self.assertEqual(u'110', interpreter.to_string(result))
+        profile, = interpreter.jit.profiles.values()
+        self.assertEqual(['number'], profile.argument_kinds)
+        self.assertTrue(profile.code is not None)
+        self.assertTrue('NUMBER_TYPES' in profile.source)
+
+    def testDeoptimization(self):
+        tests = [
+            (u'3,ab,x1', 'function f(a, b) { return a + b; }'
+                         ' [f(1, 2), f("a", "b"), f("x", 1)].join()'),
+            (u'6,NaN', 'function g(n) { var r = 0; do { r += n; } while (r < 5);'
+                       ' return r; } g(2) + "," + g(undefined)'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+    def testUntranslatable(self):
+        interpreter = self.makeInterpreter()
+        result = interpreter.execute_string(
+            'function outer(n) { var f = function () { return n; }; return f(); }'
+            'outer(1) + outer(2)'
+        )
+        self.assertEqual(u'3', interpreter.to_string(result))
+        profiles = [p for p in interpreter.jit.profiles.values() if p.calls == 2]
+        self.assertFalse(profiles[0].translatable)
+
+
+class TestVirtualMachine(TestInterpreter):
+    """
+    Run the interpreter tests with code compiled to bytecode as it is run.
+    """
+    backend = 'bytecode'
+
+    def testSuperinstructions(self):
+        from bigrig.interpreter import bytecode
+        code = bytecode.compile_source(
+            'var o = {n: 3}, t = 0; for (var i = 0; i < o.n; i++) t += i;'
+        )
+        opcodes = set(code.instructions[::2])
+        for opcode in (bytecode.COUNT_NAME, bytecode.LOAD_DOT,
+                       bytecode.COMPARE_JUMP_IF_TRUE):
+            self.assertTrue(opcode in opcodes, bytecode.OPCODE_NAMES[opcode])
+
+    def testAbruptCompletions(self):
+        tests = [
+            (u'fbf', 'var s = ""; for (var i = 0; i < 3; i++) {'
+                    ' try { if (i == 1) break; } finally { s += "f"; } s += "b"; } s'),
+            (u'2,1', 'var log = []; function f() { try { return 1; }'
+                     ' finally { log.push(2); } } log.push(f()); log.join()'),
+            (u'x', 'function g() { for (var k in {a: 1}) { try { throw "x"; }'
+                   ' catch (e) { return e; } } } g()'),
+            (u'3', 'var n = 0; a: { with ({n: 1}) { n = 2; break a; } } n += 3; n'),
+        ]
+        for expected, string in tests:
+            self.assertEvaluatesTo(expected, string)
+
+
+class TestBytecodeFiles(TestInterpreter):
+    """
+    Run the interpreter tests with programs compiled ahead of time and
+    loaded back from the bytes of a ``.bigc`` file.
+    """
+    backend = 'bytecode'
+
+    def evaluate(self, string):
+        from bigrig.interpreter import bytecode
+        data = bytecode.dumps(bytecode.compile_source(string))
+        interpreter = self.makeInterpreter()
+        result = interpreter.execute_code(bytecode.loads(data))
+        return interpreter.to_string(result)
+
+    def testCorruptFile(self):
+        from bigrig.interpreter import bytecode
+        data = bytecode.dumps(bytecode.compile_source('1 + 1'))
+        self.assertRaises(bytecode.BytecodeError, bytecode.loads, data[:-4])
+        self.assertRaises(bytecode.BytecodeError, bytecode.loads, 'BRAC' + data[4:])
+
+
+class TestScript(unittest.TestCase):
+    """
+    Run the ``bigrig`` script in a separate process.
+    """
+    def runScript(self, arguments, stdin=''):
+        import os, subprocess, sys
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        environment = dict(os.environ, PYTHONPATH=root)
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(root, 'scripts', 'bigrig')] + arguments,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, env=environment
+        )
+        stdout, stderr = process.communicate(stdin)
+        return process.returncode, stdout, stderr
+
+    def testStdin(self):
+        source = 'var a = [1, 2]; console.log(a.join("+"));'
+        for arguments in (['-'], ['-j', '2', '-'], ['--backend', 'bytecode', '-']):
+            returncode, stdout, stderr = self.runScript(arguments, source)
+            self.assertEqual(0, returncode, msg=stderr)
+            self.assertEqual('1+2\n', stdout)
+
+    def testCompileStdin(self):
+        source = 'console.log(1);'
+        returncode, stdout, stderr = self.runScript(['--compile', '-'], source)
+        self.assertNotEqual(0, returncode)
+        self.assertEqual('', stdout)
+        self.assertTrue('stdin' in stderr, msg=stderr)
+
+    def testLazyFunctions(self):
+        # Syntax errors in function bodies are reported when the script is
+        # loaded, whether or not the function is ever called.
+        source = 'function f() { var = 1; } console.log("ran");'
+        for arguments in (['--lazy-functions', '-'], ['-']):
+            returncode, stdout, stderr = self.runScript(arguments, source)
+            self.assertNotEqual(0, returncode)
+            self.assertEqual('', stdout)
+            self.assertTrue(stderr.startswith('SyntaxError'), msg=stderr)
+        source = 'function f(a) { return (a) / 2 + a; } console.log(f(6));'
+        returncode, stdout, stderr = self.runScript(['--lazy-functions', '-'], source)
+        self.assertEqual(0, returncode, msg=stderr)
+        self.assertEqual('9\n', stdout)
@@ -688,3 +688,323 @@ class TestParser(unittest.TestCase):
             parser = self.makeStringParser(expected)
             expected = parser.parse_program()
             self.assertEqual(len(expected.statements), len(result.statements))
+
+    #
+    # Locations
+    #
+
+    def testLocators(self):
+        string = "var a = 1;\nif (b) {\n  c.d(e + f * g);\n}"
+        program = self.parseString(string)
+        def position(node):
+            return node.locator.line, node.locator.column
+        self.assertEqual((0, 1), position(program))
+        declaration = program.statements[0].declarations[0]
+        self.assertEqual((0, 5), position(declaration))
+        self.assertEqual((0, 9), position(declaration.value))
+        statement = program.statements[1]
+        self.assertEqual((1, 1), position(statement))
+        call = statement.then_statement.statements[0].expression
+        self.assertIsNode('CallExpression', call)
+        self.assertEqual((2, 3), position(call))
+        self.assertEqual((2, 3), position(call.expression))
+        self.assertEqual((2, 7), position(call.arguments[0]))
+        self.assertEqual((2, 11), position(call.arguments[0].right))
+
+    def testNoLocators(self):
+        from bigrig.parser.parser import Parser
+        from bigrig.parser.scanner import TokenStreamAllowReserved
+        scanner = self.getParserModule().make_string_scanner("a.b(c + 1);")
+        parser = Parser(TokenStreamAllowReserved(scanner), track_locations=False)
+        pending = [parser.parse()]
+        while pending:
+            node = pending.pop()
+            self.assertEqual(None, node.locator)
+            pending.extend(node.iter_children())
+
+    #
+    # Lazy function bodies
+    #
+
+    def makeLazyParser(self, string):
+        from bigrig.parser.parser import Parser
+        from bigrig.parser.scanner import TokenStreamAllowReserved
+        scanner = self.getParserModule().make_string_scanner(string)
+        return Parser(TokenStreamAllowReserved(scanner), lazy_functions=True)
+
+    def testLazyFunctionBody(self):
+        from bigrig.parser.parser import LazyFunctionBody
+        string = "function f(a) {\n  var g = function () { return /}/; };\n  return {a: [a]};\n}\nf(1);"
+        program = self.makeLazyParser(string).parse()
+        self.assertEqual(2, len(program.statements))
+        function = program.statements[0]
+        self.assertTrue(isinstance(function.body, LazyFunctionBody))
+        statements = function.body.parse()
+        self.assertEqual(2, len(statements))
+        self.assertIsNode('VariableStatement', statements[0])
+        self.assertEqual(1, statements[0].locator.line)
+        inner = statements[0].declarations[0].value
+        self.assertTrue(isinstance(inner.body, LazyFunctionBody))
+        self.assertIsNode('ReturnStatement', inner.body.parse()[0])
+
+    def testLazyFunctionBodyDivision(self):
+        # Only the parser can tell whether this slash starts a regexp.
+        program = self.makeLazyParser("function f(a) { return (a) / 2 / a; }").parse()
+        statement = program.statements[0].body.parse()[0]
+        self.assertIsNode('ReturnStatement', statement)
+        self.assertIsNode('BinaryOperation', statement.expression)
+
+    def testLazyFunctionBodyErrors(self):
+        parse_mod = self.getParserModule()
+        tests = [
+            "function f() { return [1, 2; }",
+            "function f() { var = 1; }",
+            "function f() { 1 = 2; }",
+            "function f() { a.b: 1; }",
+            "function f() { function () {} }",
+            "var g = function () { for (a + 1 in b); };",
+            "function f() { function g() { return; ) }",
+        ]
+        for string in tests:
+            parser = self.makeLazyParser(string)
+            self.assertRaises(parse_mod.ParseException, parser.parse)
+
+
+class TestIncrementalParser(unittest.TestCase):
+    def makeIncrementalParser(self, string=u''):
+        from bigrig.parser.incremental import IncrementalParser
+        return IncrementalParser(string)
+
+    def testNeedsMoreInput(self):
+        parser = self.makeIncrementalParser()
+        lines = [
+            ('var a = 1;', False),
+            ('function f(x) {', True),
+            ('  return x / 2 + /[(]/.source.length;', True),
+            ('}', False),
+            ('a +', True),
+            ('f(a)', False),
+            ('/* comment', True),
+            ('*/', False),
+        ]
+        for line, expected in lines:
+            parser.append(line + '\n')
+            self.assertEqual(expected, parser.needs_more_input(), msg=line)
+        program = parser.parse()
+        self.assertEqual(3, len(program.statements))
+
+    def testNeedsMoreInputInvalidTokens(self):
+        sources = [
+            (u'1 @\n', False),
+            (u'x = #\n', False),
+            (u'"abc\n', False),
+            (u"x = 'abc\\\\\n", False),
+            (u'x = /abc\n', False),
+            (u'"abc\\\n', True),
+            (u"x = 'abc\\\r\n", True),
+            (u'f(/* comment\n', True),
+        ]
+        for source, expected in sources:
+            parser = self.makeIncrementalParser(source)
+            self.assertEqual(expected, parser.needs_more_input(), msg=source)
+        parser = self.makeIncrementalParser(u'"abc\\\n')
+        parser.append(u'def";\n')
+        self.assertFalse(parser.needs_more_input())
+        self.assertEqual(1, len(parser.parse().statements))
+
+    def testKeepsParsedStatements(self):
+        parser = self.makeIncrementalParser(u'var a = 1;\nb = 2;\n')
+        first, second = parser.parse().statements
+        parser.append(u'c = 3;\n')
+        statements = parser.parse().statements
+        self.assertEqual(3, len(statements))
+        self.assertTrue(first is statements[0])
+        # The last statement may be continued by appended text.
+        self.assertFalse(second is statements[1])
+
+    def testApplyEdit(self):
+        from bigrig.parser import ParseException
+        parser = self.makeIncrementalParser(u'var a = 1;\nb = 2;\nc = 3;\n')
+        first = parser.parse().statements[0]
+        parser.apply_edit(15, 16, u'(')
+        self.assertRaises(ParseException, parser.parse)
+        self.assertTrue(parser.needs_more_input())
+        parser.apply_edit(15, 16, u'[2, 4]')
+        statements = parser.parse().statements
+        self.assertEqual(3, len(statements))
+        self.assertTrue(first is statements[0])
+        self.assertEqual(u'b = [2, 4];\nc = 3;\n', parser.text[11:])
+
+    def testProgramLocator(self):
+        from bigrig.parser import make_string_parser
+        source = u'\n  var a = 1;\nb = 2;\n'
+        parser = self.makeIncrementalParser(source)
+        expected = repr(make_string_parser(source).parse().locator)
+        self.assertEqual(expected, repr(parser.parse().locator))
+        parser.append(u'c = 3;\n')
+        self.assertEqual(expected, repr(parser.parse().locator))
+
+
+class TestASTCache(unittest.TestCase):
+    source = u'var a = [1, "two", /3/g];\nfunction f(b) {\n  return b.c(a);\n}\n'
+
+    def setUp(self):
+        import tempfile
+        from bigrig.parser.cache import ASTCache
+        self.directory = tempfile.mkdtemp()
+        self.cache = ASTCache(self.directory)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    def getEntries(self):
+        import os
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+        ]
+
+    def assertSameTree(self, expected, result):
+        from bigrig.parser.cache import encode_tree
+        self.assertEqual(encode_tree(expected), encode_tree(result))
+        expected_nodes = [expected]
+        result_nodes = [result]
+        while expected_nodes:
+            expected_node = expected_nodes.pop()
+            result_node = result_nodes.pop()
+            self.assertEqual(
+                repr(expected_node.locator), repr(result_node.locator)
+            )
+            expected_nodes.extend(expected_node.iter_children())
+            result_nodes.extend(result_node.iter_children())
+
+    def testWarmStart(self):
+        from bigrig.parser import parse_string
+        expected = parse_string(self.source, filename='test.js')
+        cold = self.cache.parse_string(self.source, filename='test.js')
+        warm = self.cache.parse_string(self.source, filename='test.js')
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        self.assertEqual(1, len(self.getEntries()))
+        self.assertSameTree(expected, cold)
+        self.assertSameTree(expected, warm)
+
+    def testLazyFunctionBodies(self):
+        from bigrig.parser import parse_string
+        self.cache.parse_string(self.source, lazy_functions=True)
+        program = self.cache.parse_string(self.source, lazy_functions=True)
+        self.assertEqual(1, self.cache.hits)
+        body = program.statements[1].body.parse()
+        expected = parse_string(self.source).statements[1].body
+        self.assertSameTree(expected[0], body[0])
+
+    def testCorruptEntry(self):
+        self.cache.parse_string(self.source)
+        path, = self.getEntries()
+        with open(path, 'r+b') as fd:
+            fd.seek(-8, 2)
+            fd.write('garbage!')
+        program = self.cache.parse_string(self.source)
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+        self.assertEqual(2, len(program.statements))
+        self.cache.parse_string(self.source)
+        self.assertEqual(1, self.cache.hits)
+
+class TestCompactTree(unittest.TestCase):
+    source = (
+        u'var a = [1, "two", /3/g, , {b: null}];\n'
+        u'function f(b) {\n  return b.c(a) + -b * 2;\n}\n'
+        u'for (var i in a) { if (i) continue; else break; }\n'
+    )
+
+    def parseString(self, string):
+        from bigrig.parser.compact import parse_string
+        return parse_string(string, filename='test.js')
+
+    def assertSameTree(self, expected, result):
+        from bigrig.parser.node import Node
+        if isinstance(expected, Node):
+            self.assertEqual(expected.__class__.__name__, result.__class__.__name__)
+            self.assertTrue(isinstance(result, expected.__class__))
+            self.assertEqual(
+                repr(expected.locator), repr(result.locator)
+            )
+            for (name, value), (result_name, result_value) in zip(
+                    expected.iter_fields(), result.iter_fields()):
+                self.assertEqual(name, result_name)
+                self.assertSameTree(value, result_value)
+        elif isinstance(expected, list):
+            self.assertEqual(len(expected), len(result))
+            for value, result_value in zip(expected, result):
+                self.assertSameTree(value, result_value)
+        else:
+            self.assertEqual(expected, result)
+
+    def testSameTree(self):
+        from bigrig.parser import parse_string
+        expected = parse_string(self.source, filename='test.js')
+        program = self.parseString(self.source)
+        self.assertSameTree(expected, program)
+        self.assertTrue(program is program.tree.root)
+        self.assertEqual(program, program.tree.get_node(program.index))
+
+    def testViews(self):
+        from bigrig.parser.ast import Name
+        program = self.parseString(u'a = a;')
+        assignment = program.statements[0].expression
+        target, value = assignment.target, assignment.value
+        self.assertTrue(isinstance(target, Name))
+        self.assertTrue(target.is_valid_left_hand_side())
+        self.assertNotEqual(target, value)
+        self.assertEqual(target, assignment.target)
+        self.assertEqual(1, len(set([target, assignment.target])))
+        self.assertRaises(AttributeError, setattr, target, 'value', u'b')
+
+    def testPickle(self):
+        import pickle
+        program = self.parseString(self.source)
+        tree = pickle.loads(pickle.dumps(program.tree, 2))
+        self.assertSameTree(program, tree.root)
+        self.assertEqual(u'test.js', tree.root.locator.filename)
+
+class TestParseMany(unittest.TestCase):
+    sources = [
+        u'var a = 1;\nfunction f(b) {\n  return b + a;\n}\n',
+        u'a = [f(2), "three"];\n',
+        u'for (var i in a) { f(i); }\n',
+    ]
+
+    def setUp(self):
+        import os, tempfile
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for i, source in enumerate(self.sources):
+            path = os.path.join(self.directory, '%d.js' % i)
+            with open(path, 'wb') as fd:
+                fd.write(source.encode('utf-8'))
+            self.paths.append(path)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    def testParseMany(self):
+        from bigrig.parser import parse_file
+        from bigrig.parser.cache import encode_tree
+        from bigrig.parser.parallel import parse_many
+        for workers in (1, 2):
+            programs = parse_many(self.paths, workers)
+            self.assertEqual(len(self.paths), len(programs))
+            for path, program in zip(self.paths, programs):
+                expected = parse_file(path)
+                self.assertEqual(encode_tree(expected), encode_tree(program))
+                self.assertEqual(path, program.statements[0].locator.filename)
+
+    def testParseException(self):
+        from bigrig.parser import ParseException
+        from bigrig.parser.parallel import iter_parse_many
+        with open(self.paths[1], 'wb') as fd:
+            fd.write('a = ;')
+        programs = iter_parse_many(self.paths, 2)
+        self.assertEqual(2, len(programs.next().statements))
+        self.assertRaises(ParseException, programs.next)
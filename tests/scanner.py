@@ -182,6 +182,29 @@ class TestScanner(unittest.TestCase):
             token = self.getSingleToken(string)
             self.assertTokenTypeValueEqual(type, string, token)
 
+    def testLocators(self):
+        scanner = self.makeStringScanner('a\r\n  bc\n\n/* x\r\ny */ d')
+        positions = []
+        while True:
+            token = scanner.next()
+            if token.type == 'EOF':
+                break
+            if token.type not in ('SPACE', 'LINETERM'):
+                locator = token.locator
+                positions.append((locator.line, locator.column))
+        self.assertEqual([(0, 1), (1, 3), (3, 1), (4, 6)], positions)
+        self.assertEqual('<None line 4, column 6>', repr(locator))
+
+    def testAllowReserved(self):
+        from bigrig.parser.scanner import TokenStreamAllowReserved
+        stream = TokenStreamAllowReserved(self.makeStringScanner('a.class'))
+        stream.next()
+        stream.next()
+        token = stream.peek()
+        self.assertTokenTypeValueEqual('IDENTIFIER', 'class', token)
+        self.assertTrue(token is stream.next())
+        self.assertTokenTypeEqual('EOF', stream.peek())
+
     def testSingleCharTokenScanning(self):
         tests = [
             ('!', 'NOT'),
@@ -224,6 +247,17 @@ class TestScanner(unittest.TestCase):
             token = self.getSingleToken(string)
             self.assertTokenTypeEqual('COMMENT', token)
 
+    def testWhitespaceScanning(self):
+        tests = [
+            '\t\x0b\x0c ',
+            '\xc2\xa0',
+            '\xe2\x80\x83',
+            '\xef\xbb\xbf',
+        ]
+        for string in tests:
+            token = self.getSingleToken(string)
+            self.assertTokenTypeValueEqual('SPACE', string.decode('utf-8'), token)
+
     def testRegExpScanning(self):
         tests = [
             r'/^foo$/',
@@ -283,3 +317,147 @@ class TestScanner(unittest.TestCase):
         for string in tests:
             token = self.getSingleToken(string)
             self.assertTokenTypeEqual('STRING', token)
+
+
+class CrossCheckScanner(object):
+    """
+    Drives a ``FastScanner`` and a ``BufferScanner`` over the same input, checking
+    that both produce the same tokens and locators.
+    """
+    def __init__(self, test, string):
+        from bigrig.parser import scanner
+        self.test = test
+        self.fast = scanner.make_string_scanner(string, fast=True)
+        self.slow = scanner.make_string_scanner(string)
+
+    def check(self, method):
+        fast = getattr(self.fast, method)()
+        slow = getattr(self.slow, method)()
+        self.test.assertEqual(slow.type, fast.type)
+        self.test.assertEqual(slow.value, fast.value)
+        if slow.locator is None:
+            self.test.assertEqual(None, fast.locator)
+            return fast
+        for attr in ('filename', 'line', 'column', 'offset'):
+            self.test.assertEqual(
+                getattr(slow.locator, attr), getattr(fast.locator, attr),
+                msg="%s of %r differs" % (attr, slow.value)
+            )
+        return fast
+
+    def next(self):
+        return self.check('next')
+
+    def scan_regexp(self):
+        return self.check('scan_regexp')
+
+    def scan_regexp_flags(self):
+        return self.check('scan_regexp_flags')
+
+
+class TestFastScanner(TestScanner):
+    """
+    Run the scanner corpus through the ``FastScanner``, cross-checking every
+    token against the character at a time ``BufferScanner``.
+    """
+    def makeStringScanner(self, string):
+        return CrossCheckScanner(self, string)
+
+    def scanAll(self, string):
+        scanner = self.makeStringScanner(string)
+        tokens = []
+        while True:
+            token = scanner.next()
+            tokens.append(token)
+            if token.type == 'EOF':
+                return tokens
+
+    def testCrossCheckSource(self):
+        source = '\r\n'.join([
+            'var a = 1, b = .5e-3, c = 0xFF;\t// comment',
+            '/* multiple\r\nlines\n\rhere */ if (a >>>= b) { c = "str\\',
+            'ing"; }',
+            "function \\u0066oo(x) { return x !== 'y\\'' ; }",
+            'caf\xc3\xa9 = 5..toString(); \xe2\x80\x83 a\xe2\x80\xa8b\xef\xbb\xbf;',
+            '/*/ x = 1; /**/ .0x1 # @',
+            "'unterminated",
+        ])
+        tokens = self.scanAll(source)
+        self.assertTokenTypeEqual('EOF', tokens[-1])
+
+    def testCrossCheckInvalidComment(self):
+        tokens = self.scanAll('a /* no end')
+        self.assertTokenTypeEqual('INVALID', tokens[-2])
+
+    def testOffsets(self):
+        tokens = self.scanAll('foo =\n  "bar";')
+        self.assertEqual([0, 3, 4, 5, 6, 8, 13, 14],
+                         [token.locator.offset for token in tokens])
+
+    def testFileScanner(self):
+        import os
+        import tempfile
+        from bigrig.parser import scanner
+        fd, path = tempfile.mkstemp(suffix='.js')
+        try:
+            os.write(fd, 'caf\xc3\xa9 = "bar";')
+            os.close(fd)
+            for fast in (False, True):
+                with open(path, 'rb') as fd:
+                    file_scanner = scanner.make_file_scanner(fd, fast=fast)
+                token = file_scanner.next()
+                self.assertTokenTypeEqual('IDENTIFIER', token)
+                self.assertEqual(u'caf\xe9', token.value)
+                self.assertEqual(0, token.locator.offset)
+                values = []
+                while token.type != 'EOF':
+                    values.append(token.value)
+                    token = file_scanner.next()
+                self.assertEqual(u'caf\xe9 = "bar";', u''.join(values))
+        finally:
+            os.remove(path)
+
+    def iterTokens(self, source, **kwargs):
+        from bigrig.parser import iter_tokens
+        return [
+            (token.type, token.value, token.locator.line,
+             token.locator.column, token.locator.offset)
+            for token in iter_tokens(source, **kwargs)
+        ]
+
+    def testIterTokensChunks(self):
+        source = u'\r\n'.join([
+            'var a = b / 2 + /x[/]y/g.test(c);\t// comment',
+            '/* multiple\r\nlines */ s = "str\\"ing";',
+            u'caf\xe9 = 5..toString();',
+        ])
+        expected = self.iterTokens(source)
+        self.assertTrue(('REGEXP', u'/x[/]y/g', 0, 17, 16) in expected)
+        for chunk_size in (1, 2, 3, 5, 8, 13):
+            self.assertEqual(
+                expected, self.iterTokens(source, chunk_size=chunk_size)
+            )
+            self.assertEqual(
+                expected,
+                self.iterTokens(source.encode('utf-8'), chunk_size=chunk_size)
+            )
+
+    def testIterTokensSkipTrivia(self):
+        source = u'a /* b */ c\n// d\n  e'
+        tokens = self.iterTokens(source, chunk_size=4, skip_trivia=True)
+        self.assertEqual([
+            ('IDENTIFIER', u'a', 0, 1, 0),
+            ('IDENTIFIER', u'c', 0, 11, 10),
+            ('IDENTIFIER', u'e', 2, 3, 19),
+        ], tokens)
+
+
+class TestStreamScanner(TestScanner):
+    """
+    Run the scanner corpus through the ``Scanner`` reading from a character
+    stream.
+    """
+    def makeStringScanner(self, string):
+        from cStringIO import StringIO
+        scanner = self.getScannerModule()
+        return scanner.make_stream_scanner(StringIO(string))